@@ -0,0 +1,89 @@
+"""
+Benchmark - Bitmap Indexes
+"Expenses in Food across all CHECKING accounts" answered by ANDing the
+type, category and account type bitmaps, against a vectorized column scan
+and a Python loop over the rows, plus the memory held by each bitmap index
+
+Usage: python benchmarks/bench_bitmaps.py [transactions] [accounts]
+"""
+
+import sys
+import os
+import random
+import time
+from array import array
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from account import AccountType
+from bench_search import build_columns, timed
+from columnar import ColumnarTransactionManager
+from transaction import TYPE_CODES, TransactionQuery, TransactionType
+
+CATEGORIES = ["Food", "Rent", "Transport", "Utilities", "Health", "Leisure", "Travel",
+              "Shopping", "Education", "Gifts", "Insurance", "Salary"]
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+    accounts = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    print(f"=== Bitmap indexes ({count:,} transactions, {accounts:,} accounts) ===")
+    rng = random.Random(5)
+    columns = build_columns(count, accounts)
+    first = len(columns.strings)
+    columns.strings.extend(CATEGORIES)
+    columns.categories = array('i', (first + rng.randrange(len(CATEGORIES))
+                                     for _ in range(count)))
+    account_types = {account_id: rng.choice(list(AccountType))
+                     for account_id in range(1, accounts + 1)}
+
+    manager = ColumnarTransactionManager()
+    manager.set_account_types(account_types)
+    started = time.perf_counter()
+    manager.import_columns(columns)
+    print(f"load + index build  {time.perf_counter() - started:8.2f} s")
+    for name, size in manager.bitmap_memory().items():
+        print(f"{name:18s} {size / 2**20:9.2f} MiB  (int64 ID lists: {count * 8 / 2**20:.2f} MiB)")
+
+    query = TransactionQuery(transaction_type=TransactionType.EXPENSE, category="Food",
+                             account_type=AccountType.CHECKING)
+    bitmaps = (manager._type_bitmaps.get(query.transaction_type),
+               manager._category_bitmaps.get(query.category),
+               manager._account_type_bitmaps.get(query.account_type))
+    ms, found = timed(lambda: len(bitmaps[1] & bitmaps[2] & bitmaps[0]))
+    print(f"{'bitmap AND count':20s} {ms:9.2f} ms  {found:,} transactions")
+
+    checking = np.array([account_types.get(a) == AccountType.CHECKING
+                         for a in range(accounts + 1)])
+    types = np.frombuffer(columns.types, dtype=np.int8)
+    categories = np.frombuffer(columns.categories, dtype=np.int32)
+    account_ids = np.frombuffer(columns.account_ids, dtype=np.int64)
+    ms, scanned = timed(lambda: int(np.count_nonzero(
+        (types == TYPE_CODES[TransactionType.EXPENSE]) & (categories == first)
+        & checking[account_ids])), repeat=5)
+    print(f"{'NumPy column scan':20s} {ms:9.2f} ms  {scanned:,} transactions")
+
+    code, food = TYPE_CODES[TransactionType.EXPENSE], first
+    rows = min(count, 1_000_000)
+    ms, _ = timed(lambda: sum(1 for i in range(rows) if columns.types[i] == code
+                              and columns.categories[i] == food
+                              and account_types[columns.account_ids[i]] == AccountType.CHECKING),
+                  repeat=1)
+    print(f"{'Python loop':20s} {ms * count / rows:9.2f} ms  (extrapolated from {rows:,} rows)")
+
+    ms, page = timed(lambda: manager.query_transactions(query, limit=50))
+    plan = manager.explain_query(query, limit=50)
+    print(f"{'first page of 50':20s} {ms:9.2f} ms  {plan.driver} {plan.filters} "
+          f"bitmaps {plan.bitmaps}")
+    narrow = TransactionQuery(transaction_type=TransactionType.INCOME, category="Salary",
+                              account_type=account_types[7], account_id=7)
+    ms, page = timed(lambda: manager.query_transactions(narrow, limit=50))
+    plan = manager.explain_query(narrow, limit=50)
+    print(f"{'+ account':20s} {ms:9.2f} ms  {len(page)} results  {plan.driver} "
+          f"({plan.candidates:,} candidates)")
+
+
+if __name__ == "__main__":
+    main()
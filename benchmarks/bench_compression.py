@@ -0,0 +1,57 @@
+"""
+Benchmark - Response Compression
+Bytes sent for the web interface page and for JSON list responses of
+several sizes, per content coding, and the time to encode each list
+
+Usage: python benchmarks/bench_compression.py [rows ...]
+"""
+
+import sys
+import os
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import compression
+from serialization import dump_records, transaction_record
+from transaction import TransactionManager, TransactionType
+from web_interface import web_interface_page
+
+
+def list_body(rows):
+    """JSON body of a list of rows transactions"""
+    manager = TransactionManager()
+    start = datetime(2024, 1, 1)
+    manager.add_transactions(
+        (i % 100 + 1, Decimal(i % 5000 + 1) / 100, TransactionType.EXPENSE, f"Purchase {i}",
+         start + timedelta(minutes=i), "Food") for i in range(rows))
+    return dump_records(manager.get_recent_transactions(rows), transaction_record)
+
+
+def timed(function, repeat=10):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = function()
+    return (time.perf_counter() - started) / repeat * 1000, result
+
+
+def main():
+    row_counts = [int(n) for n in sys.argv[1:]] or [100, 1000, 10_000]
+    print(f"=== Response compression (encodings: "
+          f"{', '.join(compression.available_encodings())}) ===")
+    page = web_interface_page.variants
+    print("web interface  " + "  ".join(f"{encoding or 'identity'} {len(body):,} B"
+                                        for encoding, body in page.items()))
+    for rows in row_counts:
+        body = list_body(rows)
+        results = [f"identity {len(body):,} B"]
+        for encoding in compression.available_encodings():
+            ms, encoded = timed(lambda: compression.compress(body, encoding))
+            results.append(f"{encoding} {len(encoded):,} B in {ms:.2f} ms")
+        print(f"{rows:,} rows  " + "  ".join(results))
+
+
+if __name__ == "__main__":
+    main()
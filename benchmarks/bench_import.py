@@ -0,0 +1,83 @@
+"""
+Benchmark - Bulk Transaction Import
+Rows/sec of streaming CSV imports per storage backend, against adding the
+same rows one add_transaction() call at a time
+
+Usage: python benchmarks/bench_import.py [rows] [chunk_size]
+"""
+
+import sys
+import os
+import random
+import shutil
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from columnar import ColumnarTransactionManager
+from importer import import_file, parse_record
+from sqlite_repository import SqliteRepository, SqliteTransactionManager
+from transaction import TransactionManager
+
+CATEGORIES = ["Food", "Rent", "Travel", "Utilities", "Dining", "Health", "Groceries"]
+
+
+def write_export(path, rows):
+    """Synthetic signed-amount bank export, roughly in date order"""
+    rng = random.Random(42)
+    start = datetime(2023, 1, 1)
+    with open(path, "w", encoding="utf-8", newline="") as stream:
+        stream.write("account_id,amount,date,description,category\n")
+        for i in range(rows):
+            date = start + timedelta(seconds=i * 30 + rng.randrange(3600))
+            stream.write(f"{rng.randrange(1, 1001)},-{rng.randrange(1, 100_000) / 100},"
+                         f"{date.isoformat()},Card payment {i % 97},"
+                         f"{CATEGORIES[i % len(CATEGORIES)]}\n")
+
+
+def one_by_one(path):
+    """Baseline: parse the same rows and add each one separately"""
+    manager = TransactionManager()
+    started = time.perf_counter()
+    with open(path, encoding="utf-8") as stream:
+        header = stream.readline().strip().split(",")
+        for line in stream:
+            manager.add_transaction(*parse_record(dict(zip(header, line.rstrip("\n").split(",")))))
+    return manager, time.perf_counter() - started
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    chunk_size = int(sys.argv[2]) if len(sys.argv) > 2 else 10_000
+    print(f"=== Bulk import ({rows:,} CSV rows, chunks of {chunk_size:,}) ===")
+    directory = tempfile.mkdtemp(prefix="bench-import-")
+    try:
+        path = os.path.join(directory, "export.csv")
+        write_export(path, rows)
+        print(f"export file         {os.path.getsize(path) / 2 ** 20:7.1f} MiB")
+
+        _, elapsed = one_by_one(path)
+        print(f"one by one          {elapsed:7.2f}s  {rows / elapsed:>10,.0f} rows/s")
+
+        repository = SqliteRepository(os.path.join(directory, "finance.db"))
+        backends = [
+            ("memory", TransactionManager()),
+            ("columnar", ColumnarTransactionManager()),
+            ("sqlite", SqliteTransactionManager(repository)),
+        ]
+        for name, manager in backends:
+            report = import_file(manager, path, chunk_size=chunk_size)
+            if name == "sqlite":
+                started = time.perf_counter()
+                repository.flush()
+                report.seconds += time.perf_counter() - started
+            print(f"{name:<19} {report.seconds:7.2f}s  {report.rows_per_second:>10,.0f} rows/s")
+        repository.close()
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
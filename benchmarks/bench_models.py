@@ -0,0 +1,111 @@
+"""
+Benchmark - Model Object Footprint
+Compares per-object memory and attribute access time of the slotted model
+classes against equivalent __dict__-based classes
+
+Usage: python benchmarks/bench_models.py [objects]
+"""
+
+import sys
+import os
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime, date
+from decimal import Decimal
+from typing import Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from account import Account, AccountType
+from transaction import Transaction, TransactionType
+from budget import Budget, BudgetPeriod
+
+
+class DictAccount:
+    """Account as it was before __slots__"""
+
+    def __init__(self, name, account_type, initial_balance=Decimal('0')):
+        self.id = None
+        self.name = name
+        self.account_type = account_type
+        self.balance = initial_balance
+        self.created_at = datetime.now()
+        self.is_active = True
+
+
+@dataclass
+class DictTransaction:
+    """Transaction as it was before slots=True"""
+    id: Optional[int] = None
+    account_id: int = 0
+    amount: Decimal = Decimal('0')
+    transaction_type: TransactionType = TransactionType.EXPENSE
+    description: str = ""
+    date: datetime = None
+
+
+@dataclass
+class DictBudget:
+    """Budget as it was before slots=True"""
+    id: Optional[int] = None
+    name: str = ""
+    category: str = ""
+    amount: Decimal = Decimal('0')
+    period: BudgetPeriod = BudgetPeriod.MONTHLY
+    start_date: date = None
+    is_active: bool = True
+
+
+# Shared field values so that only the object itself is measured
+AMOUNT = Decimal('12.50')
+NOW = datetime(2024, 1, 1)
+TODAY = date(2024, 1, 1)
+
+FACTORIES = [
+    ("Account", lambda cls: cls("Checking", AccountType.CHECKING, AMOUNT), DictAccount, Account),
+    ("Transaction", lambda cls: cls(1, 1, AMOUNT, TransactionType.EXPENSE, "Coffee", NOW),
+     DictTransaction, Transaction),
+    ("Budget", lambda cls: cls(1, "Food", "Food", AMOUNT, BudgetPeriod.MONTHLY, TODAY),
+     DictBudget, Budget),
+]
+
+
+def measure_memory(factory, cls, count):
+    """Bytes allocated per object"""
+    tracemalloc.start()
+    objects = [factory(cls) for _ in range(count)]
+    current, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    per_object = (current - sys.getsizeof(objects)) / count
+    return per_object, objects
+
+
+def measure_access(objects):
+    """Nanoseconds per attribute read"""
+    started = time.perf_counter()
+    for obj in objects:
+        obj.id
+        obj.id
+        obj.id
+        obj.id
+    elapsed = time.perf_counter() - started
+    return elapsed / (len(objects) * 4) * 1e9
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    print(f"=== Model footprint ({count:,} objects) ===")
+    print(f"{'model':<12} {'dict bytes':>11} {'slots bytes':>12} {'dict ns':>9} {'slots ns':>9}")
+    for name, factory, before_cls, after_cls in FACTORIES:
+        before_bytes, before_objects = measure_memory(factory, before_cls, count)
+        before_ns = measure_access(before_objects)
+        del before_objects
+        after_bytes, after_objects = measure_memory(factory, after_cls, count)
+        after_ns = measure_access(after_objects)
+        del after_objects
+        print(f"{name:<12} {before_bytes:>11.1f} {after_bytes:>12.1f} {before_ns:>9.1f} {after_ns:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Benchmark - Composite Transaction Queries
+Latency of query_transactions() by combination of filters, with the plan
+the cost model chose, against filtering the description matches on a
+columnar ledger
+
+Usage: python benchmarks/bench_query.py [transactions] [accounts]
+"""
+
+import sys
+import os
+import time
+from datetime import datetime
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from bench_search import build_columns, timed
+from columnar import ColumnarTransactionManager
+from transaction import TransactionQuery, TransactionType
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+    accounts = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    print(f"=== Composite queries ({count:,} transactions) ===")
+    manager = ColumnarTransactionManager()
+    manager.import_columns(build_columns(count, accounts))
+
+    h1 = dict(start_date=datetime(2022, 1, 1), end_date=datetime(2022, 6, 30))
+    queries = [
+        ("type", TransactionQuery(transaction_type=TransactionType.INCOME)),
+        ("amount range", TransactionQuery(min_amount=Decimal('99.9'))),
+        ("account + dates", TransactionQuery(account_id=7, **h1)),
+        ("account + amount", TransactionQuery(account_id=7, min_amount=Decimal('90'))),
+        ("rare word", TransactionQuery(text="#4242", transaction_type=TransactionType.EXPENSE)),
+        ("word + type + dates", TransactionQuery(text="groc",
+                                                 transaction_type=TransactionType.INCOME, **h1)),
+        ("word + narrow dates", TransactionQuery(text="coffee", start_date=datetime(2023, 3, 1),
+                                                 end_date=datetime(2023, 3, 2))),
+    ]
+    for label, query in queries:
+        ms, found = timed(lambda: manager.query_transactions(query, limit=50))
+        plan = manager.explain_query(query, limit=50)
+        print(f"{label:20s} {ms:9.2f} ms  {len(found):2d} results  "
+              f"{plan.driver} ({plan.candidates:,} candidates)")
+
+    query = queries[5][1]
+    ms, found = timed(lambda: manager.search_transactions(
+        query.text, transaction_type=query.transaction_type, start_date=query.start_date,
+        end_date=query.end_date, limit=50), repeat=3)
+    print(f"{'text-driven search':20s} {ms:9.2f} ms  {len(found):2d} results  (same query)")
+
+
+if __name__ == "__main__":
+    main()
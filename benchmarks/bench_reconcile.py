@@ -0,0 +1,73 @@
+"""
+Benchmark - Balance Reconciliation
+Time of one drift-detection pass over many accounts by worker count, and
+of as-of balance queries answered from the monthly checkpoints
+
+Usage: python benchmarks/bench_reconcile.py [accounts] [transactions]
+
+Workers only pay off with as many cores: the slices are grouped by NumPy
+in parallel, the per-account comparison is a single vectorized pass.
+"""
+
+import sys
+import os
+import random
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from account import AccountManager, AccountType
+from columnar import ColumnarTransactionManager
+from ledger import BalanceLedger, BalanceReconciler
+from transaction import TransactionType
+
+
+def populate(accounts, transactions):
+    """Managers whose stored balances match their ledgers except for every 1000th account"""
+    account_manager = AccountManager()
+    manager = ColumnarTransactionManager()
+    for i in range(accounts):
+        account_manager.create_account(f"Account {i}", AccountType.CHECKING, Decimal('100'))
+    rng = random.Random(7)
+    start = datetime(2022, 1, 1)
+    net = [Decimal('0')] * (accounts + 1)
+    records = []
+    for i in range(transactions):
+        account_id = rng.randrange(1, accounts + 1)
+        amount = Decimal(rng.randrange(1, 10_000)) / 100
+        transaction_type = TransactionType.INCOME if i % 3 == 0 else TransactionType.EXPENSE
+        net[account_id] += amount if transaction_type == TransactionType.INCOME else -amount
+        records.append((account_id, amount, transaction_type, "", start + timedelta(
+            minutes=rng.randrange(0, 3 * 365 * 24 * 60)), "Misc"))
+    manager.add_transactions(records)
+    for account in account_manager.accounts:
+        account.balance += net[account.id] + (1 if account.id % 1000 == 0 else 0)
+    return account_manager, manager
+
+
+def main():
+    accounts = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    transactions = int(sys.argv[2]) if len(sys.argv) > 2 else 2_000_000
+    print(f"=== Balance reconciliation ({accounts:,} accounts, {transactions:,} transactions, "
+          f"{os.cpu_count()} CPUs) ===")
+    account_manager, manager = populate(accounts, transactions)
+    ledger = BalanceLedger(account_manager, manager)
+    for workers in (1, 2, 4, 8):
+        report = BalanceReconciler(ledger, workers).scan()
+        print(f"{workers} workers  {report.seconds * 1000:9.1f} ms  "
+              f"{len(report.drift):,} drifted accounts")
+
+    rng = random.Random(3)
+    queries = [(rng.randrange(1, accounts + 1), datetime(2022, 1, 1) + timedelta(
+        days=rng.randrange(0, 3 * 365))) for _ in range(2000)]
+    started = time.perf_counter()
+    for account_id, as_of in queries:
+        ledger.balance_as_of(account_id, as_of)
+    elapsed = time.perf_counter() - started
+    print(f"as-of balance  {elapsed / len(queries) * 1e6:9.1f} us per query (cold checkpoints)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark - Batch Report Aggregation
+Times group_totals over a synthetic columnar batch with the NumPy path and
+the pure-Python fallback
+
+Usage: python benchmarks/bench_reports.py [rows]
+"""
+
+import sys
+import os
+import random
+import time
+from array import array
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import aggregation
+from aggregation import ColumnBatch, group_totals
+from indexes import to_epoch_us
+from datetime import datetime
+
+CATEGORIES = ["", "Food", "Rent", "Salary", "Travel", "Utilities", "Dining", "Health"]
+
+
+def build_batch(rows):
+    """Synthetic two-year ledger across 10k accounts"""
+    rng = random.Random(42)
+    start = to_epoch_us(datetime(2023, 1, 1))
+    span = to_epoch_us(datetime(2025, 1, 1)) - start
+    return ColumnBatch(
+        account_ids=array('q', (rng.randrange(1, 10_001) for _ in range(rows))),
+        dates=array('q', sorted(start + rng.randrange(span) for _ in range(rows))),
+        types=array('b', (rng.randrange(3) for _ in range(rows))),
+        categories=array('i', (rng.randrange(len(CATEGORIES)) for _ in range(rows))),
+        amounts=array('q', (rng.randrange(1, 5_000_000) for _ in range(rows))),
+        strings=list(CATEGORIES)
+    )
+
+
+REPORTS = [
+    ("monthly", ("month", "type")),
+    ("categories", ("type", "category")),
+    ("full", ("account", "month", "type", "category")),
+]
+
+
+def timed(label, batch):
+    for report, dimensions in REPORTS:
+        started = time.perf_counter()
+        groups = group_totals(batch, dimensions=dimensions)
+        elapsed = time.perf_counter() - started
+        print(f"{label:<12} {report:<11} {elapsed:7.2f}s  "
+              f"{len(batch.amounts) / elapsed:14,.0f} rows/s  {len(groups):>10,} groups")
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+    print(f"=== Report aggregation ({rows:,} rows) ===")
+    batch = build_batch(rows)
+    if aggregation.np is not None:
+        timed("numpy", batch)
+    else:
+        print("numpy        not installed")
+    aggregation.np = None
+    timed("pure python", batch)
+
+
+if __name__ == "__main__":
+    main()
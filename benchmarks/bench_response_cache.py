@@ -0,0 +1,75 @@
+"""
+Benchmark - Response Cache
+Requests per second of the list endpoints with the response cache off and
+on, for plain reads and for conditional reads answered with 304
+
+Usage: python benchmarks/bench_response_cache.py [requests] [transactions]
+"""
+
+import sys
+import os
+import asyncio
+import tempfile
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import load_test
+
+PATHS = [("/accounts", {}), ("/transactions", {"limit": 100}), ("/budgets", {})]
+
+
+async def populate(client, transactions):
+    for i in range(10):
+        await client.post("/accounts", json={"name": f"Account {i}", "account_type": "checking",
+                                             "initial_balance": "100000"})
+        await client.post("/budgets", json={"name": f"Budget {i}", "category": f"C{i}",
+                                            "amount": "500"})
+    for i in range(transactions):
+        await client.post("/transactions", json={"account_id": i % 10 + 1, "amount": "12.5",
+                                                 "transaction_type": "expense",
+                                                 "category": f"C{i % 10}"})
+
+
+async def drive(url, requests, transactions):
+    """Requests per second of plain and conditional list reads"""
+    async with httpx.AsyncClient(base_url=url, timeout=30) as client:
+        await populate(client, transactions)
+        etags = {}
+        for path, params in PATHS:
+            response = await client.get(path, params=params)
+            etags[path] = response.headers.get("etag")
+        rates = []
+        for conditional in (False, True):
+            started = time.perf_counter()
+            for i in range(requests):
+                path, params = PATHS[i % len(PATHS)]
+                headers = {"If-None-Match": etags[path]} if conditional and etags[path] else {}
+                response = await client.get(path, params=params, headers=headers)
+                assert response.status_code in (200, 304)
+            rates.append(requests / (time.perf_counter() - started))
+        return rates
+
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+    transactions = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    print(f"=== Response cache ({requests:,} list requests, {transactions:,} transactions) ===")
+    with tempfile.TemporaryDirectory() as directory:
+        for label, max_bytes in (("cache off", "0"), ("cache on", str(32 * 1024 * 1024))):
+            processes, url = load_test.start(1, directory,
+                                             FINANCE_RESPONSE_CACHE_BYTES=max_bytes)
+            try:
+                plain, conditional = asyncio.run(drive(url, requests, transactions))
+            finally:
+                for process in reversed(processes):
+                    process.terminate()
+                    process.wait()
+            print(f"{label:10s} {plain:9.1f} requests/s  {conditional:9.1f} requests/s "
+                  f"with If-None-Match")
+
+
+if __name__ == "__main__":
+    main()
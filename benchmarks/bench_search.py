@@ -0,0 +1,87 @@
+"""
+Benchmark - Description Search
+Query latency of search_transactions() over the inverted description index,
+against a substring scan of every description, on a columnar ledger
+
+Usage: python benchmarks/bench_search.py [transactions] [accounts]
+"""
+
+import sys
+import os
+import random
+import time
+from array import array
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from columnar import ColumnarTransactionManager
+from indexes import to_epoch_us
+from transaction import TYPE_CODES, TransactionColumns, TransactionType
+
+WORDS = ["grocery", "groceries", "coffee", "rent", "salary", "fuel", "market", "pharmacy",
+         "restaurant", "cinema", "insurance", "electricity", "water", "internet", "gym",
+         "books", "parking", "taxi", "airline", "hotel", "bakery", "hardware", "pet", "toys"]
+
+
+def build_columns(count, accounts):
+    """Columns of count transactions drawn from 5,000 distinct descriptions"""
+    rng = random.Random(11)
+    strings = [" ".join(rng.sample(WORDS, 3)) + f" #{i}" for i in range(5000)] + ["Misc"]
+    start = to_epoch_us(datetime(2020, 1, 1))
+    span = to_epoch_us(datetime(2025, 1, 1)) - start
+    codes = [TYPE_CODES[TransactionType.INCOME], TYPE_CODES[TransactionType.EXPENSE]]
+    columns = TransactionColumns(strings=strings)
+    columns.ids = array('q', range(1, count + 1))
+    columns.account_ids = array('q', (rng.randrange(1, accounts + 1) for _ in range(count)))
+    columns.amounts = array('q', (rng.randrange(100, 1_000_000) for _ in range(count)))
+    columns.amount_exps = array('b', [-2]) * count
+    columns.types = array('b', (codes[i % 5 == 0] for i in range(count)))
+    columns.dates = array('q', sorted(start + rng.randrange(span) for _ in range(count)))
+    columns.descriptions = array('i', (rng.randrange(5000) for _ in range(count)))
+    columns.categories = array('i', [5000]) * count
+    return columns
+
+
+def timed(function, repeat=20):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = function()
+    return (time.perf_counter() - started) / repeat * 1000, result
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+    accounts = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    print(f"=== Description search ({count:,} transactions) ===")
+    columns = build_columns(count, accounts)
+    manager = ColumnarTransactionManager()
+    started = time.perf_counter()
+    manager.import_columns(columns)
+    print(f"load + index build  {time.perf_counter() - started:8.2f} s  "
+          f"({len(manager._text_index):,} words)")
+
+    queries = [
+        ("rare word", dict(query="#4242")),
+        ("common word", dict(query="coffee")),
+        ("prefix", dict(query="groc")),
+        ("two words", dict(query="coffee market")),
+        ("+ account", dict(query="coffee", account_id=7)),
+        ("+ type + dates", dict(query="groc", transaction_type=TransactionType.INCOME,
+                                start_date=datetime(2022, 1, 1),
+                                end_date=datetime(2022, 6, 30))),
+    ]
+    for label, query in queries:
+        ms, found = timed(lambda: manager.search_transactions(limit=50, **query))
+        print(f"{label:16s} {ms:9.2f} ms  {len(found)} results")
+
+    needle = "coffee"
+    strings = manager._strings
+    ms, found = timed(lambda: [i for i, code in enumerate(manager._descriptions[:1_000_000])
+                               if needle in strings[code].casefold()], repeat=1)
+    print(f"substring scan   {ms * count / min(count, 1_000_000):9.2f} ms  "
+          f"(extrapolated from 1M rows)")
+
+
+if __name__ == "__main__":
+    main()
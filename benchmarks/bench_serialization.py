@@ -0,0 +1,69 @@
+"""
+Benchmark - List Response Serialization
+Latency of large list responses through the per-row response models and
+through the pre-built record encoders (FINANCE_FAST_RESPONSES)
+
+Usage: python benchmarks/bench_serialization.py [rows] [repeats]
+"""
+
+import sys
+import os
+import statistics
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from fastapi.testclient import TestClient
+
+import api
+import serialization
+from account import AccountType
+from transaction import TransactionType
+
+
+def populate(rows):
+    """rows accounts and rows transactions in the API's managers"""
+    start = datetime(2024, 1, 1)
+    for i in range(rows):
+        api.account_manager.create_account(f"Account {i}", AccountType.CHECKING,
+                                           Decimal(i) / 100)
+    api.transaction_manager.add_transactions(
+        (i % 100 + 1, Decimal(i % 5000 + 1) / 100, TransactionType.EXPENSE, f"Purchase {i}",
+         start + timedelta(minutes=i), "Food") for i in range(rows))
+
+
+def latency(client, url, repeats):
+    """Median and best wall time of GET url in milliseconds"""
+    times = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        response = client.get(url)
+        times.append((time.perf_counter() - started) * 1000)
+        assert response.status_code == 200
+    return statistics.median(times), min(times), len(response.content)
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    encoder = "orjson" if serialization.orjson is not None else "json"
+    print(f"=== List response latency ({rows:,} rows, {repeats} requests, {encoder}) ===")
+    populate(rows)
+    client = TestClient(api.app)
+    for url in (f"/transactions?limit={rows}", "/accounts"):
+        results = {}
+        for fast in (False, True):
+            api.fast_responses = fast
+            results[fast] = latency(client, url, repeats)
+        assert results[False][2] == results[True][2]  # Same body size
+        for fast, label in ((False, "response models"), (True, "record encoders")):
+            median, best, size = results[fast]
+            print(f"{url:<26} {label:<16} median {median:8.1f} ms  best {best:8.1f} ms  "
+                  f"{size / 1024:,.0f} KiB")
+        print(f"{'':<26} speedup {results[False][0] / results[True][0]:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
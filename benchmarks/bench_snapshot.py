@@ -0,0 +1,128 @@
+"""
+Benchmark - Cold Start From Snapshot
+Times restart from a memory-mapped snapshot plus a short log tail against
+replaying the full mutation log, for the columnar transaction backend
+
+Usage: python benchmarks/bench_snapshot.py [rows] [tail_records]
+"""
+
+import sys
+import os
+import random
+import shutil
+import tempfile
+import time
+from array import array
+from datetime import datetime
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from account import AccountManager, AccountType
+from budget import BudgetManager
+from columnar import ColumnarTransactionManager
+from indexes import to_epoch_us
+from journal import ManagerJournal, encode_account
+from snapshot import SnapshotState, restore, write_snapshot
+from transaction import TransactionColumns, TransactionType
+from wal import Durability, WriteAheadLog
+
+ACCOUNTS = 10_000
+STRINGS = ["", "Food", "Rent", "Salary", "Travel", "Utilities", "Dining", "Health",
+           "Groceries", "Coffee", "Payroll", "Electricity"]
+REPLAY_SAMPLE = 200_000   # Full-log replay is timed on a sample and extrapolated
+
+
+def build_columns(rows):
+    """Synthetic two-year ledger across ACCOUNTS accounts"""
+    rng = random.Random(42)
+    start = to_epoch_us(datetime(2023, 1, 1))
+    span = to_epoch_us(datetime(2025, 1, 1)) - start
+    return TransactionColumns(
+        ids=array('q', range(1, rows + 1)),
+        account_ids=array('q', (rng.randrange(1, ACCOUNTS + 1) for _ in range(rows))),
+        amounts=array('q', (rng.randrange(1, 500_000) * 100 for _ in range(rows))),
+        amount_exps=array('b', [-2]) * rows,
+        types=array('b', (rng.randrange(3) for _ in range(rows))),
+        dates=array('q', sorted(start + rng.randrange(span) for _ in range(rows))),
+        descriptions=array('i', (rng.randrange(8, len(STRINGS)) for _ in range(rows))),
+        categories=array('i', (rng.randrange(8) for _ in range(rows))),
+        strings=list(STRINGS)
+    )
+
+
+def open_journal(directory):
+    return ManagerJournal(WriteAheadLog(directory, Durability.NONE), AccountManager(),
+                          ColumnarTransactionManager(), BudgetManager())
+
+
+def write_tail(journal, records):
+    """Append records transactions through the journal"""
+    rng = random.Random(7)
+    add = journal.transaction_manager.add_transaction
+    for _ in range(records):
+        add(rng.randrange(1, ACCOUNTS + 1), Decimal(rng.randrange(1, 500_000)).scaleb(-2),
+            TransactionType.EXPENSE, "Coffee", datetime(2025, 1, 2), category="Food")
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+    tail = int(sys.argv[2]) if len(sys.argv) > 2 else 10_000
+    print(f"=== Cold start ({rows:,} snapshot rows + {tail:,} log records) ===")
+    directory = tempfile.mkdtemp(prefix="bench-snapshot-")
+    try:
+        columns = build_columns(rows)
+        accounts = AccountManager()
+        for i in range(ACCOUNTS):
+            accounts.create_account(f"Account {i + 1}", AccountType.CHECKING)
+        state = SnapshotState(
+            lsn=ACCOUNTS + rows,
+            accounts=[encode_account(a) for a in accounts.accounts],
+            account_next_id=ACCOUNTS + 1,
+            transaction_next_id=rows + 1,
+            transaction_count=rows,
+            transactions=columns
+        )
+        started = time.perf_counter()
+        path = write_snapshot(directory, state)
+        elapsed = time.perf_counter() - started
+        print(f"write snapshot      {elapsed:7.2f}s  {os.path.getsize(path) / 2 ** 20:,.0f} MiB")
+        del columns, state
+
+        # The log continues after the snapshot's LSN
+        with open(os.path.join(directory, f"wal-{ACCOUNTS + rows + 1:016d}.log"), 'wb'):
+            pass
+        journal = open_journal(directory)
+        restore(journal)
+        journal.attach()
+        write_tail(journal, tail)
+        journal.wal.close()
+
+        started = time.perf_counter()
+        journal = open_journal(directory)
+        restore(journal)
+        elapsed = time.perf_counter() - started
+        journal.wal.close()
+        print(f"snapshot + tail     {elapsed:7.2f}s  "
+              f"{len(journal.transaction_manager.transactions):,} transactions")
+
+        # Full-log replay rate on a sample
+        sample = min(rows, REPLAY_SAMPLE)
+        log_directory = os.path.join(directory, "log-only")
+        journal = open_journal(log_directory)
+        journal.attach()
+        write_tail(journal, sample)
+        journal.wal.close()
+        started = time.perf_counter()
+        journal = open_journal(log_directory)
+        journal.replay()
+        elapsed = time.perf_counter() - started
+        journal.wal.close()
+        print(f"log replay          {elapsed:7.2f}s  {sample / elapsed:,.0f} records/s, "
+              f"~{(rows + tail) / sample * elapsed:,.0f}s for {rows + tail:,} records")
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
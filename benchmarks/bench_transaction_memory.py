@@ -0,0 +1,60 @@
+"""
+Benchmark - Transaction Storage Memory
+Compares memory per row of the list-of-dataclasses TransactionManager with
+the array-backed ColumnarTransactionManager
+
+Usage: python benchmarks/bench_transaction_memory.py [rows]
+"""
+
+import sys
+import os
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from transaction import TransactionManager, TransactionType
+from columnar import ColumnarTransactionManager
+
+DESCRIPTIONS = ["Groceries", "Rent", "Salary", "Coffee", "Fuel", "Utilities", "Dining"]
+
+
+def fill(manager, rows):
+    """Add rows of synthetic transactions spread across 1000 accounts"""
+    start = datetime(2024, 1, 1)
+    types = list(TransactionType)
+    for i in range(rows):
+        manager.add_transaction(
+            account_id=i % 1000 + 1,
+            amount=Decimal(i % 50000) / 100 + Decimal('0.01'),
+            transaction_type=types[i % len(types)],
+            description=DESCRIPTIONS[i % len(DESCRIPTIONS)],
+            date=start + timedelta(seconds=i * 30)
+        )
+
+
+def measure(manager_class, rows):
+    """Return (bytes per row, seconds) for filling a fresh manager"""
+    tracemalloc.start()
+    started = time.perf_counter()
+    manager = manager_class()
+    fill(manager, rows)
+    elapsed = time.perf_counter() - started
+    current, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del manager
+    return current / rows, elapsed
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    print(f"=== Transaction storage memory ({rows:,} rows) ===")
+    for manager_class in (TransactionManager, ColumnarTransactionManager):
+        per_row, elapsed = measure(manager_class, rows)
+        print(f"{manager_class.__name__:<28} {per_row:8.1f} bytes/row   {elapsed:6.2f}s to load")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmark - Account Transfers
+Throughput of transfers one call at a time and through transfer_batch(),
+both on journaled managers (each transfer or batch is one log record)
+
+Usage: python benchmarks/bench_transfers.py [transfers] [batch_size] [none|batch|always]
+"""
+
+import sys
+import os
+import random
+import shutil
+import tempfile
+import time
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from account import AccountManager, AccountType
+from budget import BudgetManager
+from journal import ManagerJournal
+from transaction import TransactionManager
+from transfers import Transfer, TransferService
+from wal import Durability, WriteAheadLog
+
+ACCOUNTS = 1000
+
+
+def open_service(directory, durability):
+    journal = ManagerJournal(WriteAheadLog(directory, durability), AccountManager(),
+                             TransactionManager(), BudgetManager())
+    journal.attach()
+    for i in range(ACCOUNTS):
+        journal.account_manager.create_account(f"Account {i}", AccountType.CHECKING,
+                                               Decimal('1000'))
+    return journal, TransferService(journal.account_manager, journal.transaction_manager,
+                                    journal.atomic)
+
+
+def transfers(count):
+    rng = random.Random(42)
+    result = []
+    for _ in range(count):
+        from_id, to_id = rng.sample(range(1, ACCOUNTS + 1), 2)
+        result.append(Transfer(from_id, to_id, Decimal(rng.randrange(1, 10_000)) / 100))
+    return result
+
+
+def measure(work, durability, batch_size):
+    """Transfers per second, settling work one by one or batch_size at a time"""
+    directory = tempfile.mkdtemp(prefix="bench-transfers-")
+    try:
+        journal, service = open_service(directory, durability)
+        started = time.perf_counter()
+        if batch_size == 1:
+            for t in work:
+                try:
+                    service.transfer(t.from_account_id, t.to_account_id, t.amount)
+                except ValueError:
+                    pass
+        else:
+            for start in range(0, len(work), batch_size):
+                service.transfer_batch(work[start:start + batch_size])
+        elapsed = time.perf_counter() - started
+        assert journal.account_manager.get_total_balance() == ACCOUNTS * Decimal('1000')
+        journal.wal.close()
+        return len(work) / elapsed
+    finally:
+        shutil.rmtree(directory)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    durability = Durability(sys.argv[3]) if len(sys.argv) > 3 else Durability.BATCH
+    print(f"=== Transfers ({count:,} transfers, {ACCOUNTS} accounts, "
+          f"WAL durability {durability.value}) ===")
+    work = transfers(count)
+    single = measure(work, durability, 1)
+    batched = measure(work, durability, batch_size)
+    print(f"one per call       {single:>12,.0f} transfers/s")
+    print(f"batches of {batch_size:<7} {batched:>12,.0f} transfers/s  {batched / single:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
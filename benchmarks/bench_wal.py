@@ -0,0 +1,67 @@
+"""
+Benchmark - Write-Ahead Log Throughput
+Records/sec for each durability setting and writer thread count
+
+Usage: python benchmarks/bench_wal.py [records]
+"""
+
+import sys
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from wal import Durability, WriteAheadLog
+
+RECORD = {"op": "transaction.add", "id": 0, "account_id": 1, "amount": "12.50",
+          "transaction_type": "expense", "description": "Lunch",
+          "date": "2024-05-10T12:30:00", "category": "Food"}
+
+SETTINGS = [
+    (Durability.NONE, 0.01),
+    (Durability.BATCH, 0.01),
+    (Durability.BATCH, 0.001),
+    (Durability.ALWAYS, 0.01),
+]
+
+
+def run(durability, flush_interval, threads, records):
+    directory = tempfile.mkdtemp(prefix="bench-wal-")
+    try:
+        wal = WriteAheadLog(directory, durability, flush_interval)
+        per_thread = records // threads
+
+        def writer():
+            for _ in range(per_thread):
+                wal.append(RECORD)
+
+        workers = [threading.Thread(target=writer) for _ in range(threads)]
+        started = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        wal.close()  # Includes the final fsync
+        elapsed = time.perf_counter() - started
+        return per_thread * threads / elapsed
+    finally:
+        shutil.rmtree(directory)
+
+
+def main():
+    records = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    print(f"=== Write-ahead log throughput ({records:,} records) ===")
+    for durability, flush_interval in SETTINGS:
+        for threads in (1, 4, 16):
+            # fsync per commit: keep single-writer ALWAYS runs short
+            count = records // 10 if durability == Durability.ALWAYS and threads == 1 else records
+            rate = run(durability, flush_interval, threads, count)
+            print(f"{durability.value:<7} interval={flush_interval:<6} threads={threads:<3} "
+                  f"{rate:12,.0f} records/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Benchmark - API Load Test
+Requests per second of the HTTP API by uvicorn worker count: one process
+with in-process managers, and N workers sharing one state server
+
+Usage: python benchmarks/load_test.py [requests] [concurrency] [workers ...]
+
+Extra workers only pay off with as many cores; every manager call from a
+worker is also one round trip to the state server.
+"""
+
+import sys
+import os
+import asyncio
+import random
+import secrets
+import socket
+import subprocess
+import tempfile
+import time
+
+import httpx
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start(workers, directory, **settings):
+    """Start the API (and state server for workers > 1), returning processes and base URL
+
+    settings are extra FINANCE_* environment variables of the processes.
+    """
+    env = {k: v for k, v in os.environ.items() if not k.startswith("FINANCE_")}
+    env.update(settings)
+    processes = []
+    if workers > 1:
+        env.update(FINANCE_STATE_SERVER=os.path.join(directory, f"state-{workers}.sock"),
+                   FINANCE_STATE_AUTHKEY=secrets.token_hex(16))
+        processes.append(subprocess.Popen([sys.executable, os.path.join("src", "state.py")],
+                                          cwd=ROOT, env=env))
+    port = free_port()
+    processes.append(subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "src.api:app", "--workers", str(workers),
+         "--port", str(port), "--host", "127.0.0.1", "--log-level", "warning"],
+        cwd=ROOT, env=env))
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 30
+    while True:
+        try:
+            httpx.get(url + "/accounts", timeout=1)
+            return processes, url
+        except httpx.TransportError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.1)
+
+
+async def drive(url, requests, concurrency):
+    """Send requests (2 reads for every write) from concurrency clients; requests per second"""
+    async with httpx.AsyncClient(base_url=url, timeout=30) as client:
+        for i in range(10):
+            await client.post("/accounts", json={"name": f"Account {i}",
+                                                 "account_type": "checking",
+                                                 "initial_balance": "100000"})
+        rng = random.Random(5)
+        queue = asyncio.Queue()
+        for i in range(requests):
+            queue.put_nowait(i)
+
+        async def client_loop():
+            while not queue.empty():
+                i = queue.get_nowait()
+                if i % 3 == 0:
+                    response = await client.post("/transactions", json={
+                        "account_id": rng.randrange(1, 11), "amount": "12.5",
+                        "transaction_type": "expense", "category": "Food"})
+                elif i % 3 == 1:
+                    response = await client.get(f"/accounts/{rng.randrange(1, 11)}")
+                else:
+                    response = await client.get("/transactions", params={"limit": 20})
+                response.raise_for_status()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+        return requests / (time.perf_counter() - started)
+
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 32
+    worker_counts = [int(n) for n in sys.argv[3:]] or [1, 2, 4]
+    print(f"=== API load test ({requests:,} requests, {concurrency} clients, "
+          f"{os.cpu_count()} CPUs) ===")
+    with tempfile.TemporaryDirectory() as directory:
+        for workers in worker_counts:
+            processes, url = start(workers, directory)
+            try:
+                rate = asyncio.run(drive(url, requests, concurrency))
+            finally:
+                for process in reversed(processes):
+                    process.terminate()
+                    process.wait()
+            mode = "in-process state" if workers == 1 else "shared state server"
+            print(f"{workers} workers  {rate:9.1f} requests/s  ({mode})")
+
+
+if __name__ == "__main__":
+    main()
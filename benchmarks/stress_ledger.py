@@ -0,0 +1,126 @@
+"""
+Benchmark - Concurrent Ledger Stress Test
+Runs deposits, withdrawals and transaction inserts from 1..N threads against
+journaled managers, checks that no update was lost (balances, IDs, rollups
+and a replay of the log) and reports throughput per thread count
+
+Usage: python benchmarks/stress_ledger.py [operations] [max_threads] [none|batch|always] [dir]
+
+Thread scaling comes from writers sharing fsyncs (group commit) while
+other accounts' locks stay free; pure in-memory work is bound by the GIL.
+Pass a directory on the disk of interest, the log goes to a temp dir in it.
+"""
+
+import sys
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+from datetime import datetime
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from account import AccountManager, AccountType
+from budget import BudgetManager
+from journal import ManagerJournal
+from transaction import TransactionManager, TransactionType
+from wal import Durability, WriteAheadLog
+
+ACCOUNTS = 256
+INITIAL_BALANCE = Decimal('1000')
+
+
+def open_journal(directory, durability):
+    return ManagerJournal(WriteAheadLog(directory, durability), AccountManager(),
+                          TransactionManager(), BudgetManager())
+
+
+def run(threads, operations, durability, parent=None):
+    """Returns (operations per second, list of failed checks)"""
+    directory = tempfile.mkdtemp(prefix="stress-ledger-", dir=parent)
+    try:
+        journal = open_journal(directory, durability)
+        journal.attach()
+        accounts = journal.account_manager
+        transactions = journal.transaction_manager
+        for i in range(ACCOUNTS):
+            accounts.create_account(f"Account {i}", AccountType.CHECKING, INITIAL_BALANCE)
+        per_thread = operations // threads
+        nets = [Decimal('0')] * threads
+        added = [0] * threads
+        barrier = threading.Barrier(threads + 1)
+
+        def worker(number):
+            rng = random.Random(number)
+            net = Decimal('0')
+            barrier.wait()
+            for _ in range(per_thread):
+                account_id = rng.randrange(1, ACCOUNTS + 1)
+                amount = Decimal(rng.randrange(1, 10_000)) / 100
+                choice = rng.random()
+                if choice < 0.35:
+                    accounts.deposit(account_id, amount)
+                    net += amount
+                elif choice < 0.7:
+                    try:
+                        accounts.withdraw(account_id, amount)
+                        net -= amount
+                    except ValueError:
+                        pass
+                else:
+                    transactions.add_transaction(account_id, amount, TransactionType.EXPENSE,
+                                                 date=datetime(2024, rng.randrange(1, 13), 1))
+                    added[number] += 1
+            nets[number] = net
+
+        workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+        for thread in workers:
+            thread.start()
+        barrier.wait()
+        started = time.perf_counter()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        journal.wal.close()
+
+        failures = []
+        count = sum(added)
+        if accounts.get_total_balance() != ACCOUNTS * INITIAL_BALANCE + sum(nets):
+            failures.append("total balance")
+        if [t.id for t in transactions.transactions] != list(range(1, count + 1)):
+            failures.append("transaction IDs")
+        if sum(m.transaction_count for m in transactions.calculate_monthly_summary()) != count:
+            failures.append("rollup counts")
+        replayed = open_journal(directory, Durability.NONE)
+        replayed.replay()
+        replayed.wal.close()
+        if [a.balance for a in replayed.account_manager.accounts] != \
+                [a.balance for a in accounts.accounts]:
+            failures.append("replayed balances")
+        return per_thread * threads / elapsed, failures
+    finally:
+        shutil.rmtree(directory)
+
+
+def main():
+    operations = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    max_threads = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    durability = Durability(sys.argv[3]) if len(sys.argv) > 3 else Durability.ALWAYS
+    parent = sys.argv[4] if len(sys.argv) > 4 else None
+    print(f"=== Concurrent ledger ({operations:,} operations, {ACCOUNTS} accounts, "
+          f"WAL durability {durability.value}) ===")
+    base = None
+    threads = 1
+    while threads <= max_threads:
+        rate, failures = run(threads, operations, durability, parent)
+        base = base or rate
+        print(f"{threads:>3} threads  {rate:>10,.0f} ops/s  {rate / base:5.2f}x  "
+              f"{'ok' if not failures else 'LOST UPDATES: ' + ', '.join(failures)}")
+        threads *= 2
+
+
+if __name__ == "__main__":
+    main()
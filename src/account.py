@@ -3,10 +3,13 @@ Personal Finance Management System - Account Management Module
 Intentionally implements only basic functionality, missing advanced features
 """
 
+import threading
+from bisect import bisect_right
+from contextlib import ExitStack, contextmanager
 from datetime import datetime
 from decimal import Decimal
 from enum import Enum
-from typing import Optional, List
+from typing import Callable, Iterable, Iterator, Optional, List, Dict, Tuple
 
 
 class AccountType(Enum):
@@ -17,68 +20,230 @@ class AccountType(Enum):
     INVESTMENT = "investment"  # Investment account
 
 
+class AccountNotFoundError(ValueError):
+    """An account ID that is unknown, or whose account was deleted meanwhile"""
+
+
 class Account:
     """Bank account class"""
     
+    __slots__ = ('id', 'name', 'account_type', 'balance', 'opening_balance', 'created_at',
+                 'is_active', '_lock')
+    
     def __init__(self, name: str, account_type: AccountType, initial_balance: Decimal = Decimal('0')):
         self.id = None  # Will be assigned by AccountManager
         self.name = name
         self.account_type = account_type
         self.balance = initial_balance
+        self.opening_balance = initial_balance  # Balance before any ledger transaction
         self.created_at = datetime.now()
         self.is_active = True
+        self._lock = threading.RLock()  # Serializes balance changes of this account
         
     def deposit(self, amount: Decimal) -> Decimal:
         """Make a deposit"""
         if amount <= 0:
             raise ValueError("Deposit amount must be positive")
-        self.balance += amount
-        return self.balance
+        with self._lock:
+            self.balance += amount
+            return self.balance
     
     def withdraw(self, amount: Decimal) -> Decimal:
         """Make a withdrawal"""
         if amount <= 0:
             raise ValueError("Withdrawal amount must be positive")
-        if amount > self.balance:
-            raise ValueError("Insufficient funds")
-        self.balance -= amount
-        return self.balance
+        with self._lock:
+            if amount > self.balance:
+                raise ValueError("Insufficient funds")
+            self.balance -= amount
+            return self.balance
     
     def get_balance(self) -> Decimal:
         """Get current balance"""
         return self.balance
     
+    def __getstate__(self):
+        # Pickled copies (e.g. sent to API worker processes) get a lock of their own
+        return {name: getattr(self, name) for name in self.__slots__ if name != '_lock'}
+    
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+        self._lock = threading.RLock()
+    
     def __str__(self):
         return f"Account({self.name}, {self.account_type.value}, ${self.balance})"
 
 
 class AccountManager:
-    """Account manager, functionality intentionally incomplete"""
+    """Account manager, functionality intentionally incomplete
+    
+    Safe to call from several threads. Each account has its own lock, held
+    while its balance changes and its listeners run (so logged balances
+    stay in order), and operations on different accounts run in parallel.
+    The manager lock only guards the account list, indexes and ID counter;
+    it is taken after an account lock, never before one.
+    """
     
     def __init__(self):
         self.accounts: List[Account] = []
         self.next_id = 1
+        # Hash indexes kept in sync with self.accounts
+        self._accounts_by_id: Dict[int, Account] = {}
+        self._accounts_by_name: Dict[str, Account] = {}
+        self._listeners: List[Callable[[str, Account], None]] = []
+        self._lock = threading.Lock()
+    
+    def subscribe(self, listener: Callable[[str, Account], None]) -> None:
+        """Register listener(event, account) called after each change"""
+        self._listeners.append(listener)
+    
+    def _notify(self, event: str, account: Account) -> None:
+        """Call listeners with a change event ("create", "balance" or "delete")"""
+        for listener in self._listeners:
+            listener(event, account)
     
     def create_account(self, name: str, account_type: AccountType, 
                       initial_balance: Decimal = Decimal('0')) -> Account:
         """Create new account"""
-        # Simple duplicate name check
-        if any(acc.name == name for acc in self.accounts):
-            raise ValueError(f"Account with name '{name}' already exists")
-        
         account = Account(name, account_type, initial_balance)
-        account.id = self.next_id
-        self.next_id += 1
-        
-        self.accounts.append(account)
+        with account._lock:
+            with self._lock:
+                # Duplicate name check via name index
+                if name in self._accounts_by_name:
+                    raise ValueError(f"Account with name '{name}' already exists")
+                account.id = self.next_id
+                self.next_id += 1
+                self.accounts.append(account)
+                self._index_account(account)
+            self._notify("create", account)
+        return account
+    
+    def restore_account(self, account: Account) -> None:
+        """Re-insert an account with its original ID (used when replaying stored state)"""
+        with self._lock:
+            self.accounts.append(account)
+            self._index_account(account)
+            self.next_id = max(self.next_id, account.id + 1)
+    
+    def _require_account(self, account_id: int) -> Account:
+        """Get account by ID or raise AccountNotFoundError"""
+        account = self._accounts_by_id.get(account_id)
+        if account is None:
+            raise AccountNotFoundError(f"Account {account_id} not found")
         return account
     
+    @contextmanager
+    def _locked_account(self, account_id: int) -> Iterator[Account]:
+        """Hold an account's lock, raising AccountNotFoundError unless it still exists
+        once held"""
+        account = self._require_account(account_id)
+        with account._lock:
+            if self._accounts_by_id.get(account_id) is not account:
+                raise AccountNotFoundError(f"Account {account_id} not found")
+            yield account
+    
+    @contextmanager
+    def lock_accounts(self, account_ids: Iterable[int]) -> Iterator[Dict[int, Account]]:
+        """Hold the locks of several accounts, taken in ID order so that callers
+        locking overlapping sets cannot deadlock; raises AccountNotFoundError for unknown IDs"""
+        with ExitStack() as stack:
+            accounts = {}
+            for account_id in sorted(set(account_ids)):
+                accounts[account_id] = stack.enter_context(self._locked_account(account_id))
+            yield accounts
+    
+    def transfer_funds(self, from_id: int, to_id: int, amount: Decimal) -> Tuple[Decimal, Decimal]:
+        """Move amount between two accounts atomically, returns both new balances"""
+        if from_id == to_id:
+            raise ValueError("Cannot transfer to the same account")
+        if amount <= 0:
+            raise ValueError("Transfer amount must be positive")
+        with self.lock_accounts((from_id, to_id)) as accounts:
+            source, target = accounts[from_id], accounts[to_id]
+            if amount > source.balance:
+                raise ValueError("Insufficient funds")
+            source.balance -= amount
+            target.balance += amount
+            self._notify("balance", source)
+            self._notify("balance", target)
+            return source.balance, target.balance
+    
+    def settle_transfers(self, transfers: List[Tuple[int, int, Decimal]]) -> List[Optional[str]]:
+        """Apply (from_id, to_id, amount) transfers in order under one set of locks
+        
+        Each transfer either applies completely or is skipped; returns None
+        for applied transfers and the reason for skipped ones. Listeners see
+        one balance change per account instead of one per transfer.
+        """
+        known = {account_id for transfer in transfers for account_id in transfer[:2]
+                 if account_id in self._accounts_by_id}
+        with self.lock_accounts(known) as accounts:
+            balances = {account_id: account.balance for account_id, account in accounts.items()}
+            results: List[Optional[str]] = []
+            for from_id, to_id, amount in transfers:
+                if from_id not in accounts or to_id not in accounts:
+                    missing = from_id if from_id not in accounts else to_id
+                    results.append(f"Account {missing} not found")
+                elif from_id == to_id:
+                    results.append("Cannot transfer to the same account")
+                elif amount <= 0:
+                    results.append("Transfer amount must be positive")
+                elif amount > balances[from_id]:
+                    results.append("Insufficient funds")
+                else:
+                    balances[from_id] -= amount
+                    balances[to_id] += amount
+                    results.append(None)
+            for account_id, balance in balances.items():
+                account = accounts[account_id]
+                if balance != account.balance:
+                    account.balance = balance
+                    self._notify("balance", account)
+            return results
+    
+    def deposit(self, account_id: int, amount: Decimal) -> Decimal:
+        """Deposit into an account by ID, returns the new balance"""
+        with self._locked_account(account_id) as account:
+            balance = account.deposit(amount)
+            self._notify("balance", account)
+        return balance
+    
+    def withdraw(self, account_id: int, amount: Decimal) -> Decimal:
+        """Withdraw from an account by ID, returns the new balance"""
+        with self._locked_account(account_id) as account:
+            balance = account.withdraw(amount)
+            self._notify("balance", account)
+        return balance
+    
     def get_account_by_id(self, account_id: int) -> Optional[Account]:
         """Get account by ID"""
-        for account in self.accounts:
-            if account.id == account_id:
-                return account
-        return None
+        return self._accounts_by_id.get(account_id)
+    
+    def get_all_accounts(self) -> List[Account]:
+        """Get all accounts in ID order"""
+        return list(self.accounts)
+    
+    def get_accounts_page(self, after_id: Optional[int] = None, limit: int = 10) -> List[Account]:
+        """Get up to limit accounts with IDs greater than after_id, in ID order"""
+        start = 0 if after_id is None else bisect_right(self.accounts, after_id,
+                                                        key=lambda a: a.id)
+        return self.accounts[start:start + limit]
+    
+    def get_account_by_name(self, name: str) -> Optional[Account]:
+        """Get account by name"""
+        return self._accounts_by_name.get(name)
+    
+    def _index_account(self, account: Account) -> None:
+        """Add account to the ID and name indexes"""
+        self._accounts_by_id[account.id] = account
+        self._accounts_by_name[account.name] = account
+    
+    def _unindex_account(self, account: Account) -> None:
+        """Remove account from the ID and name indexes"""
+        self._accounts_by_id.pop(account.id, None)
+        if self._accounts_by_name.get(account.name) is account:
+            del self._accounts_by_name[account.name]
     
     def get_total_balance(self) -> Decimal:
         """Get total balance of all accounts"""
@@ -100,19 +265,25 @@ class AccountManager:
         account = self.get_account_by_id(account_id)
         if account is None:
             return False
+        
+        with account._lock:
+            if self._accounts_by_id.get(account_id) is not account:
+                return False  # Deleted by another thread meanwhile
             
-        # Check if account has zero balance before deletion
-        if account.balance != Decimal('0'):
-            raise ValueError(f"Cannot delete account with non-zero balance: ${account.balance}")
+            # Check if account has zero balance before deletion
+            if account.balance != Decimal('0'):
+                raise ValueError(f"Cannot delete account with non-zero balance: ${account.balance}")
             
-        # Remove account from the list
-        self.accounts = [acc for acc in self.accounts if acc.id != account_id]
+            # Remove account from the list and the indexes
+            with self._lock:
+                self.accounts.remove(account)
+                self._unindex_account(account)
+            self._notify("delete", account)
         return True
     
     # TODO: Need to add the following features:
     # - update_account(account_id, **kwargs): Update account information
     # - get_accounts_by_type(account_type): Filter accounts by type
-    # - transfer_funds(from_id, to_id, amount): Transfer between accounts
     # - deactivate_account(account_id): Deactivate account
     # - get_account_history(account_id): Get account history
     # - export_accounts(): Export account data
@@ -0,0 +1,262 @@
+"""
+Personal Finance Management System - Batch Aggregation Module
+Groups transaction columns by any of (account, month, day, type, category)
+in one pass, vectorized with NumPy when it is installed and in pure Python otherwise
+"""
+
+from array import array
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional
+    np = None
+
+AMOUNT_DIGITS = 4                  # Amounts are aggregated as integers scaled by 10**4
+AMOUNT_SCALE = 10 ** AMOUNT_DIGITS
+DAY_US = 86_400_000_000
+CENT = Decimal('0.01')
+
+DIMENSIONS = ("account", "month", "day", "type", "category")
+GroupKey = Tuple[int, ...]             # Values of the requested dimensions, in DIMENSIONS order
+GroupTotal = Tuple[int, int]           # (scaled amount sum, row count)
+
+
+@dataclass(slots=True)
+class ColumnBatch:
+    """Column arrays describing a set of transactions
+
+    dates are epoch microseconds, amounts are scaled by AMOUNT_SCALE and
+    categories are codes into the strings table.
+    """
+    account_ids: array = field(default_factory=lambda: array('q'))
+    dates: array = field(default_factory=lambda: array('q'))
+    types: array = field(default_factory=lambda: array('b'))
+    categories: array = field(default_factory=lambda: array('i'))
+    amounts: array = field(default_factory=lambda: array('q'))
+    strings: List[str] = field(default_factory=list)
+
+
+def to_scaled(amount: Decimal) -> int:
+    """Convert Decimal amount to a scaled integer"""
+    return int(amount * AMOUNT_SCALE)
+
+
+def amount_exponent(amount: Decimal) -> int:
+    """Decimal exponent of an amount (0 for whole numbers), at most AMOUNT_DIGITS places"""
+    exponent = amount.as_tuple().exponent
+    if exponent < -AMOUNT_DIGITS:
+        raise ValueError(f"Transaction amount supports at most {AMOUNT_DIGITS} decimal places")
+    return min(exponent, 0)
+
+
+def from_scaled_exact(value: int, exponent: int) -> Decimal:
+    """Convert scaled integer back to the Decimal it was scaled from, given its exponent"""
+    return Decimal(value // 10 ** (AMOUNT_DIGITS + exponent)).scaleb(exponent)
+
+
+def from_scaled(value: int) -> Decimal:
+    """Convert scaled integer to Decimal, keeping at least two decimal places"""
+    amount = Decimal(value).scaleb(-AMOUNT_DIGITS)
+    quantized = amount.quantize(CENT)
+    return quantized if quantized == amount else amount.normalize()
+
+
+def month_index(date: datetime) -> int:
+    """Months since 1970-01"""
+    return (date.year - 1970) * 12 + date.month - 1
+
+
+def month_start(index: int) -> datetime:
+    """First instant of a month index"""
+    return datetime(1970 + index // 12, index % 12 + 1, 1)
+
+
+def month_label(index: int) -> str:
+    """Format a month index as YYYY-MM"""
+    return f"{1970 + index // 12:04d}-{index % 12 + 1:02d}"
+
+
+def group_totals(batch: ColumnBatch, account_id: Optional[int] = None,
+                 start_us: Optional[int] = None, end_us: Optional[int] = None,
+                 dimensions: Sequence[str] = DIMENSIONS) -> Dict[GroupKey, GroupTotal]:
+    """Sum amounts and count rows per group of the requested dimensions
+
+    Keys hold the account ID, month index, epoch day, type code and
+    category code (whichever were requested) in DIMENSIONS order.
+    """
+    selected = _select_dimensions(dimensions)
+    if np is not None and len(batch.amounts):
+        return _group_totals_numpy(batch, account_id, start_us, end_us, selected)
+    return _group_totals_python(batch, account_id, start_us, end_us, selected)
+
+
+def group_columns(batch: ColumnBatch, dimensions: Sequence[str] = DIMENSIONS):
+    """NumPy-only variant of group_totals returning (values, sums, counts) arrays
+
+    values holds one array per requested dimension in DIMENSIONS order and
+    groups are sorted by key, so callers can slice large results without
+    building a Python object per group.
+    """
+    if np is None:
+        raise RuntimeError("group_columns requires NumPy")
+    selected = _select_dimensions(dimensions)
+    if not len(batch.amounts):
+        empty = np.zeros(0, dtype=np.int64)
+        return [empty for _ in selected], empty, empty
+    return _group_columns_numpy(batch, None, None, None, selected)
+
+
+def sort_order(keys, key_span: int):
+    """Stable argsort of non-negative int64 keys below key_span
+
+    When key * len(keys) + position fits in int64 this sorts those unique
+    composite values with np.sort (much faster than a stable argsort) and
+    recovers the positions from them.
+    """
+    n = len(keys)
+    if n and key_span <= (2 ** 63 - 1) // n:
+        return np.sort(keys * n + np.arange(n, dtype=np.int64)) % n
+    return np.argsort(keys, kind='stable')
+
+
+def _select_dimensions(dimensions: Sequence[str]) -> Tuple[str, ...]:
+    """Validate dimension names and put them in DIMENSIONS order"""
+    unknown = set(dimensions) - set(DIMENSIONS)
+    if unknown:
+        raise ValueError(f"Unknown aggregation dimensions: {sorted(unknown)}")
+    return tuple(name for name in DIMENSIONS if name in dimensions)
+
+
+def _group_totals_python(batch: ColumnBatch, account_id: Optional[int],
+                         start_us: Optional[int], end_us: Optional[int],
+                         selected: Tuple[str, ...]) -> Dict[GroupKey, GroupTotal]:
+    """Single dictionary pass, month lookup cached per day"""
+    totals: Dict[GroupKey, list] = {}
+    month_by_day: Dict[int, int] = {}
+    epoch = datetime(1970, 1, 1).toordinal()
+    want = [name in selected for name in DIMENSIONS]
+    for acc, us, type_code, category, amount in zip(batch.account_ids, batch.dates, batch.types,
+                                                    batch.categories, batch.amounts):
+        if account_id is not None and acc != account_id:
+            continue
+        if (start_us is not None and us < start_us) or (end_us is not None and us > end_us):
+            continue
+        day = us // DAY_US
+        month = 0
+        if want[1]:
+            month = month_by_day.get(day)
+            if month is None:
+                month = month_by_day[day] = month_index(datetime.fromordinal(epoch + day))
+        key = tuple(value for value, wanted in zip((acc, month, day, type_code, category), want)
+                    if wanted)
+        entry = totals.get(key)
+        if entry is None:
+            totals[key] = [amount, 1]
+        else:
+            entry[0] += amount
+            entry[1] += 1
+    return {key: (entry[0], entry[1]) for key, entry in totals.items()}
+
+
+def _group_totals_numpy(batch: ColumnBatch, account_id: Optional[int],
+                        start_us: Optional[int], end_us: Optional[int],
+                        selected: Tuple[str, ...]) -> Dict[GroupKey, GroupTotal]:
+    """Group with NumPy, then convert the groups to a dictionary"""
+    decoded, sums, counts = _group_columns_numpy(batch, account_id, start_us, end_us, selected)
+    if not selected:
+        return {(): (int(sums[0]), int(counts[0]))} if len(sums) else {}
+    return {
+        key: (total, count)
+        for key, total, count in zip(zip(*(part.tolist() for part in decoded)),
+                                     sums.tolist(), counts.tolist())
+    }
+
+
+def _group_columns_numpy(batch: ColumnBatch, account_id: Optional[int],
+                         start_us: Optional[int], end_us: Optional[int],
+                         selected: Tuple[str, ...]):
+    """Encode each group as one int64 key and reduce with bincount or a single sort"""
+    accounts = np.frombuffer(batch.account_ids, dtype=np.int64)
+    dates = np.frombuffer(batch.dates, dtype=np.int64)
+    types = np.frombuffer(batch.types, dtype=np.int8)
+    categories = np.frombuffer(batch.categories, dtype=np.int32)
+    amounts = np.frombuffer(batch.amounts, dtype=np.int64)
+
+    mask = None
+    if account_id is not None:
+        mask = accounts == account_id
+    if start_us is not None:
+        mask = dates >= start_us if mask is None else mask & (dates >= start_us)
+    if end_us is not None:
+        mask = dates <= end_us if mask is None else mask & (dates <= end_us)
+    if mask is not None:
+        accounts, dates, types = accounts[mask], dates[mask], types[mask]
+        categories, amounts = categories[mask], amounts[mask]
+    if not len(amounts):
+        empty = np.zeros(0, dtype=np.int64)
+        return [empty for _ in selected], empty, empty
+
+    # Turn every requested dimension into a dense 0..span-1 code
+    columns = []
+    if "account" in selected:
+        account_min = int(accounts.min())
+        account_span = int(accounts.max()) - account_min + 1
+        if account_span > 4 * len(accounts):
+            # Sparse account IDs: factorize instead of offsetting
+            account_values, codes = np.unique(accounts, return_inverse=True)
+            columns.append((codes, len(account_values), account_values, 0))
+        else:
+            columns.append((accounts - account_min, account_span, None, account_min))
+    if "month" in selected:
+        months = dates.astype('datetime64[us]').astype('datetime64[M]').astype(np.int64)
+        month_min = int(months.min())
+        columns.append((months - month_min, int(months.max()) - month_min + 1, None, month_min))
+    if "day" in selected:
+        days = dates // DAY_US
+        day_min = int(days.min())
+        columns.append((days - day_min, int(days.max()) - day_min + 1, None, day_min))
+    if "type" in selected:
+        columns.append((types.astype(np.int64), 4, None, 0))
+    if "category" in selected:
+        columns.append((categories.astype(np.int64),
+                        max(len(batch.strings), int(categories.max()) + 1), None, 0))
+    if not columns:
+        return [], np.array([amounts.sum()], dtype=np.int64), np.array([len(amounts)])
+
+    key_span = 1
+    keys = np.zeros(len(amounts), dtype=np.int64)
+    for codes, span, _values, _offset in columns:
+        key_span *= span
+        if key_span >= 2 ** 62:
+            raise ValueError("Aggregation key space too large")
+        keys = keys * span + codes
+
+    if key_span <= max(2 * len(keys), 1 << 20) and \
+            int(np.abs(amounts).max() >> 24) * len(amounts) < 2 ** 53:
+        # Dense key space: O(n) bincount, amounts split in two float-exact halves
+        counts = np.bincount(keys, minlength=key_span)
+        high = np.bincount(keys, weights=amounts >> 24, minlength=key_span)
+        low = np.bincount(keys, weights=amounts & 0xFFFFFF, minlength=key_span)
+        group_keys = np.flatnonzero(counts)
+        counts = counts[group_keys]
+        sums = (high[group_keys].astype(np.int64) << 24) + low[group_keys].astype(np.int64)
+    else:
+        order = sort_order(keys, key_span)
+        sorted_keys = keys[order]
+        starts = np.concatenate(([0], np.flatnonzero(sorted_keys[1:] != sorted_keys[:-1]) + 1))
+        sums = np.add.reduceat(amounts[order], starts)
+        counts = np.diff(np.append(starts, len(sorted_keys)))
+        group_keys = sorted_keys[starts]
+
+    # Decode the combined key back into per-dimension values
+    decoded = []
+    for _codes, span, values, offset in reversed(columns):
+        part = group_keys % span
+        group_keys = group_keys // span
+        decoded.append(values[part] if values is not None else part + offset)
+    decoded.reverse()
+    return decoded, sums, counts
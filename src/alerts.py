@@ -0,0 +1,150 @@
+"""
+Personal Finance Management System - Budget Alerts Module
+Streaming evaluator that raises alerts as expenses push budgets past thresholds
+"""
+
+import asyncio
+from collections import deque
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Callable, Deque, List, Optional, Sequence, Set, Tuple
+
+from budget import Budget, BudgetManager, period_bounds
+from transaction import Transaction, TransactionManager, TransactionType
+
+DEFAULT_THRESHOLDS = (Decimal('80'), Decimal('100'))
+
+
+@dataclass(slots=True)
+class BudgetAlert:
+    """A budget crossed a utilization threshold"""
+    budget_id: int
+    budget_name: str
+    category: str
+    threshold: Decimal          # Percent of the budget amount
+    spent: Decimal
+    amount: Decimal
+    period_start: date
+    period_end: date
+    transaction_id: Optional[int] = None
+    created_at: datetime = None
+
+    def __post_init__(self):
+        if self.created_at is None:
+            self.created_at = datetime.now()
+
+
+class BudgetAlertEvaluator:
+    """Raises BudgetAlert events from the transaction write path
+
+    Each recorded expense looks up the active budgets of its category and
+    reads their period spend from the rollups (already updated when the
+    listener runs), so no transaction history is rescanned. An alert fires
+    when the expense moves spend from below a threshold to at or above it.
+    """
+
+    def __init__(self, budget_manager: BudgetManager, transaction_manager: TransactionManager,
+                 thresholds: Sequence[Decimal] = DEFAULT_THRESHOLDS, history_size: int = 100):
+        self.budget_manager = budget_manager
+        self.transaction_manager = transaction_manager
+        self.thresholds = sorted(Decimal(t) for t in thresholds)
+        self.recent_alerts: Deque[BudgetAlert] = deque(maxlen=history_size)
+        self._subscribers: List[Callable[[BudgetAlert], None]] = []
+        transaction_manager.subscribe(self._on_transaction)
+
+    def subscribe(self, callback: Callable[[BudgetAlert], None]) -> None:
+        """Register callback(alert) for every alert raised"""
+        self._subscribers.append(callback)
+
+    def _period_spend(self, budget: Budget, as_of: date) -> Tuple[Decimal, date, date]:
+        """Spend of the budget's category in the period containing as_of"""
+        start, end = period_bounds(budget.period, as_of)
+        spent = self.transaction_manager.calculate_category_period_total(
+            budget.category, start, end, TransactionType.EXPENSE)
+        return spent, start, end
+
+    def _on_transaction(self, event: str, transaction: Transaction) -> None:
+        """Evaluate thresholds for budgets affected by a new expense"""
+        if event != "add" or transaction.transaction_type != TransactionType.EXPENSE:
+            return
+        for budget in self.budget_manager.get_budgets_by_category(transaction.category):
+            spent, start, end = self._period_spend(budget, transaction.date.date())
+            before = spent - transaction.amount
+            for threshold in self.thresholds:
+                limit = budget.amount * threshold / 100
+                if before < limit <= spent:
+                    self._emit(BudgetAlert(
+                        budget_id=budget.id,
+                        budget_name=budget.name,
+                        category=budget.category,
+                        threshold=threshold,
+                        spent=spent,
+                        amount=budget.amount,
+                        period_start=start,
+                        period_end=end,
+                        transaction_id=transaction.id
+                    ))
+
+    def _emit(self, alert: BudgetAlert) -> None:
+        """Record alert and deliver it to subscribers"""
+        self.recent_alerts.append(alert)
+        for callback in self._subscribers:
+            callback(alert)
+
+    def check_budget_alerts(self, as_of: Optional[date] = None) -> List[BudgetAlert]:
+        """Get the highest threshold currently reached by each active budget"""
+        as_of = as_of or date.today()
+        alerts = []
+        for budget in self.budget_manager.get_active_budgets():
+            spent, start, end = self._period_spend(budget, as_of)
+            reached = [t for t in self.thresholds if spent >= budget.amount * t / 100]
+            if reached:
+                alerts.append(BudgetAlert(
+                    budget_id=budget.id,
+                    budget_name=budget.name,
+                    category=budget.category,
+                    threshold=reached[-1],
+                    spent=spent,
+                    amount=budget.amount,
+                    period_start=start,
+                    period_end=end
+                ))
+        return alerts
+
+
+class AlertStream:
+    """Fans alerts out to asyncio queues, one per connected consumer
+
+    publish() may be called from any thread; delivery is scheduled on each
+    consumer's event loop. Slow consumers drop their oldest queued alert.
+    """
+
+    def __init__(self, max_queue_size: int = 100):
+        self.max_queue_size = max_queue_size
+        self._queues: Set[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]] = set()
+
+    def open(self) -> asyncio.Queue:
+        """Create a queue for the calling coroutine's event loop"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._queues.add((asyncio.get_running_loop(), queue))
+        return queue
+
+    def close(self, queue: asyncio.Queue) -> None:
+        """Stop delivering to a queue"""
+        self._queues = {(loop, q) for loop, q in self._queues if q is not queue}
+
+    @staticmethod
+    def _deliver(queue: asyncio.Queue, alert: BudgetAlert) -> None:
+        """Enqueue alert, discarding the oldest one when the queue is full"""
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(alert)
+
+    def publish(self, alert: BudgetAlert) -> None:
+        """Deliver alert to every open queue"""
+        for loop, queue in list(self._queues):
+            if loop.is_closed():
+                self.close(queue)
+                continue
+            loop.call_soon_threadsafe(self._deliver, queue, alert)
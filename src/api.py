@@ -3,33 +3,135 @@ Personal Finance Management System - FastAPI REST API
 Intentionally implements only basic interfaces, missing authentication, authorization and advanced features
 """
 
-from fastapi import FastAPI, HTTPException, status
-from fastapi.responses import JSONResponse, HTMLResponse
+import asyncio
+import base64
+import binascii
+import codecs
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, HTTPException, Request, Response, status
+from fastapi.responses import JSONResponse, HTMLResponse, StreamingResponse
 from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
 from decimal import Decimal
 from datetime import datetime, date
-from typing import List, Optional
+from typing import Any, Callable, Iterable, List, Optional, Dict, Tuple, TypeVar
 
 import sys
 import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
-from account import AccountManager, AccountType
-from transaction import TransactionManager, TransactionType
-from budget import BudgetManager, BudgetPeriod
+from account import Account, AccountNotFoundError, AccountType
+from transaction import Transaction, TransactionQuery, TransactionType
+from budget import Budget, BudgetPeriod
+from utilization import BudgetUtilization
+from alerts import AlertStream, BudgetAlert
+from importer import DEFAULT_CHUNK_SIZE, FORMATS, TransactionImporter
+from compression import (MIN_COMPRESS_BYTES, available_encodings, compress, negotiate,
+                         variant_etag)
+from indexes import from_epoch_us, to_epoch_us
+from response_cache import DEFAULT_MAX_BYTES, ResponseCache, etag_matches
+import exporter
+from serialization import account_record, budget_record, dump_records, transaction_record
+from state import (CallGate, build_state, close_state, connect_state, gate_services,
+                   parse_address, relay_alerts)
+from transfers import Transfer
 from web_interface import get_web_interface
 
+# Global manager instances, built from the environment (see state.build_state).
+# With FINANCE_STATE_SERVER set this process is one of several workers and
+# they are proxies of the managers in the state server at that address.
+if os.environ.get("FINANCE_STATE_SERVER"):
+    state = connect_state(parse_address(os.environ["FINANCE_STATE_SERVER"]),
+                          os.environ.get("FINANCE_STATE_AUTHKEY", "").encode())
+else:
+    state = build_state()
+    # Journaled state is snapshotted here: every call of a request handler
+    # passes the gate, which a capture closes until no call is in flight
+    if state.snapshotter is not None:
+        snapshot_gate = CallGate()
+        state = gate_services(state, snapshot_gate)
+account_manager = state.account_manager
+transaction_manager = state.transaction_manager
+budget_manager = state.budget_manager
+budget_utilization = state.budget_utilization
+budget_alerts = state.budget_alerts
+balance_ledger = state.balance_ledger
+balance_reconciler = state.balance_reconciler
+transfer_service = state.transfer_service
+repository = state.repository
+journal = state.journal
+snapshotter = state.snapshotter
+data_versions = state.data_versions
+alert_stream = AlertStream()
+if state.remote:
+    relay_alerts(state.alert_feed, alert_stream.publish)
+else:
+    budget_alerts.subscribe(alert_stream.publish)
+# A snapshot is taken every FINANCE_SNAPSHOT_INTERVAL seconds (0 disables) and
+# balances are reconciled every FINANCE_RECONCILE_INTERVAL seconds (0, the
+# default, disables it); on workers the state server does both
+snapshot_interval = float(os.environ.get("FINANCE_SNAPSHOT_INTERVAL", "300"))
+reconcile_interval = 0.0 if state.remote else \
+    float(os.environ.get("FINANCE_RECONCILE_INTERVAL", "0"))
+
+
+async def _snapshot_loop():
+    """Snapshot periodically once new mutations were logged
+
+    The capture waits on a worker thread for the calls of request handlers
+    in flight (sync endpoints mutate on the thread pool) and holds new ones
+    back until it is done; the column export and file writes run after it.
+    """
+    def capture():
+        with snapshot_gate.exclusive():
+            return snapshotter.capture()
+
+    while True:
+        await asyncio.sleep(snapshot_interval)
+        if journal.wal.last_lsn > snapshotter.last_snapshot_lsn:
+            await asyncio.to_thread(snapshotter.write, await asyncio.to_thread(capture))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Run background snapshots; flush and close the storage on shutdown"""
+    task = None
+    if snapshotter is not None and snapshot_interval > 0:
+        task = asyncio.create_task(_snapshot_loop())
+    if reconcile_interval > 0:
+        balance_reconciler.start(reconcile_interval)
+    yield
+    if task is not None:
+        task.cancel()
+    if reconcile_interval > 0:
+        balance_reconciler.stop()
+    close_state(state)
+
+
 # Initialize FastAPI application
 app = FastAPI(
     title="Personal Finance Manager API",
     description="A simple personal finance management system (incomplete)",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan
 )
 
-# Global manager instances (should use database in real applications)
-account_manager = AccountManager()
-transaction_manager = TransactionManager()
-budget_manager = BudgetManager()
+
+async def wait_for_commit(request: Request, call_next):
+    """Answer a write only after the database batch holding it has committed
+
+    Requests waiting here do not block the event loop, so writes from
+    concurrent requests are coalesced into the same SQLite transaction.
+    """
+    response = await call_next(request)
+    if request.method not in ("GET", "HEAD", "OPTIONS"):
+        await repository.wait_committed()
+    return response
+
+
+if repository is not None:
+    app.middleware("http")(wait_for_commit)
 
 
 # Pydantic model
@@ -48,20 +150,94 @@ class AccountResponse(BaseModel):
     created_at: datetime
 
 
+class BalanceOperation(BaseModel):
+    amount: Decimal
+
+
 class TransactionCreate(BaseModel):
     account_id: int
     amount: Decimal
     transaction_type: TransactionType
     description: str = ""
+    category: str = ""
+
+
+class TransactionUpdate(BaseModel):
+    account_id: Optional[int] = None
+    amount: Optional[Decimal] = None
+    transaction_type: Optional[TransactionType] = None
+    description: Optional[str] = None
+    date: Optional[datetime] = None
+    category: Optional[str] = None
 
 
 class TransactionResponse(BaseModel):
     id: int
     account_id: int
-    amount: Decimal
+    amount: Decimal                 # Negative on the outgoing leg of a transfer
     transaction_type: TransactionType
     description: str
     date: datetime
+    category: str = ""
+
+
+class ImportReportResponse(BaseModel):
+    imported: int
+    rejected: int
+    errors: List[Tuple[int, str]]
+    first_id: Optional[int] = None
+    last_id: Optional[int] = None
+    seconds: float
+    rows_per_second: float
+
+
+class TransferCreate(BaseModel):
+    from_account_id: int
+    to_account_id: int
+    amount: Decimal
+    description: str = ""
+    category: str = ""
+
+
+class TransferResponse(BaseModel):
+    debit: TransactionResponse
+    credit: TransactionResponse
+    from_balance: Decimal
+    to_balance: Decimal
+
+
+class TransferBatch(BaseModel):
+    transfers: List[TransferCreate]
+
+
+class TransferBatchResponse(BaseModel):
+    settled: int
+    rejected: int
+    errors: List[Tuple[int, str]]       # (index in the batch, reason)
+    first_id: Optional[int] = None      # Legs of the n-th settled transfer are
+    last_id: Optional[int] = None       # first_id + 2n (debit) and first_id + 2n + 1
+
+
+class LedgerBalanceResponse(BaseModel):
+    account_id: int
+    as_of: Optional[datetime] = None
+    balance: Decimal               # From the opening balance and the transactions
+    stored_balance: Decimal
+
+
+class BalanceDriftResponse(BaseModel):
+    account_id: int
+    stored_balance: Decimal
+    ledger_balance: Decimal
+    difference: Decimal
+
+
+class ReconciliationResponse(BaseModel):
+    accounts_checked: int
+    transactions_scanned: int
+    drift: List[BalanceDriftResponse]
+    seconds: float
+    finished_at: datetime
 
 
 class BudgetCreate(BaseModel):
@@ -81,9 +257,284 @@ class BudgetResponse(BaseModel):
     is_active: bool
 
 
+def _account_response(a: Account) -> AccountResponse:
+    """Build response model from an account"""
+    return AccountResponse(
+        id=a.id,
+        name=a.name,
+        account_type=a.account_type,
+        balance=a.balance,
+        is_active=a.is_active,
+        created_at=a.created_at
+    )
+
+
+def _transaction_response(t: Transaction) -> TransactionResponse:
+    """Build response model from a transaction"""
+    return TransactionResponse(
+        id=t.id,
+        account_id=t.account_id,
+        amount=t.amount,
+        transaction_type=t.transaction_type,
+        description=t.description,
+        date=t.date,
+        category=t.category
+    )
+
+
+def _budget_response(b: Budget) -> BudgetResponse:
+    """Build response model from a budget"""
+    return BudgetResponse(
+        id=b.id,
+        name=b.name,
+        category=b.category,
+        amount=b.amount,
+        period=b.period,
+        start_date=b.start_date,
+        is_active=b.is_active
+    )
+
+
+# List endpoints encode rows straight to JSON bytes with the serialization
+# module's record functions, skipping the per-row response models and their
+# re-validation by response_model (which is still used for the OpenAPI
+# schema). FINANCE_FAST_RESPONSES=0 restores the model path.
+fast_responses = os.environ.get("FINANCE_FAST_RESPONSES", "1") != "0"
+T = TypeVar("T")
+
+
+def _list_response(items: Iterable[T], record: Callable[[T], Dict[str, Any]],
+                   to_model: Callable[[T], BaseModel], response: Response):
+    """Respond with a JSON array of items through the fast path or the response models"""
+    if fast_responses:
+        return Response(dump_records(items, record), media_type="application/json",
+                        headers=dict(response.headers))
+    return [to_model(item) for item in items]
+
+
+class BudgetUtilizationResponse(BaseModel):
+    budget_id: int
+    name: str
+    category: str
+    amount: Decimal
+    spent: Decimal
+    remaining: Decimal
+    utilization: Decimal
+    is_over_budget: bool
+    period_start: date
+    period_end: date
+
+
+def _utilization_response(u: BudgetUtilization) -> BudgetUtilizationResponse:
+    """Build response model from a utilization result"""
+    return BudgetUtilizationResponse(
+        budget_id=u.budget_id,
+        name=u.name,
+        category=u.category,
+        amount=u.amount,
+        spent=u.spent,
+        remaining=u.remaining,
+        utilization=u.utilization,
+        is_over_budget=u.is_over_budget,
+        period_start=u.period_start,
+        period_end=u.period_end
+    )
+
+
+class BudgetAlertResponse(BaseModel):
+    budget_id: int
+    budget_name: str
+    category: str
+    threshold: Decimal
+    spent: Decimal
+    amount: Decimal
+    period_start: date
+    period_end: date
+    transaction_id: Optional[int] = None
+    created_at: datetime
+
+
+def _alert_response(a: BudgetAlert) -> BudgetAlertResponse:
+    """Build response model from a budget alert"""
+    return BudgetAlertResponse(
+        budget_id=a.budget_id,
+        budget_name=a.budget_name,
+        category=a.category,
+        threshold=a.threshold,
+        spent=a.spent,
+        amount=a.amount,
+        period_start=a.period_start,
+        period_end=a.period_end,
+        transaction_id=a.transaction_id,
+        created_at=a.created_at
+    )
+
+
+class MonthlySummaryResponse(BaseModel):
+    month: str
+    income: Decimal
+    expense: Decimal
+    transfer: Decimal               # Net of incoming and outgoing transfer legs
+    transfer_in: Decimal
+    transfer_out: Decimal
+    net: Decimal
+    transaction_count: int
+
+
+class DailySummaryResponse(BaseModel):
+    day: date
+    income: Decimal
+    expense: Decimal
+    transfer: Decimal               # Net of incoming and outgoing transfer legs
+    transfer_in: Decimal
+    transfer_out: Decimal
+    net: Decimal
+    transaction_count: int
+
+
+class SummaryReportResponse(BaseModel):
+    total_income: Decimal
+    total_expense: Decimal
+    total_transfer: Decimal         # Net of incoming and outgoing transfer legs
+    total_transfer_in: Decimal
+    total_transfer_out: Decimal
+    net: Decimal
+    transaction_count: int
+    expense_by_category: Dict[str, Decimal]
+    income_by_category: Dict[str, Decimal]
+
+
+# Keyset pagination: list endpoints take an opaque cursor and return the
+# cursor of the next page in the X-Next-Cursor header
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def _encode_cursor(*keys: int) -> str:
+    """Opaque cursor for a position key"""
+    text = ":".join(str(key) for key in keys)
+    return base64.urlsafe_b64encode(text.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str, size: int) -> List[int]:
+    """Position key of a cursor, HTTP 400 if it is malformed"""
+    try:
+        text = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        keys = [int(key) for key in text.split(":")]
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        keys = []
+    if len(keys) != size:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return keys
+
+
+def _transaction_cursor(transaction: Transaction) -> str:
+    return _encode_cursor(to_epoch_us(transaction.date), transaction.id)
+
+
+def _decode_transaction_cursor(cursor: str):
+    """(date, id) position of a transaction cursor"""
+    epoch_us, transaction_id = _decode_cursor(cursor, 2)
+    return from_epoch_us(epoch_us), transaction_id
+
+
+def _check_limit(limit: int) -> None:
+    if limit < 1:
+        raise HTTPException(status_code=400, detail="limit must be positive")
+
+
+# Bodies of the list endpoints are cached per path and query string until a
+# write changes the resources they list (FINANCE_RESPONSE_CACHE_BYTES bounds
+# the cache, 0 disables it)
+CACHED_PATHS = {"/accounts": ("accounts",), "/budgets": ("budgets",),
+                "/transactions": ("transactions",)}
+CACHED_HEADERS = ("content-type", NEXT_CURSOR_HEADER.lower())
+response_cache = ResponseCache(int(os.environ.get("FINANCE_RESPONSE_CACHE_BYTES",
+                                                  DEFAULT_MAX_BYTES)))
+
+
+def _cached_response(key, entry, request: Request) -> Response:
+    """The cached body, compressed as the request accepts, or 304 Not Modified
+    when the client holds it"""
+    encoding = None
+    if len(entry.body) >= MIN_COMPRESS_BYTES:
+        encoding = negotiate(request.headers.get("accept-encoding"), available_encodings())
+    headers = {"ETag": variant_etag(entry.etag, encoding), "Cache-Control": "no-cache",
+               "Vary": "Accept-Encoding"}
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    if encoding is None:
+        return Response(entry.body, headers={**entry.headers, **headers})
+    body = response_cache.variant(key, entry, encoding,
+                                  lambda body: compress(body, encoding))
+    return Response(body, headers={**entry.headers, **headers, "Content-Encoding": encoding})
+
+
+async def cache_responses(request: Request, call_next):
+    """Answer repeated list requests from the response cache
+    
+    Responses carry a strong ETag and Cache-Control: no-cache, so browsers
+    revalidate with If-None-Match and get 304 until the data changes. The
+    versions are read before the endpoint runs: a write landing meanwhile
+    leaves the new entry already stale.
+    """
+    resources = CACHED_PATHS.get(request.url.path)
+    if request.method != "GET" or resources is None:
+        return await call_next(request)
+    if "account_type" in request.query_params:
+        resources += ("accounts",)   # Account types come from the accounts
+    current = data_versions.current()
+    versions = tuple(current[resource] for resource in resources)
+    key = (request.url.path, tuple(sorted(request.query_params.multi_items())))
+    entry = response_cache.get(key, versions)
+    if entry is not None:
+        return _cached_response(key, entry, request)
+    
+    response = await call_next(request)
+    if response.status_code != status.HTTP_200_OK:
+        return response
+    body = b"".join([chunk async for chunk in response.body_iterator])
+    headers = {name: value for name, value in response.headers.items()
+               if name in CACHED_HEADERS}
+    return _cached_response(key, response_cache.put(key, versions, body, headers), request)
+
+
+if response_cache.max_bytes > 0:
+    app.middleware("http")(cache_responses)
+
+
+async def compress_responses(request: Request, call_next):
+    """Compress JSON responses of at least MIN_COMPRESS_BYTES for clients
+    accepting gzip or brotli
+
+    Responses already encoded (cached lists) and streamed ones (exports,
+    alert events: they have no Content-Length) are passed through.
+    """
+    response = await call_next(request)
+    length = response.headers.get("content-length")
+    if ("content-encoding" in response.headers or length is None
+            or int(length) < MIN_COMPRESS_BYTES
+            or not response.headers.get("content-type", "").startswith("application/json")):
+        return response
+    response.headers["Vary"] = "Accept-Encoding"
+    encoding = negotiate(request.headers.get("accept-encoding"), available_encodings())
+    if encoding is None:
+        return response
+    body = compress(b"".join([chunk async for chunk in response.body_iterator]), encoding)
+    headers = {name: value for name, value in response.headers.items()
+               if name != "content-length"}
+    headers["content-encoding"] = encoding
+    if "etag" in headers:
+        headers["etag"] = variant_etag(headers["etag"], encoding)
+    return Response(body, status_code=response.status_code, headers=headers)
+
+
+# Added last: outermost, so it also sees the cached list responses
+app.middleware("http")(compress_responses)
+
+
 # Account related endpoints
 @app.post("/accounts", response_model=AccountResponse, status_code=status.HTTP_201_CREATED)
-async def create_account(account_data: AccountCreate):
+def create_account(account_data: AccountCreate):
     """Create new account"""
     try:
         account = account_manager.create_account(
@@ -91,97 +542,347 @@ async def create_account(account_data: AccountCreate):
             account_type=account_data.account_type,
             initial_balance=account_data.initial_balance
         )
-        return AccountResponse(
-            id=account.id,
-            name=account.name,
-            account_type=account.account_type,
-            balance=account.balance,
-            is_active=account.is_active,
-            created_at=account.created_at
-        )
+        return _account_response(account)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
 @app.get("/accounts", response_model=List[AccountResponse])
-async def get_accounts():
-    """Get all accounts"""
-    accounts = []
-    for account in account_manager.accounts:
-        accounts.append(AccountResponse(
-            id=account.id,
-            name=account.name,
-            account_type=account.account_type,
-            balance=account.balance,
-            is_active=account.is_active,
-            created_at=account.created_at
-        ))
-    return accounts
+async def get_accounts(response: Response, limit: Optional[int] = None,
+                       cursor: Optional[str] = None):
+    """Get accounts in ID order: all of them, or one page with limit/cursor"""
+    if limit is None and cursor is None:
+        page = account_manager.get_all_accounts()
+    else:
+        limit = 100 if limit is None else limit
+        _check_limit(limit)
+        after_id = _decode_cursor(cursor, 1)[0] if cursor is not None else None
+        page = account_manager.get_accounts_page(after_id, limit)
+        if len(page) == limit:
+            response.headers[NEXT_CURSOR_HEADER] = _encode_cursor(page[-1].id)
+    return _list_response(page, account_record, _account_response, response)
+
+
+@app.get("/accounts/reconciliation", response_model=ReconciliationResponse)
+def reconcile_accounts():
+    """Compare every stored balance with its ledger balance, listing the accounts that drifted"""
+    report = balance_reconciler.scan()
+    return ReconciliationResponse(
+        accounts_checked=report.accounts_checked,
+        transactions_scanned=report.transactions_scanned,
+        drift=[BalanceDriftResponse(account_id=d.account_id, stored_balance=d.stored_balance,
+                                    ledger_balance=d.ledger_balance, difference=d.difference)
+               for d in report.drift],
+        seconds=report.seconds,
+        finished_at=report.finished_at
+    )
 
 
 @app.get("/accounts/{account_id}", response_model=AccountResponse)
-async def get_account(account_id: int):
+def get_account(account_id: int):
     """Get account by ID"""
     account = account_manager.get_account_by_id(account_id)
     if not account:
         raise HTTPException(status_code=404, detail="Account not found")
     
-    return AccountResponse(
-        id=account.id,
-        name=account.name,
-        account_type=account.account_type,
-        balance=account.balance,
-        is_active=account.is_active,
-        created_at=account.created_at
+    return _account_response(account)
+
+
+@app.post("/accounts/{account_id}/deposit", response_model=AccountResponse)
+def deposit(account_id: int, operation: BalanceOperation):
+    """Deposit into an account, recording it as an income"""
+    return _post_balance_operation(account_id, operation.amount, TransactionType.INCOME,
+                                   "Deposit")
+
+
+@app.post("/accounts/{account_id}/withdraw", response_model=AccountResponse)
+def withdraw(account_id: int, operation: BalanceOperation):
+    """Withdraw from an account, recording it as an expense"""
+    return _post_balance_operation(account_id, operation.amount, TransactionType.EXPENSE,
+                                   "Withdrawal")
+
+
+def _post_balance_operation(account_id: int, amount: Decimal,
+                            transaction_type: TransactionType,
+                            description: str) -> AccountResponse:
+    if not account_manager.get_account_by_id(account_id):
+        raise HTTPException(status_code=404, detail="Account not found")
+    try:
+        transfer_service.post(account_id, amount, transaction_type, description)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return get_account(account_id)
+
+
+@app.get("/accounts/{account_id}/balance", response_model=LedgerBalanceResponse)
+def get_ledger_balance(account_id: int, as_of: Optional[datetime] = None):
+    """Balance recomputed from the ledger, counting transactions dated up to as_of"""
+    account = account_manager.get_account_by_id(account_id)
+    if not account:
+        raise HTTPException(status_code=404, detail="Account not found")
+    try:
+        balance = balance_ledger.balance_as_of(account_id, as_of)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return LedgerBalanceResponse(account_id=account_id, as_of=as_of, balance=balance,
+                                 stored_balance=account.balance)
+
+
+@app.post("/accounts/transfer", response_model=TransferResponse)
+def transfer(transfer_data: TransferCreate):
+    """Transfer between accounts, recording a TRANSFER transaction on each"""
+    for account_id in (transfer_data.from_account_id, transfer_data.to_account_id):
+        if not account_manager.get_account_by_id(account_id):
+            raise HTTPException(status_code=404, detail=f"Account {account_id} not found")
+    try:
+        result = transfer_service.transfer(
+            transfer_data.from_account_id, transfer_data.to_account_id, transfer_data.amount,
+            transfer_data.description, transfer_data.category)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return TransferResponse(debit=_transaction_response(result.debit),
+                            credit=_transaction_response(result.credit),
+                            from_balance=result.from_balance, to_balance=result.to_balance)
+
+
+@app.post("/accounts/transfer/batch", response_model=TransferBatchResponse)
+def transfer_batch(batch: TransferBatch):
+    """Settle many transfers in order as one unit; refused ones are reported and skipped"""
+    try:
+        results = transfer_service.transfer_batch([
+            Transfer(t.from_account_id, t.to_account_id, t.amount, t.description, t.category)
+            for t in batch.transfers])
+    except AccountNotFoundError as e:
+        # An account of the batch was deleted while its locks were being taken
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    legs = [r.debit.id for r in results if r.ok] + [r.credit.id for r in results if r.ok]
+    errors = [(index, r.error) for index, r in enumerate(results) if not r.ok]
+    return TransferBatchResponse(
+        settled=len(results) - len(errors),
+        rejected=len(errors),
+        errors=errors,
+        first_id=min(legs) if legs else None,
+        last_id=max(legs) if legs else None
     )
 
 
+@app.get("/accounts/{account_id}/transactions", response_model=List[TransactionResponse])
+def get_account_transactions(response: Response, account_id: int, limit: int = 10,
+                             offset: int = 0, cursor: Optional[str] = None):
+    """Get one page of an account's transaction history, newest first
+    
+    Pass the X-Next-Cursor of the previous page as cursor to continue; deep
+    pages then cost the same as the first (offset is still accepted).
+    """
+    if not account_manager.get_account_by_id(account_id):
+        raise HTTPException(status_code=404, detail="Account not found")
+    if limit < 1 or offset < 0:
+        raise HTTPException(status_code=400, detail="limit must be positive and offset non-negative")
+    
+    if cursor is not None:
+        date, transaction_id = _decode_transaction_cursor(cursor)
+        transactions = transaction_manager.get_transactions_before(date, transaction_id, limit,
+                                                                   account_id=account_id)
+    else:
+        transactions = transaction_manager.get_account_transactions_page(account_id, limit, offset)
+    if len(transactions) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = _transaction_cursor(transactions[-1])
+    return _list_response(transactions, transaction_record, _transaction_response, response)
+
+
 # Transaction related endpoints
 @app.post("/transactions", response_model=TransactionResponse, status_code=status.HTTP_201_CREATED)
-async def create_transaction(transaction_data: TransactionCreate):
-    """Create new transaction"""
+def create_transaction(transaction_data: TransactionCreate):
+    """Create new transaction, applying it to the account's balance
+    
+    TRANSFER transactions are only written by transfers (POST /accounts/transfer),
+    and an expense larger than the balance is refused. POST /transactions/bulk
+    follows the same rules.
+    """
     try:
         # Verify account exists
         account = account_manager.get_account_by_id(transaction_data.account_id)
         if not account:
             raise HTTPException(status_code=400, detail="Account not found")
         
-        transaction = transaction_manager.add_transaction(
-            account_id=transaction_data.account_id,
-            amount=transaction_data.amount,
-            transaction_type=transaction_data.transaction_type,
-            description=transaction_data.description
+        transaction, _ = transfer_service.post(
+            transaction_data.account_id,
+            transaction_data.amount,
+            transaction_data.transaction_type,
+            transaction_data.description,
+            transaction_data.category
         )
         
-        return TransactionResponse(
-            id=transaction.id,
-            account_id=transaction.account_id,
-            amount=transaction.amount,
-            transaction_type=transaction.transaction_type,
-            description=transaction.description,
-            date=transaction.date
-        )
+        return _transaction_response(transaction)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@app.post("/transactions/bulk", response_model=ImportReportResponse)
+async def bulk_import_transactions(request: Request, format: Optional[str] = None,
+                                   chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """Import a CSV or NDJSON bank export streamed in the request body
+    
+    The body is parsed as it arrives and posted in batches of chunk_size
+    rows; each row moves its account's balance like POST /transactions.
+    Invalid rows, TRANSFER rows and expenses the balance cannot cover at
+    that point are skipped and listed in the report. format defaults to
+    ndjson for JSON content types, otherwise csv.
+    """
+    if format is None:
+        format = "ndjson" if "json" in request.headers.get("content-type", "") else "csv"
+    if format not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(FORMATS)}")
+    if chunk_size < 1:
+        raise HTTPException(status_code=400, detail="chunk_size must be positive")
+    
+    importer = TransactionImporter(
+        transaction_manager, format, chunk_size,
+        account_exists=lambda account_id: account_manager.get_account_by_id(account_id) is not None,
+        post_batch=transfer_service.post_batch
+    )
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    # Parsing and posting take locks and may fsync: keep them off the event loop
+    async for chunk in request.stream():
+        await run_in_threadpool(importer.feed, decoder.decode(chunk))
+    await run_in_threadpool(importer.feed, decoder.decode(b"", final=True))
+    report = await run_in_threadpool(importer.close)
+    return ImportReportResponse(
+        imported=report.imported,
+        rejected=report.rejected,
+        errors=report.errors,
+        first_id=report.first_id,
+        last_id=report.last_id,
+        seconds=report.seconds,
+        rows_per_second=report.rows_per_second
+    )
+
+
+@app.get("/transactions/export")
+async def export_transactions(format: str = "csv", account_id: Optional[int] = None,
+                              start_date: Optional[datetime] = None,
+                              end_date: Optional[datetime] = None, chunk_size: int = 1000):
+    """Stream transactions (oldest first) as CSV, NDJSON or columnar NDJSON row groups
+    
+    Rows are read and encoded one chunk at a time while the response is
+    sent, so memory use does not grow with the ledger size.
+    """
+    if format not in exporter.FORMATS:
+        raise HTTPException(status_code=400,
+                            detail=f"format must be one of {', '.join(exporter.FORMATS)}")
+    if chunk_size < 1:
+        raise HTTPException(status_code=400, detail="chunk_size must be positive")
+    if account_id is not None and not account_manager.get_account_by_id(account_id):
+        raise HTTPException(status_code=404, detail="Account not found")
+    
+    chunks = transaction_manager.export_transactions(account_id, start_date, end_date, chunk_size)
+    filename = f"transactions.{exporter.FILE_EXTENSIONS[format]}"
+    # A sync generator: Starlette pulls each chunk on the thread pool
+    return StreamingResponse(exporter.encode(chunks, format),
+                             media_type=exporter.MEDIA_TYPES[format],
+                             headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
+
+# Transaction reads may query the database: plain def endpoints run on the
+# thread pool, each with its own pooled connection, instead of the event loop
 @app.get("/transactions", response_model=List[TransactionResponse])
-async def get_transactions(limit: int = 10):
-    """Get recent transaction records"""
-    transactions = transaction_manager.get_recent_transactions(limit)
-    return [TransactionResponse(
-        id=t.id,
-        account_id=t.account_id,
-        amount=t.amount,
-        transaction_type=t.transaction_type,
-        description=t.description,
-        date=t.date
-    ) for t in transactions]
+def get_transactions(response: Response, limit: int = 10, cursor: Optional[str] = None,
+                     since: Optional[str] = None, account_id: Optional[int] = None,
+                     transaction_type: Optional[TransactionType] = None,
+                     start_date: Optional[datetime] = None, end_date: Optional[datetime] = None,
+                     min_amount: Optional[Decimal] = None, max_amount: Optional[Decimal] = None,
+                     category: Optional[str] = None, q: Optional[str] = None,
+                     account_type: Optional[AccountType] = None):
+    """Get transaction records ordered by (date, id)
+    
+    By default the newest first; cursor continues with older pages. With
+    since (any returned cursor) the transactions after it are returned
+    oldest first and X-Next-Cursor is always set, so clients can poll to
+    tail new transactions. Tailing follows (date, id): rows added with a
+    date before the cursor are not picked up.
+    
+    Any of account_id, transaction_type, start_date/end_date, min_amount/
+    max_amount (inclusive, compared with the absolute amount so an outgoing
+    transfer leg matches like the incoming one), category, account_type and q (description
+    words, as in /transactions/search) narrows the newest-first listing;
+    the query planner picks the index to read candidates from.
+    """
+    _check_limit(limit)
+    query = TransactionQuery(account_id, transaction_type, start_date, end_date,
+                             min_amount, max_amount, category, q, account_type)
+    filtered = query != TransactionQuery()
+    if since is not None:
+        if filtered:
+            raise HTTPException(status_code=400, detail="since cannot be combined with filters")
+        date, transaction_id = _decode_transaction_cursor(since)
+        transactions = transaction_manager.get_transactions_after(date, transaction_id, limit)
+        response.headers[NEXT_CURSOR_HEADER] = \
+            _transaction_cursor(transactions[-1]) if transactions else since
+    else:
+        before = _decode_transaction_cursor(cursor) if cursor is not None else None
+        if filtered:
+            transactions = transaction_manager.query_transactions(query, limit, before)
+        elif before is not None:
+            transactions = transaction_manager.get_transactions_before(*before, limit)
+        else:
+            transactions = transaction_manager.get_recent_transactions(limit)
+        if len(transactions) == limit:
+            response.headers[NEXT_CURSOR_HEADER] = _transaction_cursor(transactions[-1])
+    return _list_response(transactions, transaction_record, _transaction_response, response)
+
+
+@app.get("/transactions/search", response_model=List[TransactionResponse])
+def search_transactions(response: Response, q: str, account_id: Optional[int] = None,
+                        transaction_type: Optional[TransactionType] = None,
+                        start_date: Optional[datetime] = None,
+                        end_date: Optional[datetime] = None, limit: int = 10,
+                        cursor: Optional[str] = None):
+    """Full-text search of transaction descriptions, most recently recorded first
+    
+    Every word of q must start a word of the description (case-insensitive),
+    e.g. q=groc matches "Groceries". Pass X-Next-Cursor as cursor for more.
+    """
+    _check_limit(limit)
+    before_id = _decode_cursor(cursor, 1)[0] if cursor is not None else None
+    transactions = transaction_manager.search_transactions(
+        q, account_id, transaction_type, start_date, end_date, limit, before_id)
+    if len(transactions) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = _encode_cursor(transactions[-1].id)
+    return _list_response(transactions, transaction_record, _transaction_response, response)
+
+
+@app.put("/transactions/{transaction_id}", response_model=TransactionResponse)
+def update_transaction(transaction_id: int, transaction_data: TransactionUpdate):
+    """Change fields of a transaction (omitted fields are kept), moving the balances"""
+    changes = transaction_data.model_dump(exclude_none=True)
+    if "account_id" in changes and not account_manager.get_account_by_id(changes["account_id"]):
+        raise HTTPException(status_code=400, detail="Account not found")
+    if transaction_manager.get_transaction_by_id(transaction_id) is None:
+        raise HTTPException(status_code=404, detail="Transaction not found")
+    try:
+        transaction = transfer_service.revise(transaction_id, **changes)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _transaction_response(transaction)
+
+
+@app.delete("/transactions/{transaction_id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_transaction(transaction_id: int):
+    """Delete a transaction, undoing its balance change"""
+    try:
+        deleted = transfer_service.remove(transaction_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Transaction not found")
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
 # Budget related endpoints
 @app.post("/budgets", response_model=BudgetResponse, status_code=status.HTTP_201_CREATED)
-async def create_budget(budget_data: BudgetCreate):
+def create_budget(budget_data: BudgetCreate):
     """Create new budget"""
     try:
         budget = budget_manager.create_budget(
@@ -191,39 +892,135 @@ async def create_budget(budget_data: BudgetCreate):
             period=budget_data.period
         )
         
-        return BudgetResponse(
-            id=budget.id,
-            name=budget.name,
-            category=budget.category,
-            amount=budget.amount,
-            period=budget.period,
-            start_date=budget.start_date,
-            is_active=budget.is_active
-        )
+        return _budget_response(budget)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
 @app.get("/budgets", response_model=List[BudgetResponse])
-async def get_budgets():
-    """Get all active budgets"""
-    budgets = budget_manager.get_active_budgets()
-    return [BudgetResponse(
-        id=b.id,
-        name=b.name,
-        category=b.category,
-        amount=b.amount,
-        period=b.period,
-        start_date=b.start_date,
-        is_active=b.is_active
-    ) for b in budgets]
+async def get_budgets(response: Response, limit: Optional[int] = None,
+                      cursor: Optional[str] = None):
+    """Get active budgets in ID order: all of them, or one page with limit/cursor"""
+    if limit is None and cursor is None:
+        budgets = budget_manager.get_active_budgets()
+    else:
+        limit = 100 if limit is None else limit
+        _check_limit(limit)
+        after_id = _decode_cursor(cursor, 1)[0] if cursor is not None else None
+        budgets = budget_manager.get_active_budgets_page(after_id, limit)
+        if len(budgets) == limit:
+            response.headers[NEXT_CURSOR_HEADER] = _encode_cursor(budgets[-1].id)
+    return _list_response(budgets, budget_record, _budget_response, response)
+
+
+@app.get("/budgets/utilization", response_model=List[BudgetUtilizationResponse])
+async def get_budgets_utilization(as_of: Optional[date] = None):
+    """Get utilization of all active budgets for their current period"""
+    return [_utilization_response(u) for u in budget_utilization.compare_actual_vs_budget(as_of)]
+
+
+@app.get("/budgets/alerts", response_model=List[BudgetAlertResponse])
+async def get_budget_alerts(as_of: Optional[date] = None):
+    """Get the highest alert threshold currently reached by each active budget"""
+    return [_alert_response(a) for a in budget_alerts.check_budget_alerts(as_of)]
+
+
+async def _alert_events(request: Request, keepalive: float = 15.0):
+    """Server-sent events for alerts raised while the client is connected"""
+    queue = alert_stream.open()
+    try:
+        while not await request.is_disconnected():
+            try:
+                alert = await asyncio.wait_for(queue.get(), timeout=keepalive)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            yield f"event: budget_alert\ndata: {_alert_response(alert).model_dump_json()}\n\n"
+    finally:
+        alert_stream.close(queue)
+
+
+@app.get("/budgets/alerts/stream")
+async def stream_budget_alerts(request: Request):
+    """Stream budget alerts as server-sent events instead of polling"""
+    return StreamingResponse(_alert_events(request), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache"})
+
+
+@app.get("/budgets/{budget_id}/utilization", response_model=BudgetUtilizationResponse)
+async def get_budget_utilization(budget_id: int, as_of: Optional[date] = None):
+    """Get utilization of one budget for its current period"""
+    utilization = budget_utilization.calculate_budget_utilization(budget_id, as_of)
+    if utilization is None:
+        raise HTTPException(status_code=404, detail="Budget not found")
+    return _utilization_response(utilization)
+
+
+# Report endpoints
+@app.get("/reports/monthly", response_model=List[MonthlySummaryResponse])
+async def get_monthly_report(account_id: Optional[int] = None,
+                             start_date: Optional[datetime] = None,
+                             end_date: Optional[datetime] = None):
+    """Monthly income/expense/transfer totals"""
+    summaries = transaction_manager.calculate_monthly_summary(account_id, start_date, end_date)
+    return [MonthlySummaryResponse(
+        month=m.month,
+        income=m.income,
+        expense=m.expense,
+        transfer=m.transfer,
+        transfer_in=m.transfer_in,
+        transfer_out=m.transfer_out,
+        net=m.net,
+        transaction_count=m.transaction_count
+    ) for m in summaries]
+
+
+@app.get("/reports/daily", response_model=List[DailySummaryResponse])
+async def get_daily_report(account_id: Optional[int] = None,
+                           start_day: Optional[date] = None,
+                           end_day: Optional[date] = None):
+    """Daily income/expense/transfer totals"""
+    summaries = transaction_manager.calculate_daily_summary(account_id, start_day, end_day)
+    return [DailySummaryResponse(
+        day=d.day,
+        income=d.income,
+        expense=d.expense,
+        transfer=d.transfer,
+        transfer_in=d.transfer_in,
+        transfer_out=d.transfer_out,
+        net=d.net,
+        transaction_count=d.transaction_count
+    ) for d in summaries]
+
+
+@app.get("/reports/summary", response_model=SummaryReportResponse)
+async def get_summary_report(account_id: Optional[int] = None,
+                             start_date: Optional[datetime] = None,
+                             end_date: Optional[datetime] = None):
+    """Overall totals with income and expense broken down by category"""
+    summaries = transaction_manager.calculate_monthly_summary(account_id, start_date, end_date)
+    total_income = sum((m.income for m in summaries), Decimal('0'))
+    total_expense = sum((m.expense for m in summaries), Decimal('0'))
+    return SummaryReportResponse(
+        total_income=total_income,
+        total_expense=total_expense,
+        total_transfer=sum((m.transfer for m in summaries), Decimal('0')),
+        total_transfer_in=sum((m.transfer_in for m in summaries), Decimal('0')),
+        total_transfer_out=sum((m.transfer_out for m in summaries), Decimal('0')),
+        net=total_income - total_expense,
+        transaction_count=sum(m.transaction_count for m in summaries),
+        expense_by_category=transaction_manager.calculate_category_totals(
+            TransactionType.EXPENSE, account_id, start_date, end_date),
+        income_by_category=transaction_manager.calculate_category_totals(
+            TransactionType.INCOME, account_id, start_date, end_date)
+    )
 
 
 # Basic information endpoints
 @app.get("/", response_class=HTMLResponse)
-async def root():
+async def root(request: Request):
     """Web interface homepage"""
-    return get_web_interface()
+    return get_web_interface(request)
 
 
 @app.get("/api")
@@ -245,18 +1042,9 @@ async def health_check():
 # TODO: Need to add the following API endpoints:
 # - PUT /accounts/{id}: Update account information
 # - DELETE /accounts/{id}: Delete account
-# - POST /accounts/{id}/deposit: Deposit operation
-# - POST /accounts/{id}/withdraw: Withdrawal operation
-# - POST /accounts/transfer: Transfer between accounts
 # - GET /transactions/{id}: Get specific transaction
-# - PUT /transactions/{id}: Update transaction
-# - DELETE /transactions/{id}: Delete transaction
-# - GET /accounts/{id}/transactions: Get account transaction history
 # - PUT /budgets/{id}: Update budget
 # - DELETE /budgets/{id}: Delete budget
-# - GET /budgets/{id}/utilization: Get budget utilization
-# - GET /reports/summary: Financial summary report
-# - GET /reports/monthly: Monthly report
 # - Authentication and authorization middleware
 # - Request validation and error handling
 # - API documentation and test cases
\ No newline at end of file
@@ -3,10 +3,13 @@ Personal Finance Management System - Budget Management Module
 Intentionally implements only basic functionality, missing alerts, analysis and advanced management features
 """
 
-from datetime import datetime, date
+import threading
+from bisect import bisect_right
+from datetime import datetime, date, timedelta
+from itertools import islice
 from decimal import Decimal
 from enum import Enum
-from typing import Optional, List, Dict
+from typing import Callable, Optional, List, Dict, Tuple
 from dataclasses import dataclass
 
 
@@ -17,7 +20,28 @@ class BudgetPeriod(Enum):
     YEARLY = "yearly"
 
 
-@dataclass
+# Calendar months covered by each budget period
+PERIOD_MONTHS = {
+    BudgetPeriod.MONTHLY: 1,
+    BudgetPeriod.QUARTERLY: 3,
+    BudgetPeriod.YEARLY: 12,
+}
+
+
+def period_bounds(period: BudgetPeriod, as_of: date) -> Tuple[date, date]:
+    """First and last day of the calendar period containing as_of"""
+    months = PERIOD_MONTHS[period]
+    first_month = (as_of.month - 1) // months * months + 1
+    start = date(as_of.year, first_month, 1)
+    next_month = first_month + months
+    if next_month > 12:
+        end = date(as_of.year + 1, next_month - 12, 1)
+    else:
+        end = date(as_of.year, next_month, 1)
+    return start, end - timedelta(days=1)
+
+
+@dataclass(slots=True)
 class Budget:
     """Budget"""
     id: Optional[int] = None
@@ -39,6 +63,21 @@ class BudgetManager:
     def __init__(self):
         self.budgets: List[Budget] = []
         self.next_id = 1
+        # Hash indexes kept in sync with self.budgets
+        self._budgets_by_id: Dict[int, Budget] = {}
+        self._budgets_by_name: Dict[str, Budget] = {}  # Latest budget per name
+        self._budgets_by_category: Dict[str, List[Budget]] = {}
+        self._listeners: List[Callable[[str, Budget], None]] = []
+        self._lock = threading.Lock()  # Guards the budget list, indexes and ID counter
+    
+    def subscribe(self, listener: Callable[[str, Budget], None]) -> None:
+        """Register listener(event, budget) called after each change"""
+        self._listeners.append(listener)
+    
+    def _notify(self, event: str, budget: Budget) -> None:
+        """Call listeners with a change event ("create")"""
+        for listener in self._listeners:
+            listener(event, budget)
     
     def create_budget(self, name: str, category: str, amount: Decimal, 
                      period: BudgetPeriod = BudgetPeriod.MONTHLY) -> Budget:
@@ -46,33 +85,58 @@ class BudgetManager:
         if amount <= 0:
             raise ValueError("Budget amount must be positive")
         
-        # Simple duplicate check
-        if any(b.name == name and b.is_active for b in self.budgets):
-            raise ValueError(f"Active budget with name '{name}' already exists")
-        
-        budget = Budget(
-            id=self.next_id,
-            name=name,
-            category=category,
-            amount=amount,
-            period=period
-        )
-        
-        self.next_id += 1
-        self.budgets.append(budget)
+        with self._lock:
+            # Duplicate check via name index
+            existing = self._budgets_by_name.get(name)
+            if existing is not None and existing.is_active:
+                raise ValueError(f"Active budget with name '{name}' already exists")
+            
+            budget = Budget(
+                id=self.next_id,
+                name=name,
+                category=category,
+                amount=amount,
+                period=period
+            )
+            
+            self.next_id += 1
+            self.budgets.append(budget)
+            self._index_budget(budget)
+        self._notify("create", budget)
         return budget
     
+    def restore_budget(self, budget: Budget) -> None:
+        """Re-insert a budget with its original ID (used when replaying stored state)"""
+        with self._lock:
+            self.budgets.append(budget)
+            self._index_budget(budget)
+            self.next_id = max(self.next_id, budget.id + 1)
+    
     def get_budget_by_id(self, budget_id: int) -> Optional[Budget]:
         """Get budget by ID"""
-        for budget in self.budgets:
-            if budget.id == budget_id:
-                return budget
-        return None
+        return self._budgets_by_id.get(budget_id)
+    
+    def _index_budget(self, budget: Budget) -> None:
+        """Add budget to the ID and name indexes"""
+        self._budgets_by_id[budget.id] = budget
+        self._budgets_by_name[budget.name] = budget
+        self._budgets_by_category.setdefault(budget.category, []).append(budget)
+    
+    def get_budgets_by_category(self, category: str) -> List[Budget]:
+        """Get active budgets for a category"""
+        return [b for b in self._budgets_by_category.get(category, ()) if b.is_active]
     
     def get_active_budgets(self) -> List[Budget]:
         """Get all active budgets"""
         return [b for b in self.budgets if b.is_active]
     
+    def get_active_budgets_page(self, after_id: Optional[int] = None,
+                                limit: int = 10) -> List[Budget]:
+        """Get up to limit active budgets with IDs greater than after_id, in ID order"""
+        start = 0 if after_id is None else bisect_right(self.budgets, after_id,
+                                                        key=lambda b: b.id)
+        return list(islice((b for b in islice(self.budgets, start, None) if b.is_active), limit))
+    
     def get_total_budget_amount(self) -> Decimal:
         """Get total amount of all active budgets"""
         return sum(b.amount for b in self.budgets if b.is_active)
@@ -81,11 +145,7 @@ class BudgetManager:
     # - update_budget(budget_id, **kwargs): Update budget
     # - delete_budget(budget_id): Delete budget
     # - deactivate_budget(budget_id): Deactivate budget
-    # - get_budgets_by_category(category): Get budgets by category
-    # - calculate_budget_utilization(): Calculate budget utilization
-    # - check_budget_alerts(): Check budget alerts
     # - generate_budget_report(): Generate budget report
-    # - compare_actual_vs_budget(): Compare actual spending vs budget
     # - suggest_budget_adjustments(): Suggest budget adjustments
     # - set_budget_alerts(): Set budget reminders
     # - copy_budget(): Copy budget to new period
@@ -0,0 +1,222 @@
+"""
+Personal Finance Management System - Columnar Transaction Storage Module
+Alternative TransactionManager backend that keeps rows in compact typed arrays
+"""
+
+import math
+from array import array
+from bisect import bisect_left
+from collections.abc import Sequence
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import aggregation
+from aggregation import AMOUNT_SCALE, ColumnBatch, amount_exponent, from_scaled_exact, to_scaled
+from indexes import to_epoch_us, from_epoch_us
+from transaction import (Transaction, TransactionColumns, TransactionManager, TransactionQuery,
+                         TYPE_CODES, TYPES_BY_CODE)
+
+
+class TransactionRowView(Sequence):
+    """Read-only sequence view that materializes Transaction objects on access"""
+
+    def __init__(self, manager: "ColumnarTransactionManager"):
+        self._manager = manager
+
+    def __len__(self) -> int:
+        return len(self._manager._ids)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._manager._row(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("transaction index out of range")
+        return self._manager._row(index)
+
+    def __iter__(self) -> Iterator[Transaction]:
+        row = self._manager._row
+        for i in range(len(self)):
+            yield row(i)
+
+
+class ColumnarTransactionManager(TransactionManager):
+    """Transaction manager storing one typed array per column
+
+    Per row this keeps int64 id, account id, scaled amount and epoch
+    microseconds, an int8 type code and amount exponent, and int32 codes
+    into a table of interned descriptions and categories. Transaction
+    objects are only built when they are returned to the caller. Dates are
+    stored as naive datetimes (aware dates are converted to UTC).
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._ids = array('q')
+        self._account_ids = array('q')
+        self._amounts = array('q')       # amount scaled by 10**AMOUNT_DIGITS
+        self._amount_exps = array('b')   # Decimal exponent, preserves '5.5' vs '5.50'
+        self._types = array('b')
+        self._dates = array('q')         # Microseconds since the epoch
+        self._descriptions = array('i')
+        self._categories = array('i')
+        self._strings: List[str] = []
+        self._string_codes: Dict[str, int] = {}
+        self.transactions = TransactionRowView(self)
+
+    def _intern(self, text: str) -> int:
+        """Get the code of an interned string, adding it if needed"""
+        code = self._string_codes.get(text)
+        if code is None:
+            code = self._string_codes[text] = len(self._strings)
+            self._strings.append(text)
+        return code
+
+    def _store(self, transaction: Transaction) -> None:
+        """Append transaction as one entry per column"""
+        exponent = amount_exponent(transaction.amount)
+        if self._ids and transaction.id <= self._ids[-1]:
+            raise ValueError("Transaction IDs must be appended in increasing order")
+
+        self._account_ids.append(transaction.account_id)
+        self._amounts.append(to_scaled(transaction.amount))
+        self._amount_exps.append(exponent)
+        self._types.append(TYPE_CODES[transaction.transaction_type])
+        self._dates.append(to_epoch_us(transaction.date))
+        self._descriptions.append(self._intern(transaction.description))
+        self._categories.append(self._intern(transaction.category))
+        # Last, so that lock-free readers finding the ID see the whole row
+        self._ids.append(transaction.id)
+
+    def _replace(self, old: Transaction, transaction: Transaction) -> None:
+        """Overwrite the row's entries in place (the ID and so the position stay)"""
+        position = self._position_of(old.id)
+        self._account_ids[position] = transaction.account_id
+        self._amounts[position] = to_scaled(transaction.amount)
+        self._amount_exps[position] = amount_exponent(transaction.amount)
+        self._types[position] = TYPE_CODES[transaction.transaction_type]
+        self._dates[position] = to_epoch_us(transaction.date)
+        self._descriptions[position] = self._intern(transaction.description)
+        self._categories[position] = self._intern(transaction.category)
+
+    def _delete(self, transaction: Transaction) -> None:
+        """Remove the row's entry from every column, shifting later rows down"""
+        position = self._position_of(transaction.id)
+        for name in TransactionColumns.array_fields():
+            del getattr(self, f"_{name}")[position]
+
+    def _row(self, position: int) -> Transaction:
+        """Materialize the transaction stored at a row position"""
+        return Transaction(
+            id=self._ids[position],
+            account_id=self._account_ids[position],
+            amount=from_scaled_exact(self._amounts[position], self._amount_exps[position]),
+            transaction_type=TYPES_BY_CODE[self._types[position]],
+            description=self._strings[self._descriptions[position]],
+            date=from_epoch_us(self._dates[position]),
+            category=self._strings[self._categories[position]]
+        )
+
+    def _position_of(self, transaction_id: int) -> Optional[int]:
+        """Row position of a transaction ID (IDs are stored in ascending order)"""
+        position = bisect_left(self._ids, transaction_id)
+        if position < len(self._ids) and self._ids[position] == transaction_id:
+            return position
+        return None
+
+    def _materialize(self, transaction_ids: List[int]) -> List[Transaction]:
+        """Resolve indexed IDs to freshly built transaction records
+
+        Under the lock, since a delete shifts the positions of later rows.
+        """
+        with self._lock:
+            positions = [self._position_of(tid) for tid in transaction_ids]
+            return [self._row(position) for position in positions if position is not None]
+
+    def get_transaction_by_id(self, transaction_id: int) -> Optional[Transaction]:
+        """Get transaction by ID"""
+        with self._lock:
+            position = self._position_of(transaction_id)
+            return self._row(position) if position is not None else None
+
+    def _filter_keys(self, transaction_ids: Sequence[int],
+                     query: TransactionQuery) -> List[Tuple[int, int]]:
+        """Check the filters on the columns in one vectorized pass, without
+        building any row"""
+        np = aggregation.np
+        if np is None:
+            return super()._filter_keys(transaction_ids, query)
+        candidates = np.frombuffer(transaction_ids, dtype=np.int64) \
+            if isinstance(transaction_ids, array) else np.asarray(transaction_ids, dtype=np.int64)
+        with self._lock:
+            if not len(candidates) or not len(self._ids):
+                return []
+            ids = np.frombuffer(self._ids, dtype=np.int64)
+            positions = np.searchsorted(ids, candidates)
+            positions[positions == len(ids)] = 0
+            mask = ids[positions] == candidates   # Not deleted meanwhile
+            del ids   # Release each buffer view before the lock, so appends can resize
+            if query.account_id is not None:
+                mask &= np.frombuffer(self._account_ids, dtype=np.int64)[positions] == \
+                    query.account_id
+            if query.transaction_type is not None:
+                mask &= np.frombuffer(self._types, dtype=np.int8)[positions] == \
+                    TYPE_CODES[query.transaction_type]
+            if query.category is not None:
+                code = self._string_codes.get(query.category, -1)
+                mask &= np.frombuffer(self._categories, dtype=np.int32)[positions] == code
+            if query.min_amount is not None or query.max_amount is not None:
+                amounts = np.abs(np.frombuffer(self._amounts, dtype=np.int64)[positions])
+                if query.min_amount is not None:
+                    mask &= amounts >= math.ceil(query.min_amount * AMOUNT_SCALE)
+                if query.max_amount is not None:
+                    mask &= amounts <= math.floor(query.max_amount * AMOUNT_SCALE)
+            dates = np.frombuffer(self._dates, dtype=np.int64)[positions]
+            if query.start_date is not None:
+                mask &= dates >= to_epoch_us(query.start_date)
+            if query.end_date is not None:
+                mask &= dates <= to_epoch_us(query.end_date)
+        return list(zip(dates[mask].tolist(), candidates[mask].tolist()))
+
+    def column_batch(self) -> ColumnBatch:
+        """Expose the stored columns directly, without copying"""
+        return ColumnBatch(
+            account_ids=self._account_ids,
+            dates=self._dates,
+            types=self._types,
+            categories=self._categories,
+            amounts=self._amounts,
+            strings=self._strings
+        )
+
+    def export_columns(self, count: Optional[int] = None) -> TransactionColumns:
+        """Copy the first count rows (default all) of every column"""
+        with self._lock:
+            count = len(self._ids) if count is None else count
+            return TransactionColumns(
+                ids=self._ids[:count],
+                account_ids=self._account_ids[:count],
+                amounts=self._amounts[:count],
+                amount_exps=self._amount_exps[:count],
+                types=self._types[:count],
+                dates=self._dates[:count],
+                descriptions=self._descriptions[:count],
+                categories=self._categories[:count],
+                strings=list(self._strings)
+            )
+
+    def import_columns(self, columns: TransactionColumns) -> None:
+        """Adopt exported columns (IDs ascending) as the backing arrays, without per-row work"""
+        if len(self._ids):
+            raise ValueError("Transactions can only be imported into an empty manager")
+        self._ids = columns.ids
+        self._account_ids = columns.account_ids
+        self._amounts = columns.amounts
+        self._amount_exps = columns.amount_exps
+        self._types = columns.types
+        self._dates = columns.dates
+        self._descriptions = columns.descriptions
+        self._categories = columns.categories
+        self._strings = list(columns.strings)
+        self._string_codes = {text: code for code, text in enumerate(self._strings)}
+        self._rebuild_indexes(columns)
@@ -0,0 +1,93 @@
+"""
+Personal Finance Management System - Compression Module
+Content-Encoding negotiation, gzip/brotli encoding of response bodies, and
+static pages encoded once with every supported encoding
+"""
+
+import gzip
+from typing import Dict, Optional, Sequence, Tuple
+
+try:
+    import brotli
+except ImportError:  # brotli is optional: gzip only without it
+    brotli = None
+
+from response_cache import etag_matches, make_etag
+
+MIN_COMPRESS_BYTES = 1024   # Smaller bodies fit a few packets anyway
+GZIP_LEVEL = 6              # Per-response levels: most of the size gain at a fraction of the
+BROTLI_QUALITY = 5          # CPU of the highest ones, which static pages use (paid once)
+STATIC_MAX_AGE = 24 * 3600  # The page URL is not versioned: revalidate after a day
+
+
+def available_encodings() -> Tuple[str, ...]:
+    """Supported content codings, preferred first"""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate(accept_encoding: Optional[str],
+              encodings: Sequence[str]) -> Optional[str]:
+    """The encoding of encodings the client accepts with the highest q-value
+    (the earliest on ties), or None to send the body as is"""
+    if not accept_encoding:
+        return None
+    accepted: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, parameters = part.partition(";")
+        quality = 1.0
+        parameter, _, value = parameters.strip().partition("=")
+        if parameter.strip().lower() == "q":
+            try:
+                quality = float(value)
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    best, best_quality = None, 0.0
+    for encoding in encodings:
+        quality = accepted.get(encoding, accepted.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(body: bytes, encoding: str, best: bool = False) -> bytes:
+    """body encoded with encoding ("br" or "gzip"), at the highest level if best"""
+    if encoding == "br":
+        return brotli.compress(body, quality=11 if best else BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=9 if best else GZIP_LEVEL, mtime=0)
+
+
+def variant_etag(etag: str, encoding: Optional[str]) -> str:
+    """Strong ETag of a body sent with encoding (an encoded body is other bytes)"""
+    return etag if encoding is None else f'{etag[:-1]}-{encoding}"'
+
+
+class StaticPage:
+    """A body that does not change while the process runs, encoded once
+    with every available encoding and served with a strong ETag
+
+    Variants not smaller than the body itself are not kept.
+    """
+
+    def __init__(self, body: bytes, media_type: str, max_age: int = STATIC_MAX_AGE):
+        self.etag = make_etag(body)
+        self.variants: Dict[Optional[str], bytes] = {None: body}
+        for encoding in available_encodings():
+            encoded = compress(body, encoding, best=True)
+            if len(encoded) < len(body):
+                self.variants[encoding] = encoded
+        self.headers = {"Content-Type": media_type, "Vary": "Accept-Encoding",
+                        "Cache-Control": f"public, max-age={max_age}"}
+
+    def respond(self, accept_encoding: Optional[str],
+                if_none_match: Optional[str]) -> Tuple[int, bytes, Dict[str, str]]:
+        """Status, body and headers of a response to a request with those headers:
+        the best accepted variant, or 304 when the client holds it"""
+        encoding = negotiate(accept_encoding, [e for e in self.variants if e is not None])
+        etag = variant_etag(self.etag, encoding)
+        headers = {**self.headers, "ETag": etag}
+        if etag_matches(if_none_match, etag):
+            return 304, b"", headers
+        if encoding is not None:
+            headers["Content-Encoding"] = encoding
+        return 200, self.variants[encoding], headers
@@ -0,0 +1,66 @@
+"""
+Personal Finance Management System - Transaction Export Module
+Encodes chunks of transactions as CSV, NDJSON or columnar NDJSON text
+"""
+
+import csv
+import io
+import json
+from typing import Dict, Iterable, Iterator, List
+
+from transaction import Transaction
+
+FORMATS = ("csv", "ndjson", "columns")
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "columns": "application/x-ndjson",
+}
+FILE_EXTENSIONS = {"csv": "csv", "ndjson": "ndjson", "columns": "columns.ndjson"}
+FIELDS = ("id", "account_id", "amount", "transaction_type", "description", "date", "category")
+
+
+def _values(t: Transaction) -> List:
+    """Field values in FIELDS order as JSON/CSV-friendly scalars"""
+    return [t.id, t.account_id, str(t.amount), t.transaction_type.value, t.description,
+            t.date.isoformat(), t.category]
+
+
+def encode_csv(chunks: Iterable[List[Transaction]]) -> Iterator[str]:
+    """Header line, then one text block per chunk (readable by the importer)"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(FIELDS)
+    yield buffer.getvalue()
+    for chunk in chunks:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(_values(t) for t in chunk)
+        yield buffer.getvalue()
+
+
+def encode_ndjson(chunks: Iterable[List[Transaction]]) -> Iterator[str]:
+    """One JSON object per transaction and line"""
+    for chunk in chunks:
+        yield "".join(json.dumps(dict(zip(FIELDS, _values(t)))) + "\n" for t in chunk)
+
+
+def encode_columns(chunks: Iterable[List[Transaction]]) -> Iterator[str]:
+    """One JSON object per chunk (a row group) holding an array per field"""
+    for chunk in chunks:
+        columns: Dict[str, List] = {name: [] for name in FIELDS}
+        appends = [columns[name].append for name in FIELDS]
+        for t in chunk:
+            for append, value in zip(appends, _values(t)):
+                append(value)
+        yield json.dumps({"rows": len(chunk), **columns}) + "\n"
+
+
+ENCODERS = {"csv": encode_csv, "ndjson": encode_ndjson, "columns": encode_columns}
+
+
+def encode(chunks: Iterable[List[Transaction]], format: str = "csv") -> Iterator[str]:
+    """Encode transaction chunks lazily in one of FORMATS"""
+    if format not in ENCODERS:
+        raise ValueError(f"Unsupported export format: {format}")
+    return ENCODERS[format](chunks)
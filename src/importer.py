@@ -0,0 +1,275 @@
+"""
+Personal Finance Management System - Transaction Import Module
+Stream-parses CSV/NDJSON bank exports and inserts transactions in batches
+
+Usage: python src/importer.py FILE [--format csv|ndjson] [--chunk-size N]
+                              [--sqlite PATH | --wal-dir DIR]
+"""
+
+import argparse
+import csv
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from aggregation import amount_exponent
+from transaction import Transaction, TransactionManager, TransactionType, check_amount
+
+FORMATS = ("csv", "ndjson")
+DEFAULT_CHUNK_SIZE = 10_000
+READ_SIZE = 1 << 20   # Characters read from a file per feed()
+
+
+@dataclass(slots=True)
+class ImportReport:
+    """Outcome of one import"""
+    imported: int = 0
+    rejected: int = 0
+    errors: List[Tuple[int, str]] = field(default_factory=list)  # (line, message), capped
+    first_id: Optional[int] = None
+    last_id: Optional[int] = None
+    seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        """Imported rows per second of wall time"""
+        return self.imported / self.seconds if self.seconds > 0 else 0.0
+
+
+def parse_record(record: Dict[str, Any]) -> Tuple:
+    """Validate one exported row into an add_transactions() record
+
+    Needs account_id, amount and date. Without a transaction_type the sign
+    of the amount decides (negative amounts are expenses); with one the
+    amount must be positive, or non-zero for transfers (negative when
+    leaving the account). Raises ValueError describing the first problem.
+    """
+    try:
+        account_id = int(record["account_id"])
+        amount = Decimal(str(record["amount"]).strip())
+        date = datetime.fromisoformat(str(record["date"]).strip())
+    except KeyError as e:
+        raise ValueError(f"Missing field {e.args[0]}")
+    except (InvalidOperation, TypeError, ValueError):
+        raise ValueError("Invalid account_id, amount or date")
+    if not amount.is_finite():
+        raise ValueError("Invalid account_id, amount or date")
+
+    type_name = (record.get("transaction_type") or "").strip().lower()
+    if type_name:
+        try:
+            transaction_type = TransactionType(type_name)
+        except ValueError:
+            raise ValueError(f"Unknown transaction type: {type_name}")
+    else:
+        transaction_type = TransactionType.EXPENSE if amount < 0 else TransactionType.INCOME
+        amount = abs(amount)
+    check_amount(amount, transaction_type)
+    amount_exponent(amount)
+    return (account_id, amount, transaction_type, record.get("description") or "", date,
+            record.get("category") or "")
+
+
+class TransactionImporter:
+    """Incremental importer fed with text as it arrives
+
+    Input is split into lines (one record per line: CSV fields may not
+    contain line breaks) and parsed records are buffered until chunk_size
+    are ready, then added with one add_transactions() call, so memory is
+    bounded by the chunk size rather than the file size. Invalid rows are
+    skipped and reported with their line number.
+
+    With post_batch (TransferService.post_batch) chunks are posted instead:
+    each row moves its account's balance, and rows the posting rules refuse
+    (transfers, overdrafts) are reported like invalid ones.
+    """
+
+    def __init__(self, manager: TransactionManager, format: str = "csv",
+                 chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 account_exists: Optional[Callable[[int], bool]] = None,
+                 max_errors: int = 100,
+                 post_batch: Optional[Callable[[List[Tuple]], Tuple[
+                     List[Transaction], List[Optional[str]]]]] = None):
+        if format not in FORMATS:
+            raise ValueError(f"Unsupported import format: {format}")
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be positive")
+        self.manager = manager
+        self.format = format
+        self.chunk_size = chunk_size
+        self.account_exists = account_exists
+        self.max_errors = max_errors
+        self.post_batch = post_batch
+        self.report = ImportReport()
+        self._partial = ""
+        self._line = 0
+        self._header: Optional[List[str]] = None
+        self._records: List[Tuple] = []
+        self._record_lines: List[int] = []
+        self._started = time.perf_counter()
+
+    def feed(self, text: str) -> None:
+        """Parse the complete lines in text, keeping a trailing partial line"""
+        lines = (self._partial + text).split("\n")
+        self._partial = lines.pop()
+        self.feed_lines(lines)
+
+    def feed_lines(self, lines: Iterable[str]) -> None:
+        """Parse complete lines (line endings are optional)"""
+        for line in lines:
+            self._line += 1
+            line = line.rstrip("\r\n")
+            if not line.strip():
+                continue
+            try:
+                record = self._decode(line)
+                if record is None:
+                    continue
+                parsed = parse_record(record)
+                if self.account_exists is not None and not self.account_exists(parsed[0]):
+                    raise ValueError(f"Account {parsed[0]} not found")
+            except ValueError as e:
+                self._reject(str(e))
+                continue
+            self._records.append(parsed)
+            self._record_lines.append(self._line)
+            if len(self._records) >= self.chunk_size:
+                self.flush()
+
+    def _decode(self, line: str) -> Optional[Dict[str, Any]]:
+        """Field mapping of one line, None for the CSV header"""
+        if self.format == "ndjson":
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                raise ValueError("Invalid JSON")
+            if not isinstance(record, dict):
+                raise ValueError("Expected a JSON object")
+            return record
+        row = next(csv.reader([line]))
+        if self._header is None:
+            self._header = [name.strip().lower() for name in row]
+            return None
+        if len(row) != len(self._header):
+            raise ValueError(f"Expected {len(self._header)} fields, got {len(row)}")
+        return dict(zip(self._header, row))
+
+    def _reject(self, message: str, line: Optional[int] = None) -> None:
+        self.report.rejected += 1
+        if len(self.report.errors) < self.max_errors:
+            self.report.errors.append((self._line if line is None else line, message))
+
+    def flush(self) -> None:
+        """Add (or post) the buffered records as one batch"""
+        if not self._records:
+            return
+        records, self._records = self._records, []
+        lines, self._record_lines = self._record_lines, []
+        if self.post_batch is None:
+            added: List[Transaction] = self.manager.add_transactions(records)
+        else:
+            added, errors = self.post_batch(records)
+            for line, error in zip(lines, errors):
+                if error is not None:
+                    self._reject(error, line)
+            if not added:
+                return
+        report = self.report
+        report.imported += len(added)
+        if report.first_id is None:
+            report.first_id = added[0].id
+        report.last_id = added[-1].id
+
+    def close(self) -> ImportReport:
+        """Parse any final unterminated line, add the last batch and return the report"""
+        if self._partial:
+            partial, self._partial = self._partial, ""
+            self.feed_lines([partial])
+        self.flush()
+        self.report.seconds = time.perf_counter() - self._started
+        return self.report
+
+
+def detect_format(path: str) -> str:
+    """Import format from a file extension (.ndjson/.jsonl, otherwise CSV)"""
+    return "ndjson" if os.path.splitext(path)[1].lower() in (".ndjson", ".jsonl") else "csv"
+
+
+def import_file(manager: TransactionManager, path: str, format: Optional[str] = None,
+                **options) -> ImportReport:
+    """Import a CSV or NDJSON file, reading it in fixed-size pieces"""
+    importer = TransactionImporter(manager, format or detect_format(path), **options)
+    with open(path, encoding="utf-8-sig", newline="") as stream:
+        while True:
+            text = stream.read(READ_SIZE)
+            if not text:
+                break
+            importer.feed(text)
+    return importer.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line import into a SQLite database or write-ahead log directory
+
+    Rows are posted to the stored accounts (see TransactionImporter). The
+    storage must not be open in a running API server at the same time.
+    """
+    from account import AccountManager
+    from budget import BudgetManager
+
+    parser = argparse.ArgumentParser(description="Import transactions from a bank export")
+    parser.add_argument("path", help="CSV or NDJSON file")
+    parser.add_argument("--format", choices=FORMATS, help="default: from the file extension")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    storage = parser.add_mutually_exclusive_group()
+    storage.add_argument("--sqlite", metavar="PATH", help="import into this SQLite database")
+    storage.add_argument("--wal-dir", metavar="DIR", help="import into this write-ahead log")
+    args = parser.parse_args(argv)
+
+    accounts, budgets = AccountManager(), BudgetManager()
+    close = atomic = None
+    if args.sqlite:
+        from sqlite_repository import SqliteRepository, SqliteTransactionManager
+        repository = SqliteRepository(args.sqlite)
+        manager = SqliteTransactionManager(repository)
+        repository.load(accounts, budgets)
+        repository.attach(accounts, budgets)
+        manager.load()
+        close, atomic = repository.close, repository.atomic
+    elif args.wal_dir:
+        from journal import ManagerJournal
+        from snapshot import restore
+        from wal import Durability, WriteAheadLog
+        journal = ManagerJournal(WriteAheadLog(args.wal_dir, Durability.BATCH), accounts,
+                                 TransactionManager(), budgets)
+        restore(journal)
+        journal.attach()
+        manager = journal.transaction_manager
+        close, atomic = journal.wal.close, journal.atomic
+    else:
+        manager = TransactionManager()   # Validation only
+    account_exists = post_batch = None
+    if args.sqlite or args.wal_dir:
+        from transfers import TransferService
+        account_exists = lambda account_id: accounts.get_account_by_id(account_id) is not None
+        post_batch = TransferService(accounts, manager, atomic).post_batch
+
+    try:
+        report = import_file(manager, args.path, args.format, chunk_size=args.chunk_size,
+                             account_exists=account_exists, post_batch=post_batch)
+    finally:
+        if close is not None:
+            close()
+    for line, message in report.errors:
+        print(f"line {line}: {message}")
+    print(f"Imported {report.imported:,} transactions in {report.seconds:.2f}s "
+          f"({report.rows_per_second:,.0f} rows/s), rejected {report.rejected:,}")
+    return 0 if report.rejected == 0 else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,778 @@
+"""
+Personal Finance Management System - Index Structures Module
+Ordered in-memory indexes shared by the managers
+"""
+
+import re
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from heapq import merge
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Hashable, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional
+    np = None
+
+from aggregation import sort_order
+
+EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+_WORD = re.compile(r"\w+")
+
+
+def to_epoch_us(date: datetime) -> int:
+    """Convert datetime to integer microseconds since the epoch (aware dates as UTC)"""
+    if date.tzinfo is not None:
+        date = date.astimezone(timezone.utc).replace(tzinfo=None)
+    return (date - EPOCH) // _MICROSECOND
+
+
+def from_epoch_us(value: int) -> datetime:
+    """Convert integer microseconds since the epoch back to a naive datetime"""
+    return EPOCH + timedelta(microseconds=value)
+
+
+class TimeOrderedIndex:
+    """Transaction IDs kept sorted by (date, id)
+
+    Entries are stored in two parallel int64 arrays (epoch microseconds and
+    IDs) so that appends in date order (the common case) are O(1) and
+    out-of-order inserts fall back to a binary search. Range and top-N
+    queries cost O(log n + k).
+    """
+
+    def __init__(self):
+        self._dates = array('q')
+        self._ids = array('q')
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    @classmethod
+    def from_sorted(cls, dates: array, ids: array) -> "TimeOrderedIndex":
+        """Wrap epoch_us and ID columns that are already sorted by (date, id)"""
+        index = cls()
+        index._dates = dates
+        index._ids = ids
+        return index
+
+    def _position(self, key: int, transaction_id: int) -> int:
+        """Insertion position of the (epoch_us, id) key"""
+        lo = bisect_left(self._dates, key)
+        hi = bisect_right(self._dates, key, lo)
+        return bisect_left(self._ids, transaction_id, lo, hi)
+
+    def add(self, date: datetime, transaction_id: int) -> None:
+        """Insert an entry, appending when it is the newest"""
+        key = to_epoch_us(date)
+        if not self._dates or (key, transaction_id) > (self._dates[-1], self._ids[-1]):
+            self._dates.append(key)
+            self._ids.append(transaction_id)
+            return
+        position = self._position(key, transaction_id)
+        self._dates.insert(position, key)
+        self._ids.insert(position, transaction_id)
+
+    def extend(self, keys: List[Tuple[int, int]]) -> None:
+        """Insert many (epoch_us, id) entries with one merge instead of one insert each
+
+        Only the part of the index newer than the oldest new key is rewritten,
+        so a batch of recent rows costs O(k log k) plus the overlapping tail.
+        """
+        if not keys:
+            return
+        keys = sorted(keys)
+        start = len(self._ids)
+        if self._ids and keys[0] < (self._dates[-1], self._ids[-1]):
+            start = self._position(*keys[0])
+            keys = list(merge(zip(self._dates[start:], self._ids[start:]), keys))
+            del self._dates[start:]
+            del self._ids[start:]
+        self._dates.extend(key for key, _ in keys)
+        self._ids.extend(transaction_id for _, transaction_id in keys)
+
+    def remove(self, date: datetime, transaction_id: int) -> bool:
+        """Remove an entry, returns False if it is not indexed"""
+        key = to_epoch_us(date)
+        position = self._position(key, transaction_id)
+        if position < len(self._ids) and self._ids[position] == transaction_id \
+                and self._dates[position] == key:
+            del self._dates[position]
+            del self._ids[position]
+            return True
+        return False
+
+    def latest(self, limit: int, offset: int = 0) -> List[int]:
+        """IDs of the newest entries after skipping offset, newest first"""
+        end = max(len(self._ids) - offset, 0)
+        start = max(end - limit, 0)
+        return self._ids[start:end].tolist()[::-1]
+
+    def before(self, date: datetime, transaction_id: int, limit: int) -> List[int]:
+        """IDs strictly older than the (date, id) key, newest first"""
+        end = self._position(to_epoch_us(date), transaction_id)
+        start = max(end - limit, 0)
+        return self._ids[start:end].tolist()[::-1]
+
+    def after(self, date: datetime, transaction_id: int, limit: int) -> List[int]:
+        """IDs strictly newer than the (date, id) key, oldest first"""
+        start = self._position(to_epoch_us(date), transaction_id + 1)
+        return self._ids[start:start + limit].tolist()
+
+    def range(self, start: Optional[datetime] = None,
+              end: Optional[datetime] = None) -> List[int]:
+        """IDs with start <= date <= end, oldest first"""
+        return self.range_array(start, end).tolist()
+
+    def range_array(self, start: Optional[datetime] = None,
+                    end: Optional[datetime] = None) -> array:
+        """range() as a copied int64 array (8 bytes per ID)"""
+        lo = 0 if start is None else bisect_left(self._dates, to_epoch_us(start))
+        hi = len(self._dates) if end is None else bisect_right(self._dates, to_epoch_us(end))
+        return self._ids[lo:hi]
+
+    def count(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> int:
+        """Number of entries with start <= date <= end, in O(log n)"""
+        lo = 0 if start is None else bisect_left(self._dates, to_epoch_us(start))
+        hi = len(self._dates) if end is None else bisect_right(self._dates, to_epoch_us(end))
+        return max(hi - lo, 0)
+
+    def iter_newest(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                    before: Optional[Tuple[int, int]] = None,
+                    chunk_size: int = 256) -> Iterator[List[int]]:
+        """IDs with start <= date <= end and an (epoch_us, id) key below before,
+        newest first, in lists that double in size up to 65536
+
+        Each chunk resumes below the last (date, id) key returned, so entries
+        inserted between chunks do not shift the position.
+        """
+        start_us = None if start is None else to_epoch_us(start)
+        hi = len(self._ids) if end is None else bisect_right(self._dates, to_epoch_us(end))
+        if before is not None:
+            hi = min(hi, self._position(*before))
+        while True:
+            lo = max(hi - chunk_size, 0)
+            if start_us is not None:
+                lo = bisect_left(self._dates, start_us, lo, hi)
+            if hi <= lo:
+                return
+            chunk = self._ids[lo:hi].tolist()[::-1]
+            last_key = (self._dates[lo], chunk[-1])
+            yield chunk
+            hi = self._position(*last_key)
+            chunk_size = min(chunk_size * 2, 65536)
+
+
+def build_time_indexes(account_ids: array, dates: array, ids: array
+                       ) -> Tuple[TimeOrderedIndex, Dict[int, TimeOrderedIndex]]:
+    """Bulk-build the global and per-account indexes from row columns
+
+    One sort by (date, id) plus a stable partition by account, instead of
+    one insert per row.
+    """
+    if np is not None and len(ids):
+        return _build_time_indexes_numpy(account_ids, dates, ids)
+    order = sorted(range(len(ids)), key=lambda i: (dates[i], ids[i]))
+    by_account: Dict[int, TimeOrderedIndex] = {}
+    for i in order:
+        index = by_account.get(account_ids[i])
+        if index is None:
+            index = by_account[account_ids[i]] = TimeOrderedIndex()
+        index._dates.append(dates[i])
+        index._ids.append(ids[i])
+    return TimeOrderedIndex.from_sorted(array('q', (dates[i] for i in order)),
+                                        array('q', (ids[i] for i in order))), by_account
+
+
+def _build_time_indexes_numpy(account_ids: array, dates: array, ids: array
+                              ) -> Tuple[TimeOrderedIndex, Dict[int, TimeOrderedIndex]]:
+    """lexsort once, then slice each account's run out of a stable re-sort"""
+    dates_np = np.frombuffer(dates, dtype=np.int64)
+    ids_np = np.frombuffer(ids, dtype=np.int64)
+    order = np.lexsort((ids_np, dates_np))
+    sorted_dates = dates_np[order]
+    sorted_ids = ids_np[order]
+
+    accounts = np.frombuffer(account_ids, dtype=np.int64)[order]
+    account_min = int(accounts.min())
+    by_account_order = sort_order(accounts - account_min, int(accounts.max()) - account_min + 1)
+    accounts = accounts[by_account_order]
+    account_dates = memoryview(sorted_dates[by_account_order].tobytes())
+    account_ids_bytes = memoryview(sorted_ids[by_account_order].tobytes())
+    starts = np.flatnonzero(np.r_[True, accounts[1:] != accounts[:-1]]).tolist()
+    ends = starts[1:] + [len(accounts)]
+    by_account: Dict[int, TimeOrderedIndex] = {}
+    for account_id, start, end in zip(accounts[starts].tolist(), starts, ends):
+        index_dates, index_ids = array('q'), array('q')
+        index_dates.frombytes(account_dates[start * 8:end * 8])
+        index_ids.frombytes(account_ids_bytes[start * 8:end * 8])
+        by_account[account_id] = TimeOrderedIndex.from_sorted(index_dates, index_ids)
+
+    all_dates, all_ids = array('q'), array('q')
+    all_dates.frombytes(sorted_dates.tobytes())
+    all_ids.frombytes(sorted_ids.tobytes())
+    return TimeOrderedIndex.from_sorted(all_dates, all_ids), by_account
+
+
+def tokenize(text: str) -> List[str]:
+    """Case-folded words of a text, each once, in order of appearance"""
+    return list(dict.fromkeys(_WORD.findall(text.casefold())))
+
+
+def _to_array(values) -> array:
+    """int64 NumPy array as array('q')"""
+    result = array('q')
+    result.frombytes(values.astype(np.int64).tobytes())
+    return result
+
+
+class TextIndex:
+    """Inverted index from the words of transaction descriptions to their IDs
+
+    Every word maps to an ascending int64 array of IDs (its posting list),
+    so IDs allocated in increasing order are appended in O(1). The sorted
+    vocabulary resolves a query term to the range of words it prefixes
+    with two binary searches. A query matches the IDs found for all of its
+    terms; the smallest posting list is probed into the larger ones.
+    """
+
+    def __init__(self):
+        self._postings: Dict[str, array] = {}
+        self._vocabulary: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self._vocabulary)
+
+    def add(self, text: str, transaction_id: int) -> None:
+        """Index the words of text under transaction_id"""
+        for word in tokenize(text):
+            postings = self._postings.get(word)
+            if postings is None:
+                postings = self._postings[word] = array('q')
+                insort(self._vocabulary, word)
+            if not postings or transaction_id > postings[-1]:
+                postings.append(transaction_id)
+                continue
+            position = bisect_left(postings, transaction_id)
+            if postings[position] != transaction_id:
+                postings.insert(position, transaction_id)
+
+    def remove(self, text: str, transaction_id: int) -> None:
+        """Drop transaction_id from the posting lists of the words of text"""
+        for word in tokenize(text):
+            postings = self._postings.get(word)
+            if postings is None:
+                continue
+            position = bisect_left(postings, transaction_id)
+            if position < len(postings) and postings[position] == transaction_id:
+                del postings[position]
+            if not postings:
+                del self._postings[word]
+                del self._vocabulary[bisect_left(self._vocabulary, word)]
+
+    def _term(self, term: str) -> array:
+        """IDs of the words starting with term, ascending"""
+        lo = bisect_left(self._vocabulary, term)
+        hi = bisect_left(self._vocabulary, term + "\U0010ffff", lo)
+        lists = [self._postings[word] for word in self._vocabulary[lo:hi]]
+        if len(lists) <= 1:
+            return lists[0][:] if lists else array('q')
+        if np is not None:
+            # A stable sort merges the ascending runs in linear time
+            merged = np.concatenate([np.frombuffer(postings, dtype=np.int64)
+                                     for postings in lists])
+            merged.sort(kind='stable')
+            return _to_array(merged[np.r_[True, merged[1:] != merged[:-1]]])
+        return array('q', sorted(set().union(*lists)))
+
+    def search(self, query: str) -> array:
+        """IDs (ascending) of the texts containing a word starting with each query term"""
+        terms = tokenize(query)
+        if not terms:
+            return array('q')
+        matches = sorted((self._term(term) for term in terms), key=len)
+        result = matches[0]
+        for postings in matches[1:]:
+            if not result:
+                break
+            result = intersect_sorted(result, postings)
+        return result
+
+
+def intersect_sorted(small: Sequence[int], large: Sequence[int]) -> array:
+    """IDs present in both ascending sequences (of unique IDs), by binary
+    search of each of the (ideally smaller) first one in the second"""
+    if np is not None:
+        small_np = np.frombuffer(small, dtype=np.int64) if isinstance(small, array) \
+            else np.asarray(small, dtype=np.int64)
+        large_np = np.frombuffer(large, dtype=np.int64) if isinstance(large, array) \
+            else np.asarray(large, dtype=np.int64)
+        if not len(small_np) or not len(large_np):
+            return array('q')
+        if len(small_np) * 3 > len(large_np):
+            # Similar sizes: merging both runs is cheaper than binary searches
+            merged = np.concatenate((small_np, large_np))
+            merged.sort(kind='stable')
+            return _to_array(merged[:-1][merged[1:] == merged[:-1]])
+        positions = np.minimum(np.searchsorted(large_np, small_np), len(large_np) - 1)
+        return _to_array(small_np[large_np[positions] == small_np])
+    result = array('q')
+    lo = 0
+    for value in small:
+        lo = bisect_left(large, value, lo)
+        if lo == len(large):
+            break
+        if large[lo] == value:
+            result.append(value)
+    return result
+
+
+def keep_members(values: List[int], members: Sequence[int]) -> List[int]:
+    """The values found in the ascending members sequence, in their order"""
+    if not values or not len(members):
+        return []
+    if np is not None:
+        members_np = np.frombuffer(members, dtype=np.int64) if isinstance(members, array) \
+            else np.asarray(members, dtype=np.int64)
+        values_np = np.asarray(values, dtype=np.int64)
+        positions = np.minimum(np.searchsorted(members_np, values_np), len(members_np) - 1)
+        return values_np[members_np[positions] == values_np].tolist()
+    kept = []
+    for value in values:
+        position = bisect_left(members, value)
+        if position < len(members) and members[position] == value:
+            kept.append(value)
+    return kept
+
+
+def build_text_index(ids: array, descriptions: array, strings: List[str]) -> TextIndex:
+    """Bulk-build a TextIndex from ID and description-code columns
+
+    Each distinct description is tokenized once; the IDs of its rows are
+    then added to its words' posting lists as whole runs.
+    """
+    index = TextIndex()
+    if not len(ids):
+        return index
+    runs: Dict[str, list] = {}
+    if np is not None:
+        codes = np.frombuffer(descriptions, dtype=np.int32)
+        ids_np = np.frombuffer(ids, dtype=np.int64)
+        order = np.argsort(codes, kind='stable')
+        sorted_codes = codes[order]
+        starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+        ends = np.r_[starts[1:], len(order)]
+        for code, start, end in zip(sorted_codes[starts].tolist(), starts.tolist(),
+                                    ends.tolist()):
+            for word in tokenize(strings[code]):
+                runs.setdefault(word, []).append(ids_np[order[start:end]])
+        for word, parts in runs.items():
+            postings = np.concatenate(parts) if len(parts) > 1 else parts[0]
+            index._postings[word] = _to_array(np.sort(postings))
+    else:
+        words_by_code: Dict[int, List[str]] = {}
+        for transaction_id, code in zip(ids, descriptions):
+            words = words_by_code.get(code)
+            if words is None:
+                words = words_by_code[code] = tokenize(strings[code])
+            for word in words:
+                runs.setdefault(word, []).append(transaction_id)
+        for word, postings in runs.items():
+            index._postings[word] = array('q', sorted(postings))
+    index._vocabulary = sorted(index._postings)
+    return index
+
+
+ARRAY_CONTAINER_MAX = 4096   # Values a chunk keeps as a sorted array before it becomes a bitset
+_BITSET_BYTES = 8192         # One bit for each of the 65536 low values of a chunk
+
+
+def _bitset(lows: Iterable[int]) -> bytearray:
+    """Bitset container of the given low values"""
+    bits = bytearray(_BITSET_BYTES)
+    for low in lows:
+        bits[low >> 3] |= 1 << (low & 7)
+    return bits
+
+
+def _lows(container) -> array:
+    """Low values of a container, ascending"""
+    if isinstance(container, array):
+        return container
+    if np is not None:
+        flags = np.unpackbits(np.frombuffer(container, dtype=np.uint8), bitorder='little')
+        return array('H', np.flatnonzero(flags).astype(np.uint16).tobytes())
+    lows = array('H')
+    for position, byte in enumerate(container):
+        if byte:
+            lows.extend((position << 3) + bit for bit in range(8) if byte >> bit & 1)
+    return lows
+
+
+def _as_int(container) -> int:
+    """Container as an integer with bit i set for low value i"""
+    return int.from_bytes(_bitset(container) if isinstance(container, array) else container,
+                          'little')
+
+
+def _words(container):
+    """Container as a bitset of 1024 uint64 words (NumPy)"""
+    if isinstance(container, array):
+        flags = np.zeros(1 << 16, dtype=np.bool_)
+        flags[np.frombuffer(container, dtype=np.uint16)] = True
+        container = np.packbits(flags, bitorder='little')
+    return np.frombuffer(container, dtype=np.uint64)
+
+
+def _combine(operation: str, left, right) -> Tuple[object, int]:
+    """(container, count) of left AND / OR / ANDNOT right"""
+    if isinstance(left, array) and isinstance(right, array):
+        values = set(left)
+        values = values.intersection(right) if operation == "and" else \
+            values.union(right) if operation == "or" else values.difference(right)
+        if len(values) > ARRAY_CONTAINER_MAX:
+            return _bitset(values), len(values)
+        return array('H', sorted(values)), len(values)
+    if isinstance(left, array) and operation != "or":
+        # Probe the few array values in the bitset
+        keep = operation == "and"
+        if np is not None and len(left) > 256:
+            lows_np = np.frombuffer(left, dtype=np.uint16)
+            found = np.frombuffer(right, dtype=np.uint8)[lows_np >> 3] >> (lows_np & 7) & 1
+            lows = array('H', lows_np[found.astype(np.bool_) == keep].tobytes())
+        else:
+            lows = array('H', [low for low in left
+                               if bool(right[low >> 3] >> (low & 7) & 1) == keep])
+        return lows, len(lows)
+    if operation == "and" and isinstance(right, array):
+        return _combine(operation, right, left)
+    if np is not None:
+        left_words, right_words = _words(left), _words(right)
+        words = left_words & right_words if operation == "and" else \
+            left_words | right_words if operation == "or" else left_words & ~right_words
+        count = int(np.bitwise_count(words).sum()) if hasattr(np, "bitwise_count") else \
+            int.from_bytes(words.tobytes(), 'little').bit_count()
+        return bytearray(words.tobytes()), count
+    left_bits, right_bits = _as_int(left), _as_int(right)
+    bits = left_bits & right_bits if operation == "and" else \
+        left_bits | right_bits if operation == "or" else left_bits & ~right_bits
+    return bytearray(bits.to_bytes(_BITSET_BYTES, 'little')), bits.bit_count()
+
+
+class Bitmap:
+    """Compressed set of non-negative integers (transaction IDs), in the
+    layout of roaring bitmaps
+
+    Values are split by their high bits into chunks of 65536. A chunk holds
+    its low 16 bits as a sorted array('H') while it has at most
+    ARRAY_CONTAINER_MAX of them (2 bytes per value) and as an 8 KiB bitset
+    beyond that, so dense chunks cost one bit per possible value. & (AND),
+    | (OR) and - (AND NOT) combine the chunks both sides hold; NOT is the
+    difference from a universe bitmap. What two bitsets combine into stays
+    a bitset however few values it keeps, as decoding it to an array would
+    cost more than the operation (results are read the same either way).
+    """
+
+    __slots__ = ("_keys", "_containers", "_counts")
+
+    def __init__(self, values: Iterable[int] = ()):
+        self._keys: List[int] = []
+        self._containers: list = []
+        self._counts: List[int] = []
+        for value in values:
+            self.add(value)
+
+    @classmethod
+    def from_sorted(cls, values: Sequence[int]) -> "Bitmap":
+        """Build from ascending unique values, one container at a time"""
+        bitmap = cls()
+        if np is not None:
+            values_np = np.frombuffer(values, dtype=np.int64) if isinstance(values, array) \
+                else np.asarray(values, dtype=np.int64)
+            if not len(values_np):
+                return bitmap
+            highs = values_np >> 16
+            starts = np.flatnonzero(np.r_[True, highs[1:] != highs[:-1]])
+            ends = np.r_[starts[1:], len(values_np)]
+            lows = (values_np & 0xFFFF).astype(np.uint16)
+            for key, start, end in zip(highs[starts].tolist(), starts.tolist(), ends.tolist()):
+                if end - start <= ARRAY_CONTAINER_MAX:
+                    container = array('H', lows[start:end].tobytes())
+                else:
+                    flags = np.zeros(1 << 16, dtype=np.bool_)
+                    flags[lows[start:end]] = True
+                    container = bytearray(np.packbits(flags, bitorder='little').tobytes())
+                bitmap._append(key, container, end - start)
+            return bitmap
+        chunk: List[int] = []
+        key = None
+        for value in values:
+            if value >> 16 != key:
+                if chunk:
+                    bitmap._append_lows(key, chunk)
+                key, chunk = value >> 16, []
+            chunk.append(value & 0xFFFF)
+        if chunk:
+            bitmap._append_lows(key, chunk)
+        return bitmap
+
+    def _append(self, key: int, container, count: int) -> None:
+        self._keys.append(key)
+        self._containers.append(container)
+        self._counts.append(count)
+
+    def _append_lows(self, key: int, lows: List[int]) -> None:
+        self._append(key, array('H', lows) if len(lows) <= ARRAY_CONTAINER_MAX
+                     else _bitset(lows), len(lows))
+
+    def __len__(self) -> int:
+        return sum(self._counts)
+
+    def __contains__(self, value: int) -> bool:
+        key = value >> 16
+        slot = bisect_left(self._keys, key)
+        if slot == len(self._keys) or self._keys[slot] != key:
+            return False
+        container, low = self._containers[slot], value & 0xFFFF
+        if isinstance(container, bytearray):
+            return bool(container[low >> 3] >> (low & 7) & 1)
+        position = bisect_left(container, low)
+        return position < len(container) and container[position] == low
+
+    def __iter__(self) -> Iterator[int]:
+        for key, container in zip(self._keys, self._containers):
+            base = key << 16
+            for low in _lows(container):
+                yield base + low
+
+    def add(self, value: int) -> None:
+        key, low = value >> 16, value & 0xFFFF
+        slot = bisect_left(self._keys, key)
+        if slot == len(self._keys) or self._keys[slot] != key:
+            self._keys.insert(slot, key)
+            self._containers.insert(slot, array('H', [low]))
+            self._counts.insert(slot, 1)
+            return
+        container = self._containers[slot]
+        if isinstance(container, bytearray):
+            if container[low >> 3] >> (low & 7) & 1:
+                return
+            container[low >> 3] |= 1 << (low & 7)
+        elif not container or low > container[-1]:
+            container.append(low)
+        else:
+            position = bisect_left(container, low)
+            if container[position] == low:
+                return
+            container.insert(position, low)
+        self._counts[slot] += 1
+        if self._counts[slot] == ARRAY_CONTAINER_MAX + 1 and isinstance(container, array):
+            self._containers[slot] = _bitset(container)
+
+    def discard(self, value: int) -> None:
+        key, low = value >> 16, value & 0xFFFF
+        slot = bisect_left(self._keys, key)
+        if slot == len(self._keys) or self._keys[slot] != key:
+            return
+        container = self._containers[slot]
+        if isinstance(container, bytearray):
+            if not container[low >> 3] >> (low & 7) & 1:
+                return
+            container[low >> 3] &= ~(1 << (low & 7)) & 0xFF
+        else:
+            position = bisect_left(container, low)
+            if position == len(container) or container[position] != low:
+                return
+            del container[position]
+        self._counts[slot] -= 1
+        if not self._counts[slot]:
+            del self._keys[slot], self._containers[slot], self._counts[slot]
+        elif self._counts[slot] == ARRAY_CONTAINER_MAX and isinstance(container, bytearray):
+            self._containers[slot] = _lows(container)
+
+    def copy(self) -> "Bitmap":
+        bitmap = Bitmap()
+        for key, container, count in zip(self._keys, self._containers, self._counts):
+            bitmap._append(key, container[:] if isinstance(container, array)
+                           else bytearray(container), count)
+        return bitmap
+
+    def _merge(self, other: "Bitmap", operation: str) -> "Bitmap":
+        """Combine the containers of both sides chunk by chunk"""
+        result = Bitmap()
+        keys, other_keys = self._keys, other._keys
+        i = j = 0
+        while i < len(keys) or j < len(other_keys):
+            if j == len(other_keys) or (i < len(keys) and keys[i] < other_keys[j]):
+                if operation != "and":
+                    container = self._containers[i]
+                    result._append(keys[i], container[:] if isinstance(container, array)
+                                   else bytearray(container), self._counts[i])
+                i += 1
+            elif i == len(keys) or other_keys[j] < keys[i]:
+                if operation == "or":
+                    container = other._containers[j]
+                    result._append(other_keys[j], container[:] if isinstance(container, array)
+                                   else bytearray(container), other._counts[j])
+                j += 1
+            else:
+                container, count = _combine(operation, self._containers[i],
+                                            other._containers[j])
+                if count:
+                    result._append(keys[i], container, count)
+                i += 1
+                j += 1
+        return result
+
+    def __and__(self, other: "Bitmap") -> "Bitmap":
+        return self._merge(other, "and")
+
+    def __or__(self, other: "Bitmap") -> "Bitmap":
+        return self._merge(other, "or")
+
+    def __sub__(self, other: "Bitmap") -> "Bitmap":
+        return self._merge(other, "andnot")
+
+    def to_array(self) -> array:
+        """The values as an ascending array('q')"""
+        if np is None or len(self) <= ARRAY_CONTAINER_MAX:
+            return array('q', self)
+        parts = [np.frombuffer(_lows(container), dtype=np.uint16).astype(np.int64) + (key << 16)
+                 for key, container in zip(self._keys, self._containers)]
+        return _to_array(np.concatenate(parts)) if parts else array('q')
+
+    def select(self, values: Sequence[int]) -> Sequence[int]:
+        """The values found in the bitmap, in their order (as an array('q') for
+        an array, else a list)"""
+        if np is None or len(values) < 64 or not self._keys:
+            kept = [value for value in values if value in self]
+            return array('q', kept) if isinstance(values, array) else kept
+        values_np = np.frombuffer(values, dtype=np.int64) if isinstance(values, array) \
+            else np.asarray(values, dtype=np.int64)
+        keys = np.asarray(self._keys, dtype=np.int64)
+        highs, lows = values_np >> 16, values_np & 0xFFFF
+        slots = np.minimum(np.searchsorted(keys, highs), len(keys) - 1)
+        found = keys[slots] == highs
+        order = np.argsort(slots, kind='stable')
+        sorted_slots = slots[order]
+        starts = np.flatnonzero(np.r_[True, sorted_slots[1:] != sorted_slots[:-1]])
+        ends = np.r_[starts[1:], len(order)]
+        for slot, start, end in zip(sorted_slots[starts].tolist(), starts.tolist(),
+                                    ends.tolist()):
+            rows = order[start:end]
+            low = lows[rows]
+            container = self._containers[slot]
+            if isinstance(container, bytearray):
+                bits = np.frombuffer(container, dtype=np.uint8)
+                found[rows] &= (bits[low >> 3] >> (low & 7) & 1).astype(np.bool_)
+            else:
+                stored = np.frombuffer(container, dtype=np.uint16)
+                positions = np.minimum(np.searchsorted(stored, low), len(stored) - 1)
+                found[rows] &= stored[positions] == low
+        kept = values_np[found]
+        return _to_array(kept) if isinstance(values, array) else kept.tolist()
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the containers"""
+        return sum(len(container) * (2 if isinstance(container, array) else 1)
+                   for container in self._containers)
+
+
+class BitmapIndex:
+    """Bitmap of the transaction IDs holding each value of one attribute
+
+    As every ID holds one value, NOT value is the OR of the other bitmaps.
+    """
+
+    def __init__(self):
+        self._bitmaps: Dict[Hashable, Bitmap] = {}
+
+    def __len__(self) -> int:
+        return len(self._bitmaps)
+
+    def add(self, value: Hashable, transaction_id: int) -> None:
+        bitmap = self._bitmaps.get(value)
+        if bitmap is None:
+            bitmap = self._bitmaps[value] = Bitmap()
+        bitmap.add(transaction_id)
+
+    def remove(self, value: Hashable, transaction_id: int) -> None:
+        bitmap = self._bitmaps.get(value)
+        if bitmap is not None:
+            bitmap.discard(transaction_id)
+            if not bitmap:
+                del self._bitmaps[value]
+
+    def merge(self, value: Hashable, bitmap: Bitmap) -> None:
+        """OR bitmap into the bitmap of value"""
+        if not bitmap:
+            return
+        existing = self._bitmaps.get(value)
+        self._bitmaps[value] = bitmap if existing is None else existing | bitmap
+
+    def get(self, value: Hashable) -> Bitmap:
+        """The IDs holding value (shared, not to be modified)"""
+        bitmap = self._bitmaps.get(value)
+        return bitmap if bitmap is not None else Bitmap()
+
+    def any_of(self, values: Iterable[Hashable]) -> Bitmap:
+        """The IDs holding any of the values"""
+        result = Bitmap()
+        for value in values:
+            bitmap = self._bitmaps.get(value)
+            if bitmap is not None:
+                result = result | bitmap
+        return result
+
+    def excluding(self, value: Hashable) -> Bitmap:
+        """The IDs holding any value other than value"""
+        return self.any_of(other for other in self._bitmaps if other != value)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by all the bitmaps' containers"""
+        return sum(bitmap.nbytes for bitmap in self._bitmaps.values())
+
+
+def build_bitmap_index(codes: array, ids: array, values: Sequence[Optional[Hashable]]
+                       ) -> BitmapIndex:
+    """Bulk-build a BitmapIndex from a code column and the ID column, indexing
+    each row under values[code] (rows whose code maps to None are left out)
+
+    Codes are first translated to one number per distinct value, so every
+    bitmap is built once from its sorted IDs.
+    """
+    index = BitmapIndex()
+    distinct: Dict[Hashable, int] = {}
+    lookup = [-1 if value is None else distinct.setdefault(value, len(distinct))
+              for value in values]
+    if not len(ids) or not distinct:
+        return index
+    keys = list(distinct)
+    if np is not None:
+        codes_np = np.frombuffer(codes, dtype=np.dtype(codes.typecode)).astype(np.int64)
+        ids_np = np.frombuffer(ids, dtype=np.int64)
+        known = (codes_np >= 0) & (codes_np < len(lookup))
+        mapped = np.where(known, np.asarray(lookup, dtype=np.int64)[
+            np.clip(codes_np, 0, len(lookup) - 1)], -1)
+        order = np.argsort(mapped, kind='stable')
+        sorted_mapped = mapped[order]
+        starts = np.flatnonzero(np.r_[True, sorted_mapped[1:] != sorted_mapped[:-1]])
+        ends = np.r_[starts[1:], len(order)]
+        for number, start, end in zip(sorted_mapped[starts].tolist(), starts.tolist(),
+                                      ends.tolist()):
+            if number >= 0:
+                index._bitmaps[keys[number]] = Bitmap.from_sorted(
+                    np.sort(ids_np[order[start:end]]))
+        return index
+    groups: Dict[int, List[int]] = {}
+    for transaction_id, code in zip(ids, codes):
+        number = lookup[code] if 0 <= code < len(lookup) else -1
+        if number >= 0:
+            groups.setdefault(number, []).append(transaction_id)
+    for number, group in groups.items():
+        index._bitmaps[keys[number]] = Bitmap.from_sorted(sorted(group))
+    return index
@@ -0,0 +1,213 @@
+"""
+Personal Finance Management System - Mutation Journal Module
+Records every manager mutation in the write-ahead log and replays it on startup
+"""
+
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from account import Account, AccountManager, AccountType
+from budget import Budget, BudgetManager, BudgetPeriod
+from transaction import UPDATABLE_FIELDS, Transaction, TransactionManager, TransactionType
+from wal import Durability, WriteAheadLog, read_records
+
+
+def encode_account(account: Account) -> Dict[str, Any]:
+    """Account as a JSON-compatible record"""
+    return {
+        "id": account.id,
+        "name": account.name,
+        "account_type": account.account_type.value,
+        "balance": str(account.balance),
+        "opening_balance": str(account.opening_balance),
+        "created_at": account.created_at.isoformat(),
+        "is_active": account.is_active,
+    }
+
+
+def decode_account(record: Dict[str, Any]) -> Account:
+    """Rebuild Account from its record"""
+    account = Account(record["name"], AccountType(record["account_type"]),
+                      Decimal(record["balance"]))
+    account.id = record["id"]
+    account.opening_balance = Decimal(record.get("opening_balance", record["balance"]))
+    account.created_at = datetime.fromisoformat(record["created_at"])
+    account.is_active = record["is_active"]
+    return account
+
+
+def encode_transaction(transaction: Transaction) -> Dict[str, Any]:
+    """Transaction as a JSON-compatible record"""
+    return {
+        "id": transaction.id,
+        "account_id": transaction.account_id,
+        "amount": str(transaction.amount),
+        "transaction_type": transaction.transaction_type.value,
+        "description": transaction.description,
+        "date": transaction.date.isoformat(),
+        "category": transaction.category,
+    }
+
+
+def decode_transaction(record: Dict[str, Any]) -> Transaction:
+    """Rebuild Transaction from its record"""
+    return Transaction(
+        id=record["id"],
+        account_id=record["account_id"],
+        amount=Decimal(record["amount"]),
+        transaction_type=TransactionType(record["transaction_type"]),
+        description=record["description"],
+        date=datetime.fromisoformat(record["date"]),
+        category=record["category"]
+    )
+
+
+def encode_budget(budget: Budget) -> Dict[str, Any]:
+    """Budget as a JSON-compatible record"""
+    return {
+        "id": budget.id,
+        "name": budget.name,
+        "category": budget.category,
+        "amount": str(budget.amount),
+        "period": budget.period.value,
+        "start_date": budget.start_date.isoformat(),
+        "is_active": budget.is_active,
+    }
+
+
+def decode_budget(record: Dict[str, Any]) -> Budget:
+    """Rebuild Budget from its record"""
+    return Budget(
+        id=record["id"],
+        name=record["name"],
+        category=record["category"],
+        amount=Decimal(record["amount"]),
+        period=BudgetPeriod(record["period"]),
+        start_date=date.fromisoformat(record["start_date"]),
+        is_active=record["is_active"]
+    )
+
+
+class ManagerJournal:
+    """Binds the three managers to a write-ahead log
+
+    replay() must run before attach() so that replayed mutations are not
+    logged a second time.
+    """
+
+    def __init__(self, wal: WriteAheadLog, account_manager: AccountManager,
+                 transaction_manager: TransactionManager, budget_manager: BudgetManager):
+        self.wal = wal
+        self.account_manager = account_manager
+        self.transaction_manager = transaction_manager
+        self.budget_manager = budget_manager
+        self.last_applied_lsn = 0
+        self._local = threading.local()   # Records of the open atomic() block
+
+    @contextmanager
+    def atomic(self) -> Iterator[List[Callable[[], None]]]:
+        """Log every mutation this thread makes inside the block as one "batch"
+        record, so replay applies all of them or none; nested blocks join the
+        outer one. Callers hold the locks that order the mutations until it exits.
+
+        The record is appended without waiting for the fsync: the yielded list
+        then holds the wait, for callers to run once their locks are released.
+        """
+        follow_ups: List[Callable[[], None]] = []
+        if getattr(self._local, "records", None) is not None:
+            yield follow_ups
+            return
+        records: List[Dict[str, Any]] = []
+        self._local.records = records
+        try:
+            yield follow_ups
+        finally:
+            self._local.records = None
+            if records:
+                lsn = self.wal.append({"op": "batch", "records": records}, wait=False)
+                if self.wal.durability == Durability.ALWAYS:
+                    follow_ups.append(lambda: self.wal.wait_durable(lsn))
+
+    def _append(self, record: Dict[str, Any], wait: bool = True) -> Optional[int]:
+        """Append to the log, or to the open atomic() block of this thread"""
+        records = getattr(self._local, "records", None)
+        if records is not None:
+            records.append(record)
+            return None
+        return self.wal.append(record, wait=wait)
+
+    def attach(self) -> None:
+        """Start logging every mutation"""
+        self.account_manager.subscribe(self._on_account)
+        self.transaction_manager.subscribe(self._on_transaction)
+        self.budget_manager.subscribe(self._on_budget)
+
+    def _on_account(self, event: str, account: Account) -> None:
+        if event == "create":
+            self._append({"op": "account.create", **encode_account(account)})
+        elif event == "balance":
+            self._append({"op": "account.balance", "id": account.id,
+                          "balance": str(account.balance)})
+        elif event == "delete":
+            self._append({"op": "account.delete", "id": account.id})
+
+    def _on_transaction(self, event: str, transaction: Transaction) -> Optional[Callable[[], None]]:
+        if event in ("add", "update"):
+            record = {"op": f"transaction.{event}", **encode_transaction(transaction)}
+        elif event == "delete":
+            record = {"op": "transaction.delete", "id": transaction.id}
+        else:
+            return None
+        # Runs under the transaction manager's lock: append in order there,
+        # but wait for the fsync once the lock is released
+        lsn = self._append(record, wait=False)
+        if lsn is not None and self.wal.durability == Durability.ALWAYS:
+            return lambda: self.wal.wait_durable(lsn)
+        return None
+
+    def _on_budget(self, event: str, budget: Budget) -> None:
+        if event == "create":
+            self._append({"op": "budget.create", **encode_budget(budget)})
+
+    def apply(self, record: Dict[str, Any]) -> None:
+        """Apply one logged mutation to the managers"""
+        self._apply(record)
+        self.last_applied_lsn = record["lsn"]
+
+    def _apply(self, record: Dict[str, Any]) -> None:
+        op = record["op"]
+        if op == "batch":
+            for child in record["records"]:
+                self._apply(child)
+        elif op == "account.create":
+            self.account_manager.restore_account(decode_account(record))
+        elif op == "account.balance":
+            self.account_manager.get_account_by_id(record["id"]).balance = \
+                Decimal(record["balance"])
+        elif op == "account.delete":
+            self.account_manager.delete_account(record["id"])
+        elif op == "transaction.add":
+            self.transaction_manager.restore_transaction(decode_transaction(record))
+        elif op == "transaction.update":
+            # A snapshot written after a later delete no longer holds the row
+            if self.transaction_manager.get_transaction_by_id(record["id"]) is not None:
+                transaction = decode_transaction(record)
+                changes = {name: getattr(transaction, name) for name in UPDATABLE_FIELDS}
+                self.transaction_manager.update_transaction(transaction.id, **changes)
+        elif op == "transaction.delete":
+            self.transaction_manager.delete_transaction(record["id"])
+        elif op == "budget.create":
+            self.budget_manager.restore_budget(decode_budget(record))
+        else:
+            raise ValueError(f"Unknown journal operation: {op}")
+
+    def replay(self, after_lsn: int = 0) -> int:
+        """Apply every logged mutation after after_lsn, returns the number applied"""
+        count = 0
+        for record in read_records(self.wal.directory, after_lsn):
+            self.apply(record)
+            count += 1
+        return count
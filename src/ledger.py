@@ -0,0 +1,277 @@
+"""
+Personal Finance Management System - Balance Ledger Module
+Account balances derived from the transaction ledger, with monthly
+checkpoints for as-of queries and a reconciler that finds drift
+"""
+
+import os
+import threading
+import time
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+import aggregation
+from account import Account, AccountManager
+from aggregation import (ColumnBatch, from_scaled, group_columns, group_totals, month_index,
+                         month_start, to_scaled)
+from transaction import TYPE_CODES, Transaction, TransactionManager, TransactionType
+
+# Effect of each transaction type on its account's balance. Transfer legs
+# already carry their direction in the sign of the amount.
+LEDGER_SIGNS = {
+    TransactionType.INCOME: 1,
+    TransactionType.EXPENSE: -1,
+    TransactionType.TRANSFER: 1,
+}
+_SIGNS_BY_CODE = {TYPE_CODES[t]: sign for t, sign in LEDGER_SIGNS.items()}
+
+
+def ledger_amount(transaction: Transaction) -> Decimal:
+    """Signed change a transaction makes to its account's balance"""
+    return LEDGER_SIGNS[transaction.transaction_type] * transaction.amount
+
+
+@dataclass(slots=True)
+class BalanceCheckpoint:
+    """Ledger balance of an account once every transaction dated before as_of is applied"""
+    account_id: int
+    as_of: datetime
+    balance: Decimal
+
+
+@dataclass(slots=True)
+class BalanceDrift:
+    """An account whose stored balance disagrees with its ledger"""
+    account_id: int
+    stored_balance: Decimal
+    ledger_balance: Decimal
+
+    @property
+    def difference(self) -> Decimal:
+        """Stored minus ledger balance"""
+        return self.stored_balance - self.ledger_balance
+
+
+@dataclass(slots=True)
+class ReconciliationReport:
+    """Outcome of one reconciliation pass"""
+    accounts_checked: int = 0
+    transactions_scanned: int = 0
+    drift: List[BalanceDrift] = field(default_factory=list)
+    seconds: float = 0.0
+    finished_at: Optional[datetime] = None
+
+
+class BalanceLedger:
+    """Balances recomputed from an account's opening balance and transactions
+
+    Checkpoints hold the balance at the end of every month with activity,
+    built from the per-account monthly rollups and cached per account
+    until a transaction of that account is added, changed or deleted. A balance as of a date
+    is the last checkpoint before its month plus a scan of that month's
+    transactions up to the date, so it costs O(months + one month of rows)
+    rather than a scan of the account's history.
+    """
+
+    def __init__(self, account_manager: AccountManager, transaction_manager: TransactionManager):
+        self.account_manager = account_manager
+        self.transaction_manager = transaction_manager
+        # account_id -> (month indexes, scaled net through the end of each month)
+        self._checkpoints: Dict[int, Tuple[List[int], List[int]]] = {}
+        transaction_manager.subscribe(self._on_transaction)
+
+    def _on_transaction(self, event: str, transaction: Transaction) -> None:
+        # Runs under the transaction manager's lock, like every cache read below
+        if event == "update":
+            self._checkpoints.clear()   # It may have moved from another account
+        else:
+            self._checkpoints.pop(transaction.account_id, None)
+
+    def _account(self, account_id: int) -> Account:
+        account = self.account_manager.get_account_by_id(account_id)
+        if account is None:
+            raise ValueError(f"Account {account_id} not found")
+        return account
+
+    def _monthly_net(self, account_id: int) -> Tuple[List[int], List[int]]:
+        """Cached checkpoints of one account; call with the transaction lock held"""
+        cached = self._checkpoints.get(account_id)
+        if cached is None:
+            months: Dict[int, int] = {}
+            for summary in self.transaction_manager.calculate_monthly_summary(account_id):
+                net = summary.income - summary.expense + summary.transfer
+                months[month_index(datetime.strptime(summary.month, "%Y-%m"))] = to_scaled(net)
+            indexes = sorted(months)
+            running, cumulative = 0, []
+            for index in indexes:
+                running += months[index]
+                cumulative.append(running)
+            cached = self._checkpoints[account_id] = (indexes, cumulative)
+        return cached
+
+    def checkpoints(self, account_id: int) -> List[BalanceCheckpoint]:
+        """Month-end ledger balances of an account, oldest first"""
+        opening = to_scaled(self._account(account_id).opening_balance)
+        with self.transaction_manager.exclusive():
+            indexes, cumulative = self._monthly_net(account_id)
+        return [BalanceCheckpoint(account_id, month_start(index + 1), from_scaled(opening + net))
+                for index, net in zip(indexes, cumulative)]
+
+    def balance_as_of(self, account_id: int, as_of: Optional[datetime] = None) -> Decimal:
+        """Ledger balance counting transactions dated up to as_of (default all of them)"""
+        opening = to_scaled(self._account(account_id).opening_balance)
+        with self.transaction_manager.exclusive():
+            indexes, cumulative = self._monthly_net(account_id)
+            if as_of is None:
+                return from_scaled(opening + (cumulative[-1] if cumulative else 0))
+            month = month_index(as_of)
+            position = bisect_left(indexes, month)
+            total = opening + (cumulative[position - 1] if position else 0)
+            if position < len(indexes) and indexes[position] == month:
+                for chunk in self.transaction_manager.export_transactions(
+                        account_id, month_start(month), as_of):
+                    total += sum(to_scaled(ledger_amount(t)) for t in chunk)
+        return from_scaled(total)
+
+
+def _slice(batch: ColumnBatch, start: int, end: int) -> ColumnBatch:
+    return ColumnBatch(batch.account_ids[start:end], batch.dates[start:end],
+                       batch.types[start:end], batch.categories[start:end],
+                       batch.amounts[start:end], batch.strings)
+
+
+def _net_by_account(batch: ColumnBatch) -> Dict[int, int]:
+    """Scaled ledger net of every account in a batch"""
+    net: Dict[int, int] = {}
+    for (account_id, type_code), (total, _count) in group_totals(
+            batch, dimensions=("account", "type")).items():
+        net[account_id] = net.get(account_id, 0) + _SIGNS_BY_CODE[type_code] * total
+    return net
+
+
+def _net_arrays(batch: ColumnBatch):
+    """NumPy variant of _net_by_account: (sorted account IDs, scaled nets) arrays"""
+    np = aggregation.np
+    (account_ids, type_codes), sums, _counts = group_columns(batch, ("account", "type"))
+    signs = np.zeros(max(_SIGNS_BY_CODE) + 1, dtype=np.int64)
+    for type_code, sign in _SIGNS_BY_CODE.items():
+        signs[type_code] = sign
+    return _sum_by_account(account_ids, sums * signs[type_codes])
+
+
+def _sum_by_account(account_ids, amounts):
+    """Add up amounts sharing an account ID, returning sorted unique IDs and their sums"""
+    np = aggregation.np
+    if not len(account_ids):
+        return account_ids, amounts
+    order = np.argsort(account_ids, kind='stable')
+    account_ids, amounts = account_ids[order], amounts[order]
+    starts = np.concatenate(([0], np.flatnonzero(account_ids[1:] != account_ids[:-1]) + 1))
+    return account_ids[starts], np.add.reduceat(amounts, starts)
+
+
+class BalanceReconciler:
+    """Finds accounts whose stored balance drifted from their ledger
+
+    A pass copies the transaction columns under the transaction manager's
+    lock, one slice per worker, and sums each slice by account in parallel
+    (the NumPy grouping releases the GIL), then compares every account
+    with opening balance plus net.
+    Mismatches are confirmed under the account's lock with the exact
+    ledger balance, so writes racing with the pass are not reported.
+    """
+
+    def __init__(self, ledger: BalanceLedger, workers: Optional[int] = None):
+        self.ledger = ledger
+        self.workers = workers or min(8, os.cpu_count() or 1)
+        self.last_report: Optional[ReconciliationReport] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def scan(self) -> ReconciliationReport:
+        """Run one reconciliation pass over every account"""
+        started = time.perf_counter()
+        manager = self.ledger.transaction_manager
+        with manager.exclusive():
+            accounts = list(self.ledger.account_manager.accounts)
+            batch = manager.column_batch()
+            # Columnar stores expose their live arrays: the slices copy them
+            # while no write can append or update a row
+            rows = len(batch.account_ids)
+            step = -(-rows // self.workers) or 1
+            slices = [_slice(batch, start, start + step) for start in range(0, rows, step)]
+        if aggregation.np is not None:
+            suspects = self._suspects_numpy(accounts, slices)
+        else:
+            suspects = self._suspects_python(accounts, slices)
+
+        report = ReconciliationReport(accounts_checked=len(accounts), transactions_scanned=rows)
+        for account_id in suspects:
+            drift = self._confirm(account_id)
+            if drift is not None:
+                report.drift.append(drift)
+        report.seconds = time.perf_counter() - started
+        report.finished_at = datetime.now()
+        self.last_report = report
+        return report
+
+    def _suspects_python(self, accounts: List[Account], slices: List[ColumnBatch]) -> List[int]:
+        """IDs of accounts whose balance differs from opening balance plus net"""
+        net: Dict[int, int] = {}
+        with ThreadPoolExecutor(self.workers) as pool:
+            for partial in pool.map(_net_by_account, slices):
+                for account_id, total in partial.items():
+                    net[account_id] = net.get(account_id, 0) + total
+        return [a.id for a in accounts
+                if to_scaled(a.balance) != to_scaled(a.opening_balance) + net.get(a.id, 0)]
+
+    def _suspects_numpy(self, accounts: List[Account], slices: List[ColumnBatch]) -> List[int]:
+        """Vectorized _suspects_python: slices are grouped on the worker threads"""
+        np = aggregation.np
+        with ThreadPoolExecutor(self.workers) as pool:
+            partials = list(pool.map(_net_arrays, slices))
+        if partials:
+            net_ids, nets = _sum_by_account(np.concatenate([ids for ids, _ in partials]),
+                                            np.concatenate([sums for _, sums in partials]))
+        else:
+            net_ids = nets = np.zeros(0, dtype=np.int64)
+        ids = np.fromiter((a.id for a in accounts), dtype=np.int64, count=len(accounts))
+        # Stored minus opening balance: what the ledger net has to be
+        expected = np.fromiter((to_scaled(a.balance - a.opening_balance) for a in accounts),
+                               dtype=np.int64, count=len(accounts))
+        positions = np.minimum(np.searchsorted(net_ids, ids), max(len(net_ids) - 1, 0))
+        found = net_ids[positions] == ids if len(net_ids) else np.zeros(len(ids), dtype=bool)
+        actual = np.where(found, nets[positions] if len(nets) else 0, 0)
+        return ids[expected != actual].tolist()
+
+    def _confirm(self, account_id: int) -> Optional[BalanceDrift]:
+        """Exact comparison with the account locked, None if it agrees (or is gone)"""
+        try:
+            with self.ledger.account_manager.lock_accounts([account_id]) as accounts:
+                stored = accounts[account_id].balance
+                ledger = self.ledger.balance_as_of(account_id)
+        except ValueError:
+            return None
+        return BalanceDrift(account_id, stored, ledger) if stored != ledger else None
+
+    def start(self, interval: float) -> None:
+        """Reconcile every interval seconds on a background thread"""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(interval,),
+                                        name="balance-reconciler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background thread after its current pass"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            self.scan()
@@ -0,0 +1,161 @@
+"""
+Personal Finance Management System - Response Cache Module
+Caches serialized GET response bodies until the data they were computed
+from changes, with strong ETags for conditional requests
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+from account import AccountManager
+from budget import BudgetManager
+from transaction import TransactionManager
+
+RESOURCES = ("accounts", "transactions", "budgets")
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+ENTRY_OVERHEAD = 256        # Bytes counted per entry on top of its body (key, headers, ETag)
+
+
+class DataVersions:
+    """Change counter of each resource, bumped by every mutation of its manager
+
+    A response computed while the counters of its resources held some
+    values is current exactly as long as they still hold them.
+    """
+
+    def __init__(self):
+        self._versions = dict.fromkeys(RESOURCES, 0)
+        self._lock = threading.Lock()
+
+    def bump(self, resource: str) -> None:
+        with self._lock:
+            self._versions[resource] += 1
+
+    def current(self) -> Dict[str, int]:
+        """Counter of every resource"""
+        with self._lock:
+            return dict(self._versions)
+
+    def attach(self, account_manager: AccountManager, transaction_manager: TransactionManager,
+               budget_manager: BudgetManager) -> None:
+        """Bump the counters from the managers' change listeners"""
+        account_manager.subscribe(lambda event, account: self.bump("accounts"))
+        transaction_manager.subscribe(lambda event, transaction: self.bump("transactions"))
+        budget_manager.subscribe(lambda event, budget: self.bump("budgets"))
+
+
+def make_etag(body: bytes) -> str:
+    """Strong ETag of a response body (the same in every worker process)"""
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header lists etag (or is *)"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+@dataclass(slots=True)
+class CachedResponse:
+    """A response body with the resource versions it was computed at, and
+    the encoded (compressed) copies of it made so far"""
+    versions: Tuple[int, ...]
+    body: bytes
+    etag: str
+    headers: Dict[str, str]
+    variants: Dict[str, bytes] = field(default_factory=dict)
+
+    @property
+    def size(self) -> int:
+        return (len(self.body) + sum(len(body) for body in self.variants.values())
+                + ENTRY_OVERHEAD)
+
+
+class ResponseCache:
+    """LRU cache of response bodies by request key, bounded by their total size
+
+    An entry found with other versions than the current ones is stale: it
+    is dropped and reported as a miss, so a write is never followed by a
+    response computed before it. Bodies larger than a quarter of max_bytes
+    are not kept.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, CachedResponse]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size(self) -> int:
+        """Bytes counted for all entries"""
+        return self._size
+
+    def get(self, key: Hashable, versions: Tuple[int, ...]) -> Optional[CachedResponse]:
+        """The entry of key if it was computed at versions"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.versions != versions:
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: Hashable, versions: Tuple[int, ...], body: bytes,
+            headers: Dict[str, str]) -> CachedResponse:
+        """Store a body computed at versions, evicting the least recently used
+        entries beyond max_bytes"""
+        entry = CachedResponse(versions, body, make_etag(body), headers)
+        if entry.size > self.max_bytes // 4:
+            return entry
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._size += entry.size
+            self._evict()
+        return entry
+
+    def variant(self, key: Hashable, entry: CachedResponse, encoding: str,
+                encode: Callable[[bytes], bytes]) -> bytes:
+        """The body of entry encoded with encoding, encoding it on first use
+        (the copy is kept with the entry, counted in its size)"""
+        body = entry.variants.get(encoding)
+        if body is not None:
+            return body
+        body = encode(entry.body)
+        with self._lock:
+            if self._entries.get(key) is entry and encoding not in entry.variants:
+                entry.variants[encoding] = body
+                self._size += len(body)
+                self._evict()
+        return body
+
+    def _evict(self) -> None:
+        while self._size > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: Hashable) -> None:
+        self._size -= self._entries.pop(key).size
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
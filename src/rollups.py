@@ -0,0 +1,181 @@
+"""
+Personal Finance Management System - Running Aggregates Module
+Materialized per-account daily and monthly totals, updated on every write
+"""
+
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import aggregation
+from aggregation import ColumnBatch, DAY_US, group_columns, group_totals, month_index
+from indexes import from_epoch_us
+
+MonthBucket = Tuple[int, int, str]   # (month_index, type_code, category)
+DayBucket = Tuple[int, int]          # (epoch_day, type_code)
+CategoryBucket = Tuple[str, int, int]  # (category, month_index, type_code)
+
+
+class RollupStore:
+    """Per-account [scaled sum, count] buckets by month/type/category and day/type
+
+    Buckets are nested under the account ID so that account-filtered
+    queries only touch that account's buckets. Report queries cost
+    O(buckets) regardless of how many transactions were recorded. A flat
+    (category, month, type) map across all accounts answers per-category
+    spend lookups (e.g. budgets) in O(months).
+
+    With NumPy, rebuild() keeps the per-account buckets as grouped arrays
+    sorted by account (the base) and later writes go to the bucket
+    dictionaries as deltas, so a bulk load does not create millions of
+    bucket objects. Queries yield base and delta buckets; the same key may
+    appear in both and callers add them up.
+    """
+
+    def __init__(self):
+        self._months: Dict[int, Dict[MonthBucket, List[int]]] = {}
+        self._days: Dict[int, Dict[DayBucket, List[int]]] = {}
+        self._categories: Dict[CategoryBucket, List[int]] = {}
+        # Base from rebuild(): column arrays plus each account's (start, end) run
+        self._base_months: Optional[Tuple] = None
+        self._base_days: Optional[Tuple] = None
+        self._base_month_runs: Dict[int, Tuple[int, int]] = {}
+        self._base_day_runs: Dict[int, Tuple[int, int]] = {}
+        self._base_strings: List[str] = []
+
+    @staticmethod
+    def _bump(buckets: Dict, key: Tuple, amount: int, count: int) -> None:
+        """Add to one bucket, dropping it once it is empty again
+        
+        A delta bucket over a rebuilt base may net a zero count with a
+        non-zero amount (an amount update retracts and adds one row), so
+        only a bucket with neither is empty.
+        """
+        entry = buckets.get(key)
+        if entry is None:
+            buckets[key] = [amount, count]
+            return
+        entry[0] += amount
+        entry[1] += count
+        if entry[0] == 0 and entry[1] == 0:
+            del buckets[key]
+
+    def apply(self, account_id: int, epoch_us: int, type_code: int, category: str,
+              amount: int, sign: int = 1) -> None:
+        """Record (sign=1) or retract (sign=-1) one transaction"""
+        month = month_index(from_epoch_us(epoch_us))
+        months = self._months.get(account_id)
+        if months is None:
+            months = self._months[account_id] = {}
+        days = self._days.get(account_id)
+        if days is None:
+            days = self._days[account_id] = {}
+        self._bump(months, (month, type_code, category), sign * amount, sign)
+        self._bump(days, (epoch_us // DAY_US, type_code), sign * amount, sign)
+        self._bump(self._categories, (category, month, type_code), sign * amount, sign)
+
+    def rebuild(self, batch: ColumnBatch) -> None:
+        """Recompute every bucket from a column batch in vectorized passes"""
+        self._months.clear()
+        self._days.clear()
+        self._categories.clear()
+        self._base_months = self._base_days = None
+        self._base_month_runs, self._base_day_runs = {}, {}
+        self._base_strings = list(batch.strings)
+        if aggregation.np is not None:
+            self._rebuild_base(batch)
+            return
+        for (account_id, month, type_code, category), (total, count) in group_totals(
+                batch, dimensions=("account", "month", "type", "category")).items():
+            name = batch.strings[category]
+            self._months.setdefault(account_id, {})[(month, type_code, name)] = [total, count]
+            entry = self._categories.setdefault((name, month, type_code), [0, 0])
+            entry[0] += total
+            entry[1] += count
+        for (account_id, day, type_code), (total, count) in group_totals(
+                batch, dimensions=("account", "day", "type")).items():
+            self._days.setdefault(account_id, {})[(day, type_code)] = [total, count]
+
+    def _rebuild_base(self, batch: ColumnBatch) -> None:
+        """Keep per-account buckets as arrays; only the small category map is a dict"""
+        for (month, type_code, category), (total, count) in group_totals(
+                batch, dimensions=("month", "type", "category")).items():
+            self._categories[(batch.strings[category], month, type_code)] = [total, count]
+        (accounts, months, types, categories), sums, counts = group_columns(
+            batch, ("account", "month", "type", "category"))
+        self._base_months = (months, types, categories, sums, counts)
+        self._base_month_runs = _account_runs(accounts)
+        (accounts, days, types), sums, counts = group_columns(batch, ("account", "day", "type"))
+        self._base_days = (days, types, sums, counts)
+        self._base_day_runs = _account_runs(accounts)
+
+    @staticmethod
+    def _base_rows(base: Optional[Tuple], runs: Dict[int, Tuple[int, int]],
+                   account_id: Optional[int], first: Optional[int],
+                   last: Optional[int]) -> Iterator[Tuple]:
+        """Yield base bucket rows whose first column is within [first, last]"""
+        if base is None:
+            return iter(())
+        if account_id is not None:
+            start, end = runs.get(account_id, (0, 0))
+            base = tuple(column[start:end] for column in base)
+        mask = None
+        if first is not None:
+            mask = base[0] >= first
+        if last is not None:
+            mask = base[0] <= last if mask is None else mask & (base[0] <= last)
+        if mask is not None:
+            base = tuple(column[mask] for column in base)
+        return zip(*(column.tolist() for column in base))
+
+    def _accounts(self, store: Dict, account_id: Optional[int]) -> Iterator[Dict]:
+        """Bucket maps for one account or for all accounts"""
+        if account_id is None:
+            return iter(store.values())
+        buckets = store.get(account_id)
+        return iter([buckets] if buckets is not None else [])
+
+    def month_totals(self, account_id: Optional[int] = None, first_month: Optional[int] = None,
+                     last_month: Optional[int] = None
+                     ) -> Iterator[Tuple[int, int, str, int, int]]:
+        """Yield (month, type_code, category, scaled_sum, count) within the month range"""
+        strings = self._base_strings
+        for month, type_code, category, total, count in self._base_rows(
+                self._base_months, self._base_month_runs, account_id, first_month, last_month):
+            yield month, type_code, strings[category], total, count
+        for buckets in self._accounts(self._months, account_id):
+            for (month, type_code, category), (total, count) in buckets.items():
+                if (first_month is None or month >= first_month) and \
+                        (last_month is None or month <= last_month):
+                    yield month, type_code, category, total, count
+
+    def day_totals(self, account_id: Optional[int] = None, first_day: Optional[int] = None,
+                   last_day: Optional[int] = None) -> Iterator[Tuple[int, int, int, int]]:
+        """Yield (epoch_day, type_code, scaled_sum, count) within the day range"""
+        yield from self._base_rows(self._base_days, self._base_day_runs, account_id,
+                                   first_day, last_day)
+        for buckets in self._accounts(self._days, account_id):
+            for (day, type_code), (total, count) in buckets.items():
+                if (first_day is None or day >= first_day) and \
+                        (last_day is None or day <= last_day):
+                    yield day, type_code, total, count
+
+    def category_total(self, category: str, type_code: int, first_month: int,
+                       last_month: int) -> int:
+        """Scaled sum of one category and type over a month range, all accounts"""
+        categories = self._categories
+        total = 0
+        for month in range(first_month, last_month + 1):
+            entry = categories.get((category, month, type_code))
+            if entry is not None:
+                total += entry[0]
+        return total
+
+
+def _account_runs(accounts) -> Dict[int, Tuple[int, int]]:
+    """(start, end) of each account's run in an array sorted by account"""
+    np = aggregation.np
+    if not len(accounts):
+        return {}
+    starts = np.flatnonzero(np.r_[True, accounts[1:] != accounts[:-1]])
+    ends = np.append(starts[1:], len(accounts))
+    return {account_id: (start, end) for account_id, start, end in zip(
+        accounts[starts].tolist(), starts.tolist(), ends.tolist())}
@@ -0,0 +1,74 @@
+"""
+Personal Finance Management System - Response Serialization Module
+Pre-built record encoders that turn model objects straight into JSON bytes
+"""
+
+import json
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, TypeVar
+
+try:
+    import orjson
+except ImportError:  # orjson is optional
+    orjson = None
+
+from account import Account
+from budget import Budget
+from transaction import Transaction
+
+T = TypeVar("T")
+
+
+def encode_datetime(value: datetime) -> str:
+    """ISO 8601 text as Pydantic writes it (UTC as 'Z')"""
+    text = value.isoformat()
+    return text[:-6] + "Z" if text.endswith("+00:00") else text
+
+
+# One function per model, each building the same JSON object the matching
+# response model would: Decimal as its string form, enums as their value
+def transaction_record(t: Transaction) -> Dict[str, Any]:
+    return {
+        "id": t.id,
+        "account_id": t.account_id,
+        "amount": str(t.amount),
+        "transaction_type": t.transaction_type.value,
+        "description": t.description,
+        "date": encode_datetime(t.date),
+        "category": t.category,
+    }
+
+
+def account_record(a: Account) -> Dict[str, Any]:
+    return {
+        "id": a.id,
+        "name": a.name,
+        "account_type": a.account_type.value,
+        "balance": str(a.balance),
+        "is_active": a.is_active,
+        "created_at": encode_datetime(a.created_at),
+    }
+
+
+def budget_record(b: Budget) -> Dict[str, Any]:
+    return {
+        "id": b.id,
+        "name": b.name,
+        "category": b.category,
+        "amount": str(b.amount),
+        "period": b.period.value,
+        "start_date": b.start_date.isoformat(),
+        "is_active": b.is_active,
+    }
+
+
+def dumps(content: Any) -> bytes:
+    """Compact UTF-8 JSON, with orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def dump_records(items: Iterable[T], record: Callable[[T], Dict[str, Any]]) -> bytes:
+    """JSON array of record(item) for every item"""
+    return dumps([record(item) for item in items])
@@ -0,0 +1,229 @@
+"""
+Personal Finance Management System - Snapshot Module
+Binary point-in-time images of manager state, written in the background and
+memory-mapped on startup so that only the log tail has to be replayed
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from journal import ManagerJournal, decode_account, decode_budget, encode_account, encode_budget
+from transaction import TransactionColumns
+
+SNAPSHOT_PREFIX = "snapshot-"
+SNAPSHOT_SUFFIX = ".snap"
+MAGIC = b"PFMSNAP1"
+_HEADER = struct.Struct("<8sQ")   # magic, JSON header length
+_ALIGN = 8
+
+
+@dataclass(slots=True)
+class SnapshotState:
+    """Manager state as of one log position
+
+    Accounts and budgets are few and kept as journal records; transactions
+    are stored column by column so that they load without per-row parsing.
+    """
+    lsn: int
+    accounts: List[Dict[str, Any]] = field(default_factory=list)
+    budgets: List[Dict[str, Any]] = field(default_factory=list)
+    account_next_id: int = 1
+    budget_next_id: int = 1
+    transaction_next_id: int = 1
+    transaction_count: int = 0
+    transactions: Optional[TransactionColumns] = None
+
+
+def snapshot_name(lsn: int) -> str:
+    """File name of the snapshot taken at the given LSN"""
+    return f"{SNAPSHOT_PREFIX}{lsn:016d}{SNAPSHOT_SUFFIX}"
+
+
+def snapshot_lsn(path: str) -> int:
+    """LSN a snapshot file was taken at, from its name"""
+    return int(os.path.basename(path)[len(SNAPSHOT_PREFIX):-len(SNAPSHOT_SUFFIX)])
+
+
+def list_snapshots(directory: str) -> List[str]:
+    """Snapshot paths, oldest first"""
+    if not os.path.isdir(directory):
+        return []
+    names = sorted(n for n in os.listdir(directory)
+                   if n.startswith(SNAPSHOT_PREFIX) and n.endswith(SNAPSHOT_SUFFIX))
+    return [os.path.join(directory, n) for n in names]
+
+
+def _padding(size: int) -> bytes:
+    return b"\0" * (-size % _ALIGN)
+
+
+def write_snapshot(directory: str, state: SnapshotState) -> str:
+    """Write state atomically (temp file, fsync, rename), returns its path"""
+    columns = state.transactions or TransactionColumns()
+    layout = []
+    offset = 0
+    for name in TransactionColumns.array_fields():
+        column = getattr(columns, name)
+        size = len(column) * column.itemsize
+        layout.append([name, column.typecode, offset, size])
+        offset += size + len(_padding(size))
+    header = json.dumps({
+        "lsn": state.lsn,
+        "byteorder": sys.byteorder,
+        "accounts": state.accounts,
+        "budgets": state.budgets,
+        "account_next_id": state.account_next_id,
+        "budget_next_id": state.budget_next_id,
+        "transaction_next_id": state.transaction_next_id,
+        "transaction_count": len(columns.ids),
+        "strings": columns.strings,
+        "columns": layout,
+    }, separators=(',', ':')).encode()
+
+    path = os.path.join(directory, snapshot_name(state.lsn))
+    temp_path = path + ".tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, len(header)))
+        f.write(header)
+        f.write(_padding(_HEADER.size + len(header)))
+        for name in TransactionColumns.array_fields():
+            column = getattr(columns, name)
+            column.tofile(f)
+            f.write(_padding(len(column) * column.itemsize))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+    if hasattr(os, "O_DIRECTORY"):
+        directory_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(directory_fd)
+        finally:
+            os.close(directory_fd)
+    return path
+
+
+def load_snapshot(path: str) -> SnapshotState:
+    """Read a snapshot through a memory map, copying each column into an array once"""
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        magic, header_size = _HEADER.unpack_from(mapped, 0)
+        if magic != MAGIC:
+            raise ValueError(f"Not a snapshot file: {path}")
+        header = json.loads(mapped[_HEADER.size:_HEADER.size + header_size])
+        if header["byteorder"] != sys.byteorder:
+            raise ValueError(f"Snapshot was written with {header['byteorder']}-endian columns")
+        base = _HEADER.size + header_size
+        base += len(_padding(base))
+
+        columns = TransactionColumns(strings=header["strings"])
+        view = memoryview(mapped)
+        try:
+            for name, typecode, offset, size in header["columns"]:
+                column = array(typecode)
+                column.frombytes(view[base + offset:base + offset + size])
+                setattr(columns, name, column)
+        finally:
+            view.release()
+
+    return SnapshotState(
+        lsn=header["lsn"],
+        accounts=header["accounts"],
+        budgets=header["budgets"],
+        account_next_id=header["account_next_id"],
+        budget_next_id=header["budget_next_id"],
+        transaction_next_id=header["transaction_next_id"],
+        transaction_count=header["transaction_count"],
+        transactions=columns
+    )
+
+
+class Snapshotter:
+    """Takes snapshots of a journaled set of managers and compacts the log
+
+    capture() must run where no mutation is in flight (e.g. holding the
+    exclusive() of a CallGate that every manager call passes) and only
+    copies account and budget records and the transaction row count. A
+    mutation that changed the managers but has not logged its record yet
+    would otherwise be in the snapshot and in the log tail replayed over
+    it. write() does the expensive column export and file I/O and can run
+    on a worker thread, because new transaction rows are appended: rows
+    that a later delete shifted into the first count are dropped again by
+    ID, and updates or deletes made after capture() are replayed from the
+    log. After the snapshot is durable, log segments and snapshots it
+    supersedes are deleted.
+    """
+
+    def __init__(self, journal: ManagerJournal, directory: Optional[str] = None):
+        self.journal = journal
+        self.directory = directory or journal.wal.directory
+        os.makedirs(self.directory, exist_ok=True)
+        snapshots = list_snapshots(self.directory)
+        self.last_snapshot_lsn = snapshot_lsn(snapshots[-1]) if snapshots else 0
+
+    def capture(self) -> SnapshotState:
+        """Record the current state cheaply; the log continues in a new segment"""
+        wal = self.journal.wal
+        accounts = self.journal.account_manager
+        transactions = self.journal.transaction_manager
+        budgets = self.journal.budget_manager
+        state = SnapshotState(
+            lsn=wal.last_lsn,
+            accounts=[encode_account(a) for a in accounts.accounts],
+            budgets=[encode_budget(b) for b in budgets.budgets],
+            account_next_id=accounts.next_id,
+            budget_next_id=budgets.next_id,
+            transaction_next_id=transactions.next_id,
+            transaction_count=len(transactions.transactions)
+        )
+        wal.roll()
+        return state
+
+    def write(self, state: SnapshotState) -> str:
+        """Export the captured transaction rows, write the snapshot and compact"""
+        columns = self.journal.transaction_manager.export_columns(state.transaction_count)
+        captured = bisect_left(columns.ids, state.transaction_next_id)
+        if captured < len(columns.ids):
+            for name in TransactionColumns.array_fields():
+                setattr(columns, name, getattr(columns, name)[:captured])
+        state.transactions = columns
+        path = write_snapshot(self.directory, state)
+        self.last_snapshot_lsn = state.lsn
+        self.journal.wal.truncate_before(state.lsn)
+        for old_path in list_snapshots(self.directory):
+            if old_path != path:
+                os.remove(old_path)
+        return path
+
+    def snapshot(self) -> str:
+        """Capture and write in the calling thread"""
+        return self.write(self.capture())
+
+
+def restore(journal: ManagerJournal, directory: Optional[str] = None) -> Optional[SnapshotState]:
+    """Load the latest snapshot into the (empty) managers, then replay the log tail
+
+    Returns the snapshot used, or None when the whole log was replayed.
+    """
+    snapshots = list_snapshots(directory or journal.wal.directory)
+    state = load_snapshot(snapshots[-1]) if snapshots else None
+    if state is not None:
+        for record in state.accounts:
+            journal.account_manager.restore_account(decode_account(record))
+        for record in state.budgets:
+            journal.budget_manager.restore_budget(decode_budget(record))
+        journal.transaction_manager.import_columns(state.transactions)
+        journal.account_manager.next_id = max(journal.account_manager.next_id,
+                                              state.account_next_id)
+        journal.budget_manager.next_id = max(journal.budget_manager.next_id,
+                                             state.budget_next_id)
+        journal.transaction_manager.next_id = max(journal.transaction_manager.next_id,
+                                                  state.transaction_next_id)
+        journal.last_applied_lsn = state.lsn
+    journal.replay(after_lsn=journal.last_applied_lsn)
+    return state
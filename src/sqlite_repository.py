@@ -0,0 +1,588 @@
+"""
+Personal Finance Management System - SQLite Storage Module
+SQLite persistence for the managers: batched writes on one writer thread,
+reads through a pool of connections
+"""
+
+import asyncio
+import queue
+import sqlite3
+import threading
+from collections.abc import Sequence
+from concurrent.futures import Future
+from contextlib import contextmanager
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from account import Account, AccountManager, AccountType
+from aggregation import ColumnBatch, amount_exponent, to_scaled
+from budget import Budget, BudgetManager, BudgetPeriod
+from indexes import to_epoch_us, from_epoch_us
+from transaction import (Transaction, TransactionColumns, TransactionManager, TransactionQuery,
+                         TransactionType, TYPE_CODES)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS accounts (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    account_type TEXT NOT NULL,
+    balance TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    is_active INTEGER NOT NULL,
+    opening_balance TEXT
+);
+CREATE TABLE IF NOT EXISTS transactions (
+    id INTEGER PRIMARY KEY,
+    account_id INTEGER NOT NULL,
+    amount TEXT NOT NULL,
+    transaction_type TEXT NOT NULL,
+    description TEXT NOT NULL,
+    date INTEGER NOT NULL,
+    category TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_transactions_account_date ON transactions (account_id, date);
+CREATE INDEX IF NOT EXISTS idx_transactions_date ON transactions (date);
+CREATE INDEX IF NOT EXISTS idx_transactions_type ON transactions (transaction_type);
+CREATE INDEX IF NOT EXISTS idx_transactions_category ON transactions (category);
+CREATE TABLE IF NOT EXISTS budgets (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    category TEXT NOT NULL,
+    amount TEXT NOT NULL,
+    period TEXT NOT NULL,
+    start_date TEXT NOT NULL,
+    is_active INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    next_id INTEGER NOT NULL
+);
+"""
+
+# Statements are constant strings so that each connection compiles them once
+# (sqlite3 keeps a per-connection prepared statement cache)
+INSERT_ACCOUNT = "INSERT INTO accounts VALUES (?, ?, ?, ?, ?, ?, ?)"
+UPDATE_BALANCE = "UPDATE accounts SET balance = ? WHERE id = ?"
+DELETE_ACCOUNT = "DELETE FROM accounts WHERE id = ?"
+INSERT_TRANSACTION = "INSERT INTO transactions VALUES (?, ?, ?, ?, ?, ?, ?)"
+UPDATE_TRANSACTION = ("UPDATE transactions SET account_id = ?, amount = ?, transaction_type = ?, "
+                      "description = ?, date = ?, category = ? WHERE id = ?")
+DELETE_TRANSACTION = "DELETE FROM transactions WHERE id = ?"
+INSERT_BUDGET = "INSERT INTO budgets VALUES (?, ?, ?, ?, ?, ?, ?)"
+SET_COUNTER = "INSERT OR REPLACE INTO counters VALUES (?, ?)"
+SELECT_TRANSACTION_COLUMNS = \
+    "id, account_id, amount, transaction_type, description, date, category"
+
+_BARRIER = object()
+_STOP = object()
+_MISSING = object()
+_UNIT = object()
+
+
+def connect(path: str, read_only: bool = False) -> sqlite3.Connection:
+    """Open a connection usable from any thread (one thread at a time)"""
+    connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+    connection.execute("PRAGMA busy_timeout = 5000")
+    if read_only:
+        connection.execute("PRAGMA query_only = ON")
+    else:
+        connection.execute("PRAGMA synchronous = NORMAL")
+    return connection
+
+
+class ConnectionPool:
+    """Read connections handed out one per caller
+
+    In WAL mode readers do not block each other or the writer, and the
+    sqlite3 module releases the GIL while a query runs, so requests on
+    different threads read in parallel.
+    """
+
+    def __init__(self, path: str, size: int = 4):
+        self.path = path
+        self.size = size
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a connection, waiting for one if all size are in use"""
+        try:
+            connection = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                create = self._created < self.size
+                self._created += create
+            connection = connect(self.path, read_only=True) if create else self._idle.get()
+        try:
+            yield connection
+        finally:
+            self._idle.put(connection)
+
+    def close(self) -> None:
+        """Close the idle connections"""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class BatchWriter:
+    """Single writer thread that commits queued statements in batches
+
+    Every statement queued while the previous batch was committing goes
+    into the next SQLite transaction (group commit), consecutive
+    statements of the same kind with one executemany(). submit() returns
+    a Future that resolves once its batch has committed; if the batch
+    fails, every Future in it gets the error.
+    """
+
+    def __init__(self, path: str, max_batch: int = 1000):
+        self.max_batch = max_batch
+        self._connection = connect(path)
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="sqlite-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, sql: str, params: Tuple) -> Future:
+        """Queue one statement"""
+        future: Future = Future()
+        self._queue.put((sql, params, future))
+        return future
+
+    def submit_many(self, sql: str, rows: List[Tuple]) -> Future:
+        """Queue one statement for many parameter rows (all in the same batch)"""
+        future: Future = Future()
+        self._queue.put((sql, list(rows), future))
+        return future
+
+    def submit_unit(self, statements: List[Tuple[str, object]],
+                    future: Optional[Future] = None) -> Future:
+        """Queue (sql, params or list of rows) statements that must commit together"""
+        if future is None:
+            future = Future()
+        self._queue.put((_UNIT, list(statements), future))
+        return future
+
+    def flush(self) -> None:
+        """Block until everything queued so far has committed"""
+        future: Future = Future()
+        self._queue.put((_BARRIER, None, future))
+        future.result()
+
+    def close(self) -> None:
+        """Commit what is queued, then stop the writer thread"""
+        self._queue.put((_STOP, None, None))
+        self._thread.join()
+        self._connection.close()
+
+    def _run(self) -> None:
+        stop = False
+        while not stop:
+            batch = [self._queue.get()]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = any(sql is _STOP for sql, _params, _future in batch)
+            self._commit([item for item in batch if item[0] is not _STOP])
+
+    def _commit(self, batch: List[Tuple]) -> None:
+        """Run one batch in a single transaction and resolve its futures"""
+        statements = []
+        for sql, params, _future in batch:
+            if sql is _UNIT:
+                statements.extend(params)
+            elif sql is not _BARRIER:
+                statements.append((sql, params))
+        error: Optional[BaseException] = None
+        if statements:
+            try:
+                self._connection.execute("BEGIN")
+                start = 0
+                while start < len(statements):
+                    end = start + 1
+                    while end < len(statements) and statements[end][0] == statements[start][0]:
+                        end += 1
+                    rows: List[Tuple] = []
+                    for _sql, params in statements[start:end]:
+                        if isinstance(params, list):
+                            rows.extend(params)
+                        else:
+                            rows.append(params)
+                    self._connection.executemany(statements[start][0], rows)
+                    start = end
+                self._connection.execute("COMMIT")
+            except sqlite3.Error as e:
+                if self._connection.in_transaction:
+                    self._connection.execute("ROLLBACK")
+                error = e
+        for _sql, _params, future in batch:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(None)
+
+
+def _transaction_row(transaction: Transaction) -> Tuple:
+    return (transaction.id, transaction.account_id, str(transaction.amount),
+            transaction.transaction_type.value, transaction.description,
+            to_epoch_us(transaction.date), transaction.category)
+
+
+def _decode_transaction(row: Tuple) -> Transaction:
+    return Transaction(
+        id=row[0],
+        account_id=row[1],
+        amount=Decimal(row[2]),
+        transaction_type=TransactionType(row[3]),
+        description=row[4],
+        date=from_epoch_us(row[5]),
+        category=row[6]
+    )
+
+
+class SqliteRepository:
+    """SQLite database behind the three managers
+
+    Accounts and budgets are small and stay in memory; their changes are
+    written through. Transactions are stored only in SQLite (see
+    SqliteTransactionManager). Writes are queued to the BatchWriter, so
+    callers that need durability wait on wait_committed().
+    """
+
+    def __init__(self, path: str, pool_size: int = 4, max_batch: int = 1000):
+        self.path = path
+        setup = connect(path)
+        setup.execute("PRAGMA journal_mode = WAL")
+        setup.executescript(SCHEMA)
+        if "opening_balance" not in [row[1] for row in setup.execute("PRAGMA table_info(accounts)")]:
+            setup.execute("ALTER TABLE accounts ADD COLUMN opening_balance TEXT")
+        setup.close()
+        self.writer = BatchWriter(path, max_batch)
+        self.pool = ConnectionPool(path, pool_size)
+        self._last: Optional[Future] = None
+        self._submit_lock = threading.Lock()   # Keeps _last the most recently queued write
+        self._local = threading.local()        # Statements of the open atomic() block
+
+    def submit(self, sql: str, params: Tuple) -> Future:
+        """Queue a write, returns a Future resolved when it has committed"""
+        unit = getattr(self._local, "unit", None)
+        if unit is not None:
+            unit[0].append((sql, params))
+            return unit[1]
+        with self._submit_lock:
+            future = self._last = self.writer.submit(sql, params)
+        return future
+
+    def submit_many(self, sql: str, rows: List[Tuple]) -> Future:
+        """Queue a write of many rows, returns a Future resolved when they have committed"""
+        unit = getattr(self._local, "unit", None)
+        if unit is not None:
+            unit[0].append((sql, list(rows)))
+            return unit[1]
+        with self._submit_lock:
+            future = self._last = self.writer.submit_many(sql, rows)
+        return future
+
+    @contextmanager
+    def atomic(self) -> Iterator[None]:
+        """Commit every write this thread submits inside the block in one SQLite
+        transaction (never split across batches); nested blocks join the outer one"""
+        if getattr(self._local, "unit", None) is not None:
+            yield
+            return
+        statements: List[Tuple[str, object]] = []
+        future: Future = Future()
+        self._local.unit = (statements, future)
+        try:
+            yield
+        finally:
+            self._local.unit = None
+            # Writes already applied in memory are queued even if the block raised
+            with self._submit_lock:
+                self._last = self.writer.submit_unit(statements, future)
+
+    def flush(self) -> None:
+        """Block until every queued write has committed"""
+        self.writer.flush()
+
+    def last_write(self) -> Optional[Future]:
+        """Future of the most recently queued write (None before the first)"""
+        return self._last
+
+    async def wait_committed(self) -> None:
+        """Wait (without blocking the event loop) for the writes queued so far"""
+        last = self.last_write()
+        if last is not None:
+            await asyncio.wrap_future(last)
+
+    def close(self) -> None:
+        """Commit queued writes and close every connection"""
+        self.writer.close()
+        self.pool.close()
+
+    def attach(self, account_manager: AccountManager, budget_manager: BudgetManager) -> None:
+        """Write account and budget changes through to the database"""
+        account_manager.subscribe(
+            lambda event, account: self._on_account(event, account, account_manager))
+        budget_manager.subscribe(
+            lambda event, budget: self._on_budget(event, budget, budget_manager))
+
+    def _on_account(self, event: str, account: Account, manager: AccountManager) -> None:
+        if event == "create":
+            self.submit(INSERT_ACCOUNT, (account.id, account.name, account.account_type.value,
+                                         str(account.balance), account.created_at.isoformat(),
+                                         int(account.is_active), str(account.opening_balance)))
+            self.submit(SET_COUNTER, ("account", manager.next_id))
+        elif event == "balance":
+            self.submit(UPDATE_BALANCE, (str(account.balance), account.id))
+        elif event == "delete":
+            self.submit(DELETE_ACCOUNT, (account.id,))
+
+    def _on_budget(self, event: str, budget: Budget, manager: BudgetManager) -> None:
+        if event == "create":
+            self.submit(INSERT_BUDGET, (budget.id, budget.name, budget.category,
+                                        str(budget.amount), budget.period.value,
+                                        budget.start_date.isoformat(), int(budget.is_active)))
+            self.submit(SET_COUNTER, ("budget", manager.next_id))
+
+    def load(self, account_manager: AccountManager, budget_manager: BudgetManager) -> None:
+        """Fill empty account and budget managers from the database"""
+        with self.pool.connection() as connection:
+            counters = dict(connection.execute("SELECT name, next_id FROM counters"))
+            for row in connection.execute("SELECT * FROM accounts ORDER BY id"):
+                account = Account(row[1], AccountType(row[2]), Decimal(row[3]))
+                account.id = row[0]
+                account.created_at = datetime.fromisoformat(row[4])
+                account.is_active = bool(row[5])
+                # Databases created before opening balances were stored hold NULL
+                account.opening_balance = Decimal(row[6] if row[6] is not None else row[3])
+                account_manager.restore_account(account)
+            for row in connection.execute("SELECT * FROM budgets ORDER BY id"):
+                budget_manager.restore_budget(Budget(
+                    id=row[0],
+                    name=row[1],
+                    category=row[2],
+                    amount=Decimal(row[3]),
+                    period=BudgetPeriod(row[4]),
+                    start_date=date.fromisoformat(row[5]),
+                    is_active=bool(row[6])
+                ))
+        account_manager.next_id = max(account_manager.next_id, counters.get("account", 1))
+        budget_manager.next_id = max(budget_manager.next_id, counters.get("budget", 1))
+
+
+class SqliteRowView(Sequence):
+    """Read-only sequence of stored transactions in ID order, read on access"""
+
+    def __init__(self, manager: "SqliteTransactionManager"):
+        self._manager = manager
+
+    def __len__(self) -> int:
+        return self._manager._count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            rows = self._manager._fetch_range(start, max(stop - start, 0))
+            return rows[::step]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("transaction index out of range")
+        return self._manager._fetch_range(index, 1)[0]
+
+
+class SqliteTransactionManager(TransactionManager):
+    """Transaction manager whose rows live in SQLite
+
+    The time and account indexes and the rollups stay in memory (rebuilt
+    by load()), so lookups resolve to IDs without a query and only the
+    returned rows are read, through the connection pool. Rows whose
+    insert, update or delete has not committed yet are served from memory
+    (a pending delete as None).
+    """
+
+    def __init__(self, repository: SqliteRepository):
+        super().__init__()
+        self.repository = repository
+        self.transactions = SqliteRowView(self)
+        self._count = 0
+        self._pending: Dict[int, Optional[Transaction]] = {}
+
+    def _settle(self, future: Future, rows: Dict[int, Optional[Transaction]]) -> None:
+        """Drop rows from memory once the statement writing them has committed,
+        unless a later change replaced them meanwhile"""
+        def done(f: Future) -> None:
+            if f.exception() is None:
+                for transaction_id, row in rows.items():
+                    if self._pending.get(transaction_id, _MISSING) is row:
+                        self._pending.pop(transaction_id, None)
+        future.add_done_callback(done)
+
+    def _store(self, transaction: Transaction) -> None:
+        """Queue the insert; keep the row in memory until it has committed"""
+        self._pending[transaction.id] = transaction
+        self._count += 1
+        future = self.repository.submit(INSERT_TRANSACTION, _transaction_row(transaction))
+        self._settle(future, {transaction.id: transaction})
+
+    def _store_batch(self, transactions: List[Transaction]) -> None:
+        """Queue the whole batch as one executemany(), committed together"""
+        rows = {t.id: t for t in transactions}
+        self._pending.update(rows)
+        self._count += len(transactions)
+        future = self.repository.submit_many(
+            INSERT_TRANSACTION, [_transaction_row(t) for t in transactions])
+        self._settle(future, rows)
+
+    def _replace(self, old: Transaction, transaction: Transaction) -> None:
+        """Queue the update; serve the new version from memory until it has committed"""
+        self._pending[transaction.id] = transaction
+        row = _transaction_row(transaction)
+        future = self.repository.submit(UPDATE_TRANSACTION, row[1:] + row[:1])
+        self._settle(future, {transaction.id: transaction})
+
+    def _delete(self, transaction: Transaction) -> None:
+        """Queue the delete; the ID stays reserved (its counter is stored) so
+        that a reload does not hand it out again"""
+        self._pending[transaction.id] = None
+        self._count -= 1
+        future = self.repository.submit(DELETE_TRANSACTION, (transaction.id,))
+        self.repository.submit(SET_COUNTER, ("transaction", self.next_id))
+        self._settle(future, {transaction.id: None})
+
+    def _query(self, sql: str, params: Tuple = ()) -> List[Tuple]:
+        with self.repository.pool.connection() as connection:
+            return connection.execute(sql, params).fetchall()
+
+    def _fetch_range(self, offset: int, limit: int) -> List[Transaction]:
+        """Rows by position in ID order"""
+        self.repository.flush()
+        return [_decode_transaction(row) for row in self._query(
+            f"SELECT {SELECT_TRANSACTION_COLUMNS} FROM transactions ORDER BY id LIMIT ? OFFSET ?",
+            (limit, offset))]
+
+    def _materialize(self, transaction_ids: List[int]) -> List[Transaction]:
+        """Read the indexed IDs in one query, keeping the index order
+        
+        The pending rows are copied first: one committing (and leaving
+        _pending) during the query is then either in the copy or, already
+        committed, in the database.
+        """
+        pending = {}
+        for tid in transaction_ids:
+            transaction = self._pending.get(tid, _MISSING)
+            if transaction is not _MISSING:
+                pending[tid] = transaction
+        missing = [tid for tid in transaction_ids if tid not in pending]
+        found: Dict[int, Transaction] = {}
+        for start in range(0, len(missing), 500):
+            chunk = missing[start:start + 500]
+            for row in self._query(
+                    f"SELECT {SELECT_TRANSACTION_COLUMNS} FROM transactions "
+                    f"WHERE id IN ({','.join('?' * len(chunk))})", tuple(chunk)):
+                found[row[0]] = _decode_transaction(row)
+        rows = []
+        for tid in transaction_ids:
+            transaction = pending.get(tid, _MISSING)
+            if transaction is _MISSING:
+                transaction = found.get(tid)
+            if transaction is not None:   # Not deleted meanwhile
+                rows.append(transaction)
+        return rows
+
+    def _filter_keys(self, transaction_ids: Sequence[int],
+                     query: TransactionQuery) -> List[Tuple[int, int]]:
+        """Check the filters in SQL, reading only the keys of the passing rows
+        (amounts are stored as text, so their bounds are checked here)"""
+        self.repository.flush()
+        conditions, params = [], []
+        for column, value in (("account_id", query.account_id),
+                              ("transaction_type", query.transaction_type and
+                               query.transaction_type.value),
+                              ("category", query.category)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        if query.start_date is not None:
+            conditions.append("date >= ?")
+            params.append(to_epoch_us(query.start_date))
+        if query.end_date is not None:
+            conditions.append("date <= ?")
+            params.append(to_epoch_us(query.end_date))
+        where = "".join(f" AND {condition}" for condition in conditions)
+        ids = list(transaction_ids)
+        keys: Dict[int, Tuple[int, int]] = {}
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            for transaction_id, epoch_us, amount in self._query(
+                    f"SELECT id, date, amount FROM transactions "
+                    f"WHERE id IN ({','.join('?' * len(chunk))}){where}",
+                    tuple(chunk) + tuple(params)):
+                amount = abs(Decimal(amount))
+                if ((query.min_amount is None or amount >= query.min_amount)
+                        and (query.max_amount is None or amount <= query.max_amount)):
+                    keys[transaction_id] = (epoch_us, transaction_id)
+        return [keys[tid] for tid in ids if tid in keys]
+
+    def get_transaction_by_id(self, transaction_id: int) -> Optional[Transaction]:
+        """Get transaction by ID"""
+        pending = self._pending.get(transaction_id, _MISSING)
+        if pending is not _MISSING:
+            return pending
+        rows = self._query(f"SELECT {SELECT_TRANSACTION_COLUMNS} FROM transactions WHERE id = ?",
+                           (transaction_id,))
+        return _decode_transaction(rows[0]) if rows else None
+
+    def _scan_columns(self) -> TransactionColumns:
+        """Read every stored row into columns, in ID order"""
+        self.repository.flush()
+        columns = TransactionColumns()
+        codes: Dict[str, int] = {}
+        with self.repository.pool.connection() as connection:
+            for row in connection.execute(
+                    f"SELECT {SELECT_TRANSACTION_COLUMNS} FROM transactions ORDER BY id"):
+                amount = Decimal(row[2])
+                description = codes.get(row[4])
+                if description is None:
+                    description = codes[row[4]] = len(columns.strings)
+                    columns.strings.append(row[4])
+                category = codes.get(row[6])
+                if category is None:
+                    category = codes[row[6]] = len(columns.strings)
+                    columns.strings.append(row[6])
+                columns.ids.append(row[0])
+                columns.account_ids.append(row[1])
+                columns.amounts.append(to_scaled(amount))
+                columns.amount_exps.append(amount_exponent(amount))
+                columns.types.append(TYPE_CODES[TransactionType(row[3])])
+                columns.dates.append(row[5])
+                columns.descriptions.append(description)
+                columns.categories.append(category)
+        return columns
+
+    def column_batch(self) -> ColumnBatch:
+        """Build a columnar view of all stored transactions for batch aggregation"""
+        return self._scan_columns().batch()
+
+    def export_columns(self, count: Optional[int] = None) -> TransactionColumns:
+        """Encode stored transactions (the first count, default all) as columns"""
+        columns = self._scan_columns()
+        if count is not None:
+            for name in TransactionColumns.array_fields():
+                setattr(columns, name, getattr(columns, name)[:count])
+        return columns
+
+    def load(self) -> None:
+        """Build the in-memory indexes and rollups from the stored rows"""
+        columns = self._scan_columns()
+        self._count = len(columns.ids)
+        self._rebuild_indexes(columns)
+        counters = dict(self._query("SELECT name, next_id FROM counters"))
+        self.next_id = max(self.next_id, counters.get("transaction", 1))
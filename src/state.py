@@ -0,0 +1,350 @@
+"""
+Personal Finance Management System - Application State Module
+Builds the managers and services from the environment, and serves them to
+API worker processes from one state server process over IPC
+
+Usage: python src/state.py [--address HOST:PORT|SOCKET_PATH]
+(the authentication key is read from FINANCE_STATE_AUTHKEY)
+"""
+
+import argparse
+import os
+import signal
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
+from multiprocessing.managers import BaseManager, IteratorProxy
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple, Union
+
+from account import AccountManager
+from alerts import BudgetAlert, BudgetAlertEvaluator
+from budget import BudgetManager
+from journal import ManagerJournal
+from ledger import BalanceLedger, BalanceReconciler
+from response_cache import DataVersions
+from snapshot import Snapshotter, restore
+from sqlite_repository import SqliteRepository, SqliteTransactionManager
+from transaction import TransactionManager
+from transfers import TransferService
+from utilization import BudgetUtilizationService
+from wal import Durability, WriteAheadLog
+
+Address = Union[str, Tuple[str, int]]
+
+# Shared objects a worker can reach, by attribute of AppState
+SERVICES = ("account_manager", "transaction_manager", "budget_manager", "budget_utilization",
+            "budget_alerts", "balance_ledger", "balance_reconciler", "transfer_service")
+# In-process only: their arguments or results (callables, locks) cannot cross processes
+LOCAL_METHODS = {"subscribe", "lock_accounts", "exclusive", "start", "stop",
+                 "track_account_types"}
+# Methods returning iterators, served as remote iterators
+ITERATOR_METHODS = {"export_transactions"}
+
+
+@dataclass
+class AppState:
+    """Managers and services behind the API; proxies of them in a worker process"""
+    account_manager: Any
+    transaction_manager: Any
+    budget_manager: Any
+    budget_utilization: Any
+    budget_alerts: Any
+    balance_ledger: Any
+    balance_reconciler: Any
+    transfer_service: Any
+    journal: Optional[ManagerJournal] = None
+    snapshotter: Optional[Snapshotter] = None
+    repository: Optional[SqliteRepository] = None
+    data_versions: Any = None       # DataVersions (a proxy of the server's on workers)
+    alert_feed: Any = None          # Set on workers (proxy of the server's AlertFeed)
+
+    @property
+    def remote(self) -> bool:
+        return self.alert_feed is not None
+
+
+def build_state() -> AppState:
+    """Create the managers and services, restoring stored state
+
+    FINANCE_STORAGE selects where state lives: "memory" (default,
+    optionally journaled to FINANCE_WAL_DIR) or "sqlite" (database file
+    FINANCE_SQLITE_PATH, FINANCE_SQLITE_POOL_SIZE read connections).
+    """
+    account_manager = AccountManager()
+    budget_manager = BudgetManager()
+    repository: Optional[SqliteRepository] = None
+    if os.environ.get("FINANCE_STORAGE", "memory") == "sqlite":
+        repository = SqliteRepository(
+            os.environ.get("FINANCE_SQLITE_PATH", "finance.db"),
+            pool_size=int(os.environ.get("FINANCE_SQLITE_POOL_SIZE", "4"))
+        )
+        transaction_manager = SqliteTransactionManager(repository)
+        repository.load(account_manager, budget_manager)
+        transaction_manager.load()
+        repository.attach(account_manager, budget_manager)
+    else:
+        transaction_manager = TransactionManager()
+    budget_utilization = BudgetUtilizationService(budget_manager, transaction_manager)
+    budget_alerts = BudgetAlertEvaluator(budget_manager, transaction_manager)
+    balance_ledger = BalanceLedger(account_manager, transaction_manager)
+
+    # Optional write-ahead log: state is restored from the latest snapshot and
+    # log tail in FINANCE_WAL_DIR and every later mutation is appended to it
+    journal: Optional[ManagerJournal] = None
+    snapshotter: Optional[Snapshotter] = None
+    if repository is None and os.environ.get("FINANCE_WAL_DIR"):
+        journal = ManagerJournal(
+            WriteAheadLog(
+                os.environ["FINANCE_WAL_DIR"],
+                durability=Durability(os.environ.get("FINANCE_WAL_DURABILITY", "batch")),
+                flush_interval=float(os.environ.get("FINANCE_WAL_FLUSH_INTERVAL", "0.01"))
+            ),
+            account_manager, transaction_manager, budget_manager
+        )
+        restore(journal)
+        journal.attach()
+        snapshotter = Snapshotter(journal)
+
+    # Restored accounts and those created later index their transactions by type
+    transaction_manager.track_account_types(account_manager)
+    data_versions = DataVersions()
+    data_versions.attach(account_manager, transaction_manager, budget_manager)
+
+    # Transfers persist both legs and both balances as one journal record or
+    # one SQLite transaction
+    transfer_service = TransferService(
+        account_manager, transaction_manager,
+        journal.atomic if journal is not None else
+        repository.atomic if repository is not None else None
+    )
+    return AppState(account_manager, transaction_manager, budget_manager, budget_utilization,
+                    budget_alerts, balance_ledger, BalanceReconciler(balance_ledger),
+                    transfer_service, journal, snapshotter, repository, data_versions)
+
+
+def close_state(state: AppState) -> None:
+    """Flush and close the storage"""
+    if state.journal is not None:
+        state.journal.wal.close()
+    if state.repository is not None:
+        state.repository.close()
+
+
+def parse_address(value: str) -> Address:
+    """"host:port" as a TCP address, anything else as a Unix socket path"""
+    host, _, port = value.rpartition(":")
+    return (host, int(port)) if host and port.isdigit() else value
+
+
+class AlertFeed:
+    """Numbered history of recent alerts, long-polled by workers to relay
+    the alerts raised in the server into their own alert streams"""
+
+    def __init__(self, size: int = 1000):
+        self._alerts: Deque[Tuple[int, BudgetAlert]] = deque(maxlen=size)
+        self._last = 0
+        self._changed = threading.Condition()
+
+    def publish(self, alert: BudgetAlert) -> None:
+        with self._changed:
+            self._last += 1
+            self._alerts.append((self._last, alert))
+            self._changed.notify_all()
+
+    def latest(self) -> int:
+        """Number of the newest alert"""
+        return self._last
+
+    def wait(self, after: int, timeout: float) -> Tuple[int, List[BudgetAlert]]:
+        """Alerts numbered after after, waiting up to timeout seconds for one"""
+        with self._changed:
+            self._changed.wait_for(lambda: self._last > after, timeout)
+            return self._last, [alert for number, alert in self._alerts if number > after]
+
+
+class CallGate:
+    """Lets served calls run concurrently, but lets a snapshot capture wait
+    until none is in flight (and hold new ones back meanwhile)"""
+
+    def __init__(self):
+        self._changed = threading.Condition()
+        self._active = 0
+        self._closed = False
+
+    @contextmanager
+    def call(self) -> Iterator[None]:
+        with self._changed:
+            self._changed.wait_for(lambda: not self._closed)
+            self._active += 1
+        try:
+            yield
+        finally:
+            with self._changed:
+                self._active -= 1
+                if not self._active:
+                    self._changed.notify_all()
+
+    @contextmanager
+    def exclusive(self) -> Iterator[None]:
+        with self._changed:
+            self._changed.wait_for(lambda: not self._closed)
+            self._closed = True
+            self._changed.wait_for(lambda: self._active == 0)
+        try:
+            yield
+        finally:
+            with self._changed:
+                self._closed = False
+                self._changed.notify_all()
+
+
+class _Served:
+    """Wraps a shared object so that every call passes the gate, and returns
+    only once the SQLite writes it queued (if any) have committed"""
+
+    def __init__(self, target: Any, gate: CallGate, repository: Optional[SqliteRepository]):
+        self._target = target
+        self._gate = gate
+        self._repository = repository
+
+    def __getattr__(self, name: str) -> Callable:
+        method = getattr(self._target, name)
+
+        def call(*args, **kwargs):
+            with self._gate.call():
+                before = self._repository.last_write() if self._repository else None
+                result = method(*args, **kwargs)
+                after = self._repository.last_write() if self._repository else None
+            if after is not before:
+                after.result()
+            return result
+        return call
+
+
+def gate_services(state: AppState, gate: CallGate) -> AppState:
+    """Copy of state whose services pass gate on every call, for an API that
+    takes snapshots itself (see serve() for the state server)"""
+    return replace(state, **{name: _Served(getattr(state, name), gate, state.repository)
+                             for name in SERVICES})
+
+
+def exposed_methods(target: Any) -> List[str]:
+    """Public methods of target that can be called from another process"""
+    return [name for name in dir(target) if not name.startswith("_")
+            and name not in LOCAL_METHODS and callable(getattr(target, name))]
+
+
+class StateManager(BaseManager):
+    """Connection to the state server (see serve())"""
+
+
+StateManager.register("Iterator", proxytype=IteratorProxy, create_method=False)
+for _name in SERVICES + ("alert_feed", "data_versions"):
+    StateManager.register(_name)
+
+
+def serve(address: Address, authkey: bytes, state: Optional[AppState] = None) -> None:
+    """Serve the application state to worker processes until interrupted
+
+    Each worker connection is handled on its own thread, so calls from
+    different workers run concurrently against the thread-safe managers;
+    listeners (journal, alerts, ledger) run here, once per change. Takes
+    snapshots every FINANCE_SNAPSHOT_INTERVAL and reconciles balances every
+    FINANCE_RECONCILE_INTERVAL seconds, like a single-process API.
+    """
+    state = state or build_state()
+    gate = CallGate()
+    feed = AlertFeed()
+    state.budget_alerts.subscribe(feed.publish)
+
+    class Server(StateManager):
+        pass
+
+    Server.register("alert_feed", callable=lambda: feed,
+                    exposed=("publish", "latest", "wait"))
+    Server.register("data_versions", callable=lambda: state.data_versions,
+                    exposed=("current",))
+    for name in SERVICES:
+        target = getattr(state, name)
+        served = _Served(target, gate, state.repository)
+        Server.register(name, callable=lambda served=served: served,
+                        exposed=exposed_methods(target),
+                        method_to_typeid={method: "Iterator" for method in ITERATOR_METHODS})
+
+    stop = threading.Event()
+    snapshot_interval = float(os.environ.get("FINANCE_SNAPSHOT_INTERVAL", "300"))
+    if state.snapshotter is not None and snapshot_interval > 0:
+        def snapshot_loop():
+            while not stop.wait(snapshot_interval):
+                if state.journal.wal.last_lsn > state.snapshotter.last_snapshot_lsn:
+                    with gate.exclusive():
+                        captured = state.snapshotter.capture()
+                    state.snapshotter.write(captured)
+        threading.Thread(target=snapshot_loop, name="snapshots", daemon=True).start()
+    reconcile_interval = float(os.environ.get("FINANCE_RECONCILE_INTERVAL", "0"))
+    if reconcile_interval > 0:
+        state.balance_reconciler.start(reconcile_interval)
+
+    server = Server(address=address, authkey=authkey).get_server()
+    try:
+        server.serve_forever()
+    finally:
+        stop.set()
+        if reconcile_interval > 0:
+            state.balance_reconciler.stop()
+        close_state(state)
+
+
+def connect_state(address: Address, authkey: bytes, timeout: float = 10.0) -> AppState:
+    """Proxies of the served state, waiting up to timeout seconds for the server"""
+    deadline = time.monotonic() + timeout
+    while True:
+        manager = StateManager(address=address, authkey=authkey)
+        try:
+            manager.connect()
+            break
+        except (ConnectionError, FileNotFoundError):
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.05)
+    return AppState(*(getattr(manager, name)() for name in SERVICES),
+                    data_versions=manager.data_versions(), alert_feed=manager.alert_feed())
+
+
+def relay_alerts(feed: Any, publish: Callable[[BudgetAlert], None]) -> threading.Thread:
+    """Publish the alerts the server raises from now on, on a background thread"""
+    def run():
+        last = feed.latest()
+        try:
+            while True:
+                last, alerts = feed.wait(last, 30.0)
+                for alert in alerts:
+                    publish(alert)
+        except (EOFError, ConnectionError):
+            return   # Server shut down
+
+    thread = threading.Thread(target=run, name="alert-relay", daemon=True)
+    thread.start()
+    return thread
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the state server"""
+    parser = argparse.ArgumentParser(description="Serve the finance state to API workers")
+    parser.add_argument("--address", default=os.environ.get("FINANCE_STATE_SERVER",
+                                                            "127.0.0.1:8765"))
+    args = parser.parse_args(argv)
+    authkey = os.environ.get("FINANCE_STATE_AUTHKEY")
+    if not authkey:
+        parser.error("FINANCE_STATE_AUTHKEY must be set")
+    # Stop like on Ctrl+C, so that the storage is flushed and closed
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    serve(parse_address(args.address), authkey.encode())
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -3,11 +3,24 @@ Personal Finance Management System - Transaction Recording Module
 Intentionally implements only basic functionality, missing categorization, statistics and advanced query features
 """
 
-from datetime import datetime
+import threading
+from array import array
+from bisect import bisect_left
+from contextlib import contextmanager
+from datetime import datetime, date as Date, timedelta
 from decimal import Decimal
 from enum import Enum
-from typing import Optional, List
-from dataclasses import dataclass
+from typing import Callable, Iterable, Iterator, Optional, List, Dict, Sequence, Tuple
+from dataclasses import dataclass, field, fields, replace
+
+import aggregation
+from account import AccountManager, AccountType
+from aggregation import (ColumnBatch, amount_exponent, to_scaled, from_scaled, from_scaled_exact,
+                         month_index, month_label, month_start)
+from indexes import (Bitmap, BitmapIndex, TextIndex, TimeOrderedIndex, build_bitmap_index,
+                     build_text_index, build_time_indexes, keep_members, tokenize, to_epoch_us,
+                     from_epoch_us)
+from rollups import RollupStore
 
 
 class TransactionType(Enum):
@@ -17,7 +30,53 @@ class TransactionType(Enum):
     TRANSFER = "transfer"  # Transfer
 
 
-@dataclass
+# Compact integer codes used by columnar storage and aggregation
+TYPE_CODES = {t: code for code, t in enumerate(TransactionType)}
+TYPES_BY_CODE = list(TransactionType)
+
+# The running aggregates keep transfer legs leaving an account (negative
+# amounts) under their own code, so reports can show gross flows both ways
+TRANSFER_OUT_CODE = len(TYPES_BY_CODE)
+_ROLLUP_CODES = TRANSFER_OUT_CODE + 1
+_TRANSFER_CODE = TYPE_CODES[TransactionType.TRANSFER]
+
+# Fields update_transaction() may change
+UPDATABLE_FIELDS = {"account_id", "amount", "transaction_type", "description", "date", "category"}
+
+
+def check_amount(amount: Decimal, transaction_type: TransactionType) -> None:
+    """Amounts must be positive, except transfers: their sign is the direction
+    (a transfer leg leaving the account is negative)"""
+    if amount == 0 or (amount < 0 and transaction_type != TransactionType.TRANSFER):
+        raise ValueError("Transaction amount must be positive")
+
+
+def _rollup_code(type_code: int, amount: int) -> int:
+    """Rollup code of a row (scaled amount): its type code, or TRANSFER_OUT_CODE
+    for an outgoing transfer leg"""
+    return TRANSFER_OUT_CODE if type_code == _TRANSFER_CODE and amount < 0 else type_code
+
+
+def _type_rollup_codes(transaction_type: TransactionType) -> Tuple[int, ...]:
+    """Rollup codes holding the rows of one transaction type"""
+    code = TYPE_CODES[transaction_type]
+    return (code, TRANSFER_OUT_CODE) if code == _TRANSFER_CODE else (code,)
+
+
+def _rollup_batch(batch: ColumnBatch) -> ColumnBatch:
+    """A batch sharing batch's columns with its types replaced by rollup codes"""
+    if aggregation.np is not None:
+        np = aggregation.np
+        types = np.frombuffer(batch.types, dtype=np.int8)
+        outgoing = (types == _TRANSFER_CODE) & (np.frombuffer(batch.amounts, dtype=np.int64) < 0)
+        codes = array('b', np.where(outgoing, TRANSFER_OUT_CODE, types).astype(np.int8).tobytes())
+    else:
+        codes = array('b', map(_rollup_code, batch.types, batch.amounts))
+    return ColumnBatch(batch.account_ids, batch.dates, codes, batch.categories, batch.amounts,
+                       batch.strings)
+
+
+@dataclass(slots=True)
 class Transaction:
     """Transaction record"""
     id: Optional[int] = None
@@ -26,57 +85,887 @@ class Transaction:
     transaction_type: TransactionType = TransactionType.EXPENSE
     description: str = ""
     date: datetime = None
+    category: str = ""
     
     def __post_init__(self):
         if self.date is None:
             self.date = datetime.now()
 
 
+@dataclass(slots=True)
+class MonthlySummary:
+    """Income/expense summary for one month
+    
+    transfer is the net of the transfer legs (incoming minus outgoing);
+    transfer_in and transfer_out are the gross amounts moved each way.
+    """
+    month: str
+    income: Decimal = Decimal('0')
+    expense: Decimal = Decimal('0')
+    transfer: Decimal = Decimal('0')
+    transfer_in: Decimal = Decimal('0')
+    transfer_out: Decimal = Decimal('0')
+    transaction_count: int = 0
+    
+    @property
+    def net(self) -> Decimal:
+        """Income minus expense"""
+        return self.income - self.expense
+
+
+@dataclass(slots=True)
+class DailySummary:
+    """Income/expense summary for one day
+    
+    transfer is the net of the transfer legs (incoming minus outgoing);
+    transfer_in and transfer_out are the gross amounts moved each way.
+    """
+    day: Date
+    income: Decimal = Decimal('0')
+    expense: Decimal = Decimal('0')
+    transfer: Decimal = Decimal('0')
+    transfer_in: Decimal = Decimal('0')
+    transfer_out: Decimal = Decimal('0')
+    transaction_count: int = 0
+    
+    @property
+    def net(self) -> Decimal:
+        """Income minus expense"""
+        return self.income - self.expense
+
+
+@dataclass(slots=True)
+class TransactionQuery:
+    """Filters of query_transactions(); fields left None do not filter
+    
+    Dates and amounts are inclusive bounds; amounts bound the size of a
+    transaction, so an outgoing transfer leg (stored with a negative
+    amount) matches by its absolute value. text matches descriptions like
+    search_transactions() (a query without words does not filter).
+    account_type matches the transactions of accounts of that type, as
+    registered with set_account_type().
+    """
+    account_id: Optional[int] = None
+    transaction_type: Optional[TransactionType] = None
+    start_date: Optional[datetime] = None
+    end_date: Optional[datetime] = None
+    min_amount: Optional[Decimal] = None
+    max_amount: Optional[Decimal] = None
+    category: Optional[str] = None
+    text: Optional[str] = None
+    account_type: Optional[AccountType] = None
+    
+    def matches(self, transaction: Transaction) -> bool:
+        """Whether a transaction passes every filter except text and account_type"""
+        return ((self.account_id is None or transaction.account_id == self.account_id)
+                and (self.transaction_type is None
+                     or transaction.transaction_type == self.transaction_type)
+                and (self.start_date is None or transaction.date >= self.start_date)
+                and (self.end_date is None or transaction.date <= self.end_date)
+                and (self.min_amount is None or abs(transaction.amount) >= self.min_amount)
+                and (self.max_amount is None or abs(transaction.amount) <= self.max_amount)
+                and (self.category is None or transaction.category == self.category))
+    
+    def row_filters(self) -> List[str]:
+        """Names of the filters checked on each candidate row"""
+        return [name for name, value in (
+            ("transaction_type", self.transaction_type), ("category", self.category),
+            ("amount", self.min_amount if self.min_amount is not None else self.max_amount)
+        ) if value is not None]
+
+
+@dataclass(slots=True)
+class QueryPlan:
+    """How query_transactions() answers a query
+    
+    driver is where candidates come from: "account" or "time" (walking that
+    time index newest first over the date range), "text" (the description
+    matches), "bitmap" (the IDs in the bitmaps), both sorted by date, or
+    "none" (nothing can match). candidates is how many the driver holds;
+    filters are checked on each of them. bitmaps are the bitmap indexes
+    ANDed (smallest first) for the type, category and account type filters.
+    """
+    driver: str
+    candidates: int
+    filters: List[str] = field(default_factory=list)
+    bitmaps: List[str] = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class TransactionColumns:
+    """Every transaction field as a typed column (the snapshot storage format)
+
+    amounts are scaled by 10**AMOUNT_DIGITS with the original Decimal
+    exponent alongside, dates are epoch microseconds and descriptions and
+    categories are codes into the strings table.
+    """
+    ids: array = field(default_factory=lambda: array('q'))
+    account_ids: array = field(default_factory=lambda: array('q'))
+    amounts: array = field(default_factory=lambda: array('q'))
+    amount_exps: array = field(default_factory=lambda: array('b'))
+    types: array = field(default_factory=lambda: array('b'))
+    dates: array = field(default_factory=lambda: array('q'))
+    descriptions: array = field(default_factory=lambda: array('i'))
+    categories: array = field(default_factory=lambda: array('i'))
+    strings: List[str] = field(default_factory=list)
+    
+    @classmethod
+    def array_fields(cls) -> List[str]:
+        """Names of the typed column fields, in storage order"""
+        return [f.name for f in fields(cls) if f.name != "strings"]
+    
+    def batch(self) -> ColumnBatch:
+        """The columns needed for aggregation, without copying"""
+        return ColumnBatch(
+            account_ids=self.account_ids,
+            dates=self.dates,
+            types=self.types,
+            categories=self.categories,
+            amounts=self.amounts,
+            strings=self.strings
+        )
+
+
 class TransactionManager:
-    """Transaction manager, functionality intentionally incomplete"""
+    """Transaction manager, functionality intentionally incomplete
+    
+    Safe to call from several threads: one lock covers ID allocation, the
+    row store, the indexes (time, per-account, description words and the
+    bitmaps) and the rollups. Listeners run while it is held,
+    so they see changes in ID order; a listener may return a callable that
+    is run after the lock is released (e.g. to wait for an fsync without
+    blocking other writers). Rows are materialized outside the lock.
+    """
     
     def __init__(self):
         self.transactions: List[Transaction] = []
         self.next_id = 1
+        self._by_id: Dict[int, Transaction] = {}
+        self._time_index = TimeOrderedIndex()
+        self._account_index: Dict[int, TimeOrderedIndex] = {}
+        self._text_index = TextIndex()
+        self._type_bitmaps = BitmapIndex()
+        self._category_bitmaps = BitmapIndex()
+        self._account_type_bitmaps = BitmapIndex()
+        self._account_types: Dict[int, AccountType] = {}
+        self._rollups = RollupStore()
+        self._listeners: List[Callable[[str, Transaction], Optional[Callable[[], None]]]] = []
+        self._lock = threading.RLock()
     
     def add_transaction(self, account_id: int, amount: Decimal, 
-                       transaction_type: TransactionType, description: str = "") -> Transaction:
-        """Add transaction record"""
-        if amount <= 0:
-            raise ValueError("Transaction amount must be positive")
-        
-        transaction = Transaction(
-            id=self.next_id,
-            account_id=account_id,
-            amount=amount,
-            transaction_type=transaction_type,
-            description=description
-        )
+                       transaction_type: TransactionType, description: str = "",
+                       date: Optional[datetime] = None, category: str = "") -> Transaction:
+        """Add transaction record (date defaults to now, older dates are allowed)"""
+        check_amount(amount, transaction_type)
+        amount_exponent(amount)
         
-        self.next_id += 1
-        self.transactions.append(transaction)
+        with self._lock:
+            transaction = Transaction(
+                id=self.next_id,
+                account_id=account_id,
+                amount=amount,
+                transaction_type=transaction_type,
+                description=description,
+                date=date,
+                category=category
+            )
+            
+            self._store(transaction)
+            self.next_id += 1
+            self._index_transaction(transaction)
+            followups = self._notify("add", transaction)
+        self._run_followups(followups)
+        return transaction
+    
+    def add_transactions(self, records: Iterable[Tuple]) -> List[Transaction]:
+        """Add a batch of (account_id, amount, transaction_type, description, date,
+        category) records under one contiguous ID range
+        
+        Every record is validated before any is stored, so a batch is added
+        completely or not at all. The time indexes are updated once per batch;
+        the rollups and listeners still see each transaction in ID order.
+        """
+        transactions = []
+        for account_id, amount, transaction_type, description, date, category in records:
+            check_amount(amount, transaction_type)
+            amount_exponent(amount)
+            transactions.append(Transaction(
+                account_id=account_id,
+                amount=amount,
+                transaction_type=transaction_type,
+                description=description,
+                date=date,
+                category=category
+            ))
+        
+        followups = []
+        with self._lock:
+            first_id = self.next_id
+            self.next_id += len(transactions)
+            for transaction_id, transaction in enumerate(transactions, first_id):
+                transaction.id = transaction_id
+            self._store_batch(transactions)
+            self._index_batch(transactions)
+            for transaction in transactions:
+                self._rollup(transaction)
+                followups.extend(self._notify("add", transaction))
+        self._run_followups(followups)
+        return transactions
+    
+    def restore_transaction(self, transaction: Transaction) -> None:
+        """Re-insert a transaction with its original ID (used when replaying stored state)"""
+        with self._lock:
+            self._store(transaction)
+            self.next_id = max(self.next_id, transaction.id + 1)
+            self._index_transaction(transaction)
+    
+    def update_transaction(self, transaction_id: int, **changes) -> Transaction:
+        """Change fields of a transaction (any of UPDATABLE_FIELDS), keeping its ID
+        
+        Raises:
+            ValueError: If the transaction does not exist or a change is invalid
+        """
+        unknown = set(changes) - UPDATABLE_FIELDS
+        if unknown:
+            raise ValueError(f"Cannot update transaction fields: {', '.join(sorted(unknown))}")
+        
+        with self._lock:
+            old = self.get_transaction_by_id(transaction_id)
+            if old is None:
+                raise ValueError(f"Transaction {transaction_id} not found")
+            transaction = replace(old, **changes)
+            check_amount(transaction.amount, transaction.transaction_type)
+            amount_exponent(transaction.amount)
+            
+            self._unindex_transaction(old)
+            self._replace(old, transaction)
+            self._index_transaction(transaction)
+            followups = self._notify("update", transaction)
+        self._run_followups(followups)
         return transaction
     
+    def delete_transaction(self, transaction_id: int) -> bool:
+        """Delete a transaction by ID, returns False if it does not exist"""
+        with self._lock:
+            transaction = self.get_transaction_by_id(transaction_id)
+            if transaction is None:
+                return False
+            self._unindex_transaction(transaction)
+            self._delete(transaction)
+            followups = self._notify("delete", transaction)
+        self._run_followups(followups)
+        return True
+    
+    @contextmanager
+    def exclusive(self) -> Iterator[None]:
+        """Hold the write lock across several calls, so that no other thread's
+        transactions are added (or logged) in between"""
+        with self._lock:
+            yield
+    
+    def subscribe(self, listener: Callable[[str, Transaction], Optional[Callable[[], None]]]
+                  ) -> None:
+        """Register listener(event, transaction) called after each change"""
+        self._listeners.append(listener)
+    
+    def set_account_type(self, account_id: int, account_type: AccountType) -> None:
+        """Index the account's transactions (recorded and future) under its type,
+        for the account_type filter of queries"""
+        with self._lock:
+            previous = self._account_types.get(account_id)
+            if previous == account_type:
+                return
+            self._account_types[account_id] = account_type
+            account_index = self._account_index.get(account_id)
+            if account_index is None:
+                return
+            transaction_ids = sorted(account_index.range())
+            if previous is not None:
+                for transaction_id in transaction_ids:
+                    self._account_type_bitmaps.remove(previous, transaction_id)
+            self._account_type_bitmaps.merge(account_type, Bitmap.from_sorted(transaction_ids))
+    
+    def set_account_types(self, account_types: Dict[int, AccountType]) -> None:
+        """Register the types of many accounts, rebuilding the account type index once"""
+        with self._lock:
+            self._account_types.update(account_types)
+            account_ids, transaction_ids = array('q'), array('q')
+            for account_id, account_index in self._account_index.items():
+                transaction_ids.extend(account_index.range())
+                account_ids.extend(array('q', [account_id]) * len(account_index))
+            self._account_type_bitmaps = build_bitmap_index(account_ids, transaction_ids,
+                                                            self._account_type_table())
+    
+    def _account_type_table(self) -> List[Optional[AccountType]]:
+        """Registered account types by account ID (None where unknown)"""
+        table: List[Optional[AccountType]] = [None] * (max(self._account_types, default=0) + 1)
+        for account_id, account_type in self._account_types.items():
+            table[account_id] = account_type
+        return table
+    
+    def track_account_types(self, account_manager: AccountManager) -> None:
+        """Keep the account type index in step with the accounts of account_manager"""
+        account_manager.subscribe(lambda event, account: self.set_account_type(
+            account.id, account.account_type) if event == "create" else None)
+        self.set_account_types({account.id: account.account_type
+                                for account in account_manager.get_all_accounts()})
+    
+    def bitmap_memory(self) -> Dict[str, int]:
+        """Bytes held by each bitmap index"""
+        with self._lock:
+            return {
+                "transaction_type": self._type_bitmaps.nbytes,
+                "category": self._category_bitmaps.nbytes,
+                "account_type": self._account_type_bitmaps.nbytes
+            }
+    
+    def _notify(self, event: str, transaction: Transaction) -> List[Callable[[], None]]:
+        """Call listeners with a change event ("add", "update" with the new version or
+        "delete") once indexes and rollups reflect it, returns the follow-up callables
+        they returned"""
+        followups = []
+        for listener in self._listeners:
+            followup = listener(event, transaction)
+            if followup is not None:
+                followups.append(followup)
+        return followups
+    
+    @staticmethod
+    def _run_followups(followups: List[Callable[[], None]]) -> None:
+        """Run listener follow-ups once the lock has been released"""
+        for followup in followups:
+            followup()
+    
+    def _store(self, transaction: Transaction) -> None:
+        """Persist transaction row in the backing storage"""
+        self.transactions.append(transaction)
+        self._by_id[transaction.id] = transaction
+    
+    def _store_batch(self, transactions: List[Transaction]) -> None:
+        """Persist a batch of transaction rows in the backing storage"""
+        for transaction in transactions:
+            self._store(transaction)
+    
+    def _replace(self, old: Transaction, transaction: Transaction) -> None:
+        """Overwrite a stored row with its updated version (same ID)"""
+        position = bisect_left(self.transactions, old.id, key=lambda t: t.id)
+        self.transactions[position] = transaction
+        self._by_id[transaction.id] = transaction
+    
+    def _delete(self, transaction: Transaction) -> None:
+        """Remove a row from the backing storage"""
+        position = bisect_left(self.transactions, transaction.id, key=lambda t: t.id)
+        del self.transactions[position]
+        del self._by_id[transaction.id]
+    
+    def _index_transaction(self, transaction: Transaction) -> None:
+        """Add transaction to the time, per-account, text and bitmap indexes and the
+        rollups"""
+        self._time_index.add(transaction.date, transaction.id)
+        account_index = self._account_index.get(transaction.account_id)
+        if account_index is None:
+            account_index = self._account_index[transaction.account_id] = TimeOrderedIndex()
+        account_index.add(transaction.date, transaction.id)
+        self._text_index.add(transaction.description, transaction.id)
+        self._bitmap_transaction(transaction)
+        self._rollup(transaction)
+    
+    def _unindex_transaction(self, transaction: Transaction) -> None:
+        """Remove transaction from the indexes and retract it from the rollups"""
+        self._time_index.remove(transaction.date, transaction.id)
+        account_index = self._account_index.get(transaction.account_id)
+        if account_index is not None:
+            account_index.remove(transaction.date, transaction.id)
+        self._text_index.remove(transaction.description, transaction.id)
+        self._type_bitmaps.remove(transaction.transaction_type, transaction.id)
+        self._category_bitmaps.remove(transaction.category, transaction.id)
+        account_type = self._account_types.get(transaction.account_id)
+        if account_type is not None:
+            self._account_type_bitmaps.remove(account_type, transaction.id)
+        self._rollup(transaction, sign=-1)
+    
+    def _bitmap_transaction(self, transaction: Transaction) -> None:
+        """Set the transaction's bit in its type, category and account type bitmaps"""
+        self._type_bitmaps.add(transaction.transaction_type, transaction.id)
+        self._category_bitmaps.add(transaction.category, transaction.id)
+        account_type = self._account_types.get(transaction.account_id)
+        if account_type is not None:
+            self._account_type_bitmaps.add(account_type, transaction.id)
+    
+    def _index_batch(self, transactions: List[Transaction]) -> None:
+        """Merge a batch into the time, per-account, text and bitmap indexes (rollups
+        are left to the caller)"""
+        keys: Dict[int, List[Tuple[int, int]]] = {}
+        for t in transactions:
+            keys.setdefault(t.account_id, []).append((to_epoch_us(t.date), t.id))
+            self._text_index.add(t.description, t.id)
+            self._bitmap_transaction(t)
+        self._time_index.extend([key for account_keys in keys.values() for key in account_keys])
+        for account_id, account_keys in keys.items():
+            account_index = self._account_index.get(account_id)
+            if account_index is None:
+                account_index = self._account_index[account_id] = TimeOrderedIndex()
+            account_index.extend(account_keys)
+    
+    def _rollup(self, transaction: Transaction, sign: int = 1) -> None:
+        """Add (sign=1) or retract (sign=-1) a transaction in the running aggregates"""
+        amount = to_scaled(transaction.amount)
+        self._rollups.apply(
+            transaction.account_id,
+            to_epoch_us(transaction.date),
+            _rollup_code(TYPE_CODES[transaction.transaction_type], amount),
+            transaction.category,
+            amount,
+            sign
+        )
+    
+    def _materialize(self, transaction_ids: List[int]) -> List[Transaction]:
+        """Resolve indexed IDs to transaction records (skipping any deleted meanwhile)"""
+        by_id = self._by_id
+        return [t for t in map(by_id.get, transaction_ids) if t is not None]
+    
+    def get_transaction_by_id(self, transaction_id: int) -> Optional[Transaction]:
+        """Get transaction by ID"""
+        return self._by_id.get(transaction_id)
+    
     def get_transactions_by_account(self, account_id: int) -> List[Transaction]:
-        """Get transaction records for specified account"""
-        return [t for t in self.transactions if t.account_id == account_id]
+        """Get transaction records for specified account, oldest first"""
+        with self._lock:
+            account_index = self._account_index.get(account_id)
+            if account_index is None:
+                return []
+            transaction_ids = account_index.range()
+        return self._materialize(transaction_ids)
+    
+    def get_account_transactions_page(self, account_id: int, limit: int = 10,
+                                      offset: int = 0) -> List[Transaction]:
+        """Get one page of an account's transactions, newest first"""
+        with self._lock:
+            account_index = self._account_index.get(account_id)
+            if account_index is None:
+                return []
+            transaction_ids = account_index.latest(limit, offset)
+        return self._materialize(transaction_ids)
+    
+    def count_transactions_by_account(self, account_id: int) -> int:
+        """Get number of transactions recorded for an account"""
+        account_index = self._account_index.get(account_id)
+        return len(account_index) if account_index is not None else 0
     
     def get_recent_transactions(self, limit: int = 10) -> List[Transaction]:
         """Get recent transaction records"""
-        sorted_transactions = sorted(self.transactions, key=lambda t: t.date, reverse=True)
-        return sorted_transactions[:limit]
+        with self._lock:
+            transaction_ids = self._time_index.latest(limit)
+        return self._materialize(transaction_ids)
+    
+    def get_transactions_before(self, date: datetime, transaction_id: int,
+                                limit: int = 10, account_id: Optional[int] = None
+                                ) -> List[Transaction]:
+        """Get the page of transactions older than the given (date, id), newest first"""
+        with self._lock:
+            index = self._time_index if account_id is None else self._account_index.get(account_id)
+            if index is None:
+                return []
+            transaction_ids = index.before(date, transaction_id, limit)
+        return self._materialize(transaction_ids)
+    
+    def get_transactions_after(self, date: datetime, transaction_id: int,
+                               limit: int = 10, account_id: Optional[int] = None
+                               ) -> List[Transaction]:
+        """Get the transactions newer than the given (date, id), oldest first (for tailing)"""
+        with self._lock:
+            index = self._time_index if account_id is None else self._account_index.get(account_id)
+            if index is None:
+                return []
+            transaction_ids = index.after(date, transaction_id, limit)
+        return self._materialize(transaction_ids)
+    
+    def get_transactions_by_type(self, transaction_type: TransactionType) -> List[Transaction]:
+        """Get transactions of one type, oldest first"""
+        return self.query_transactions(TransactionQuery(transaction_type=transaction_type),
+                                       limit=None)[::-1]
+    
+    def get_transactions_by_date_range(self, start_date: Optional[datetime] = None,
+                                       end_date: Optional[datetime] = None) -> List[Transaction]:
+        """Get transactions with start_date <= date <= end_date, oldest first"""
+        with self._lock:
+            transaction_ids = self._time_index.range(start_date, end_date)
+        return self._materialize(transaction_ids)
+    
+    def export_transactions(self, account_id: Optional[int] = None,
+                            start_date: Optional[datetime] = None,
+                            end_date: Optional[datetime] = None,
+                            chunk_size: int = 1000) -> Iterator[List[Transaction]]:
+        """Yield transactions with start_date <= date <= end_date in chunks, oldest first
+        
+        The IDs in range are copied under the lock when iteration starts, so
+        the export is the transactions recorded at that point (less any
+        deleted meanwhile). Only one chunk of records is materialized at a
+        time, so a full-ledger export runs in memory bounded by chunk_size
+        plus 8 bytes per ID.
+        """
+        with self._lock:
+            index = self._time_index if account_id is None else self._account_index.get(account_id)
+            if index is None:
+                return
+            transaction_ids = index.range_array(start_date, end_date)
+        for start in range(0, len(transaction_ids), chunk_size):
+            yield self._materialize(transaction_ids[start:start + chunk_size].tolist())
+    
+    def search_transactions(self, query: str, account_id: Optional[int] = None,
+                            transaction_type: Optional[TransactionType] = None,
+                            start_date: Optional[datetime] = None,
+                            end_date: Optional[datetime] = None, limit: int = 10,
+                            before_id: Optional[int] = None) -> List[Transaction]:
+        """Get transactions whose description has a word starting with every query
+        term (case-insensitive), most recently recorded (highest ID) first
+        
+        The matches come from the description index; the other filters are
+        checked newest first, a growing chunk of matches at a time, until
+        limit pass. before_id continues after the last ID of a previous page.
+        """
+        with self._lock:
+            matches = self._text_index.search(query)
+        filters = TransactionQuery(account_id, transaction_type, start_date, end_date)
+        end = len(matches) if before_id is None else bisect_left(matches, before_id)
+        chunk_size = max(limit * 2, 64)
+        found: List[int] = []
+        while end > 0 and len(found) < limit:
+            start = max(end - chunk_size, 0)
+            keys = self._filter_keys(matches[start:end], filters)
+            found.extend(tid for _, tid in keys[::-1][:limit - len(found)])
+            end = start
+            chunk_size *= 2
+        return self._materialize(found)
+    
+    def query_transactions(self, query: TransactionQuery, limit: Optional[int] = 10,
+                           before: Optional[Tuple[datetime, int]] = None) -> List[Transaction]:
+        """Get up to limit (None: all) transactions matching every filter of query,
+        newest first by (date, id); before continues below the (date, id) of the
+        last row of a previous page
+        
+        See explain_query() for how the candidates are found.
+        """
+        with self._lock:
+            plan, index, matches, bitmap, row_query = self._plan(query, limit)
+        if plan.driver == "none":
+            return []
+        before_key = None if before is None else (to_epoch_us(before[0]), before[1])
+        
+        if index is None:
+            keys = self._filter_keys(matches, row_query)
+            if before_key is not None:
+                keys = [key for key in keys if key < before_key]
+            keys.sort(reverse=True)
+            return self._materialize([tid for _, tid in keys[:limit]])
+        
+        found: List[int] = []
+        row_filters = bool(row_query.row_filters())
+        chunks = index.iter_newest(query.start_date, query.end_date, before_key,
+                                   max(limit or 0, 64))
+        while limit is None or len(found) < limit:
+            with self._lock:
+                chunk = next(chunks, None)
+                if chunk is not None and bitmap is not None:
+                    chunk = bitmap.select(chunk)
+            if chunk is None:
+                break
+            if matches is not None:
+                chunk = keep_members(chunk, matches)
+            if chunk and row_filters:
+                chunk = [tid for _, tid in self._filter_keys(chunk, row_query)]
+            found.extend(chunk)
+        return self._materialize(found[:limit])
+    
+    def explain_query(self, query: TransactionQuery, limit: Optional[int] = 10) -> QueryPlan:
+        """The plan query_transactions() would use for query"""
+        with self._lock:
+            return self._plan(query, limit)[0]
+    
+    def _plan(self, query: TransactionQuery, limit: Optional[int]):
+        """Choose the candidate source for a query; call with the lock held
+        
+        The account's time index (or else the global one) bounds the date
+        range in O(log n). The type, category and account type filters are
+        answered by ANDing their bitmaps, smallest first. The IDs in the
+        result that match the text (if any) are either the driver, when
+        there are fewer of them than range rows a walk is expected to visit
+        before limit of them turn up (all assumed spread evenly and
+        independently), or the walk keeps only the candidates among them.
+        Returns (plan, time index to walk (None when driven by the members),
+        text matches (or the driver's members), bitmap, query of the filters
+        left to check on rows).
+        """
+        bitmaps = [(name, index.get(value)) for name, index, value in (
+            ("transaction_type", self._type_bitmaps, query.transaction_type),
+            ("category", self._category_bitmaps, query.category),
+            ("account_type", self._account_type_bitmaps, query.account_type)
+        ) if value is not None]
+        row_query = replace(query, transaction_type=None, category=None, account_type=None) \
+            if bitmaps else query
+        filters = row_query.row_filters()
+        none = QueryPlan("none", 0), None, None, None, row_query
+        if query.account_id is not None:
+            driver, index = "account", self._account_index.get(query.account_id)
+            if index is None:
+                return none
+        else:
+            driver, index = "time", self._time_index
+        in_range = index.count(query.start_date, query.end_date)
+        if not in_range:
+            return none
+        total = max(len(self._time_index), 1)
+        
+        bitmap = None
+        bitmaps.sort(key=lambda item: len(item[1]))
+        for _, other in bitmaps:
+            bitmap = other if bitmap is None else bitmap & other
+            if not bitmap:
+                return none
+        matches = None
+        if query.text is not None and tokenize(query.text):
+            matches = self._text_index.search(query.text)
+            if not matches:
+                return none
+        if bitmap is None and matches is None:
+            return QueryPlan(driver, in_range, filters), index, None, None, row_query
+        
+        names = [name for name, _ in bitmaps]
+        source = "bitmap" if matches is None else "text"
+        members = len(matches) if matches is not None else len(bitmap)
+        if matches is not None and bitmap is not None:
+            members = members * len(bitmap) / total
+        expected = members * in_range / total
+        walked = in_range if limit is None or not expected else \
+            min(in_range, limit * in_range / expected)
+        if members < walked:
+            if bitmap is None:
+                found = matches
+            elif matches is None:
+                found = bitmap.to_array()
+            else:
+                found = (Bitmap.from_sorted(matches) & bitmap).to_array()
+            if not found:
+                return none
+            row_filters = [name for name, value in (
+                ("account", query.account_id), ("date", query.start_date or query.end_date)
+            ) if value is not None]
+            return QueryPlan(source, len(found), row_filters + filters, names), None, found, \
+                None, row_query
+        filters = (["bitmap"] if bitmap is not None else []) + \
+            (["text"] if matches is not None else []) + filters
+        return QueryPlan(driver, in_range, filters, names), index, matches, bitmap, row_query
+    
+    def _filter_keys(self, transaction_ids: Sequence[int],
+                     query: TransactionQuery) -> List[Tuple[int, int]]:
+        """(epoch_us, id) keys of the given transactions that pass the query's
+        filters except text, in the given order"""
+        return [(to_epoch_us(t.date), t.id)
+                for t in self._materialize(list(transaction_ids)) if query.matches(t)]
+    
+    def column_batch(self) -> ColumnBatch:
+        """Build a columnar view of all transactions for batch aggregation"""
+        batch = ColumnBatch()
+        codes: Dict[str, int] = {}
+        for t in self.transactions:
+            code = codes.get(t.category)
+            if code is None:
+                code = codes[t.category] = len(batch.strings)
+                batch.strings.append(t.category)
+            batch.account_ids.append(t.account_id)
+            batch.dates.append(to_epoch_us(t.date))
+            batch.types.append(TYPE_CODES[t.transaction_type])
+            batch.categories.append(code)
+            batch.amounts.append(to_scaled(t.amount))
+        return batch
+    
+    def rebuild_rollups(self) -> None:
+        """Recompute the running aggregates from the stored transactions"""
+        with self._lock:
+            self._rollups.rebuild(_rollup_batch(self.column_batch()))
+    
+    def export_columns(self, count: Optional[int] = None) -> TransactionColumns:
+        """Encode the first count stored transactions (default all) as columns
+        
+        New rows are appended, so this may run on a background thread while
+        transactions are being added past count.
+        """
+        rows = self.transactions[:count] if count is not None else list(self.transactions)
+        columns = TransactionColumns()
+        codes: Dict[str, int] = {}
+        for t in rows:
+            description = codes.get(t.description)
+            if description is None:
+                description = codes[t.description] = len(columns.strings)
+                columns.strings.append(t.description)
+            category = codes.get(t.category)
+            if category is None:
+                category = codes[t.category] = len(columns.strings)
+                columns.strings.append(t.category)
+            columns.ids.append(t.id)
+            columns.account_ids.append(t.account_id)
+            columns.amounts.append(to_scaled(t.amount))
+            columns.amount_exps.append(amount_exponent(t.amount))
+            columns.types.append(TYPE_CODES[t.transaction_type])
+            columns.dates.append(to_epoch_us(t.date))
+            columns.descriptions.append(description)
+            columns.categories.append(category)
+        return columns
+    
+    def import_columns(self, columns: TransactionColumns) -> None:
+        """Bulk-load exported transactions into an empty manager, then rebuild
+        the indexes and rollups in one pass each (no listeners are called)"""
+        if len(self.transactions):
+            raise ValueError("Transactions can only be imported into an empty manager")
+        strings = columns.strings
+        for position in range(len(columns.ids)):
+            self._store(Transaction(
+                id=columns.ids[position],
+                account_id=columns.account_ids[position],
+                amount=from_scaled_exact(columns.amounts[position], columns.amount_exps[position]),
+                transaction_type=TYPES_BY_CODE[columns.types[position]],
+                description=strings[columns.descriptions[position]],
+                date=from_epoch_us(columns.dates[position]),
+                category=strings[columns.categories[position]]
+            ))
+        self._rebuild_indexes(columns)
+    
+    def _rebuild_indexes(self, columns: TransactionColumns) -> None:
+        """Bulk-build the time, account, text and bitmap indexes and the rollups from
+        columns"""
+        with self._lock:
+            self._time_index, self._account_index = build_time_indexes(
+                columns.account_ids, columns.dates, columns.ids)
+            self._text_index = build_text_index(columns.ids, columns.descriptions,
+                                                columns.strings)
+            self._type_bitmaps = build_bitmap_index(columns.types, columns.ids,
+                                                    list(TransactionType))
+            self._category_bitmaps = build_bitmap_index(columns.categories, columns.ids,
+                                                        columns.strings)
+            self._account_type_bitmaps = build_bitmap_index(
+                columns.account_ids, columns.ids, self._account_type_table())
+            self._rollups.rebuild(_rollup_batch(columns.batch()))
+            if len(columns.ids):
+                self.next_id = max(self.next_id, max(columns.ids) + 1)
+    
+    def _report_rows(self, account_id: Optional[int], start_date: Optional[datetime],
+                     end_date: Optional[datetime]):
+        """Yield (month, type_code, category, scaled_sum, count) for a date range
+        
+        Whole months come from the rollups; partially covered months at either
+        end of the range are filled in from the rows in the time index.
+        """
+        start_us = to_epoch_us(start_date) if start_date is not None else None
+        end_us = to_epoch_us(end_date) if end_date is not None else None
+        if start_us is not None and end_us is not None and start_us > end_us:
+            return
+        
+        first_month = last_month = None
+        edges = []
+        if start_us is not None:
+            first_month = month_index(from_epoch_us(start_us))
+            if start_us != to_epoch_us(month_start(first_month)):
+                edges.append((start_us, to_epoch_us(month_start(first_month + 1)) - 1))
+                first_month += 1
+        if end_us is not None:
+            last_month = month_index(from_epoch_us(end_us))
+            if end_us != to_epoch_us(month_start(last_month + 1)) - 1:
+                edges.append((to_epoch_us(month_start(last_month)), end_us))
+                last_month -= 1
+        if len(edges) == 2 and first_month > last_month + 1:
+            edges = [(start_us, end_us)]  # Both ends fall inside the same month
+        
+        yield from self._rollups.month_totals(account_id, first_month, last_month)
+        
+        index = self._time_index if account_id is None else self._account_index.get(account_id)
+        if index is None:
+            return
+        for edge_start, edge_end in edges:
+            for t in self._materialize(index.range(from_epoch_us(edge_start),
+                                                   from_epoch_us(edge_end))):
+                amount = to_scaled(t.amount)
+                yield (month_index(from_epoch_us(to_epoch_us(t.date))),
+                       _rollup_code(TYPE_CODES[t.transaction_type], amount), t.category,
+                       amount, 1)
+    
+    def calculate_monthly_summary(self, account_id: Optional[int] = None,
+                                  start_date: Optional[datetime] = None,
+                                  end_date: Optional[datetime] = None) -> List[MonthlySummary]:
+        """Calculate income/expense/transfer totals per month, oldest month first"""
+        months: Dict[int, List[int]] = {}
+        with self._lock:
+            rows = list(self._report_rows(account_id, start_date, end_date))
+        for month, type_code, _category, total, count in rows:
+            sums = months.setdefault(month, [0] * (_ROLLUP_CODES + 1))
+            sums[type_code] += total
+            sums[-1] += count
+        
+        return [MonthlySummary(
+            month=month_label(month),
+            income=from_scaled(sums[TYPE_CODES[TransactionType.INCOME]]),
+            expense=from_scaled(sums[TYPE_CODES[TransactionType.EXPENSE]]),
+            transfer=from_scaled(sums[_TRANSFER_CODE] + sums[TRANSFER_OUT_CODE]),
+            transfer_in=from_scaled(sums[_TRANSFER_CODE]),
+            transfer_out=from_scaled(-sums[TRANSFER_OUT_CODE]),
+            transaction_count=sums[-1]
+        ) for month, sums in sorted(months.items()) if sums[-1]]   # Not all deleted
+    
+    def calculate_daily_summary(self, account_id: Optional[int] = None,
+                                start_day: Optional[Date] = None,
+                                end_day: Optional[Date] = None) -> List[DailySummary]:
+        """Calculate income/expense/transfer totals per day, oldest day first"""
+        epoch = Date(1970, 1, 1)
+        days: Dict[int, List[int]] = {}
+        with self._lock:
+            rows = list(self._rollups.day_totals(
+                account_id,
+                (start_day - epoch).days if start_day is not None else None,
+                (end_day - epoch).days if end_day is not None else None))
+        for day, type_code, total, count in rows:
+            sums = days.setdefault(day, [0] * (_ROLLUP_CODES + 1))
+            sums[type_code] += total
+            sums[-1] += count
+        
+        return [DailySummary(
+            day=epoch + timedelta(days=day),
+            income=from_scaled(sums[TYPE_CODES[TransactionType.INCOME]]),
+            expense=from_scaled(sums[TYPE_CODES[TransactionType.EXPENSE]]),
+            transfer=from_scaled(sums[_TRANSFER_CODE] + sums[TRANSFER_OUT_CODE]),
+            transfer_in=from_scaled(sums[_TRANSFER_CODE]),
+            transfer_out=from_scaled(-sums[TRANSFER_OUT_CODE]),
+            transaction_count=sums[-1]
+        ) for day, sums in sorted(days.items()) if sums[-1]]
+    
+    def calculate_category_totals(self, transaction_type: TransactionType = TransactionType.EXPENSE,
+                                  account_id: Optional[int] = None,
+                                  start_date: Optional[datetime] = None,
+                                  end_date: Optional[datetime] = None) -> Dict[str, Decimal]:
+        """Calculate totals per category for one transaction type (the net of
+        both legs for transfers)"""
+        wanted = _type_rollup_codes(transaction_type)
+        totals: Dict[str, List[int]] = {}
+        with self._lock:
+            rows = list(self._report_rows(account_id, start_date, end_date))
+        for _month, type_code, category, total, count in rows:
+            if type_code in wanted:
+                entry = totals.setdefault(category, [0, 0])
+                entry[0] += total
+                entry[1] += count
+        # A rebuilt bucket and the deltas retracting all of it add up to no rows
+        return {category: from_scaled(total) for category, (total, count) in totals.items()
+                if count}
+    
+    def calculate_category_period_total(self, category: str, first_month: Date, last_month: Date,
+                                        transaction_type: TransactionType = TransactionType.EXPENSE
+                                        ) -> Decimal:
+        """Total of one category over whole calendar months (any day inside each bound month)"""
+        with self._lock:
+            total = sum(self._rollups.category_total(
+                category, code, month_index(first_month), month_index(last_month))
+                for code in _type_rollup_codes(transaction_type))
+        return from_scaled(total)
     
     # TODO: Need to add the following features:
-    # - delete_transaction(transaction_id): Delete transaction record
-    # - update_transaction(transaction_id, **kwargs): Update transaction record
-    # - get_transactions_by_type(transaction_type): Filter transactions by type
-    # - get_transactions_by_date_range(start_date, end_date): Filter by date range
-    # - add_transaction_category(): Add transaction categorization feature
-    # - calculate_monthly_summary(): Calculate monthly income/expense summary
-    # - calculate_category_totals(): Calculate totals by category
-    # - search_transactions(query): Search transaction records
-    # - export_transactions(): Export transaction data
-    # - import_transactions(): Import transaction data
     # - duplicate_transaction(): Duplicate transaction record
     # - add_recurring_transactions(): Add recurring transactions
     # - generate_reports(): Generate financial reports
\ No newline at end of file
@@ -0,0 +1,295 @@
+"""
+Personal Finance Management System - Transfer Module
+Moves money between accounts, writing the balance changes and both
+TRANSFER transaction legs as one unit; records, changes and deletes incomes
+and expenses together with the balance change they make
+"""
+
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass, replace
+from datetime import datetime
+from decimal import Decimal
+from typing import (Callable, ContextManager, Dict, Iterable, Iterator, List, Optional,
+                    Sequence, Tuple)
+
+from account import Account, AccountManager, AccountNotFoundError
+from aggregation import amount_exponent
+from ledger import LEDGER_SIGNS, ledger_amount
+from transaction import (UPDATABLE_FIELDS, Transaction, TransactionManager, TransactionType,
+                         check_amount)
+
+# Transaction fields whose change moves account balances
+BALANCE_FIELDS = ("account_id", "amount", "transaction_type")
+
+
+@dataclass(slots=True)
+class Transfer:
+    """One requested transfer"""
+    from_account_id: int
+    to_account_id: int
+    amount: Decimal
+    description: str = ""
+    category: str = ""
+    date: Optional[datetime] = None
+
+
+@dataclass(slots=True)
+class TransferResult:
+    """Outcome of one transfer: both legs, or why it was refused"""
+    debit: Optional[Transaction] = None     # Leg on the source account (negative amount)
+    credit: Optional[Transaction] = None    # Leg on the target account
+    error: Optional[str] = None
+    from_balance: Optional[Decimal] = None  # Balances right after it (single transfers only)
+    to_balance: Optional[Decimal] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def _check_amount(amount: Decimal) -> None:
+    """Refuse amounts the transaction legs could not store, before any balance moves"""
+    if amount <= 0:
+        raise ValueError("Transfer amount must be positive")
+    amount_exponent(amount)
+
+
+def _check_posting(amount: Decimal, transaction_type: TransactionType) -> None:
+    """Refuse a transaction post() cannot record, before any balance moves"""
+    if transaction_type == TransactionType.TRANSFER:
+        raise ValueError("Transfer transactions are recorded by transfers between two accounts")
+    check_amount(amount, transaction_type)
+    amount_exponent(amount)
+
+
+def _check_funds(accounts: Dict[int, Account], moves: Dict[int, Decimal]) -> None:
+    """Refuse balance moves (signed, by account ID) that would overdraw an account"""
+    for account_id, move in moves.items():
+        if move < 0 and -move > accounts[account_id].balance:
+            raise ValueError("Insufficient funds")
+
+
+def _legs(transfer: Transfer, date: datetime) -> List[tuple]:
+    """add_transactions() records for the debit (negative) and credit legs"""
+    date = transfer.date or date
+    return [
+        (transfer.from_account_id, -transfer.amount, TransactionType.TRANSFER,
+         transfer.description or f"Transfer to account {transfer.to_account_id}",
+         date, transfer.category),
+        (transfer.to_account_id, transfer.amount, TransactionType.TRANSFER,
+         transfer.description or f"Transfer from account {transfer.from_account_id}",
+         date, transfer.category),
+    ]
+
+
+class TransferService:
+    """Atomic transfers between accounts, and the single write path of
+    transactions that move a balance
+
+    A transfer holds both account locks (taken in ID order, so concurrent
+    transfers in opposite directions cannot deadlock) and the transaction
+    manager's write lock while it moves the balances and adds its two legs
+    under consecutive IDs. atomic, when given, is the storage's unit of
+    work (ManagerJournal.atomic or SqliteRepository.atomic): everything the
+    transfer changes is then persisted together, so a crash never leaves
+    one leg or one balance without the other.
+
+    post(), post_batch(), revise() and remove() do the same for incomes and
+    expenses, so every stored balance stays its opening balance plus its ledger.
+    """
+
+    def __init__(self, account_manager: AccountManager, transaction_manager: TransactionManager,
+                 atomic: Optional[Callable[[], ContextManager]] = None):
+        self.account_manager = account_manager
+        self.transaction_manager = transaction_manager
+        self.atomic = atomic
+
+    @contextmanager
+    def _unit(self, account_ids: Iterable[int]) -> Iterator[Dict[int, Account]]:
+        """Hold the account locks and the transaction manager's inside one unit of
+        work; follow-ups the unit yields (a journal's fsync wait) run after the locks"""
+        follow_ups: Optional[List[Callable[[], None]]] = None
+        with ExitStack() as stack:
+            accounts = stack.enter_context(self.account_manager.lock_accounts(account_ids))
+            stack.enter_context(self.transaction_manager.exclusive())
+            if self.atomic is not None:
+                follow_ups = stack.enter_context(self.atomic())
+            yield accounts
+        for follow_up in follow_ups or ():
+            follow_up()
+
+    def _move(self, moves: Dict[int, Decimal]) -> Dict[int, Decimal]:
+        """Apply signed balance moves checked by _check_funds(), returns the new balances"""
+        balances = {}
+        for account_id, move in moves.items():
+            if move > 0:
+                balances[account_id] = self.account_manager.deposit(account_id, move)
+            elif move < 0:
+                balances[account_id] = self.account_manager.withdraw(account_id, -move)
+        return balances
+
+    def _require_transaction(self, transaction_id: int) -> Transaction:
+        transaction = self.transaction_manager.get_transaction_by_id(transaction_id)
+        if transaction is None:
+            raise ValueError(f"Transaction {transaction_id} not found")
+        return transaction
+
+    def transfer(self, from_id: int, to_id: int, amount: Decimal, description: str = "",
+                 category: str = "", date: Optional[datetime] = None) -> TransferResult:
+        """Move amount from one account to another, raises ValueError if refused"""
+        _check_amount(amount)
+        transfer = Transfer(from_id, to_id, amount, description, category, date)
+        with self._unit((from_id, to_id)):
+            from_balance, to_balance = self.account_manager.transfer_funds(from_id, to_id, amount)
+            debit, credit = self.transaction_manager.add_transactions(
+                _legs(transfer, datetime.now()))
+        return TransferResult(debit, credit, None, from_balance, to_balance)
+
+    def post(self, account_id: int, amount: Decimal, transaction_type: TransactionType,
+             description: str = "", category: str = "",
+             date: Optional[datetime] = None) -> Tuple[Transaction, Decimal]:
+        """Record an income or expense and apply it to the account's balance,
+        returns the transaction and the new balance; raises ValueError if refused"""
+        _check_posting(amount, transaction_type)
+        move = {account_id: ledger_amount(Transaction(amount=amount,
+                                                      transaction_type=transaction_type))}
+        with self._unit(move) as accounts:
+            _check_funds(accounts, move)
+            transaction = self.transaction_manager.add_transaction(
+                account_id, amount, transaction_type, description, date, category)
+            balance = self._move(move)[account_id]
+        return transaction, balance
+
+    def revise(self, transaction_id: int, **changes) -> Transaction:
+        """Change fields of a transaction, moving the balances of its old and
+        new account by the difference; raises ValueError if refused
+
+        Transfer legs only change their description, category and date: their
+        amount and account are those of the transfer they belong to.
+        """
+        unknown = set(changes) - UPDATABLE_FIELDS
+        if unknown:
+            raise ValueError(f"Cannot update transaction fields: {', '.join(sorted(unknown))}")
+        while True:
+            old = self._require_transaction(transaction_id)
+            account_ids = {old.account_id, changes.get("account_id", old.account_id)}
+            with self._unit(account_ids) as accounts:
+                old = self._require_transaction(transaction_id)
+                if old.account_id not in accounts:
+                    continue   # Moved to another account meanwhile: lock that one
+                new = replace(old, **changes)
+                if any(getattr(new, name) != getattr(old, name) for name in BALANCE_FIELDS):
+                    if TransactionType.TRANSFER in (old.transaction_type, new.transaction_type):
+                        raise ValueError("Transfer legs only change their description, "
+                                         "category and date")
+                    _check_posting(new.amount, new.transaction_type)
+                moves = {old.account_id: -ledger_amount(old)}
+                moves[new.account_id] = moves.get(new.account_id, 0) + ledger_amount(new)
+                _check_funds(accounts, moves)
+                transaction = self.transaction_manager.update_transaction(transaction_id,
+                                                                          **changes)
+                self._move(moves)
+                return transaction
+
+    def remove(self, transaction_id: int) -> bool:
+        """Delete an income or expense and undo its balance change, returns
+        False if it does not exist; raises ValueError if refused (transfer legs
+        cannot be deleted on their own)"""
+        while True:
+            old = self.transaction_manager.get_transaction_by_id(transaction_id)
+            if old is None:
+                return False
+            with self._unit((old.account_id,)) as accounts:
+                old = self.transaction_manager.get_transaction_by_id(transaction_id)
+                if old is None:
+                    return False
+                if old.account_id not in accounts:
+                    continue
+                if old.transaction_type == TransactionType.TRANSFER:
+                    raise ValueError("Transfer legs cannot be deleted on their own")
+                moves = {old.account_id: -ledger_amount(old)}
+                _check_funds(accounts, moves)
+                self.transaction_manager.delete_transaction(transaction_id)
+                self._move(moves)
+                return True
+
+    def transfer_batch(self, transfers: Sequence[Transfer]) -> List[TransferResult]:
+        """Settle transfers in order as one unit, returns a result per transfer
+
+        Refused transfers (unknown account, insufficient funds at that point
+        of the batch, ...) are skipped with their reason; the others apply.
+        All accounts involved are locked once and the legs are added in one
+        batch, so thousands of transfers cost about as much as one import.
+        """
+        results = [TransferResult() for _ in transfers]
+        pending = []
+        for index, transfer in enumerate(transfers):
+            try:
+                _check_amount(transfer.amount)
+                pending.append(index)
+            except ValueError as e:
+                results[index].error = str(e)
+        account_ids = {account_id for index in pending
+                       for account_id in (transfers[index].from_account_id,
+                                          transfers[index].to_account_id)
+                       if self.account_manager.get_account_by_id(account_id) is not None}
+        now = datetime.now()
+        with self._unit(account_ids):
+            errors = self.account_manager.settle_transfers(
+                [(transfers[index].from_account_id, transfers[index].to_account_id,
+                  transfers[index].amount) for index in pending])
+            accepted = [index for index, error in zip(pending, errors) if error is None]
+            legs = self.transaction_manager.add_transactions(
+                [leg for index in accepted for leg in _legs(transfers[index], now)]
+            ) if accepted else []
+        for index, error in zip(pending, errors):
+            results[index].error = error
+        for position, index in enumerate(accepted):
+            results[index].debit, results[index].credit = legs[2 * position:2 * position + 2]
+        return results
+
+    def post_batch(self, records: Sequence[tuple]
+                   ) -> Tuple[List[Transaction], List[Optional[str]]]:
+        """Post add_transactions() records of incomes and expenses in order as one
+        unit, returns the added transactions and an error (None if posted) per record
+
+        Refused records (transfers, unknown account, insufficient funds at that
+        point of the batch, ...) are skipped with their reason; the others move
+        their account's balance like post(), with one add_transactions() call.
+        """
+        errors: List[Optional[str]] = [None] * len(records)
+        for index, record in enumerate(records):
+            try:
+                _check_posting(record[1], record[2])
+            except ValueError as e:
+                errors[index] = str(e)
+        while True:
+            account_ids = {record[0] for record, error in zip(records, errors)
+                           if error is None
+                           and self.account_manager.get_account_by_id(record[0]) is not None}
+            try:
+                with self._unit(account_ids) as accounts:
+                    balances = {account_id: account.balance
+                                for account_id, account in accounts.items()}
+                    moves: Dict[int, Decimal] = {}
+                    accepted = []
+                    for index, record in enumerate(records):
+                        if errors[index] is not None:
+                            continue
+                        account_id = record[0]
+                        if account_id not in balances:
+                            errors[index] = f"Account {account_id} not found"
+                            continue
+                        move = LEDGER_SIGNS[record[2]] * record[1]
+                        if move < 0 and -move > balances[account_id]:
+                            errors[index] = "Insufficient funds"
+                            continue
+                        balances[account_id] += move
+                        moves[account_id] = moves.get(account_id, 0) + move
+                        accepted.append(record)
+                    added = self.transaction_manager.add_transactions(accepted) \
+                        if accepted else []
+                    self._move(moves)
+            except AccountNotFoundError:
+                continue   # Deleted while its lock was being taken: leave it out
+            return added, errors
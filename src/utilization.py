@@ -0,0 +1,81 @@
+"""
+Personal Finance Management System - Budget Utilization Module
+Joins active budgets with the per-category monthly spend rollups
+"""
+
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+from typing import List, Optional
+
+from budget import Budget, BudgetManager, period_bounds
+from transaction import TransactionManager, TransactionType
+
+
+@dataclass(slots=True)
+class BudgetUtilization:
+    """Spending against one budget for its current calendar period"""
+    budget_id: int
+    name: str
+    category: str
+    amount: Decimal
+    spent: Decimal
+    period_start: date
+    period_end: date
+
+    @property
+    def remaining(self) -> Decimal:
+        """Budget left for the period (negative when overspent)"""
+        return self.amount - self.spent
+
+    @property
+    def utilization(self) -> Decimal:
+        """Spent as a percentage of the budget amount"""
+        return (self.spent / self.amount * 100).quantize(Decimal('0.01'))
+
+    @property
+    def is_over_budget(self) -> bool:
+        """Whether spending exceeded the budget"""
+        return self.spent > self.amount
+
+
+class BudgetUtilizationService:
+    """Budget utilization, budget vs actual comparison
+
+    Spend comes from TransactionManager's (category, month) expense rollups,
+    so each budget costs at most 12 bucket lookups (yearly period) no matter
+    how many expenses were recorded. Periods are calendar months, quarters
+    and years.
+    """
+
+    def __init__(self, budget_manager: BudgetManager, transaction_manager: TransactionManager):
+        self.budget_manager = budget_manager
+        self.transaction_manager = transaction_manager
+
+    def _utilization(self, budget: Budget, as_of: date) -> BudgetUtilization:
+        """Compute utilization of one budget for the period containing as_of"""
+        start, end = period_bounds(budget.period, as_of)
+        spent = self.transaction_manager.calculate_category_period_total(
+            budget.category, start, end, TransactionType.EXPENSE)
+        return BudgetUtilization(
+            budget_id=budget.id,
+            name=budget.name,
+            category=budget.category,
+            amount=budget.amount,
+            spent=spent,
+            period_start=start,
+            period_end=end
+        )
+
+    def calculate_budget_utilization(self, budget_id: int,
+                                     as_of: Optional[date] = None) -> Optional[BudgetUtilization]:
+        """Get utilization of one budget, None if the budget does not exist"""
+        budget = self.budget_manager.get_budget_by_id(budget_id)
+        if budget is None:
+            return None
+        return self._utilization(budget, as_of or date.today())
+
+    def compare_actual_vs_budget(self, as_of: Optional[date] = None) -> List[BudgetUtilization]:
+        """Get utilization of every active budget"""
+        as_of = as_of or date.today()
+        return [self._utilization(b, as_of) for b in self.budget_manager.get_active_budgets()]
@@ -0,0 +1,218 @@
+"""
+Personal Finance Management System - Write-Ahead Log Module
+Append-only, segmented JSON-lines log with group commit
+"""
+
+import json
+import os
+import threading
+from enum import Enum
+from typing import Any, Dict, Iterator, List, Optional
+
+SEGMENT_PREFIX = "wal-"
+SEGMENT_SUFFIX = ".log"
+
+
+class Durability(Enum):
+    """When appended records reach stable storage"""
+    NONE = "none"      # Written to the OS on every append, never fsynced
+    BATCH = "batch"    # Background group commit every flush_interval seconds
+    ALWAYS = "always"  # append() returns after fsync; concurrent writers share one fsync
+
+
+def segment_name(first_lsn: int) -> str:
+    """File name of the segment whose first record has the given LSN"""
+    return f"{SEGMENT_PREFIX}{first_lsn:016d}{SEGMENT_SUFFIX}"
+
+
+def segment_first_lsn(path: str) -> int:
+    """LSN of the first record a segment file holds (or would hold)"""
+    return int(os.path.basename(path)[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)])
+
+
+def list_segments(directory: str) -> List[str]:
+    """Segment paths in LSN order"""
+    if not os.path.isdir(directory):
+        return []
+    names = sorted(n for n in os.listdir(directory)
+                   if n.startswith(SEGMENT_PREFIX) and n.endswith(SEGMENT_SUFFIX))
+    return [os.path.join(directory, n) for n in names]
+
+
+def _read_segment(path: str) -> Iterator[Dict[str, Any]]:
+    """Yield the complete records of one segment
+
+    A torn record at the end of a segment (crash mid-write) is skipped.
+    """
+    with open(path, 'rb') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break  # Torn tail: nothing after it was acknowledged
+            yield record
+
+
+def read_records(directory: str, after_lsn: int = 0) -> Iterator[Dict[str, Any]]:
+    """Yield records with lsn > after_lsn from every segment, oldest first"""
+    segments = list_segments(directory)
+    for position, path in enumerate(segments):
+        # Skip segments that end before after_lsn without opening them
+        if position + 1 < len(segments) and \
+                segment_first_lsn(segments[position + 1]) <= after_lsn + 1:
+            continue
+        for record in _read_segment(path):
+            if record["lsn"] > after_lsn:
+                yield record
+
+
+class WriteAheadLog:
+    """Append-only log of JSON records, each stamped with an increasing LSN
+
+    Appends are buffered in memory and written by whichever thread commits
+    first, so a single write()+fsync() covers every record buffered up to
+    that point (group commit). Opening a log continues numbering after the
+    last record on disk in a fresh segment.
+    """
+
+    def __init__(self, directory: str, durability: Durability = Durability.BATCH,
+                 flush_interval: float = 0.01):
+        self.directory = directory
+        self.durability = durability
+        self.flush_interval = flush_interval
+        os.makedirs(directory, exist_ok=True)
+
+        # Only the newest segment matters; its name numbers it even when empty
+        self.last_lsn = 0
+        segments = list_segments(directory)
+        if segments:
+            self.last_lsn = segment_first_lsn(segments[-1]) - 1
+            for record in _read_segment(segments[-1]):
+                self.last_lsn = record["lsn"]
+        self.durable_lsn = self.last_lsn
+
+        self._lock = threading.Lock()           # Guards the buffer and LSN counter
+        self._commit_lock = threading.Lock()    # Serializes write+fsync
+        self._durable = threading.Condition(self._lock)
+        self._buffer: List[bytes] = []
+        self._closed = False
+        self._stop = threading.Event()
+        # A segment starting after the last complete record can only hold a torn write
+        self._segment_first_lsn = self.last_lsn + 1
+        self._file = open(os.path.join(directory, segment_name(self._segment_first_lsn)), 'wb')
+
+        self._flusher: Optional[threading.Thread] = None
+        if durability == Durability.BATCH:
+            self._flusher = threading.Thread(target=self._flush_loop, name="wal-flusher",
+                                             daemon=True)
+            self._flusher.start()
+
+    def append(self, record: Dict[str, Any], wait: bool = True) -> int:
+        """Append a record, returns its LSN
+
+        With ALWAYS the record is durable on return, unless wait is False:
+        then the caller must wait_durable(lsn) itself (e.g. after releasing
+        its own locks, so that other writers can share the fsync).
+        """
+        payload = json.dumps(record, separators=(',', ':')).encode()
+        with self._lock:
+            if self._closed:
+                raise ValueError("Write-ahead log is closed")
+            self.last_lsn += 1
+            lsn = self.last_lsn
+            # Splice the LSN in as the first key without re-encoding the record
+            self._buffer.append(b'{"lsn":%d%s%s\n' % (lsn, b',' if len(payload) > 2 else b'',
+                                                     payload[1:]))
+        if self.durability == Durability.NONE:
+            self._commit(sync=False)
+        elif self.durability == Durability.ALWAYS and wait:
+            self.wait_durable(lsn)
+        return lsn
+
+    def _commit(self, sync: bool = True) -> None:
+        """Write every buffered record, then fsync once for all of them"""
+        with self._commit_lock:
+            with self._lock:
+                pending, self._buffer = self._buffer, []
+                lsn = self.last_lsn
+            if pending:
+                self._file.write(b''.join(pending))
+                self._file.flush()
+            if not sync:
+                return
+            if lsn > self.durable_lsn:
+                os.fsync(self._file.fileno())
+            with self._lock:
+                self.durable_lsn = max(self.durable_lsn, lsn)
+                self._durable.notify_all()
+
+    def wait_durable(self, lsn: int) -> None:
+        """Block until the record with this LSN has been fsynced"""
+        with self._lock:
+            if self.durable_lsn >= lsn:
+                return
+        # Whoever gets the commit lock first commits for every waiter
+        self._commit()
+        with self._lock:
+            while self.durable_lsn < lsn:
+                self._durable.wait()
+
+    def roll(self) -> int:
+        """Continue in a new segment, returns the first LSN it will hold
+
+        Every record appended before the call ends up in an older segment.
+        """
+        with self._commit_lock:
+            with self._lock:
+                if self._closed:
+                    raise ValueError("Write-ahead log is closed")
+                pending, self._buffer = self._buffer, []
+                lsn = self.last_lsn
+                if lsn + 1 == self._segment_first_lsn:
+                    self._buffer = pending   # Current segment is still empty
+                    return self._segment_first_lsn
+                old_file = self._file
+                self._segment_first_lsn = lsn + 1
+                self._file = open(os.path.join(self.directory, segment_name(lsn + 1)), 'wb')
+            if pending:
+                old_file.write(b''.join(pending))
+            old_file.flush()
+            os.fsync(old_file.fileno())
+            old_file.close()
+            with self._lock:
+                self.durable_lsn = max(self.durable_lsn, lsn)
+                self._durable.notify_all()
+            return lsn + 1
+
+    def truncate_before(self, lsn: int) -> int:
+        """Delete segments holding only records with LSN <= lsn, returns how many"""
+        segments = list_segments(self.directory)
+        removed = 0
+        for path, following in zip(segments, segments[1:]):
+            if segment_first_lsn(following) > lsn + 1 or \
+                    segment_first_lsn(path) >= self._segment_first_lsn:
+                break
+            os.remove(path)
+            removed += 1
+        return removed
+
+    def flush(self) -> None:
+        """Write and fsync everything appended so far"""
+        self._commit()
+
+    def _flush_loop(self) -> None:
+        """Background group commit for BATCH durability"""
+        while not self._stop.wait(self.flush_interval):
+            self._commit()
+
+    def close(self) -> None:
+        """Flush pending records and close the segment"""
+        if self._closed:
+            return
+        with self._lock:
+            self._closed = True
+        self._stop.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        self._commit()
+        self._file.close()
@@ -4,10 +4,13 @@ Provides user-friendly HTML interface as an alternative to complex API documenta
 """
 
 from fastapi import FastAPI, Request
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, Response
 from fastapi.staticfiles import StaticFiles
+from typing import Optional
 import os
 
+from compression import StaticPage
+
 # Add Web interface routes in api.py
 
 web_interface_html = """
@@ -282,6 +285,9 @@ web_interface_html = """
                     headers: {
                         'Content-Type': 'application/json',
                     },
+                    // Lists are revalidated with If-None-Match: an unchanged one
+                    // comes back as 304 and is read from the browser cache
+                    cache: 'no-cache',
                 };
                 
                 if (data) {
@@ -381,6 +387,13 @@ web_interface_html = """
 """
 
 
-def get_web_interface():
-    """Return Web interface HTML"""
-    return HTMLResponse(content=web_interface_html)
\ No newline at end of file
+# Encoded once at startup, with an ETag and cache headers
+web_interface_page = StaticPage(web_interface_html.encode("utf-8"), "text/html; charset=utf-8")
+
+
+def get_web_interface(request: Optional[Request] = None):
+    """Return Web interface HTML, compressed as the request accepts"""
+    headers = request.headers if request is not None else {}
+    status_code, body, response_headers = web_interface_page.respond(
+        headers.get("accept-encoding"), headers.get("if-none-match"))
+    return Response(body, status_code=status_code, headers=response_headers)
\ No newline at end of file
@@ -3,10 +3,13 @@ API Server Startup Script
 Automatically detects available ports and starts FastAPI server
 """
 
+import argparse
+import secrets
 import socket
 import subprocess
 import sys
 import os
+import tempfile
 
 
 def is_port_available(port):
@@ -29,8 +32,20 @@ def find_available_port(start_port=8000, max_attempts=10):
     return None
 
 
-def start_api_server():
-    """Start API server"""
+def start_state_server(directory):
+    """Start the state server shared by the API workers, returning it and its environment"""
+    env = dict(os.environ,
+               FINANCE_STATE_SERVER=os.path.join(directory, "state.sock"),
+               FINANCE_STATE_AUTHKEY=secrets.token_hex(16))
+    server = subprocess.Popen(
+        [sys.executable, os.path.join("src", "state.py")],
+        cwd=os.path.dirname(os.path.abspath(__file__)), env=env
+    )
+    return server, env
+
+
+def start_api_server(workers=1):
+    """Start API server (workers > 1: that many processes sharing one state server)"""
     print("🚀 Personal Finance Management System - API Server Launcher")
     print("=" * 50)
     
@@ -58,6 +73,14 @@ def start_api_server():
         "--port", str(available_port),
         "--host", "127.0.0.1"
     ]
+    env = None
+    state_server = None
+    if workers > 1:
+        # Production mode: no reloader, workers are proxies of the state server's managers
+        cmd[cmd.index("--reload")] = "--workers"
+        cmd.insert(cmd.index("--workers") + 1, str(workers))
+        state_server, env = start_state_server(tempfile.mkdtemp(prefix="finance-"))
+        print(f"🧩 State server: {env['FINANCE_STATE_SERVER']} ({workers} workers)")
     
     try:
         print(f"🎯 Startup command: {' '.join(cmd)}")
@@ -65,7 +88,7 @@ def start_api_server():
         print("=" * 50)
         
         # Start server
-        subprocess.run(cmd, cwd=os.path.dirname(os.path.abspath(__file__)))
+        subprocess.run(cmd, cwd=os.path.dirname(os.path.abspath(__file__)), env=env)
         
     except KeyboardInterrupt:
         print("\n👋 Server stopped")
@@ -73,7 +96,14 @@ def start_api_server():
         print("❌ Error: uvicorn not found, please install: pip install uvicorn")
     except Exception as e:
         print(f"❌ Startup failed: {e}")
+    finally:
+        if state_server is not None:
+            state_server.terminate()
+            state_server.wait()
 
 
 if __name__ == "__main__":
-    start_api_server()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Start the finance API server")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="worker processes (more than 1 starts a shared state server)")
+    start_api_server(parser.parse_args().workers)
\ No newline at end of file
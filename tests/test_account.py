@@ -45,6 +45,13 @@ class TestAccount:
         account = Account("Test Account", AccountType.CHECKING, Decimal('100'))
         with pytest.raises(ValueError, match="Insufficient funds"):
             account.withdraw(Decimal('200'))
+    
+    def test_account_uses_slots(self):
+        """Test accounts have no per-instance __dict__"""
+        account = Account("Test Account", AccountType.CHECKING)
+        assert not hasattr(account, '__dict__')
+        with pytest.raises(AttributeError):
+            account.nickname = "Main"
 
 
 class TestAccountManager:
@@ -131,4 +138,31 @@ class TestAccountManager:
         # Now deletion should succeed
         result = self.manager.delete_account(account_id)
         assert result is True
-        assert self.manager.get_account_by_id(account_id) is None
\ No newline at end of file
+        assert self.manager.get_account_by_id(account_id) is None
+    
+    def test_get_account_by_name(self):
+        """Test getting account by name through the name index"""
+        account = self.manager.create_account("Test Account", AccountType.CHECKING)
+        assert self.manager.get_account_by_name("Test Account") is account
+        assert self.manager.get_account_by_name("Missing") is None
+    
+    def test_create_account_reuses_name_after_delete(self):
+        """Test that a deleted account's name and ID leave the indexes"""
+        account = self.manager.create_account("Test Account", AccountType.CHECKING)
+        self.manager.delete_account(account.id)
+        
+        replacement = self.manager.create_account("Test Account", AccountType.SAVINGS)
+        assert replacement.id != account.id
+        assert self.manager.get_account_by_id(account.id) is None
+        assert self.manager.get_account_by_name("Test Account") is replacement
+    
+    def test_get_accounts_page(self):
+        """Test keyset paging continues after the last ID seen, skipping deleted accounts"""
+        accounts = [self.manager.create_account(f"Account {i}", AccountType.CHECKING)
+                    for i in range(5)]
+        self.manager.delete_account(accounts[2].id)
+        
+        first = self.manager.get_accounts_page(limit=2)
+        assert first == accounts[:2]
+        assert self.manager.get_accounts_page(first[-1].id, limit=2) == accounts[3:5]
+        assert self.manager.get_accounts_page(accounts[4].id) == []
@@ -0,0 +1,88 @@
+"""
+pytest tests for the batch aggregation module
+Checks the NumPy and pure-Python grouping paths agree
+"""
+
+import pytest
+from datetime import datetime
+from decimal import Decimal
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import aggregation
+from aggregation import ColumnBatch, group_totals, from_scaled, month_label, month_index
+from indexes import to_epoch_us
+
+
+def _sample_batch():
+    """Batch with sparse account IDs, several months and categories"""
+    batch = ColumnBatch(strings=["", "Food", "Rent"])
+    rows = [
+        (1, datetime(2023, 12, 31, 23, 59), 1, 1, 1000),
+        (1, datetime(2024, 1, 1), 1, 1, 2500),
+        (1, datetime(2024, 1, 20), 1, 1, 500),
+        (10 ** 12, datetime(2024, 1, 2), 0, 0, 99),
+        (1, datetime(2024, 2, 1), 1, 2, 7000),
+        (1, datetime(1969, 7, 20), 2, 0, 1),
+    ]
+    for account_id, date, type_code, category, amount in rows:
+        batch.account_ids.append(account_id)
+        batch.dates.append(to_epoch_us(date))
+        batch.types.append(type_code)
+        batch.categories.append(category)
+        batch.amounts.append(amount)
+    return batch
+
+
+class TestGroupTotals:
+    """Tests for group_totals"""
+    
+    def test_python_path(self, monkeypatch):
+        """Test pure-Python grouping"""
+        monkeypatch.setattr(aggregation, "np", None)
+        groups = group_totals(_sample_batch(), dimensions=("account", "month", "type", "category"))
+        jan = month_index(datetime(2024, 1, 1))
+        assert groups[(1, jan, 1, 1)] == (3000, 2)
+        assert groups[(10 ** 12, jan, 0, 0)] == (99, 1)
+        assert groups[(1, month_index(datetime(1969, 7, 1)), 2, 0)] == (1, 1)
+        assert len(groups) == 5
+    
+    def test_numpy_path_matches_python(self, monkeypatch):
+        """Test vectorized grouping gives identical results, with filters"""
+        pytest.importorskip("numpy")
+        batch = _sample_batch()
+        start_us = to_epoch_us(datetime(2024, 1, 1))
+        vectorized = [group_totals(batch), group_totals(batch, account_id=1, start_us=start_us)]
+        monkeypatch.setattr(aggregation, "np", None)
+        assert vectorized == [group_totals(batch), group_totals(batch, account_id=1, start_us=start_us)]
+    
+    def test_dimension_subsets_match(self, monkeypatch):
+        """Test grouping by fewer dimensions on both paths"""
+        pytest.importorskip("numpy")
+        batch = _sample_batch()
+        jan = month_index(datetime(2024, 1, 1))
+        vectorized = group_totals(batch, dimensions=("month", "type"))
+        assert vectorized[(jan, 1)] == (3000, 2)
+        assert group_totals(batch, dimensions=())[()] == (11100, 6)
+        monkeypatch.setattr(aggregation, "np", None)
+        assert group_totals(batch, dimensions=("type", "month")) == vectorized
+    
+    def test_unknown_dimension(self):
+        """Test rejecting unknown dimensions"""
+        with pytest.raises(ValueError, match="Unknown aggregation dimensions"):
+            group_totals(_sample_batch(), dimensions=("weekday",))
+    
+    def test_empty_filter_result(self):
+        """Test filtering out every row"""
+        assert group_totals(_sample_batch(), account_id=42) == {}
+        assert group_totals(ColumnBatch()) == {}
+
+
+def test_from_scaled_and_month_label():
+    """Test scaled amount and month formatting helpers"""
+    assert from_scaled(1205000) == Decimal('120.50')
+    assert str(from_scaled(1234567)) == '123.4567'
+    assert month_label(month_index(datetime(2024, 2, 29))) == "2024-02"
+    assert month_label(month_index(datetime(1969, 12, 1))) == "1969-12"
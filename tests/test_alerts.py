@@ -0,0 +1,86 @@
+"""
+pytest tests for the budget alerts module
+"""
+
+import asyncio
+from decimal import Decimal
+from datetime import datetime, date
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from alerts import AlertStream, BudgetAlertEvaluator
+from budget import BudgetManager
+from transaction import TransactionManager, TransactionType
+
+
+class TestBudgetAlertEvaluator:
+    """Tests for BudgetAlertEvaluator"""
+    
+    def setup_method(self):
+        """Setup before each test"""
+        self.budgets = BudgetManager()
+        self.transactions = TransactionManager()
+        self.evaluator = BudgetAlertEvaluator(self.budgets, self.transactions)
+        self.received = []
+        self.evaluator.subscribe(self.received.append)
+        self.budget = self.budgets.create_budget("Groceries", "Food", Decimal('100'))
+    
+    def _spend(self, amount, category="Food", when=datetime(2024, 5, 10)):
+        return self.transactions.add_transaction(1, Decimal(amount), TransactionType.EXPENSE,
+                                                 date=when, category=category)
+    
+    def test_alert_fires_once_per_threshold(self):
+        """Test thresholds fire when crossed and not again afterwards"""
+        self._spend('70')
+        assert self.received == []
+        
+        crossing = self._spend('15')
+        assert [a.threshold for a in self.received] == [Decimal('80')]
+        assert self.received[0].transaction_id == crossing.id
+        assert self.received[0].spent == Decimal('85')
+        
+        self._spend('5')
+        assert len(self.received) == 1
+    
+    def test_single_expense_crosses_both_thresholds(self):
+        """Test one large expense raises both alerts"""
+        self._spend('150')
+        assert [a.threshold for a in self.received] == [Decimal('80'), Decimal('100')]
+        assert list(self.evaluator.recent_alerts) == self.received
+    
+    def test_other_categories_types_and_periods_ignored(self):
+        """Test unrelated transactions never raise alerts"""
+        self._spend('90', category="Fun")
+        self.transactions.add_transaction(1, Decimal('500'), TransactionType.INCOME,
+                                          date=datetime(2024, 5, 1), category="Food")
+        self._spend('70', when=datetime(2024, 4, 30))
+        self._spend('70', when=datetime(2024, 5, 1))
+        assert self.received == []
+    
+    def test_check_budget_alerts(self):
+        """Test the on-demand alert check reports the highest reached threshold"""
+        self._spend('85')
+        self.budgets.create_budget("Fun", "Fun", Decimal('100'))
+        
+        alerts = self.evaluator.check_budget_alerts(as_of=date(2024, 5, 31))
+        assert [(a.budget_name, a.threshold) for a in alerts] == [("Groceries", Decimal('80'))]
+
+
+class TestAlertStream:
+    """Tests for AlertStream"""
+    
+    def test_publish_reaches_open_queues(self):
+        """Test alerts are delivered to queues and dropped after close"""
+        stream = AlertStream(max_queue_size=2)
+        
+        async def consume():
+            first, second = stream.open(), stream.open()
+            stream.close(second)
+            for alert in ("a", "b", "c"):
+                stream.publish(alert)
+            await asyncio.sleep(0)
+            return [first.get_nowait(), first.get_nowait()], second.empty()
+        
+        assert asyncio.run(consume()) == (["b", "c"], True)
@@ -0,0 +1,116 @@
+"""
+pytest tests for the HTTP API (in-process state)
+"""
+
+import itertools
+from decimal import Decimal
+
+import pytest
+from fastapi.testclient import TestClient
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import api
+
+_names = itertools.count(1)
+
+
+@pytest.fixture
+def client():
+    return TestClient(api.app)
+
+
+def create_account(client, initial_balance):
+    response = client.post("/accounts", json={"name": f"Account {next(_names)}",
+                                              "account_type": "checking",
+                                              "initial_balance": initial_balance})
+    assert response.status_code == 201
+    return response.json()["id"]
+
+
+def balance(response):
+    return Decimal(response.json()["balance"])
+
+
+def test_balance_changes_keep_ledger_in_sync(client):
+    """Test deposits, withdrawals and transactions leave no drift to reconcile"""
+    account_id = create_account(client, "100")
+    assert balance(client.post(f"/accounts/{account_id}/deposit", json={"amount": "50"})) == 150
+    expense = client.post("/transactions", json={"account_id": account_id, "amount": "20",
+                                                 "transaction_type": "expense"}).json()
+    assert balance(client.post(f"/accounts/{account_id}/withdraw", json={"amount": "10"})) == 120
+    response = client.put(f"/transactions/{expense['id']}", json={"amount": "25"})
+    assert response.status_code == 200
+    assert balance(client.get(f"/accounts/{account_id}")) == 115
+
+    ledger = client.get(f"/accounts/{account_id}/balance").json()
+    assert Decimal(ledger["balance"]) == Decimal(ledger["stored_balance"]) == 115
+    assert client.get("/accounts/reconciliation").json()["drift"] == []
+
+    assert client.delete(f"/transactions/{expense['id']}").status_code == 204
+    assert balance(client.get(f"/accounts/{account_id}")) == 140
+    assert client.get("/accounts/reconciliation").json()["drift"] == []
+
+
+@pytest.mark.parametrize("amount", ["-30", "30"])
+def test_standalone_transfer_rejected(client, amount):
+    """Test TRANSFER transactions are only written by transfers"""
+    account_id = create_account(client, "100")
+    response = client.post("/transactions", json={"account_id": account_id, "amount": amount,
+                                                  "transaction_type": "transfer"})
+    assert response.status_code == 400
+    assert client.get(f"/accounts/{account_id}/transactions").json() == []
+
+
+def test_overdrawing_expense_rejected(client):
+    """Test an expense beyond the balance is refused like a withdrawal"""
+    account_id = create_account(client, "10")
+    response = client.post("/transactions", json={"account_id": account_id, "amount": "20",
+                                                  "transaction_type": "expense"})
+    assert (response.status_code, response.json()["detail"]) == (400, "Insufficient funds")
+
+
+def test_bulk_import_posts_like_create(client):
+    """Test imported rows move balances and follow the same rules as POST /transactions"""
+    account_id = create_account(client, "10")
+    body = (f"account_id,amount,date,transaction_type\n"
+            f"{account_id},5,2024-05-01,income\n"
+            f"{account_id},30,2024-05-02,transfer\n"
+            f"{account_id},-20,2024-05-03,\n"
+            f"{account_id},-15,2024-05-04,\n")
+    report = client.post("/transactions/bulk", content=body,
+                         headers={"Content-Type": "text/csv"}).json()
+    assert (report["imported"], report["rejected"]) == (2, 2)
+    assert [line for line, _message in report["errors"]] == [3, 4]
+    assert report["errors"][1][1] == "Insufficient funds"
+    assert balance(client.get(f"/accounts/{account_id}")) == 0
+    assert client.get("/accounts/reconciliation").json()["drift"] == []
+
+
+def test_transfer_batch_account_deleted_meanwhile(client, monkeypatch):
+    """Test an account deleted while a batch locks its accounts is a 404, not a 500"""
+    first, second = create_account(client, "100"), create_account(client, "0")
+    lock_accounts = api.account_manager.lock_accounts
+
+    def delete_then_lock(account_ids):
+        api.account_manager.delete_account(second)
+        return lock_accounts(account_ids)
+    monkeypatch.setattr(api.account_manager, "lock_accounts", delete_then_lock)
+    response = client.post("/accounts/transfer/batch", json={"transfers": [
+        {"from_account_id": first, "to_account_id": second, "amount": "10"}]})
+    assert (response.status_code, response.json()["detail"]) == \
+        (404, f"Account {second} not found")
+
+
+def test_transfer_batch_other_errors_stay_400(client, monkeypatch):
+    """Test only a missing account makes a batch a 404; other refusals are a 400"""
+    first, second = create_account(client, "100"), create_account(client, "0")
+
+    def refuse(transfers):
+        raise ValueError("Insufficient funds")
+    monkeypatch.setattr(api.account_manager, "settle_transfers", refuse)
+    response = client.post("/accounts/transfer/batch", json={"transfers": [
+        {"from_account_id": first, "to_account_id": second, "amount": "10"}]})
+    assert (response.status_code, response.json()["detail"]) == (400, "Insufficient funds")
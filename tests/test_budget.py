@@ -39,6 +39,11 @@ class TestBudget:
         budget = Budget(name="Test", category="Test", amount=Decimal('100'))
         assert budget.start_date is not None
         assert isinstance(budget.start_date, date)
+    
+    def test_budget_uses_slots(self):
+        """Test budgets have no per-instance __dict__"""
+        budget = Budget(name="Test", category="Test", amount=Decimal('100'))
+        assert not hasattr(budget, '__dict__')
 
 
 class TestBudgetManager:
@@ -114,4 +119,32 @@ class TestBudgetManager:
         
         assert monthly.period == BudgetPeriod.MONTHLY
         assert quarterly.period == BudgetPeriod.QUARTERLY
-        assert yearly.period == BudgetPeriod.YEARLY
\ No newline at end of file
+        assert yearly.period == BudgetPeriod.YEARLY
+    
+    def test_create_budget_reuses_name_after_deactivation(self):
+        """Test creating budget with the name of an inactive budget"""
+        old_budget = self.manager.create_budget("Groceries", "Food", Decimal('500'))
+        old_budget.is_active = False
+        
+        new_budget = self.manager.create_budget("Groceries", "Food", Decimal('600'))
+        assert self.manager.get_budget_by_id(old_budget.id) is old_budget
+        assert self.manager.get_budget_by_id(new_budget.id) is new_budget
+    
+    def test_get_budgets_by_category(self):
+        """Test category lookup returns active budgets only"""
+        food = self.manager.create_budget("Groceries", "Food", Decimal('500'))
+        dining = self.manager.create_budget("Dining", "Food", Decimal('200'))
+        self.manager.create_budget("Rent", "Housing", Decimal('1500'))
+        dining.is_active = False
+        
+        assert self.manager.get_budgets_by_category("Food") == [food]
+        assert self.manager.get_budgets_by_category("Travel") == []
+    
+    def test_get_active_budgets_page(self):
+        """Test keyset paging over active budgets"""
+        budgets = [self.manager.create_budget(f"Budget {i}", "Food", Decimal('100'))
+                   for i in range(4)]
+        budgets[1].is_active = False
+        
+        assert self.manager.get_active_budgets_page(limit=2) == [budgets[0], budgets[2]]
+        assert self.manager.get_active_budgets_page(budgets[2].id, limit=2) == [budgets[3]]
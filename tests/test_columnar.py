@@ -0,0 +1,52 @@
+"""
+pytest tests for the columnar transaction storage backend
+Reuses the TransactionManager tests and adds storage-specific checks
+"""
+
+import pytest
+from decimal import Decimal
+from datetime import datetime
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from columnar import ColumnarTransactionManager
+from transaction import Transaction, TransactionType
+from tests import test_transaction
+
+
+class TestColumnarTransactionManager(test_transaction.TestTransactionManager):
+    """Run the TransactionManager tests against the columnar backend"""
+    
+    def setup_method(self):
+        """Setup before each test"""
+        self.manager = ColumnarTransactionManager()
+    
+    def test_round_trip_preserves_values(self):
+        """Test materialized rows equal the original transaction"""
+        added = self.manager.add_transaction(7, Decimal('12.50'), TransactionType.INCOME,
+                                             "Salary", date=datetime(2024, 5, 1, 9, 30, 15, 123))
+        
+        stored = self.manager.get_transaction_by_id(added.id)
+        assert stored == added
+        assert str(stored.amount) == '12.50'
+        assert self.manager.transactions[0] == added
+        assert list(self.manager.transactions) == [added]
+    
+    def test_descriptions_are_interned(self):
+        """Test repeated descriptions share one string table entry"""
+        for _ in range(3):
+            self.manager.add_transaction(1, Decimal('1'), TransactionType.EXPENSE, "Coffee")
+        self.manager.add_transaction(1, Decimal('1'), TransactionType.EXPENSE, "Lunch")
+        
+        assert sorted(self.manager._strings) == ["", "Coffee", "Lunch"]
+    
+    def test_amount_precision_limit(self):
+        """Test amounts beyond the fixed scale are rejected without consuming an ID"""
+        with pytest.raises(ValueError, match="at most 4 decimal places"):
+            self.manager.add_transaction(1, Decimal('0.00001'), TransactionType.EXPENSE)
+        
+        transaction = self.manager.add_transaction(1, Decimal('1'), TransactionType.EXPENSE)
+        assert transaction.id == 1
+        assert len(self.manager.transactions) == 1
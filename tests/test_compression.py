@@ -0,0 +1,69 @@
+"""
+pytest tests for the compression module
+"""
+
+import gzip
+
+import pytest
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import compression
+from compression import StaticPage, compress, negotiate, variant_etag
+
+BODY = b"<html>" + b"<p>Personal finance</p>" * 200 + b"</html>"
+
+
+@pytest.fixture(params=["brotli", "no brotli"])
+def encodings(request, monkeypatch):
+    """Supported encodings with brotli installed (if it is) and without it"""
+    if request.param == "no brotli":
+        monkeypatch.setattr(compression, "brotli", None)
+    elif compression.brotli is None:
+        pytest.skip("brotli is not installed")
+    return compression.available_encodings()
+
+
+def test_negotiate():
+    """Test q-values, wildcards and server preference on ties"""
+    assert negotiate(None, ["br", "gzip"]) is None
+    assert negotiate("gzip, br", ["br", "gzip"]) == "br"
+    assert negotiate("gzip;q=1.0, br;q=0.5", ["br", "gzip"]) == "gzip"
+    assert negotiate("br;q=0, *", ["br", "gzip"]) == "gzip"
+    assert negotiate("identity", ["br", "gzip"]) is None
+    assert negotiate("gzip;q=bad", ["gzip"]) is None
+
+
+def test_compress_round_trip(encodings):
+    """Test every available encoding decodes back to the body"""
+    assert gzip.decompress(compress(BODY, "gzip")) == BODY
+    assert compress(BODY, "gzip") == compress(BODY, "gzip")   # No timestamp
+    if "br" in encodings:
+        assert compression.brotli.decompress(compress(BODY, "br", best=True)) == BODY
+
+
+def test_static_page_variants(encodings):
+    """Test the page is served in the preferred accepted encoding with its own ETag"""
+    page = StaticPage(BODY, "text/html; charset=utf-8")
+    assert set(page.variants) == {None, *encodings}
+
+    status, body, headers = page.respond("gzip, br", None)
+    assert (status, headers["Content-Encoding"]) == (200, encodings[0])
+    assert body == page.variants[encodings[0]]
+    assert headers["ETag"] == variant_etag(page.etag, encodings[0]) != page.etag
+    assert headers["Cache-Control"] == f"public, max-age={compression.STATIC_MAX_AGE}"
+    assert headers["Vary"] == "Accept-Encoding"
+
+    assert page.respond("gzip, br", headers["ETag"])[:2] == (304, b"")
+    status, body, headers = page.respond(None, headers["ETag"])
+    assert (status, body, headers["ETag"]) == (200, BODY, page.etag)
+    assert "Content-Encoding" not in headers
+
+
+def test_static_page_skips_larger_variants():
+    """Test a body compression does not shrink is only kept as is"""
+    page = StaticPage(b"ok", "text/plain")
+    assert list(page.variants) == [None]
+    assert page.respond("gzip", None)[1] == b"ok"
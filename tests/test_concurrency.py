@@ -0,0 +1,122 @@
+"""
+pytest tests for concurrent use of the managers from several threads
+"""
+
+import random
+import sys
+import os
+import threading
+from decimal import Decimal
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from account import AccountManager, AccountType
+from budget import BudgetManager
+from columnar import ColumnarTransactionManager
+from journal import ManagerJournal
+from transaction import TransactionManager, TransactionType
+from wal import Durability, WriteAheadLog
+
+THREADS = 8
+OPERATIONS = 400
+ACCOUNTS = 4
+
+
+def run_workers(journal):
+    """Hammer a few accounts from THREADS threads, returns the expected totals"""
+    accounts = journal.account_manager
+    transactions = journal.transaction_manager
+    totals = [Decimal('0')] * THREADS
+    barrier = threading.Barrier(THREADS)
+
+    def worker(number):
+        rng = random.Random(number)
+        barrier.wait()
+        for _ in range(OPERATIONS):
+            account_id = rng.randrange(1, ACCOUNTS + 1)
+            amount = Decimal(rng.randrange(1, 1000)) / 100
+            if rng.random() < 0.5:
+                accounts.deposit(account_id, amount)
+                totals[number] += amount
+            else:
+                try:
+                    accounts.withdraw(account_id, amount)
+                    totals[number] -= amount
+                except ValueError:
+                    pass
+            transactions.add_transaction(account_id, amount, TransactionType.EXPENSE,
+                                         date=datetime(2024, 1, rng.randrange(1, 29)))
+
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(THREADS)]
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)  # Switch threads as often as possible
+    try:
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+    finally:
+        sys.setswitchinterval(switch_interval)
+    return sum(totals)
+
+
+class TestConcurrency:
+    """Tests for lost updates and ID allocation under contention"""
+
+    transaction_manager_class = TransactionManager
+
+    def _open(self, directory):
+        return ManagerJournal(WriteAheadLog(directory, Durability.NONE), AccountManager(),
+                              self.transaction_manager_class(), BudgetManager())
+
+    def test_no_lost_updates(self, tmp_path):
+        """Test balances, IDs and rollups match the work done, also after replay"""
+        journal = self._open(str(tmp_path))
+        journal.attach()
+        for i in range(ACCOUNTS):
+            journal.account_manager.create_account(f"Account {i}", AccountType.CHECKING,
+                                                   Decimal('100'))
+        net = run_workers(journal)
+        journal.wal.close()
+
+        manager = journal.transaction_manager
+        assert journal.account_manager.get_total_balance() == ACCOUNTS * Decimal('100') + net
+        assert [t.id for t in manager.transactions] == list(range(1, THREADS * OPERATIONS + 1))
+        assert sum(len(manager.get_transactions_by_account(a)) for a in range(1, ACCOUNTS + 1)) \
+            == THREADS * OPERATIONS
+        assert manager.calculate_monthly_summary()[0].expense == \
+            sum((t.amount for t in manager.transactions), Decimal('0'))
+
+        # Balance records were logged in the order they were applied
+        replayed = self._open(str(tmp_path))
+        replayed.replay()
+        replayed.wal.close()
+        assert [a.balance for a in replayed.account_manager.accounts] == \
+            [a.balance for a in journal.account_manager.accounts]
+        assert len(replayed.transaction_manager.transactions) == THREADS * OPERATIONS
+
+    def test_unique_account_names(self):
+        """Test concurrent creates of the same name admit exactly one"""
+        manager = AccountManager()
+        created, errors = [], []
+
+        def create():
+            try:
+                created.append(manager.create_account("Shared", AccountType.SAVINGS))
+            except ValueError as e:
+                errors.append(e)
+
+        workers = [threading.Thread(target=create) for _ in range(THREADS)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        assert len(created) == 1 and len(errors) == THREADS - 1
+        assert manager.next_id == 2
+
+
+class TestColumnarConcurrency(TestConcurrency):
+    """Run the concurrency tests against the columnar backend"""
+
+    transaction_manager_class = ColumnarTransactionManager
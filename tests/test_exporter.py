@@ -0,0 +1,64 @@
+"""
+pytest tests for the transaction export module
+"""
+
+import json
+from decimal import Decimal
+from datetime import datetime
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from exporter import encode
+from importer import TransactionImporter
+from transaction import TransactionManager, TransactionType
+
+
+class TestExporter:
+    """Tests for CSV, NDJSON and columnar encodings"""
+
+    def setup_method(self):
+        """Setup before each test"""
+        self.manager = TransactionManager()
+        self.manager.add_transaction(1, Decimal('12.50'), TransactionType.EXPENSE,
+                                     'Lunch, "Cafe"', datetime(2024, 5, 1, 12), "Food")
+        self.manager.add_transaction(2, Decimal('3000'), TransactionType.INCOME, "Salary",
+                                     datetime(2024, 5, 2), "Salary")
+        self.manager.add_transaction(1, Decimal('5'), TransactionType.TRANSFER,
+                                     date=datetime(2024, 5, 3))
+
+    def _export(self, format):
+        return "".join(encode(self.manager.export_transactions(chunk_size=2), format))
+
+    def test_csv_round_trips_through_importer(self):
+        """Test an exported CSV imports back into equal transactions"""
+        copy = TransactionManager()
+        importer = TransactionImporter(copy, "csv")
+        importer.feed(self._export("csv"))
+        report = importer.close()
+
+        assert report.rejected == 0
+        assert list(copy.transactions) == list(self.manager.transactions)
+
+    def test_ndjson(self):
+        """Test one object per transaction"""
+        rows = [json.loads(line) for line in self._export("ndjson").splitlines()]
+        assert [row["id"] for row in rows] == [1, 2, 3]
+        assert rows[0]["amount"] == "12.50"
+        assert rows[2]["transaction_type"] == "transfer"
+
+    def test_columns_row_groups(self):
+        """Test one object of column arrays per chunk"""
+        groups = [json.loads(line) for line in self._export("columns").splitlines()]
+        assert [group["rows"] for group in groups] == [2, 1]
+        assert groups[0]["account_id"] == [1, 2]
+        assert groups[1]["date"] == ["2024-05-03T00:00:00"]
+
+    def test_unknown_format(self):
+        """Test unsupported formats are rejected"""
+        try:
+            encode([], "xml")
+            assert False, "Should raise ValueError"
+        except ValueError:
+            pass
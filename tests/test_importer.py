@@ -0,0 +1,100 @@
+"""
+pytest tests for the transaction import module
+"""
+
+from decimal import Decimal
+from datetime import datetime
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from importer import TransactionImporter, import_file, main, parse_record
+from transaction import TransactionManager, TransactionType
+
+CSV_EXPORT = (
+    "account_id,amount,date,description,category\r\n"
+    "1,-12.50,2024-05-02T08:30:00,Coffee,Food\r\n"
+    "1,2500,2024-05-01,Salary,Income\r\n"
+    "1,abc,2024-05-03,Broken,\r\n"
+    "2,-4,2024-05-04,\"Bus, return\",Travel\r\n"
+)
+
+
+class TestParseRecord:
+    """Tests for row validation"""
+
+    def test_signed_amount_without_type(self):
+        """Test the amount sign picks the type when none is given"""
+        record = parse_record({"account_id": "3", "amount": "-5.10", "date": "2024-01-02"})
+        assert record == (3, Decimal('5.10'), TransactionType.EXPENSE, "",
+                          datetime(2024, 1, 2), "")
+
+    def test_explicit_type_needs_positive_amount(self):
+        """Test typed rows keep the positive-amount rule"""
+        record = parse_record({"account_id": 1, "amount": 8, "date": "2024-01-02",
+                               "transaction_type": "Transfer"})
+        assert record[2] == TransactionType.TRANSFER
+        for amount in ("-8", "0", "1.00001", "NaN"):
+            try:
+                parse_record({"account_id": 1, "amount": amount, "date": "2024-01-02",
+                              "transaction_type": "expense"})
+                assert False, f"Should reject amount {amount}"
+            except ValueError:
+                pass
+
+    def test_missing_field(self):
+        """Test a missing required field is named"""
+        try:
+            parse_record({"account_id": 1, "amount": "1"})
+            assert False, "Should raise ValueError"
+        except ValueError as e:
+            assert "date" in str(e)
+
+
+class TestTransactionImporter:
+    """Tests for incremental CSV and NDJSON imports"""
+
+    def setup_method(self):
+        """Setup before each test"""
+        self.manager = TransactionManager()
+
+    def test_csv_fed_in_arbitrary_pieces(self):
+        """Test lines split across feed() calls are reassembled"""
+        importer = TransactionImporter(self.manager, "csv", chunk_size=2)
+        for start in range(0, len(CSV_EXPORT), 7):
+            importer.feed(CSV_EXPORT[start:start + 7])
+        report = importer.close()
+
+        assert (report.imported, report.rejected) == (3, 1)
+        assert report.errors == [(4, "Invalid account_id, amount or date")]
+        assert (report.first_id, report.last_id) == (1, 3)
+        assert [t.description for t in self.manager.get_transactions_by_date_range()] == \
+            ["Salary", "Coffee", "Bus, return"]
+        assert self.manager.calculate_category_totals() == {"Food": Decimal('12.50'),
+                                                            "Travel": Decimal('4')}
+
+    def test_ndjson_with_unknown_accounts(self):
+        """Test NDJSON rows for unknown accounts are rejected"""
+        importer = TransactionImporter(self.manager, "ndjson",
+                                       account_exists=lambda account_id: account_id == 1)
+        importer.feed('{"account_id": 1, "amount": "9.99", "date": "2024-02-01", '
+                      '"transaction_type": "expense", "category": "Fun"}\n'
+                      '{"account_id": 2, "amount": "1", "date": "2024-02-01"}\n'
+                      '[1, 2]\n'
+                      '{"account_id": 1, "amount": 3, "date": "2024-02-02"}')
+        report = importer.close()
+
+        assert report.imported == 2
+        assert report.errors == [(2, "Account 2 not found"), (3, "Expected a JSON object")]
+        assert self.manager.get_transaction_by_id(2).transaction_type == TransactionType.INCOME
+
+    def test_import_file_and_cli(self, tmp_path, capsys):
+        """Test file import picks the format from the extension"""
+        path = tmp_path / "export.csv"
+        path.write_text(CSV_EXPORT, encoding="utf-8")
+
+        report = import_file(self.manager, str(path), chunk_size=1)
+        assert report.imported == 3
+        assert main([str(path)]) == 1
+        assert "Imported 3 transactions" in capsys.readouterr().out
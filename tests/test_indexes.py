@@ -0,0 +1,78 @@
+"""
+pytest tests for the compressed bitmaps of the index structures module
+"""
+
+import random
+
+import pytest
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import indexes
+from indexes import ARRAY_CONTAINER_MAX, Bitmap, BitmapIndex
+
+NUMPY = ([indexes.np] if indexes.np is not None else []) + [None]
+
+
+def _values(seed, count, high):
+    return sorted(random.Random(seed).sample(range(high), count))
+
+
+class TestBitmap:
+    """Tests for Bitmap"""
+    
+    @pytest.mark.parametrize("numpy", NUMPY)
+    def test_operations_match_sets(self, monkeypatch, numpy):
+        """Test AND, OR and AND NOT on sparse and dense chunks match Python sets"""
+        monkeypatch.setattr(indexes, "np", numpy)
+        # Chunk 0 dense in both, chunk 1 dense in one and sparse in the other, chunk 3 in one
+        left = _values(1, 9000, 1 << 16) + _values(2, 6000, 1 << 16)
+        left = sorted(set(left) | {(1 << 16) + v for v in _values(3, 5000, 1 << 16)})
+        right = _values(4, 20000, 1 << 16) + [(1 << 16) + v for v in _values(5, 300, 1 << 16)]
+        right += [(3 << 16) + v for v in _values(6, 10, 1 << 16)]
+        a, b = Bitmap.from_sorted(left), Bitmap.from_sorted(right)
+        for result, expected in ((a & b, set(left) & set(right)),
+                                 (a | b, set(left) | set(right)),
+                                 (a - b, set(left) - set(right)),
+                                 (b - a, set(right) - set(left))):
+            assert list(result) == sorted(expected)
+            assert len(result) == len(expected)
+            assert list(result.to_array()) == sorted(expected)
+    
+    @pytest.mark.parametrize("numpy", NUMPY)
+    def test_add_and_discard_switch_containers(self, monkeypatch, numpy):
+        """Test a chunk becomes a bitset past ARRAY_CONTAINER_MAX values and an array again"""
+        monkeypatch.setattr(indexes, "np", numpy)
+        bitmap = Bitmap(range(0, 2 * (ARRAY_CONTAINER_MAX + 1), 2))
+        assert bitmap.nbytes == 8192
+        bitmap.discard(0)
+        bitmap.discard(1)
+        assert bitmap.nbytes == 2 * ARRAY_CONTAINER_MAX
+        assert 0 not in bitmap and 2 in bitmap and 3 not in bitmap
+        bitmap.add(1 << 20)
+        assert len(bitmap) == ARRAY_CONTAINER_MAX + 1
+        assert list(bitmap)[-2:] == [2 * ARRAY_CONTAINER_MAX, 1 << 20]
+    
+    @pytest.mark.parametrize("numpy", NUMPY)
+    def test_select_keeps_order(self, monkeypatch, numpy):
+        """Test select keeps the members of a sequence in its order"""
+        monkeypatch.setattr(indexes, "np", numpy)
+        bitmap = Bitmap.from_sorted(list(range(0, 100_000, 3)))
+        values = list(range(100_000, 0, -7))
+        assert bitmap.select(values) == [v for v in values if v % 3 == 0]
+        assert Bitmap().select(values) == []
+
+
+def test_bitmap_index_not_is_or_of_others():
+    """Test NOT value is the OR of the other values' bitmaps"""
+    index = BitmapIndex()
+    for transaction_id in range(1, 31):
+        index.add(transaction_id % 3, transaction_id)
+    index.remove(0, 3)
+    assert list(index.excluding(0)) == [i for i in range(1, 31) if i % 3]
+    assert list(index.any_of([0, 2])) == [i for i in range(1, 31) if i % 3 != 1 and i != 3]
+    assert list(index.get(0) & index.any_of([0, 1])) == list(range(6, 31, 3))
+    assert len(index.get(7)) == 0
+    assert index.nbytes == 2 * 29
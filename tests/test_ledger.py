@@ -0,0 +1,100 @@
+"""
+pytest tests for ledger balances, checkpoints and reconciliation
+"""
+
+import sys
+import os
+import threading
+from decimal import Decimal
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from account import AccountManager, AccountType
+from columnar import ColumnarTransactionManager
+from ledger import BalanceLedger, BalanceReconciler
+from transaction import TransactionManager, TransactionType
+from transfers import TransferService
+
+
+class TestBalanceLedger:
+    """Test cases for BalanceLedger and BalanceReconciler"""
+
+    transaction_manager_class = TransactionManager
+
+    def setup_method(self):
+        """Setup before each test"""
+        self.accounts = AccountManager()
+        self.transactions = self.transaction_manager_class()
+        self.ledger = BalanceLedger(self.accounts, self.transactions)
+        self.accounts.create_account("Checking", AccountType.CHECKING, Decimal('100'))
+        self.accounts.create_account("Savings", AccountType.SAVINGS, Decimal('0'))
+        for amount, transaction_type, date in [
+            ('50', TransactionType.INCOME, datetime(2024, 1, 10)),
+            ('20.5', TransactionType.EXPENSE, datetime(2024, 1, 20)),
+            ('10', TransactionType.EXPENSE, datetime(2024, 3, 5)),
+            ('5', TransactionType.INCOME, datetime(2024, 3, 25)),
+        ]:
+            self.transactions.add_transaction(1, Decimal(amount), transaction_type, date=date)
+
+    def test_balance_as_of(self):
+        """Test as-of balances from checkpoints plus the partial month"""
+        assert self.ledger.balance_as_of(1, datetime(2023, 12, 31)) == Decimal('100')
+        assert self.ledger.balance_as_of(1, datetime(2024, 1, 15)) == Decimal('150')
+        assert self.ledger.balance_as_of(1, datetime(2024, 2, 1)) == Decimal('129.5')
+        assert self.ledger.balance_as_of(1, datetime(2024, 3, 10)) == Decimal('119.5')
+        assert self.ledger.balance_as_of(1) == Decimal('124.5')
+        assert self.ledger.balance_as_of(2) == Decimal('0')
+
+    def test_checkpoints_follow_new_transactions(self):
+        """Test back-dated transactions move later checkpoints"""
+        assert [(c.as_of, c.balance) for c in self.ledger.checkpoints(1)] == [
+            (datetime(2024, 2, 1), Decimal('129.5')), (datetime(2024, 4, 1), Decimal('124.5'))]
+        self.transactions.add_transaction(1, Decimal('4.5'), TransactionType.INCOME,
+                                          date=datetime(2024, 2, 14))
+        assert [c.balance for c in self.ledger.checkpoints(1)] == \
+            [Decimal('129.5'), Decimal('134'), Decimal('129')]
+        assert self.ledger.balance_as_of(1, datetime(2024, 3, 1)) == Decimal('134')
+
+    def test_transfers_move_ledger_balances(self):
+        """Test transfer legs count against the source and for the target"""
+        TransferService(self.accounts, self.transactions).transfer(
+            1, 2, Decimal('30'), date=datetime(2024, 4, 1))
+        assert self.ledger.balance_as_of(1) == Decimal('94.5')
+        assert self.ledger.balance_as_of(2) == Decimal('30')
+
+    def test_reconciler_reports_drift(self):
+        """Test only accounts whose stored balance disagrees are reported"""
+        self.accounts.create_account("Untouched", AccountType.CHECKING, Decimal('7'))
+        self.accounts.deposit(1, Decimal('24.5'))  # Now matches the ledger
+        self.accounts.deposit(2, Decimal('3'))     # Changed without a transaction
+        report = BalanceReconciler(self.ledger, workers=3).scan()
+        assert report.accounts_checked == 3
+        assert report.transactions_scanned == 4
+        assert [(d.account_id, d.difference) for d in report.drift] == [(2, Decimal('3'))]
+
+    def test_reconciler_reads_columns_under_lock(self):
+        """Test a pass reads the columns while no write can change them"""
+        column_batch = self.transactions.column_batch
+        held = []
+
+        def probe():
+            entered = threading.Event()
+
+            def write():
+                with self.transactions.exclusive():
+                    entered.set()
+
+            threading.Thread(target=write, daemon=True).start()
+            held.append(not entered.wait(timeout=0.1))
+            return column_batch()
+
+        self.transactions.column_batch = probe
+        assert BalanceReconciler(self.ledger).scan().transactions_scanned == 4
+        assert held == [True]
+
+
+class TestColumnarBalanceLedger(TestBalanceLedger):
+    """Run the ledger tests against the columnar backend"""
+
+    transaction_manager_class = ColumnarTransactionManager
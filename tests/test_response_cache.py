@@ -0,0 +1,88 @@
+"""
+pytest tests for the response cache module
+"""
+
+from decimal import Decimal
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from account import AccountManager, AccountType
+from budget import BudgetManager, BudgetPeriod
+from response_cache import ENTRY_OVERHEAD, DataVersions, ResponseCache, etag_matches, make_etag
+from transaction import TransactionManager, TransactionType
+
+
+def test_data_versions_follow_managers():
+    """Test each mutation bumps the counter of its resource only"""
+    accounts, transactions, budgets = AccountManager(), TransactionManager(), BudgetManager()
+    versions = DataVersions()
+    versions.attach(accounts, transactions, budgets)
+    assert versions.current() == {"accounts": 0, "transactions": 0, "budgets": 0}
+
+    accounts.create_account("Checking", AccountType.CHECKING, Decimal('100'))
+    accounts.deposit(1, Decimal('5'))
+    transactions.add_transaction(1, Decimal('20'), TransactionType.EXPENSE)
+    budgets.create_budget("Groceries", "Food", Decimal('100'), BudgetPeriod.MONTHLY)
+    assert versions.current() == {"accounts": 2, "transactions": 1, "budgets": 1}
+
+
+def test_get_requires_same_versions():
+    """Test an entry is returned at its versions, and dropped once they change"""
+    cache = ResponseCache()
+    entry = cache.put("accounts", (1,), b"[]", {})
+    assert cache.get("accounts", (1,)) is entry
+    assert cache.get("accounts", (2,)) is None
+    assert cache.get("accounts", (1,)) is None
+    assert (cache.hits, cache.misses, len(cache), cache.size) == (1, 2, 0, 0)
+
+
+def test_evicts_least_recently_used():
+    """Test the total size stays within max_bytes, evicting the oldest entries"""
+    cache = ResponseCache(max_bytes=4 * (ENTRY_OVERHEAD + 100))
+    for key in "abcd":
+        cache.put(key, (0,), b"x" * 100, {})
+    cache.get("a", (0,))
+    cache.put("e", (0,), b"x" * 100, {})
+    assert cache.get("b", (0,)) is None
+    assert all(cache.get(key, (0,)) for key in "acde")
+    assert cache.size == 4 * (ENTRY_OVERHEAD + 100)
+
+
+def test_large_body_not_kept():
+    """Test a body over a quarter of max_bytes is returned but not stored"""
+    cache = ResponseCache(max_bytes=4 * ENTRY_OVERHEAD)
+    entry = cache.put("big", (0,), b"x" * ENTRY_OVERHEAD, {})
+    assert entry.etag == make_etag(b"x" * ENTRY_OVERHEAD)
+    assert len(cache) == 0
+
+
+def test_etag_matches():
+    """Test If-None-Match lists, weak validators and *"""
+    etag = make_etag(b"[]")
+    assert etag == make_etag(b"[]") != make_etag(b"[1]")
+    assert etag_matches(f'"other", {etag}', etag)
+    assert etag_matches(f"W/{etag}", etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches(None, etag)
+    assert not etag_matches('"other"', etag)
+
+
+def test_variant_encoded_once():
+    """Test an encoded copy is made once per encoding and counted in the size"""
+    cache = ResponseCache()
+    entry = cache.put("accounts", (0,), b"x" * 100, {})
+    calls = []
+
+    def encode(body):
+        calls.append(body)
+        return body[:10]
+    assert cache.variant("accounts", entry, "gzip", encode) == b"x" * 10
+    assert cache.variant("accounts", entry, "gzip", encode) == b"x" * 10
+    assert len(calls) == 1
+    assert cache.size == 110 + ENTRY_OVERHEAD
+
+    stale = cache.put("accounts", (1,), b"y" * 100, {})
+    cache.variant("accounts", entry, "br", encode)   # Replaced: not kept
+    assert entry.variants.keys() == {"gzip"} and not stale.variants
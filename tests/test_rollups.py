@@ -0,0 +1,105 @@
+"""
+pytest tests for the running aggregates module
+"""
+
+from datetime import datetime
+from decimal import Decimal
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import aggregation
+import indexes
+from aggregation import ColumnBatch, month_index
+from indexes import to_epoch_us
+from rollups import RollupStore
+from transaction import TransactionManager, TransactionType
+
+
+def _merged(rows):
+    """Add up bucket rows by key (a key may come from both the base and the deltas)"""
+    totals = {}
+    for *key, total, count in rows:
+        entry = totals.setdefault(tuple(key), [0, 0])
+        entry[0] += total
+        entry[1] += count
+    return totals
+
+
+class TestRollupStore:
+    """Tests for RollupStore"""
+    
+    def setup_method(self):
+        """Setup before each test"""
+        self.store = RollupStore()
+        self.when = to_epoch_us(datetime(2024, 3, 15, 10))
+    
+    def test_apply_accumulates_per_account(self):
+        """Test buckets accumulate per account, month, type and category"""
+        self.store.apply(1, self.when, 1, "Food", 500)
+        self.store.apply(1, self.when, 1, "Food", 250)
+        self.store.apply(2, self.when, 1, "Food", 100)
+        
+        march = month_index(datetime(2024, 3, 1))
+        assert list(self.store.month_totals(account_id=1)) == [(march, 1, "Food", 750, 2)]
+        assert sum(total for *_, total, _count in self.store.month_totals()) == 850
+        assert list(self.store.month_totals(account_id=3)) == []
+    
+    def test_retract_removes_empty_buckets(self):
+        """Test retracting every transaction leaves no buckets behind"""
+        self.store.apply(1, self.when, 0, "", 500)
+        self.store.apply(1, self.when, 0, "", 500, sign=-1)
+        
+        assert list(self.store.month_totals()) == []
+        assert list(self.store.day_totals()) == []
+    
+    def test_rebuild_matches_incremental(self, monkeypatch):
+        """Test rebuilt buckets (deferred with NumPy, eager without) match applied ones"""
+        batch = ColumnBatch(strings=["", "Food"])
+        rows = [(1, datetime(2024, 3, 15), 1, 1, 500), (2, datetime(2024, 3, 16), 0, 0, 900),
+                (1, datetime(2024, 4, 1), 1, 1, 250), (1, datetime(2024, 4, 1, 8), 1, 0, 100)]
+        for account_id, when, type_code, category, amount in rows:
+            batch.account_ids.append(account_id)
+            batch.dates.append(to_epoch_us(when))
+            batch.types.append(type_code)
+            batch.categories.append(category)
+            batch.amounts.append(amount)
+            self.store.apply(account_id, to_epoch_us(when), type_code, batch.strings[category],
+                             amount)
+        self.store.apply(2, self.when, 0, "", 50)
+        
+        for numpy in ([aggregation.np] if aggregation.np is not None else []) + [None]:
+            monkeypatch.setattr(aggregation, "np", numpy)
+            rebuilt = RollupStore()
+            rebuilt.rebuild(batch)
+            rebuilt.apply(2, self.when, 0, "", 50)
+            assert _merged(rebuilt.month_totals(account_id=1)) == \
+                _merged(self.store.month_totals(account_id=1))
+            assert _merged(rebuilt.month_totals()) == _merged(self.store.month_totals())
+            assert _merged(rebuilt.day_totals(first_day=0)) == _merged(self.store.day_totals())
+            march = month_index(datetime(2024, 3, 1))
+            assert rebuilt.category_total("Food", 1, march, march + 1) == 750
+    
+    def test_update_and_delete_after_restore(self, monkeypatch):
+        """Test changes to restored transactions reach every rollup"""
+        source = TransactionManager()
+        source.add_transaction(1, Decimal('10'), TransactionType.EXPENSE, "Lunch",
+                               datetime(2024, 3, 15, 12), "Food")
+        source.add_transaction(1, Decimal('7'), TransactionType.EXPENSE, "Taxi",
+                               datetime(2024, 3, 15, 18), "Travel")
+        columns = source.export_columns()
+        
+        for numpy in ([aggregation.np] if aggregation.np is not None else []) + [None]:
+            monkeypatch.setattr(aggregation, "np", numpy)
+            monkeypatch.setattr(indexes, "np", numpy)
+            manager = TransactionManager()
+            manager.import_columns(columns)
+            manager.update_transaction(1, amount=Decimal('25'))
+            manager.delete_transaction(2)
+            
+            assert manager.calculate_monthly_summary(account_id=1)[0].expense == Decimal('25')
+            assert manager.calculate_daily_summary(account_id=1)[0].expense == Decimal('25')
+            assert manager.calculate_category_totals() == {"Food": Decimal('25')}
+            march = datetime(2024, 3, 1).date()
+            assert manager.calculate_category_period_total("Food", march, march) == Decimal('25')
@@ -0,0 +1,58 @@
+"""
+pytest tests for the response serialization module
+"""
+
+import json
+from decimal import Decimal
+from datetime import datetime, date, timedelta, timezone
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import serialization
+from account import Account, AccountType
+from budget import Budget, BudgetPeriod
+from serialization import (account_record, budget_record, dump_records, encode_datetime,
+                           transaction_record)
+from transaction import Transaction, TransactionType
+
+
+class TestSerialization:
+    """Tests for the pre-built record encoders"""
+
+    def test_records(self):
+        """Test records hold JSON scalars in response model field order"""
+        transaction = Transaction(id=1, account_id=2, amount=Decimal('12.50'),
+                                  transaction_type=TransactionType.EXPENSE, description="Café",
+                                  date=datetime(2024, 5, 1, 12, 0, 0, 5), category="Food")
+        assert transaction_record(transaction) == {
+            "id": 1, "account_id": 2, "amount": "12.50", "transaction_type": "expense",
+            "description": "Café", "date": "2024-05-01T12:00:00.000005", "category": "Food"}
+
+        account = Account("Checking", AccountType.CHECKING, Decimal('100'))
+        account.id = 3
+        assert list(account_record(account)) == ["id", "name", "account_type", "balance",
+                                                 "is_active", "created_at"]
+        assert account_record(account)["balance"] == "100"
+
+        budget = Budget(id=4, name="Food", category="Food", amount=Decimal('1E+2'),
+                        period=BudgetPeriod.YEARLY, start_date=date(2024, 1, 1))
+        assert budget_record(budget)["amount"] == "1E+2"
+        assert budget_record(budget)["start_date"] == "2024-01-01"
+
+    def test_encode_datetime_offsets(self):
+        """Test UTC is written as Z and other offsets are kept"""
+        assert encode_datetime(datetime(2024, 1, 1, tzinfo=timezone.utc)) == "2024-01-01T00:00:00Z"
+        assert encode_datetime(datetime(2024, 1, 1, tzinfo=timezone(timedelta(hours=2)))) == \
+            "2024-01-01T00:00:00+02:00"
+
+    def test_dumps_without_orjson(self, monkeypatch):
+        """Test the standard library fallback writes the same compact UTF-8 JSON"""
+        budget = Budget(id=1, name="Café", category="Food", amount=Decimal('5'),
+                        start_date=date(2024, 1, 1))
+        encoded = dump_records([budget], budget_record)
+        monkeypatch.setattr(serialization, "orjson", None)
+        assert dump_records([budget], budget_record) == encoded
+        assert json.loads(encoded) == [budget_record(budget)]
+        assert b" " not in encoded
@@ -0,0 +1,250 @@
+"""
+pytest tests for the snapshot module
+"""
+
+import threading
+from decimal import Decimal
+from datetime import datetime
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import indexes
+from account import AccountManager, AccountType
+from budget import BudgetManager
+from columnar import ColumnarTransactionManager
+from journal import ManagerJournal
+from snapshot import Snapshotter, list_snapshots, load_snapshot, restore
+from state import CallGate
+from transaction import TransactionManager, TransactionType
+from transfers import TransferService
+from wal import Durability, WriteAheadLog, list_segments
+
+
+class TestSnapshot:
+    """Tests for snapshots, log compaction and restore"""
+
+    transaction_manager_class = TransactionManager
+
+    def _open(self, directory):
+        journal = ManagerJournal(WriteAheadLog(directory, Durability.NONE), AccountManager(),
+                                 self.transaction_manager_class(), BudgetManager())
+        restore(journal)
+        journal.attach()
+        return journal
+
+    def _populate(self, journal):
+        account = journal.account_manager.create_account("Checking", AccountType.CHECKING,
+                                                         Decimal('100'))
+        journal.account_manager.create_account("Old", AccountType.SAVINGS)
+        journal.account_manager.delete_account(2)
+        journal.transaction_manager.add_transaction(
+            account.id, Decimal('1200.5'), TransactionType.INCOME, "Salary",
+            datetime(2024, 5, 31, 9), category="Salary")
+        journal.transaction_manager.add_transaction(
+            account.id, Decimal('12.50'), TransactionType.EXPENSE, "Lunch",
+            datetime(2024, 5, 10, 12, 30), category="Food")
+        journal.budget_manager.create_budget("Food", "Food", Decimal('300'))
+
+    def test_snapshot_round_trip(self, tmp_path):
+        """Test a snapshot file holds every manager's state"""
+        journal = self._open(str(tmp_path))
+        self._populate(journal)
+        path = Snapshotter(journal).snapshot()
+
+        state = load_snapshot(path)
+        assert state.lsn == journal.wal.last_lsn
+        assert [a["name"] for a in state.accounts] == ["Checking"]
+        assert state.account_next_id == 3
+        assert list(state.transactions.ids) == [1, 2]
+        assert [state.transactions.strings[c] for c in state.transactions.categories] == \
+            ["Salary", "Food"]
+        journal.wal.close()
+
+    def test_restore_from_snapshot_and_log_tail(self, tmp_path):
+        """Test restart loads the snapshot, replays later records and compacts the log"""
+        journal = self._open(str(tmp_path))
+        self._populate(journal)
+        Snapshotter(journal).snapshot()
+        assert len(list_segments(str(tmp_path))) == 1
+        journal.account_manager.deposit(1, Decimal('5'))
+        journal.transaction_manager.add_transaction(
+            1, Decimal('3.25'), TransactionType.EXPENSE, "Coffee",
+            datetime(2024, 5, 2, 8), category="Food")
+        journal.wal.close()
+
+        restored = self._open(str(tmp_path))
+        manager = restored.transaction_manager
+        assert restored.account_manager.get_account_by_id(1).balance == Decimal('105')
+        assert restored.account_manager.get_account_by_id(2) is None
+        assert restored.account_manager.create_account("New", AccountType.SAVINGS).id == 3
+        assert [t.id for t in manager.get_transactions_by_account(1)] == [3, 2, 1]
+        assert manager.get_transaction_by_id(1).amount == Decimal('1200.5')
+        assert manager.get_transaction_by_id(2).date == datetime(2024, 5, 10, 12, 30)
+        assert manager.calculate_category_totals()["Food"] == Decimal('15.75')
+        assert manager.add_transaction(1, Decimal('1'), TransactionType.EXPENSE).id == 4
+        assert restored.budget_manager.get_budget_by_id(1).category == "Food"
+        restored.wal.close()
+
+    def test_new_snapshot_replaces_old(self, tmp_path):
+        """Test only the latest snapshot is kept"""
+        journal = self._open(str(tmp_path))
+        self._populate(journal)
+        snapshotter = Snapshotter(journal)
+        snapshotter.snapshot()
+        journal.account_manager.deposit(1, Decimal('1'))
+        path = snapshotter.snapshot()
+
+        assert list_snapshots(str(tmp_path)) == [path]
+        assert snapshotter.last_snapshot_lsn == journal.wal.last_lsn
+        journal.wal.close()
+
+    def test_capture_ignores_later_rows(self, tmp_path):
+        """Test rows added between capture and write are left to the log"""
+        journal = self._open(str(tmp_path))
+        self._populate(journal)
+        snapshotter = Snapshotter(journal)
+        state = snapshotter.capture()
+        journal.transaction_manager.add_transaction(1, Decimal('7'), TransactionType.EXPENSE)
+        snapshotter.write(state)
+        journal.wal.close()
+
+        assert list(load_snapshot(list_snapshots(str(tmp_path))[0]).transactions.ids) == [1, 2]
+        restored = self._open(str(tmp_path))
+        assert len(restored.transaction_manager.transactions) == 3
+        restored.wal.close()
+
+    def test_changes_after_capture_replay(self, tmp_path):
+        """Test updates and deletes between capture and write restore from the log"""
+        journal = self._open(str(tmp_path))
+        self._populate(journal)
+        snapshotter = Snapshotter(journal)
+        state = snapshotter.capture()
+        manager = journal.transaction_manager
+        manager.update_transaction(2, description="Team lunch")
+        manager.delete_transaction(1)
+        manager.add_transaction(1, Decimal('7'), TransactionType.EXPENSE, "Taxi")
+        snapshotter.write(state)
+        journal.wal.close()
+
+        assert list(load_snapshot(list_snapshots(str(tmp_path))[0]).transactions.ids) == [2]
+        restored = self._open(str(tmp_path)).transaction_manager
+        assert [t.id for t in restored.get_transactions_by_account(1)] == [2, 3]
+        assert [t.id for t in restored.search_transactions("team")] == [2]
+        assert restored.search_transactions("salary") == []
+        assert restored.add_transaction(1, Decimal('1'), TransactionType.EXPENSE).id == 4
+
+
+    def test_capture_waits_for_transfer_in_flight(self, tmp_path):
+        """Test a gated capture racing a transfer restores its legs exactly once"""
+        journal = self._open(str(tmp_path))
+        self._populate(journal)
+        journal.account_manager.create_account("Savings", AccountType.SAVINGS)
+        service = TransferService(journal.account_manager, journal.transaction_manager,
+                                  journal.atomic)
+        snapshotter, gate = Snapshotter(journal), CallGate()
+        added, release, captured = threading.Event(), threading.Event(), []
+
+        def pause(event, transaction):
+            # Legs stored, their batch record not logged yet
+            if event == "add" and transaction.transaction_type == TransactionType.TRANSFER:
+                added.set()
+                release.wait(5)
+        journal.transaction_manager.subscribe(pause)
+
+        def transfer():
+            with gate.call():
+                service.transfer(1, 3, Decimal('40'))
+
+        def capture():
+            with gate.exclusive():
+                captured.append(snapshotter.capture())
+
+        transferring = threading.Thread(target=transfer)
+        capturing = threading.Thread(target=capture)
+        transferring.start()
+        assert added.wait(5)
+        capturing.start()
+        capturing.join(0.1)
+        assert capturing.is_alive()   # Waits for the transfer
+        release.set()
+        transferring.join(5)
+        capturing.join(5)
+        snapshotter.write(captured[0])
+        journal.wal.close()
+
+        restored = self._open(str(tmp_path))
+        accounts, manager = restored.account_manager, restored.transaction_manager
+        assert [accounts.get_account_by_id(i).balance for i in (1, 3)] == \
+            [Decimal('60'), Decimal('40')]
+        assert [t.id for t in manager.get_transactions_by_account(3)] == [4]
+        assert len(manager.transactions) == 4
+        assert manager.add_transaction(3, Decimal('1'), TransactionType.EXPENSE).id == 5
+        restored.wal.close()
+
+
+class TestColumnarSnapshot(TestSnapshot):
+    """Run the snapshot tests against the columnar backend"""
+
+    transaction_manager_class = ColumnarTransactionManager
+
+
+class TestBuildTimeIndexes:
+    """Tests for the bulk index build used when loading snapshots"""
+
+    def test_python_fallback_matches_numpy(self, monkeypatch):
+        """Test both bulk build paths sort by (date, id) within each account"""
+        manager = TransactionManager()
+        for day, account_id in [(5, 1), (3, 2), (3, 1), (9, 1), (1, 2)]:
+            manager.add_transaction(account_id, Decimal('1'), TransactionType.EXPENSE,
+                                    date=datetime(2024, 1, day))
+        columns = manager.export_columns()
+
+        results = []
+        for numpy in ([indexes.np] if indexes.np is not None else []) + [None]:
+            monkeypatch.setattr(indexes, "np", numpy)
+            time_index, by_account = indexes.build_time_indexes(
+                columns.account_ids, columns.dates, columns.ids)
+            results.append((time_index.range(), {a: i.range() for a, i in by_account.items()}))
+        assert results[-1] == ([5, 2, 3, 1, 4], {1: [3, 1, 4], 2: [5, 2]})
+        assert all(result == results[-1] for result in results)
+
+
+    def test_text_index_python_fallback_matches_numpy(self, monkeypatch):
+        """Test both bulk text index builds give the same posting lists"""
+        manager = TransactionManager()
+        for description in ["Coffee shop", "coffee beans", "", "Shop rent", "Coffee shop"]:
+            manager.add_transaction(1, Decimal('1'), TransactionType.EXPENSE, description)
+        columns = manager.export_columns()
+
+        results = []
+        for numpy in ([indexes.np] if indexes.np is not None else []) + [None]:
+            monkeypatch.setattr(indexes, "np", numpy)
+            index = indexes.build_text_index(columns.ids, columns.descriptions, columns.strings)
+            results.append({word: list(index.search(word))
+                            for word in ["coffee", "shop", "beans", "rent", "s"]})
+        assert results[-1] == {"coffee": [1, 2, 5], "shop": [1, 4, 5], "beans": [2],
+                               "rent": [4], "s": [1, 4, 5]}
+        assert all(result == results[-1] for result in results)
+
+    def test_bitmap_index_python_fallback_matches_numpy(self, monkeypatch):
+        """Test both bulk bitmap builds index every row under its value"""
+        manager = TransactionManager()
+        for i in range(1, 11):
+            manager.add_transaction(i % 3, Decimal('1'), TransactionType.EXPENSE,
+                                    category="Food" if i % 2 else "Rent")
+        columns = manager.export_columns()
+
+        results = []
+        for numpy in ([indexes.np] if indexes.np is not None else []) + [None]:
+            monkeypatch.setattr(indexes, "np", numpy)
+            categories = indexes.build_bitmap_index(columns.categories, columns.ids,
+                                                    columns.strings)
+            accounts = indexes.build_bitmap_index(columns.account_ids, columns.ids,
+                                                  [None, "odd", "even"])
+            results.append(({value: list(categories.get(value)) for value in ("Food", "Rent")},
+                            {value: list(accounts.get(value)) for value in ("odd", "even")}))
+        assert results[-1] == ({"Food": [1, 3, 5, 7, 9], "Rent": [2, 4, 6, 8, 10]},
+                               {"odd": [1, 4, 7, 10], "even": [2, 5, 8]})
+        assert all(result == results[-1] for result in results)
@@ -0,0 +1,175 @@
+"""
+pytest tests for the SQLite storage backend
+Reuses the TransactionManager tests and adds storage-specific checks
+"""
+
+import shutil
+import tempfile
+from concurrent.futures import Future
+from decimal import Decimal
+from datetime import datetime
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from account import AccountManager, AccountType
+from budget import BudgetManager, BudgetPeriod
+from sqlite_repository import INSERT_TRANSACTION, SqliteRepository, SqliteTransactionManager
+from transaction import TransactionType
+from tests import test_transaction
+
+
+class TestSqliteTransactionManager(test_transaction.TestTransactionManager):
+    """Run the TransactionManager tests against the SQLite backend"""
+
+    def setup_method(self):
+        """Setup before each test"""
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "finance.db")
+        self.repository = SqliteRepository(self.path)
+        self.manager = SqliteTransactionManager(self.repository)
+
+    def teardown_method(self):
+        """Close the database after each test"""
+        self.repository.close()
+        shutil.rmtree(self.directory)
+
+    def _reopen(self):
+        """Close and reopen the database, loading every manager"""
+        self.repository.close()
+        self.repository = SqliteRepository(self.path)
+        self.manager = SqliteTransactionManager(self.repository)
+        self.manager.load()
+
+    def test_rows_persist_across_reopen(self):
+        """Test stored rows, indexes and rollups survive a restart"""
+        added = self.manager.add_transaction(7, Decimal('12.50'), TransactionType.INCOME,
+                                             "Salary", datetime(2024, 5, 1, 9, 30), "Pay")
+        self.manager.add_transaction(7, Decimal('3'), TransactionType.EXPENSE, "Coffee",
+                                     datetime(2024, 5, 2), "Food")
+        self._reopen()
+
+        stored = self.manager.get_transaction_by_id(added.id)
+        assert stored == added
+        assert str(stored.amount) == '12.50'
+        assert [t.id for t in self.manager.get_account_transactions_page(7)] == [2, 1]
+        assert self.manager.calculate_category_totals() == {"Food": Decimal('3')}
+        assert self.manager.add_transaction(7, Decimal('1'), TransactionType.EXPENSE).id == 3
+        assert len(self.manager.transactions) == 3
+
+    def test_deleted_ids_are_not_reused(self):
+        """Test updates and deletes persist and a reload keeps the next ID"""
+        for day in (1, 2):
+            self.manager.add_transaction(7, Decimal('5'), TransactionType.EXPENSE, "Lunch",
+                                         datetime(2024, 5, day))
+        self.manager.update_transaction(1, description="Team dinner", amount=Decimal('40'))
+        self.manager.delete_transaction(2)
+        self._reopen()
+
+        assert [(t.id, t.description, t.amount) for t in self.manager.transactions] == \
+            [(1, "Team dinner", Decimal('40'))]
+        assert [t.id for t in self.manager.search_transactions("dinner")] == [1]
+        assert self.manager.add_transaction(7, Decimal('1'), TransactionType.EXPENSE).id == 3
+
+    def test_uncommitted_rows_are_readable(self):
+        """Test rows are served from memory until their batch commits"""
+        held = []
+        submit = self.repository.submit
+
+        def hold(sql, params):
+            held.append((sql, params, Future()))
+            return held[-1][2]
+
+        self.repository.submit = hold
+        added = self.manager.add_transaction(1, Decimal('5'), TransactionType.EXPENSE)
+
+        assert self.manager.get_transaction_by_id(added.id) == added
+        assert self.manager.get_recent_transactions() == [added]
+        self.repository.submit = submit
+        for sql, params, future in held:
+            submit(sql, params).result()
+            future.set_result(None)
+        assert self.manager._pending == {}
+        assert self.manager.get_recent_transactions() == [added]
+
+    def test_row_committing_during_read_is_kept(self):
+        """Test a row leaving memory while its ID is being read is still returned"""
+        committed = self.manager.add_transaction(1, Decimal('1'), TransactionType.EXPENSE)
+        self.repository.flush()
+        held = []
+        submit = self.repository.submit
+
+        def hold(sql, params):
+            held.append((sql, params, Future()))
+            return held[-1][2]
+
+        self.repository.submit = hold
+        added = self.manager.add_transaction(1, Decimal('5'), TransactionType.EXPENSE)
+        self.repository.submit = submit
+        query = self.manager._query
+
+        def commit_then_query(sql, params=()):
+            for sql_held, params_held, future in held:
+                submit(sql_held, params_held).result()
+                future.set_result(None)
+            held.clear()
+            return query(sql, params)
+
+        self.manager._query = commit_then_query
+        assert self.manager.get_recent_transactions() == [added, committed]
+        assert self.manager._pending == {}
+
+    def test_concurrent_writes_share_batches(self):
+        """Test statements queued together commit in one transaction"""
+        commits = []
+        self.repository.writer._connection.set_trace_callback(
+            lambda sql: sql == "COMMIT" and commits.append(sql))
+        futures = [self.repository.submit(INSERT_TRANSACTION, (i, 1, "1", "expense", "", 0, ""))
+                   for i in range(1, 201)]
+        for future in futures:
+            future.result()
+
+        assert len(commits) < 200
+        assert len(self.manager.transactions) == 0  # Inserted behind the manager's back
+        self.manager.load()
+        assert len(self.manager.transactions) == 200
+
+    def test_failed_batch_reports_error(self):
+        """Test a constraint violation fails the futures of its batch"""
+        self.manager.add_transaction(1, Decimal('5'), TransactionType.EXPENSE)
+        self.repository.flush()
+        future = self.repository.submit(INSERT_TRANSACTION, (1, 1, "1", "expense", "", 0, ""))
+
+        try:
+            future.result()
+            assert False, "Should raise an sqlite3 error"
+        except Exception as e:
+            assert "UNIQUE" in str(e)
+
+
+class TestSqliteRepository:
+    """Tests for account and budget persistence"""
+
+    def test_accounts_and_budgets_persist(self, tmp_path):
+        """Test write-through changes are loaded after a restart"""
+        path = str(tmp_path / "finance.db")
+        repository = SqliteRepository(path)
+        accounts, budgets = AccountManager(), BudgetManager()
+        repository.attach(accounts, budgets)
+        checking = accounts.create_account("Checking", AccountType.CHECKING, Decimal('100'))
+        savings = accounts.create_account("Savings", AccountType.SAVINGS)
+        accounts.withdraw(checking.id, Decimal('40.25'))
+        accounts.delete_account(savings.id)
+        budgets.create_budget("Food", "Food", Decimal('300'), BudgetPeriod.YEARLY)
+        repository.close()
+
+        repository = SqliteRepository(path)
+        accounts, budgets = AccountManager(), BudgetManager()
+        repository.load(accounts, budgets)
+        assert accounts.get_account_by_name("Checking").balance == Decimal('59.75')
+        assert accounts.get_account_by_id(savings.id) is None
+        assert accounts.next_id == 3
+        assert budgets.get_budget_by_id(1).period == BudgetPeriod.YEARLY
+        assert budgets.next_id == 2
+        repository.close()
@@ -0,0 +1,103 @@
+"""
+pytest tests for the state server shared by API worker processes
+"""
+
+import sys
+import os
+import pickle
+import subprocess
+from decimal import Decimal
+from datetime import datetime
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from account import Account, AccountType
+from budget import BudgetPeriod
+from state import AlertFeed, connect_state, parse_address
+from transaction import TransactionType
+
+SRC = os.path.join(os.path.dirname(__file__), '..', 'src')
+
+
+@pytest.fixture
+def server(tmp_path):
+    """A state server on a Unix socket, with in-memory storage"""
+    address = str(tmp_path / "state.sock")
+    env = {k: v for k, v in os.environ.items() if not k.startswith("FINANCE_")}
+    env["FINANCE_STATE_AUTHKEY"] = "secret"
+    process = subprocess.Popen([sys.executable, os.path.join(SRC, "state.py"),
+                                "--address", address], env=env)
+    yield address
+    process.terminate()
+    assert process.wait(timeout=10) == 0
+
+
+def test_parse_address():
+    """Test host:port is TCP and anything else a socket path"""
+    assert parse_address("127.0.0.1:8765") == ("127.0.0.1", 8765)
+    assert parse_address("/tmp/state.sock") == "/tmp/state.sock"
+
+
+def test_account_pickles_without_lock():
+    """Test accounts cross processes and get a lock of their own"""
+    account = Account("Checking", AccountType.CHECKING, Decimal('10'))
+    account.id = 3
+    copy = pickle.loads(pickle.dumps(account))
+    assert (copy.id, copy.balance, copy.opening_balance) == (3, Decimal('10'), Decimal('10'))
+    with copy._lock:
+        assert copy._lock is not account._lock
+
+
+def test_alert_feed_wait():
+    """Test the feed returns alerts after a number, or none on timeout"""
+    feed = AlertFeed(size=2)
+    assert feed.wait(0, 0.01) == (0, [])
+    for alert in ("a", "b", "c"):
+        feed.publish(alert)
+    assert feed.wait(1, 0.01) == (3, ["b", "c"])
+    assert feed.latest() == 3
+
+
+def test_workers_share_state(server):
+    """Test two workers see each other's writes through the server"""
+    first = connect_state(server, b"secret")
+    second = connect_state(server, b"secret")
+    assert first.remote and second.remote
+
+    first.account_manager.create_account("Checking", AccountType.CHECKING, Decimal('100'))
+    second.account_manager.create_account("Savings", AccountType.SAVINGS, Decimal('0'))
+    assert second.data_versions.current()["accounts"] == 2
+    transaction = second.transaction_manager.add_transaction(
+        1, Decimal('20'), TransactionType.EXPENSE, "Groceries", datetime(2024, 5, 2), "Food")
+    assert transaction.id == 1
+
+    result = first.transfer_service.transfer(1, 2, Decimal('30'), date=datetime(2024, 5, 3))
+    assert (result.from_balance, result.to_balance) == (Decimal('70'), Decimal('30'))
+    assert [a.balance for a in second.account_manager.get_all_accounts()] == \
+        [Decimal('70'), Decimal('30')]
+    chunks = list(second.transaction_manager.export_transactions(None, None, None, 2))
+    assert [[t.id for t in chunk] for chunk in chunks] == [[1, 2], [3]]
+    assert first.balance_ledger.balance_as_of(2) == Decimal('30')
+
+    # The expense never touched the balance: the reconciler sees it
+    report = second.balance_reconciler.scan()
+    assert [(d.account_id, d.difference) for d in report.drift] == [(1, Decimal('20'))]
+
+    with pytest.raises(ValueError):
+        first.account_manager.withdraw(2, Decimal('1000'))
+
+
+def test_alerts_reach_workers(server):
+    """Test alerts raised in the server are readable by a worker"""
+    state = connect_state(server, b"secret")
+    after = state.alert_feed.latest()
+    state.budget_manager.create_budget("Groceries", "Food", Decimal('100'),
+                                       BudgetPeriod.MONTHLY)
+    state.account_manager.create_account("Checking", AccountType.CHECKING, Decimal('500'))
+    state.transaction_manager.add_transaction(1, Decimal('95'), TransactionType.EXPENSE,
+                                              category="Food")
+    last, alerts = state.alert_feed.wait(after, 5.0)
+    assert last > after
+    assert alerts[0].category == "Food"
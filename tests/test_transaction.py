@@ -4,14 +4,16 @@ Intentionally includes only basic tests, missing boundary tests and complex scen
 """
 
 import pytest
+from dataclasses import replace
 from decimal import Decimal
-from datetime import datetime
+from datetime import datetime, date
 
 import sys
 import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
-from transaction import Transaction, TransactionManager, TransactionType
+from account import AccountManager, AccountType
+from transaction import Transaction, TransactionManager, TransactionQuery, TransactionType
 
 
 class TestTransaction:
@@ -38,6 +40,11 @@ class TestTransaction:
         transaction = Transaction(account_id=1, amount=Decimal('50'))
         assert transaction.date is not None
         assert isinstance(transaction.date, datetime)
+    
+    def test_transaction_uses_slots(self):
+        """Test transactions have no per-instance __dict__"""
+        transaction = Transaction(account_id=1, amount=Decimal('50'))
+        assert not hasattr(transaction, '__dict__')
 
 
 class TestTransactionManager:
@@ -70,6 +77,21 @@ class TestTransactionManager:
         with pytest.raises(ValueError, match="Transaction amount must be positive"):
             self.manager.add_transaction(1, Decimal('-50'), TransactionType.EXPENSE)
     
+    def test_add_transaction_signed_transfer(self):
+        """Test transfers may be negative (leaving the account) but not zero"""
+        assert self.manager.add_transaction(1, Decimal('-50'), TransactionType.TRANSFER).amount \
+            == Decimal('-50')
+        with pytest.raises(ValueError, match="Transaction amount must be positive"):
+            self.manager.add_transaction(1, Decimal('0'), TransactionType.TRANSFER)
+    
+    def test_add_transaction_too_many_decimal_places(self):
+        """Test amounts with more than 4 decimal places are rejected, not truncated"""
+        with pytest.raises(ValueError, match="at most 4 decimal places"):
+            self.manager.add_transaction(1, Decimal('10.00001'), TransactionType.EXPENSE)
+        assert len(self.manager.transactions) == 0
+        assert self.manager.add_transaction(1, Decimal('10.0001'),
+                                            TransactionType.EXPENSE).amount == Decimal('10.0001')
+    
     def test_get_transactions_by_account(self):
         """Test getting transactions by account"""
         # Add transactions for different accounts
@@ -101,4 +123,376 @@ class TestTransactionManager:
             self.manager.add_transaction(1, Decimal('10'), TransactionType.EXPENSE)
         
         recent = self.manager.get_recent_transactions()
-        assert len(recent) == 10  # Default limit is 10
\ No newline at end of file
+        assert len(recent) == 10  # Default limit is 10
+    
+    def test_get_recent_transactions_out_of_order_dates(self):
+        """Test recent transactions stay date-ordered with backdated inserts"""
+        newest = self.manager.add_transaction(1, Decimal('10'), TransactionType.EXPENSE,
+                                              date=datetime(2024, 3, 1))
+        oldest = self.manager.add_transaction(1, Decimal('10'), TransactionType.EXPENSE,
+                                              date=datetime(2024, 1, 1))
+        middle = self.manager.add_transaction(1, Decimal('10'), TransactionType.EXPENSE,
+                                              date=datetime(2024, 2, 1))
+        
+        assert self.manager.get_recent_transactions(3) == [newest, middle, oldest]
+    
+    def test_get_transactions_before(self):
+        """Test paging backwards from a (date, id) position"""
+        added = [
+            self.manager.add_transaction(1, Decimal('10'), TransactionType.EXPENSE,
+                                         date=datetime(2024, 1, day))
+            for day in range(1, 6)
+        ]
+        
+        page = self.manager.get_transactions_before(added[3].date, added[3].id, limit=2)
+        assert page == [added[2], added[1]]
+    
+    def test_get_transactions_after(self):
+        """Test tailing forwards from a (date, id) position, per account too"""
+        added = [
+            self.manager.add_transaction(day % 2 + 1, Decimal('10'), TransactionType.EXPENSE,
+                                         date=datetime(2024, 1, day))
+            for day in range(1, 6)
+        ]
+        
+        assert self.manager.get_transactions_after(added[1].date, added[1].id, 2) == added[2:4]
+        assert self.manager.get_transactions_after(added[0].date, added[0].id,
+                                                   account_id=2) == [added[2], added[4]]
+        assert self.manager.get_transactions_before(added[4].date, added[4].id,
+                                                    account_id=2) == [added[2], added[0]]
+        assert self.manager.get_transactions_after(added[4].date, added[4].id) == []
+        assert self.manager.get_transactions_after(added[0].date, 0, account_id=9) == []
+    
+    def test_get_transactions_by_date_range(self):
+        """Test filtering transactions by inclusive date range"""
+        for day in (5, 1, 20, 10):
+            self.manager.add_transaction(1, Decimal('10'), TransactionType.EXPENSE,
+                                         date=datetime(2024, 1, day))
+        
+        result = self.manager.get_transactions_by_date_range(datetime(2024, 1, 5),
+                                                             datetime(2024, 1, 10))
+        assert [t.date.day for t in result] == [5, 10]
+    
+    def test_get_account_transactions_page(self):
+        """Test paging an account's history from the per-account index"""
+        added = [
+            self.manager.add_transaction(1, Decimal('10'), TransactionType.EXPENSE,
+                                         date=datetime(2024, 1, day))
+            for day in range(1, 6)
+        ]
+        self.manager.add_transaction(2, Decimal('10'), TransactionType.INCOME,
+                                     date=datetime(2024, 1, 31))
+        
+        assert self.manager.get_account_transactions_page(1, limit=2) == [added[4], added[3]]
+        assert self.manager.get_account_transactions_page(1, limit=2, offset=4) == [added[0]]
+        assert self.manager.get_account_transactions_page(3) == []
+        assert self.manager.count_transactions_by_account(1) == 5
+    
+    def test_add_transactions_batch(self):
+        """Test a batch gets contiguous IDs and is merged into the indexes and rollups"""
+        self.manager.add_transaction(1, Decimal('10'), TransactionType.EXPENSE,
+                                     date=datetime(2024, 1, 10))
+        added = self.manager.add_transactions([
+            (1, Decimal('5'), TransactionType.EXPENSE, "Late", datetime(2024, 1, 20), "Food"),
+            (2, Decimal('7.25'), TransactionType.INCOME, "", datetime(2024, 1, 1), ""),
+            (1, Decimal('3'), TransactionType.EXPENSE, "Early", datetime(2024, 1, 5), "Food"),
+        ])
+        
+        assert [t.id for t in added] == [2, 3, 4]
+        assert self.manager.get_transaction_by_id(3) == added[1]
+        assert [t.id for t in self.manager.get_transactions_by_date_range()] == [3, 4, 1, 2]
+        assert [t.id for t in self.manager.get_transactions_by_account(1)] == [4, 1, 2]
+        assert self.manager.calculate_category_totals() == {"Food": Decimal('8'), "": Decimal('10')}
+        assert self.manager.add_transaction(2, Decimal('1'), TransactionType.EXPENSE).id == 5
+    
+    def test_add_transactions_rejects_whole_batch(self):
+        """Test an invalid record leaves the manager unchanged"""
+        with pytest.raises(ValueError):
+            self.manager.add_transactions([
+                (1, Decimal('5'), TransactionType.EXPENSE, "", datetime(2024, 1, 1), ""),
+                (1, Decimal('0'), TransactionType.EXPENSE, "", datetime(2024, 1, 2), ""),
+            ])
+        assert len(self.manager.transactions) == 0
+        assert self.manager.add_transaction(1, Decimal('1'), TransactionType.EXPENSE).id == 1
+    
+    def test_export_transactions_in_chunks(self):
+        """Test exports are filtered, chunked and see the rows present when they start"""
+        for day in (5, 1, 20, 10, 15):
+            self.manager.add_transaction(1, Decimal('10'), TransactionType.EXPENSE,
+                                         date=datetime(2024, 1, day))
+        self.manager.add_transaction(2, Decimal('10'), TransactionType.EXPENSE,
+                                     date=datetime(2024, 1, 12))
+        
+        chunks = self.manager.export_transactions(1, datetime(2024, 1, 2), chunk_size=2)
+        first = next(chunks)
+        self.manager.add_transaction(1, Decimal('1'), TransactionType.EXPENSE,
+                                     date=datetime(2024, 1, 3))
+        self.manager.add_transaction(1, Decimal('1'), TransactionType.EXPENSE,
+                                     date=datetime(2024, 1, 25))
+        self.manager.delete_transaction(5)
+        rest = list(chunks)
+        
+        assert [t.date.day for t in first] == [5, 10]
+        assert [[t.date.day for t in chunk] for chunk in rest] == [[20]]
+        assert [t.date.day for chunk in self.manager.export_transactions(1, chunk_size=10)
+                for t in chunk] == [1, 3, 5, 10, 20, 25]
+        assert list(self.manager.export_transactions(3)) == []
+    
+    def _add_sample_month_data(self):
+        """Add transactions spread over two months and categories"""
+        self.manager.add_transaction(1, Decimal('3000'), TransactionType.INCOME, "Salary",
+                                     date=datetime(2024, 1, 1), category="Salary")
+        self.manager.add_transaction(1, Decimal('120.50'), TransactionType.EXPENSE, "Market",
+                                     date=datetime(2024, 1, 5), category="Food")
+        self.manager.add_transaction(2, Decimal('30'), TransactionType.EXPENSE, "Cafe",
+                                     date=datetime(2024, 1, 31, 23, 59), category="Food")
+        self.manager.add_transaction(1, Decimal('1200'), TransactionType.EXPENSE, "Rent",
+                                     date=datetime(2024, 2, 1), category="Housing")
+        self.manager.add_transaction(1, Decimal('200'), TransactionType.TRANSFER, "Savings",
+                                     date=datetime(2024, 2, 2))
+    
+    def test_calculate_monthly_summary(self):
+        """Test monthly income/expense summary"""
+        self._add_sample_month_data()
+        
+        january, february = self.manager.calculate_monthly_summary()
+        assert january.month == "2024-01"
+        assert january.income == Decimal('3000')
+        assert january.expense == Decimal('150.50')
+        assert january.net == Decimal('2849.50')
+        assert january.transaction_count == 3
+        assert february.month == "2024-02"
+        assert february.expense == Decimal('1200')
+        assert february.transfer == Decimal('200')
+    
+    def test_calculate_monthly_summary_filtered(self):
+        """Test monthly summary filtered by account and date range"""
+        self._add_sample_month_data()
+        
+        summary = self.manager.calculate_monthly_summary(account_id=1,
+                                                         end_date=datetime(2024, 1, 31))
+        assert len(summary) == 1
+        assert summary[0].expense == Decimal('120.50')
+        assert self.manager.calculate_monthly_summary(account_id=99) == []
+    
+    def test_calculate_category_totals(self):
+        """Test totals per category"""
+        self._add_sample_month_data()
+        
+        assert self.manager.calculate_category_totals() == {
+            "Food": Decimal('150.50'),
+            "Housing": Decimal('1200'),
+        }
+        assert self.manager.calculate_category_totals(TransactionType.INCOME) == {
+            "Salary": Decimal('3000')
+        }
+    
+    def test_calculate_monthly_summary_partial_month_range(self):
+        """Test ranges inside one month are answered from the edge rows"""
+        self._add_sample_month_data()
+        
+        summary = self.manager.calculate_monthly_summary(start_date=datetime(2024, 1, 2),
+                                                         end_date=datetime(2024, 1, 31, 12))
+        assert len(summary) == 1
+        assert summary[0].income == Decimal('0')
+        assert summary[0].expense == Decimal('120.50')
+        assert summary[0].transaction_count == 1
+        assert self.manager.calculate_category_totals(
+            start_date=datetime(2024, 1, 15), end_date=datetime(2024, 2, 1)) == {
+            "Food": Decimal('30'), "Housing": Decimal('1200')}
+    
+    def test_calculate_daily_summary(self):
+        """Test daily totals from the day rollups"""
+        self._add_sample_month_data()
+        
+        days = self.manager.calculate_daily_summary(account_id=1, start_day=date(2024, 1, 2))
+        assert [d.day for d in days] == [date(2024, 1, 5), date(2024, 2, 1), date(2024, 2, 2)]
+        assert days[0].expense == Decimal('120.50')
+        assert days[2].transfer == Decimal('200')
+    
+    def test_rebuild_rollups_matches_incremental(self):
+        """Test rebuilding the rollups from storage gives the same reports"""
+        self._add_sample_month_data()
+        monthly = self.manager.calculate_monthly_summary()
+        daily = self.manager.calculate_daily_summary()
+        categories = self.manager.calculate_category_totals()
+        
+        self.manager.rebuild_rollups()
+        assert self.manager.calculate_monthly_summary() == monthly
+        assert self.manager.calculate_daily_summary() == daily
+        assert self.manager.calculate_category_totals() == categories
+    
+    def _add_descriptions(self):
+        for account_id, transaction_type, description, day in [
+            (1, TransactionType.EXPENSE, "Groceries at Corner Market", 3),
+            (2, TransactionType.EXPENSE, "grocery delivery", 4),
+            (1, TransactionType.INCOME, "Salary March", 5),
+            (1, TransactionType.EXPENSE, "Market groceries, fruit", 6),
+            (1, TransactionType.EXPENSE, "", 7),
+        ]:
+            self.manager.add_transaction(account_id, Decimal('10'), transaction_type,
+                                         description, datetime(2024, 3, day))
+    
+    def test_search_transactions(self):
+        """Test case-insensitive word prefix search, newest recorded first"""
+        self._add_descriptions()
+        assert [t.id for t in self.manager.search_transactions("groc")] == [4, 2, 1]
+        assert [t.id for t in self.manager.search_transactions("GROCERIES market")] == [4, 1]
+        assert [t.id for t in self.manager.search_transactions("market salary")] == []
+        assert self.manager.search_transactions("") == []
+        assert [t.id for t in self.manager.search_transactions("groc", limit=2)] == [4, 2]
+        assert [t.id for t in self.manager.search_transactions("groc", before_id=2)] == [1]
+    
+    def test_search_transactions_filtered(self):
+        """Test search combined with account, type and date filters"""
+        self._add_descriptions()
+        assert [t.id for t in self.manager.search_transactions("groc", account_id=1)] == [4, 1]
+        assert [t.id for t in self.manager.search_transactions(
+            "m", transaction_type=TransactionType.INCOME)] == [3]
+        assert [t.id for t in self.manager.search_transactions(
+            "groc", start_date=datetime(2024, 3, 4), end_date=datetime(2024, 3, 5))] == [2]
+    
+    def test_update_transaction(self):
+        """Test updates move the row in the indexes, rollups and search"""
+        self._add_descriptions()
+        updated = self.manager.update_transaction(
+            1, account_id=2, description="Hardware store", date=datetime(2024, 4, 1))
+        assert (updated.id, updated.account_id, updated.amount) == (1, 2, Decimal('10'))
+        assert self.manager.get_transaction_by_id(1) == updated
+        assert [t.id for t in self.manager.search_transactions("groc")] == [4, 2]
+        assert [t.id for t in self.manager.search_transactions("hard")] == [1]
+        assert [t.id for t in self.manager.get_transactions_by_account(2)] == [2, 1]
+        assert [m.month for m in self.manager.calculate_monthly_summary(account_id=2)] == \
+            ["2024-03", "2024-04"]
+        assert self.manager.get_recent_transactions(1)[0].id == 1
+        
+        with pytest.raises(ValueError):
+            self.manager.update_transaction(1, amount=Decimal('-1'))
+        with pytest.raises(ValueError):
+            self.manager.update_transaction(1, id=9)
+        with pytest.raises(ValueError):
+            self.manager.update_transaction(99, description="x")
+        assert self.manager.get_transaction_by_id(1) == updated
+    
+    def test_delete_transaction(self):
+        """Test deleted rows leave every index and the rollups"""
+        self._add_descriptions()
+        assert self.manager.delete_transaction(4)
+        assert not self.manager.delete_transaction(4)
+        assert self.manager.get_transaction_by_id(4) is None
+        assert [t.id for t in self.manager.search_transactions("groc")] == [2, 1]
+        assert [t.id for t in self.manager.get_transactions_by_account(1)] == [1, 3, 5]
+        assert len(self.manager.transactions) == 4
+        assert self.manager.calculate_monthly_summary(account_id=1)[0].expense == Decimal('20')
+        assert self.manager.add_transaction(1, Decimal('1'), TransactionType.EXPENSE).id == 6
+    
+    def _add_query_data(self):
+        for i in range(40):
+            self.manager.add_transaction(
+                1 + i % 2, Decimal(10 + i),
+                TransactionType.INCOME if i % 4 == 0 else TransactionType.EXPENSE,
+                "Coffee beans" if i % 10 == 3 else f"Purchase {i}",
+                datetime(2024, 1, 1 + i % 28, i % 24), "Food" if i % 3 == 0 else "Misc")
+    
+    def _expected(self, query):
+        rows = [t for t in self.manager.get_transactions_by_date_range()
+                if query.matches(t) and (query.text is None or "coffee" in t.description.lower())]
+        return [t.id for t in sorted(rows, key=lambda t: (t.date, t.id), reverse=True)]
+    
+    @pytest.mark.parametrize("query", [
+        TransactionQuery(),
+        TransactionQuery(account_id=2, transaction_type=TransactionType.EXPENSE),
+        TransactionQuery(start_date=datetime(2024, 1, 5), end_date=datetime(2024, 1, 20),
+                         category="Food"),
+        TransactionQuery(min_amount=Decimal('20.5'), max_amount=Decimal('30')),
+        TransactionQuery(text="cof", account_id=2),
+        TransactionQuery(text="coffee", transaction_type=TransactionType.INCOME),
+        TransactionQuery(account_id=5),
+        TransactionQuery(category="Unknown"),
+    ])
+    def test_query_transactions(self, query):
+        """Test every filter combination matches a scan of all rows"""
+        self._add_query_data()
+        assert [t.id for t in self.manager.query_transactions(query, limit=None)] == \
+            self._expected(query)
+    
+    def test_query_transactions_pages(self):
+        """Test paging with before continues below the last (date, id)"""
+        self._add_query_data()
+        query = TransactionQuery(transaction_type=TransactionType.EXPENSE)
+        pages, before = [], None
+        while True:
+            page = self.manager.query_transactions(query, limit=7, before=before)
+            if not page:
+                break
+            pages.extend(t.id for t in page)
+            before = (page[-1].date, page[-1].id)
+        assert pages == self._expected(query)
+        text_page = self.manager.query_transactions(TransactionQuery(text="coffee"), limit=2)
+        assert [t.id for t in self.manager.query_transactions(
+            TransactionQuery(text="coffee"), before=(text_page[-1].date, text_page[-1].id))] == \
+            self._expected(TransactionQuery(text="coffee"))[2:]
+    
+    def test_explain_query(self):
+        """Test the planner picks the smaller candidate source"""
+        self._add_query_data()
+        plan = self.manager.explain_query(TransactionQuery(account_id=1, min_amount=Decimal('20')))
+        assert (plan.driver, plan.candidates, plan.filters) == ("account", 20, ["amount"])
+        plan = self.manager.explain_query(TransactionQuery(
+            account_id=1, transaction_type=TransactionType.INCOME))
+        assert (plan.driver, plan.candidates, plan.filters, plan.bitmaps) == \
+            ("bitmap", 10, ["account"], ["transaction_type"])
+        plan = self.manager.explain_query(TransactionQuery(text="coffee", category="Food"))
+        assert (plan.driver, plan.candidates, plan.filters, plan.bitmaps) == \
+            ("text", 2, [], ["category"])
+        plan = self.manager.explain_query(TransactionQuery(text="purchase"), limit=5)
+        assert (plan.driver, plan.filters) == ("time", ["text"])
+        assert self.manager.explain_query(TransactionQuery(text="tea")).driver == "none"
+    
+    def test_query_by_account_type(self):
+        """Test the type, category and account type bitmaps answer queries together"""
+        self._add_query_data()
+        self.manager.add_transaction(3, Decimal('5'), TransactionType.EXPENSE, category="Food")
+        self.manager.set_account_type(1, AccountType.CHECKING)
+        self.manager.set_account_type(3, AccountType.CHECKING)
+        self.manager.set_account_type(2, AccountType.SAVINGS)
+        self.manager.delete_transaction(1)
+        self.manager.update_transaction(4, category="Food")
+        self.manager.add_transaction(1, Decimal('7'), TransactionType.EXPENSE, category="Food")
+        
+        query = TransactionQuery(transaction_type=TransactionType.EXPENSE, category="Food",
+                                 account_type=AccountType.CHECKING)
+        expected = self._expected(replace(query, account_type=None))
+        expected = [tid for tid in expected
+                    if self.manager.get_transaction_by_id(tid).account_id in (1, 3)]
+        assert len(expected) == 5
+        assert [t.id for t in self.manager.query_transactions(query, limit=None)] == expected
+        assert [t.id for t in self.manager.query_transactions(query, limit=3)] == expected[:3]
+        assert sorted(self.manager.explain_query(query).bitmaps) == \
+            ["account_type", "category", "transaction_type"]
+        assert self.manager.query_transactions(
+            TransactionQuery(account_type=AccountType.CREDIT)) == []
+        memory = self.manager.bitmap_memory()
+        assert set(memory) == {"transaction_type", "category", "account_type"}
+        assert all(size > 0 for size in memory.values())
+    
+    def test_track_account_types(self):
+        """Test existing and new accounts are indexed under their type"""
+        accounts = AccountManager()
+        accounts.create_account("Checking", AccountType.CHECKING)
+        self.manager.add_transaction(1, Decimal('5'), TransactionType.EXPENSE)
+        self.manager.add_transaction(2, Decimal('6'), TransactionType.EXPENSE)
+        self.manager.track_account_types(accounts)
+        accounts.create_account("Savings", AccountType.SAVINGS)
+        self.manager.add_transaction(2, Decimal('7'), TransactionType.INCOME)
+        savings = self.manager.query_transactions(
+            TransactionQuery(account_type=AccountType.SAVINGS))
+        assert [t.id for t in savings] == [3, 2]
+    
+    def test_get_transactions_by_type(self):
+        """Test filtering by type returns oldest first"""
+        self._add_query_data()
+        income = self.manager.get_transactions_by_type(TransactionType.INCOME)
+        assert len(income) == 10
+        assert all(t.transaction_type == TransactionType.INCOME for t in income)
+        assert [(t.date, t.id) for t in income] == sorted((t.date, t.id) for t in income)
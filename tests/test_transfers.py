@@ -0,0 +1,292 @@
+"""
+pytest tests for transfers between accounts
+"""
+
+import sys
+import os
+import threading
+from decimal import Decimal
+from datetime import datetime
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from account import AccountManager, AccountType
+from budget import BudgetManager
+from journal import ManagerJournal
+from ledger import BalanceLedger, BalanceReconciler
+from sqlite_repository import SqliteRepository, SqliteTransactionManager
+from transaction import TransactionManager, TransactionQuery, TransactionType
+from transfers import Transfer, TransferService
+from wal import Durability, WriteAheadLog, read_records
+
+
+def open_accounts(account_manager, balances):
+    for i, balance in enumerate(balances):
+        account_manager.create_account(f"Account {i}", AccountType.CHECKING, Decimal(balance))
+
+
+class TestTransferService:
+    """Test cases for TransferService"""
+
+    def setup_method(self):
+        """Setup before each test"""
+        self.accounts = AccountManager()
+        self.transactions = TransactionManager()
+        self.service = TransferService(self.accounts, self.transactions)
+        open_accounts(self.accounts, ['100', '50', '0'])
+
+    def balances(self):
+        return [a.balance for a in self.accounts.accounts]
+
+    def test_transfer(self):
+        """Test a transfer moves the balance and writes both legs"""
+        result = self.service.transfer(1, 2, Decimal('30.25'), date=datetime(2024, 3, 1))
+        assert self.balances() == [Decimal('69.75'), Decimal('80.25'), Decimal('0')]
+        assert (result.from_balance, result.to_balance) == (Decimal('69.75'), Decimal('80.25'))
+        assert (result.debit.id, result.credit.id) == (1, 2)
+        assert (result.debit.account_id, result.credit.account_id) == (1, 2)
+        assert (result.debit.amount, result.credit.amount) == (Decimal('-30.25'), Decimal('30.25'))
+        assert {result.debit.transaction_type, result.credit.transaction_type} == \
+            {TransactionType.TRANSFER}
+        assert result.debit.description == "Transfer to account 2"
+        assert self.transactions.calculate_monthly_summary(account_id=2)[0].transfer == \
+            Decimal('30.25')
+
+    @pytest.mark.parametrize("rebuild", [False, True])
+    def test_transfer_reports_and_filters(self, rebuild):
+        """Test reports show both directions and amount filters match both legs"""
+        self.service.transfer(1, 2, Decimal('30'), category="Savings", date=datetime(2024, 3, 1))
+        self.service.post(1, Decimal('5'), TransactionType.EXPENSE)
+        if rebuild:
+            self.transactions.rebuild_rollups()
+        summary, = self.transactions.calculate_monthly_summary(
+            start_date=datetime(2024, 3, 1), end_date=datetime(2024, 3, 31))
+        assert (summary.transfer, summary.transfer_in, summary.transfer_out) == \
+            (Decimal('0'), Decimal('30'), Decimal('30'))
+        summary, = self.transactions.calculate_monthly_summary(account_id=1,
+                                                               end_date=datetime(2024, 3, 31))
+        assert (summary.transfer, summary.transfer_in, summary.transfer_out) == \
+            (Decimal('-30'), Decimal('0'), Decimal('30'))
+        day, = self.transactions.calculate_daily_summary(account_id=2)
+        assert (day.transfer_in, day.transfer_out) == (Decimal('30'), Decimal('0'))
+        assert self.transactions.calculate_category_totals(TransactionType.TRANSFER) == \
+            {"Savings": Decimal('0')}
+        legs = self.transactions.query_transactions(TransactionQuery(
+            transaction_type=TransactionType.TRANSFER, min_amount=Decimal('30'),
+            max_amount=Decimal('30')))
+        assert sorted(t.amount for t in legs) == [Decimal('-30'), Decimal('30')]
+
+    @pytest.mark.parametrize("from_id, to_id, amount", [
+        (1, 2, Decimal('100.01')),   # Insufficient funds
+        (1, 1, Decimal('1')),        # Same account
+        (1, 9, Decimal('1')),        # Unknown account
+        (1, 2, Decimal('0')),
+        (1, 2, Decimal('0.00001')),  # More places than a transaction stores
+    ])
+    def test_refused_transfer_changes_nothing(self, from_id, to_id, amount):
+        """Test a refused transfer leaves balances and transactions untouched"""
+        with pytest.raises(ValueError):
+            self.service.transfer(from_id, to_id, amount)
+        assert self.balances() == [Decimal('100'), Decimal('50'), Decimal('0')]
+        assert len(self.transactions.transactions) == 0
+
+    def test_transfer_batch(self):
+        """Test batches settle in order and skip refused transfers"""
+        results = self.service.transfer_batch([
+            Transfer(1, 3, Decimal('80')),
+            Transfer(3, 2, Decimal('100')),   # Only 80 arrived so far
+            Transfer(3, 2, Decimal('80')),
+            Transfer(2, 7, Decimal('1')),
+            Transfer(2, 1, Decimal('-5')),
+        ])
+        assert [r.error for r in results] == [None, "Insufficient funds", None,
+                                              "Account 7 not found",
+                                              "Transfer amount must be positive"]
+        assert self.balances() == [Decimal('20'), Decimal('130'), Decimal('0')]
+        assert [(r.debit.id, r.credit.id) for r in results if r.ok] == [(1, 2), (3, 4)]
+        assert len(self.transactions.transactions) == 4
+
+    def drift(self):
+        return BalanceReconciler(BalanceLedger(self.accounts, self.transactions)).scan().drift
+
+    def test_post(self):
+        """Test incomes and expenses move the balance with their transaction"""
+        income, balance = self.service.post(1, Decimal('50'), TransactionType.INCOME, "Salary")
+        assert (income.account_id, income.amount, balance) == (1, Decimal('50'), Decimal('150'))
+        expense, balance = self.service.post(1, Decimal('20'), TransactionType.EXPENSE,
+                                             category="Food")
+        assert (expense.id, balance) == (2, Decimal('130'))
+        assert self.balances() == [Decimal('130'), Decimal('50'), Decimal('0')]
+        assert self.drift() == []
+
+    @pytest.mark.parametrize("account_id, amount, transaction_type", [
+        (1, Decimal('100.01'), TransactionType.EXPENSE),   # Insufficient funds
+        (9, Decimal('1'), TransactionType.INCOME),         # Unknown account
+        (1, Decimal('-5'), TransactionType.INCOME),
+        (1, Decimal('-5'), TransactionType.TRANSFER),      # Only transfers write legs
+        (1, Decimal('5'), TransactionType.TRANSFER),
+        (1, Decimal('0.00001'), TransactionType.INCOME),
+    ])
+    def test_refused_post_changes_nothing(self, account_id, amount, transaction_type):
+        """Test a refused transaction leaves balances and transactions untouched"""
+        with pytest.raises(ValueError):
+            self.service.post(account_id, amount, transaction_type)
+        assert self.balances() == [Decimal('100'), Decimal('50'), Decimal('0')]
+        assert len(self.transactions.transactions) == 0
+
+    def test_post_batch(self):
+        """Test batches post in order and skip records the posting rules refuse"""
+        date = datetime(2024, 3, 1)
+        added, errors = self.service.post_batch([
+            (3, Decimal('40'), TransactionType.EXPENSE, "", date, ""),   # Nothing there yet
+            (3, Decimal('30'), TransactionType.INCOME, "", date, ""),
+            (3, Decimal('30'), TransactionType.EXPENSE, "", date, ""),
+            (1, Decimal('5'), TransactionType.TRANSFER, "", date, ""),
+            (9, Decimal('5'), TransactionType.INCOME, "", date, ""),
+        ])
+        assert errors == ["Insufficient funds", None, None,
+                          "Transfer transactions are recorded by transfers between two accounts",
+                          "Account 9 not found"]
+        assert [t.id for t in added] == [1, 2]
+        assert self.balances() == [Decimal('100'), Decimal('50'), Decimal('0')]
+        assert self.drift() == []
+
+    def test_revise(self):
+        """Test changing a transaction moves balances by the difference it makes"""
+        expense, _ = self.service.post(1, Decimal('20'), TransactionType.EXPENSE)
+        self.service.revise(expense.id, amount=Decimal('30'), description="Groceries")
+        assert self.balances() == [Decimal('70'), Decimal('50'), Decimal('0')]
+        self.service.revise(expense.id, account_id=2, transaction_type=TransactionType.INCOME)
+        assert self.balances() == [Decimal('100'), Decimal('80'), Decimal('0')]
+        assert self.transactions.get_transaction_by_id(expense.id).description == "Groceries"
+        with pytest.raises(ValueError, match="Insufficient funds"):
+            self.service.revise(expense.id, transaction_type=TransactionType.EXPENSE,
+                                amount=Decimal('200'))
+        assert self.transactions.get_transaction_by_id(expense.id).amount == Decimal('30')
+        assert self.drift() == []
+
+    def test_transfer_legs_keep_amounts(self):
+        """Test transfer legs only change fields that move no balance, and stay paired"""
+        result = self.service.transfer(1, 2, Decimal('30'))
+        self.service.revise(result.debit.id, description="Rent share")
+        for changes in (dict(amount=Decimal('-40')), dict(account_id=3),
+                        dict(transaction_type=TransactionType.EXPENSE)):
+            with pytest.raises(ValueError, match="Transfer legs"):
+                self.service.revise(result.debit.id, **changes)
+        with pytest.raises(ValueError, match="Transfer legs"):
+            self.service.remove(result.credit.id)
+        assert len(self.transactions.transactions) == 2
+        assert self.drift() == []
+
+    def test_remove(self):
+        """Test deleting a transaction undoes its balance change"""
+        income, _ = self.service.post(3, Decimal('25'), TransactionType.INCOME)
+        expense, _ = self.service.post(3, Decimal('20'), TransactionType.EXPENSE)
+        with pytest.raises(ValueError, match="Insufficient funds"):
+            self.service.remove(income.id)   # The expense spent it
+        assert self.service.remove(expense.id) is True
+        assert self.service.remove(expense.id) is False
+        assert self.balances() == [Decimal('100'), Decimal('50'), Decimal('25')]
+        assert self.drift() == []
+
+    def test_opposite_transfers_do_not_deadlock(self):
+        """Test concurrent transfers in both directions finish and conserve money"""
+        def worker(from_id, to_id):
+            for _ in range(300):
+                try:
+                    self.service.transfer(from_id, to_id, Decimal('1'))
+                except ValueError:
+                    pass
+
+        workers = [threading.Thread(target=worker, args=pair)
+                   for pair in [(1, 2), (2, 1), (2, 3), (3, 1)] * 2]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join(timeout=30)
+        assert not any(thread.is_alive() for thread in workers)
+        assert sum(self.balances()) == Decimal('150')
+        assert len(self.transactions.transactions) % 2 == 0
+
+
+class TestTransferStorage:
+    """Transfers are persisted as one unit"""
+
+    def test_journal_logs_one_record(self, tmp_path):
+        """Test a transfer is one batch record and replays to the same state"""
+        def open_journal():
+            return ManagerJournal(WriteAheadLog(str(tmp_path), Durability.NONE),
+                                  AccountManager(), TransactionManager(), BudgetManager())
+
+        journal = open_journal()
+        journal.attach()
+        open_accounts(journal.account_manager, ['100', '50'])
+        service = TransferService(journal.account_manager, journal.transaction_manager,
+                                  journal.atomic)
+        service.transfer(1, 2, Decimal('40'))
+        service.transfer_batch([Transfer(2, 1, Decimal('5')), Transfer(2, 1, Decimal('5'))])
+        journal.wal.close()
+
+        records = list(read_records(str(tmp_path)))
+        assert [r["op"] for r in records] == ["account.create", "account.create",
+                                              "batch", "batch"]
+        assert [r["op"] for r in records[2]["records"]] == \
+            ["account.balance", "account.balance", "transaction.add", "transaction.add"]
+
+        replayed = open_journal()
+        replayed.replay()
+        replayed.wal.close()
+        assert [a.balance for a in replayed.account_manager.accounts] == \
+            [Decimal('70'), Decimal('80')]
+        assert len(replayed.transaction_manager.transactions) == 6
+        assert replayed.last_applied_lsn == 4
+
+    def test_journal_waits_after_locks(self, tmp_path):
+        """Test a durable journal waits for the batch's fsync once the locks are released"""
+        journal = ManagerJournal(WriteAheadLog(str(tmp_path), Durability.ALWAYS),
+                                 AccountManager(), TransactionManager(), BudgetManager())
+        journal.attach()
+        open_accounts(journal.account_manager, ['100', '50'])
+        service = TransferService(journal.account_manager, journal.transaction_manager,
+                                  journal.atomic)
+        wait_durable = journal.wal.wait_durable
+        waits = []
+
+        def probe(lsn):
+            free = threading.Event()
+
+            def lock():
+                with journal.transaction_manager.exclusive():
+                    free.set()
+
+            threading.Thread(target=lock, daemon=True).start()
+            waits.append((lsn, free.wait(timeout=5)))
+            wait_durable(lsn)
+
+        journal.wal.wait_durable = probe
+        service.transfer(1, 2, Decimal('40'))
+        service.post(1, Decimal('5'), TransactionType.EXPENSE)
+        journal.wal.close()
+        assert waits == [(3, True), (4, True)]
+
+    def test_sqlite_commits_one_unit(self, tmp_path):
+        """Test transfer writes reach SQLite together and survive a reopen"""
+        path = str(tmp_path / "finance.db")
+        repository = SqliteRepository(path)
+        accounts, transactions = AccountManager(), SqliteTransactionManager(repository)
+        repository.attach(accounts, BudgetManager())
+        open_accounts(accounts, ['100', '50'])
+        service = TransferService(accounts, transactions, repository.atomic)
+        service.transfer(1, 2, Decimal('40'))
+        repository.close()
+
+        repository = SqliteRepository(path)
+        accounts, transactions = AccountManager(), SqliteTransactionManager(repository)
+        repository.load(accounts, BudgetManager())
+        transactions.load()
+        assert [a.balance for a in accounts.accounts] == [Decimal('60'), Decimal('90')]
+        assert [a.opening_balance for a in accounts.accounts] == [Decimal('100'), Decimal('50')]
+        assert [t.account_id for t in transactions.transactions] == [1, 2]
+        repository.close()
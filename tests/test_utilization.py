@@ -0,0 +1,77 @@
+"""
+pytest tests for the budget utilization module
+"""
+
+import pytest
+from decimal import Decimal
+from datetime import datetime, date
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from budget import BudgetManager, BudgetPeriod, period_bounds
+from transaction import TransactionManager, TransactionType
+from utilization import BudgetUtilizationService
+
+
+class TestPeriodBounds:
+    """Tests for calendar period bounds"""
+    
+    @pytest.mark.parametrize("period, as_of, expected", [
+        (BudgetPeriod.MONTHLY, date(2024, 2, 10), (date(2024, 2, 1), date(2024, 2, 29))),
+        (BudgetPeriod.QUARTERLY, date(2024, 11, 30), (date(2024, 10, 1), date(2024, 12, 31))),
+        (BudgetPeriod.YEARLY, date(2024, 6, 1), (date(2024, 1, 1), date(2024, 12, 31))),
+    ])
+    def test_period_bounds(self, period, as_of, expected):
+        """Test bounds of the calendar period containing a date"""
+        assert period_bounds(period, as_of) == expected
+
+
+class TestBudgetUtilizationService:
+    """Tests for BudgetUtilizationService"""
+    
+    def setup_method(self):
+        """Setup before each test"""
+        self.budgets = BudgetManager()
+        self.transactions = TransactionManager()
+        self.service = BudgetUtilizationService(self.budgets, self.transactions)
+        for month, amount in ((1, '300'), (2, '150'), (4, '75')):
+            self.transactions.add_transaction(1, Decimal(amount), TransactionType.EXPENSE,
+                                              date=datetime(2024, month, 10), category="Food")
+        self.transactions.add_transaction(2, Decimal('999'), TransactionType.INCOME,
+                                          date=datetime(2024, 2, 1), category="Food")
+        self.transactions.add_transaction(1, Decimal('40'), TransactionType.EXPENSE,
+                                          date=datetime(2024, 2, 11), category="Fun")
+    
+    def test_monthly_utilization(self):
+        """Test monthly budget only counts that month's expenses in its category"""
+        budget = self.budgets.create_budget("Groceries", "Food", Decimal('200'))
+        
+        result = self.service.calculate_budget_utilization(budget.id, as_of=date(2024, 2, 20))
+        assert result.spent == Decimal('150')
+        assert result.remaining == Decimal('50')
+        assert result.utilization == Decimal('75.00')
+        assert not result.is_over_budget
+    
+    def test_quarterly_over_budget(self):
+        """Test quarterly budget sums three months of spend"""
+        budget = self.budgets.create_budget("Food Q", "Food", Decimal('400'), BudgetPeriod.QUARTERLY)
+        
+        result = self.service.calculate_budget_utilization(budget.id, as_of=date(2024, 3, 31))
+        assert result.spent == Decimal('450')
+        assert result.is_over_budget
+        assert (result.period_start, result.period_end) == (date(2024, 1, 1), date(2024, 3, 31))
+    
+    def test_missing_budget(self):
+        """Test utilization of a non-existent budget"""
+        assert self.service.calculate_budget_utilization(999) is None
+    
+    def test_compare_actual_vs_budget_skips_inactive(self):
+        """Test bulk comparison covers active budgets only"""
+        self.budgets.create_budget("Groceries", "Food", Decimal('200'))
+        inactive = self.budgets.create_budget("Fun", "Fun", Decimal('100'))
+        inactive.is_active = False
+        
+        results = self.service.compare_actual_vs_budget(as_of=date(2024, 4, 1))
+        assert [(r.name, r.spent) for r in results] == [("Groceries", Decimal('75'))]
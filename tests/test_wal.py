@@ -0,0 +1,175 @@
+"""
+pytest tests for the write-ahead log and mutation journal modules
+"""
+
+import threading
+from decimal import Decimal
+from datetime import datetime
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from account import AccountManager, AccountType
+from budget import BudgetManager, BudgetPeriod
+from journal import ManagerJournal
+from transaction import TransactionManager, TransactionType
+from wal import Durability, WriteAheadLog, list_segments, read_records
+
+
+class TestWriteAheadLog:
+    """Tests for WriteAheadLog"""
+
+    def test_records_round_trip(self, tmp_path):
+        """Test appended records are read back in LSN order"""
+        wal = WriteAheadLog(str(tmp_path), Durability.ALWAYS)
+        assert wal.append({"op": "a", "n": 1}) == 1
+        assert wal.append({}) == 2
+        wal.close()
+
+        assert list(read_records(str(tmp_path))) == [{"lsn": 1, "op": "a", "n": 1}, {"lsn": 2}]
+        assert [r["lsn"] for r in read_records(str(tmp_path), after_lsn=1)] == [2]
+
+    def test_reopen_continues_lsn_in_new_segment(self, tmp_path):
+        """Test reopening continues numbering after the last record"""
+        wal = WriteAheadLog(str(tmp_path), Durability.NONE)
+        wal.append({"op": "a"})
+        wal.close()
+
+        wal = WriteAheadLog(str(tmp_path), Durability.NONE)
+        assert wal.append({"op": "b"}) == 2
+        wal.close()
+        assert len(list_segments(str(tmp_path))) == 2
+        assert [r["op"] for r in read_records(str(tmp_path))] == ["a", "b"]
+
+    def test_torn_tail_is_skipped(self, tmp_path):
+        """Test a partially written last record is ignored"""
+        wal = WriteAheadLog(str(tmp_path), Durability.ALWAYS)
+        wal.append({"op": "a"})
+        wal.close()
+        with open(list_segments(str(tmp_path))[0], 'ab') as f:
+            f.write(b'{"lsn":2,"op":')
+
+        assert [r["lsn"] for r in read_records(str(tmp_path))] == [1]
+        wal = WriteAheadLog(str(tmp_path), Durability.ALWAYS)
+        assert wal.append({"op": "b"}) == 2
+        wal.close()
+        assert [r["op"] for r in read_records(str(tmp_path))] == ["a", "b"]
+
+    def test_batch_flush(self, tmp_path):
+        """Test BATCH records are durable after flush"""
+        wal = WriteAheadLog(str(tmp_path), Durability.BATCH, flush_interval=60)
+        lsn = wal.append({"op": "a"})
+        wal.flush()
+        assert wal.durable_lsn == lsn
+        wal.close()
+
+    def test_concurrent_always_appends(self, tmp_path):
+        """Test concurrent ALWAYS writers each get a unique, durable LSN"""
+        wal = WriteAheadLog(str(tmp_path), Durability.ALWAYS)
+        lsns = []
+
+        def writer():
+            for i in range(50):
+                lsns.append(wal.append({"op": "w", "i": i}))
+
+        threads = [threading.Thread(target=writer) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert wal.durable_lsn >= max(lsns)
+        wal.close()
+
+        assert sorted(lsns) == list(range(1, 201))
+        assert [r["lsn"] for r in read_records(str(tmp_path))] == list(range(1, 201))
+
+    def test_roll_and_truncate(self, tmp_path):
+        """Test rolled segments are dropped once covered, keeping later records"""
+        wal = WriteAheadLog(str(tmp_path), Durability.NONE)
+        wal.append({"op": "a"})
+        wal.append({"op": "b"})
+        assert wal.roll() == 3
+        assert wal.roll() == 3  # Nothing appended since the last roll
+        wal.append({"op": "c"})
+
+        assert wal.truncate_before(1) == 0
+        assert wal.truncate_before(2) == 1
+        assert [r["op"] for r in read_records(str(tmp_path))] == ["c"]
+        wal.close()
+
+        wal = WriteAheadLog(str(tmp_path), Durability.NONE)
+        assert wal.append({"op": "d"}) == 4
+        wal.close()
+
+    def test_reopen_after_full_truncation(self, tmp_path):
+        """Test LSNs continue from the segment name when no records remain"""
+        wal = WriteAheadLog(str(tmp_path), Durability.NONE)
+        wal.append({"op": "a"})
+        wal.roll()
+        wal.truncate_before(1)
+        wal.close()
+
+        assert list(read_records(str(tmp_path))) == []
+        wal = WriteAheadLog(str(tmp_path), Durability.NONE)
+        assert wal.append({"op": "b"}) == 2
+        wal.close()
+
+    def test_append_after_close(self, tmp_path):
+        """Test appending to a closed log fails"""
+        wal = WriteAheadLog(str(tmp_path))
+        wal.close()
+
+        try:
+            wal.append({"op": "a"})
+            assert False, "Should raise ValueError"
+        except ValueError:
+            pass
+
+
+class TestManagerJournal:
+    """Tests for ManagerJournal"""
+
+    def _open(self, directory):
+        managers = (AccountManager(), TransactionManager(), BudgetManager())
+        journal = ManagerJournal(WriteAheadLog(directory, Durability.NONE), *managers)
+        journal.replay()
+        journal.attach()
+        return journal
+
+    def test_replay_restores_managers(self, tmp_path):
+        """Test every mutation is restored after reopening"""
+        journal = self._open(str(tmp_path))
+        checking = journal.account_manager.create_account("Checking", AccountType.CHECKING,
+                                                          Decimal('100'))
+        savings = journal.account_manager.create_account("Savings", AccountType.SAVINGS)
+        journal.account_manager.deposit(checking.id, Decimal('50.25'))
+        journal.account_manager.delete_account(savings.id)
+        journal.transaction_manager.add_transaction(
+            checking.id, Decimal('12.50'), TransactionType.EXPENSE, "Lunch",
+            datetime(2024, 5, 10, 12, 30), category="Food")
+        journal.budget_manager.create_budget("Food", "Food", Decimal('300'),
+                                             BudgetPeriod.QUARTERLY)
+        journal.wal.close()
+
+        restored = self._open(str(tmp_path))
+        account = restored.account_manager.get_account_by_name("Checking")
+        assert account.id == checking.id
+        assert account.balance == Decimal('150.25')
+        assert restored.account_manager.get_account_by_id(savings.id) is None
+
+        transaction = restored.transaction_manager.get_transaction_by_id(1)
+        assert transaction.amount == Decimal('12.50')
+        assert transaction.date == datetime(2024, 5, 10, 12, 30)
+        assert transaction.category == "Food"
+        assert restored.transaction_manager.calculate_category_totals()["Food"] == Decimal('12.50')
+
+        budget = restored.budget_manager.get_budget_by_id(1)
+        assert budget.period == BudgetPeriod.QUARTERLY
+
+        # New objects continue after the restored IDs and are logged once
+        assert restored.account_manager.create_account(
+            "Brokerage", AccountType.INVESTMENT).id == savings.id + 1
+        restored.wal.close()
+        assert restored.last_applied_lsn == 6
+        assert [r["op"] for r in read_records(str(tmp_path))].count("account.create") == 3